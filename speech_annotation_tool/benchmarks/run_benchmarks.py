@@ -0,0 +1,246 @@
+"""Headless benchmarks for the TextEditor and VideoPlayer hot paths (see the README)."""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QMouseEvent, QTextCursor
+from PyQt5.QtCore import Qt, QEvent, QPoint, QSize, PYQT_VERSION_STR, QT_VERSION_STR
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if TOOL_DIR not in sys.path:
+    sys.path.insert(0, TOOL_DIR)
+
+from widgets.text_editor import TextEditor
+from widgets.video_player import VideoPlayer
+from utils.timestamp import format_times
+from utils.simulated_backend import SimulatedBackend
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+WORDS = ("the", "speech", "segment", "annotation", "and", "a", "of", "to", "recording",
+         "speaker", "noise", "silence", "okay", "yes", "no", "then", "we", "said")
+
+
+def get_icon_path(icon_name):
+    return os.path.join(TOOL_DIR, "icons", icon_name)
+
+
+def make_transcript(num_lines, seed=0):
+    """Synthetic '[start]-[end] text' transcript with increasing timestamps."""
+    rng = random.Random(seed)
+    starts, ends = [], []
+    position = 0
+    for _ in range(num_lines):
+        position += rng.randint(100, 1500)
+        starts.append(position)
+        position += rng.randint(500, 8000)
+        ends.append(position)
+    start_strs, end_strs = format_times(starts), format_times(ends)
+    lines = []
+    for start, end in zip(start_strs, end_strs):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 14)))
+        lines.append(f"[{start}]-[{end}] {text}")
+    return "\n".join(lines) + "\n"
+
+
+def measure(func, runs):
+    """Calls func ``runs`` times, returning the wall times in milliseconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return times
+
+
+def summarize(times, per_call_count=1):
+    times = sorted(t / per_call_count for t in times)
+    p95_index = min(len(times) - 1, int(round(0.95 * (len(times) - 1))))
+    return {"runs": len(times), "median_ms": statistics.median(times),
+            "p95_ms": times[p95_index], "min_ms": times[0], "max_ms": times[-1]}
+
+
+# --- Benchmarks ---
+
+def bench_editor(app, size, work_dir, results):
+    runs = 1 if size >= 1000000 else 3
+    path = os.path.join(work_dir, f"transcript_{size}.txt")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(make_transcript(size))
+
+    player = SimulatedBackend()
+    player.load("simulated://media")
+    editor = TextEditor(player, get_icon_path, QSize(24, 24), auto_pause_enabled=False)
+    editor.resize(800, 900)
+    editor.show()
+    app.processEvents()
+
+    def load():
+        editor.load_transcript_content(path)
+        app.processEvents()
+    results[f"load_transcript[{size}]"] = summarize(measure(load, runs))
+
+    save_path = os.path.join(work_dir, f"saved_{size}.txt")
+    results[f"save_to_path[{size}]"] = summarize(
+        measure(lambda: editor._save_to_path(save_path), runs))
+
+    # Click-to-seek: a left click on the timestamp of a line mid-document
+    text_edit = editor.text_edit
+    cursor = QTextCursor(text_edit.document().findBlockByNumber(size // 2))
+    text_edit.setTextCursor(cursor)
+    text_edit.centerCursor()
+    app.processEvents()
+    click_point = text_edit.cursorRect(text_edit.textCursor()).center() + QPoint(4, 0)
+    seeks = []
+    text_edit.seekRequest.connect(seeks.append)
+    clicks = 200
+
+    def click():
+        for _ in range(clicks):
+            press = QMouseEvent(QEvent.MouseButtonPress, click_point, Qt.LeftButton,
+                                Qt.LeftButton, Qt.NoModifier)
+            text_edit.mousePressEvent(press)
+    results[f"click_to_seek[{size}]"] = summarize(measure(click, 5), clicks)
+    if not seeks:
+        print(f"Warning: click_to_seek[{size}] did not hit a timestamp", file=sys.stderr)
+
+    # Timestamp insertion (start/end pairs) at the end of the document
+    text_edit.moveCursor(QTextCursor.End)
+    player.play()
+    insertions = 200
+
+    def insert():
+        for _ in range(insertions):
+            editor.insert_timestamp_action()
+            if not editor.last_timestamp_inserted:
+                text_edit.moveCursor(QTextCursor.End)
+                text_edit.insertPlainText("\n")
+    results[f"insert_timestamp[{size}]"] = summarize(measure(insert, 3), insertions)
+
+    # Typing mid-document with the statistics panel's aggregates being kept up to date
+    editor.track_stats()
+    while editor.stats is None:
+        app.processEvents()
+        time.sleep(0.01)
+    text_edit.setTextCursor(cursor)
+    text_edit.moveCursor(QTextCursor.EndOfBlock)
+    keystrokes = 200
+
+    def type_text():
+        for _ in range(keystrokes):
+            text_edit.insertPlainText("a")
+    results[f"type_character[{size}]"] = summarize(measure(type_text, 3), keystrokes)
+
+    # Gutter painting of a full viewport
+    paints = 100
+    text_edit.setTextCursor(cursor)
+    text_edit.centerCursor()
+    app.processEvents()
+
+    def paint():
+        for _ in range(paints):
+            text_edit.line_number_area.repaint()
+    results[f"paint_line_numbers[{size}]"] = summarize(measure(paint, 5), paints)
+
+    editor.text_edit.document().setModified(False)
+    editor.stop_auto_save()
+    editor.close()
+    editor.deleteLater()
+    app.processEvents()
+
+
+def bench_update_ui(app, results):
+    player = SimulatedBackend()
+    video_player = VideoPlayer(None, get_icon_path, QSize(24, 24), player=player)
+    video_player.resize(800, 600)
+    video_player.show()
+    player.load("simulated://media")
+    player.play()
+    app.processEvents()
+    ticks = 1000
+
+    def tick():
+        for _ in range(ticks):
+            video_player.update_ui()
+    results["update_ui_tick"] = summarize(measure(tick, 5), ticks)
+    video_player.timer.stop()
+    video_player.close()
+
+
+# --- Regression checks ---
+
+def check_regressions(results, thresholds, baseline=None, tolerance=0.25):
+    regressions = []
+    for name, result in results.items():
+        limit = thresholds.get(name, {}).get("median_ms")
+        if limit is not None and result["median_ms"] > limit:
+            regressions.append({"benchmark": name, "median_ms": result["median_ms"],
+                                "limit_ms": limit, "reason": "threshold"})
+        if baseline and name in baseline:
+            allowed = baseline[name]["median_ms"] * (1.0 + tolerance)
+            if result["median_ms"] > allowed:
+                regressions.append({"benchmark": name, "median_ms": result["median_ms"],
+                                    "limit_ms": allowed, "reason": "baseline"})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Annotime headless benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma separated transcript line counts (e.g. 1000,1000000)")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="JSON file of median_ms limits")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown relative to --baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="annotime_bench_") as work_dir:
+        # Logging stays unconfigured, so DEBUG/INFO records stop at their level check
+        for size in sizes:
+            bench_editor(app, size, work_dir, results)
+        bench_update_ui(app, results)
+
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, encoding="utf-8") as file:
+            thresholds = json.load(file)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    regressions = check_regressions(results, thresholds, baseline, args.tolerance)
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "qt": QT_VERSION_STR, "pyqt": PYQT_VERSION_STR, "platform": platform.platform(),
+                 "qpa": os.environ.get("QT_QPA_PLATFORM"), "sizes": sizes},
+        "results": results,
+        "regressions": regressions,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:<32} median {result['median_ms']:10.3f} ms   p95 {result['p95_ms']:10.3f} ms")
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']}: {regression['median_ms']:.3f} ms "
+              f"> {regression['limit_ms']:.3f} ms ({regression['reason']})")
+    print(f"Results written to {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
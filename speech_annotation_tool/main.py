@@ -1,16 +1,40 @@
 import sys
 import os
+import multiprocessing
 # import json # No longer needed?
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QSplitter, QWidget,
                              QVBoxLayout, QMenuBar, QMenu, QAction, QMessageBox,
-                             QShortcut, QInputDialog, QLabel)
-from PyQt5.QtCore import Qt, QSettings, QTimer, QUrl, QSize
+                             QShortcut, QInputDialog, QLabel, QFileDialog, QDialog,
+                             QProgressDialog)
+from PyQt5.QtCore import Qt, QSettings, QTimer, QUrl, QSize, QStandardPaths
 from PyQt5.QtGui import QIcon, QKeySequence
 
 
 # Assuming video_player and text_editor are in a 'widgets' subfolder
 from widgets.video_player import VideoPlayer
-from widgets.text_editor import TextEditor
+from widgets.session_tabs import SessionTabs
+from widgets.segment_review import SegmentReview
+from widgets.retime_dialog import RetimeDialog
+from widgets.silence_snap import SilenceSnap
+from widgets.clip_export_dialog import ClipExportDialog, ClipExporter
+from widgets.stats_panel import StatsPanel
+from widgets.control_server import ControlServer
+from utils.audio_cache import AudioCache
+from utils.media_cache import MediaCache, media_exists, is_remote
+from utils.clip_export import ExportJob
+from utils.manifest import build_manifest
+from utils.importers import FILE_FILTER as IMPORT_FILE_FILTER
+from utils.segments import parse_segments
+from utils.agreement import compare_segments, read_segments, summary as agreement_summary, format_summary, write_report
+from utils.control_protocol import socket_name_from_env
+from utils.resync import estimate_sync, drift_ms_per_hour, MIN_CONFIDENCE as RESYNC_MIN_CONFIDENCE
+from utils.workers import run_in_background
+from utils.tracing import tracer
+from utils.player_backend import backend_name_from_env, video_output_from_env
+from utils.playback_clock import playback_clock
+from utils.log import get_logger, setup_logging, dump_recent, log_file_path
+
+log = get_logger("main")
 
 # --- Path Setup (Keep as is) ---
 if getattr(sys, 'frozen', False):
@@ -38,7 +62,7 @@ class MainWindow(QMainWindow):
         if os.path.exists(app_icon_path):
              self.setWindowIcon(QIcon(app_icon_path))
         else:
-             print(f"Warning: Application icon not found at {app_icon_path}")
+             log.warning("Application icon not found at %s", app_icon_path)
 
 
         self.setGeometry(100, 100, 1280, 720) # Slightly larger default size
@@ -95,24 +119,66 @@ class MainWindow(QMainWindow):
         get_icon = lambda name: QIcon(get_icon_path(name))
 
         # Pass main window settings to widgets if needed (e.g., for auto-pause)
-        self.video_player = VideoPlayer(self, get_icon_path, default_icon_size)
-        self.text_editor = TextEditor(
-            self.video_player.media_player,
+        # ANNOTIME_PLAYER_BACKEND overrides the saved backend (e.g. "simulated" for headless runs)
+        backend_name = backend_name_from_env(self.settings.value("playerBackend", "vlc", type=str))
+        # ANNOTIME_VIDEO_OUTPUT overrides how video is drawn ("native" window, Qt-painted "frames" or "auto")
+        video_output = video_output_from_env(self.settings.value("videoOutput", "auto", type=str))
+        self.video_player = VideoPlayer(self, get_icon_path, default_icon_size, backend_name=backend_name,
+                                        video_output=video_output)
+        # One tab per video/transcript pair, all spawned from the same player backend
+        self.sessions = SessionTabs(
+            self.video_player,
             get_icon_path,
             default_icon_size,
             # Pass initial auto-pause setting
-            self.settings.value("autoPause", True, type=bool)
+            self.settings.value("autoPause", True, type=bool),
+            max_players=self.settings.value("maxWarmPlayers", 3, type=int),
+            memory_cap_mb=self.settings.value("playerMemoryCapMb", 768, type=int),
+            project_files=self.settings.value("projectFiles", False, type=bool)
         )
-
-        self.text_editor.jump_to_time_signal.connect(self.video_player.set_time_ms)
+        # Decoded audio for analysis tools, shared by all tabs
+        self.audio_cache = AudioCache(
+            os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "audio_cache"),
+            max_bytes=self.settings.value("audioCacheMb", 2048, type=int) * 1024 * 1024)
+        # Remote media (HTTP, network shares) is played through a local block cache
+        self.media_cache = MediaCache(
+            os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "media_cache"),
+            max_bytes=self.settings.value("mediaCacheMb", 4096, type=int) * 1024 * 1024)
+        self.video_player.media_cache = self.media_cache
+        # Moves inserted timestamps to nearby pauses (optional)
+        self.silence_snap = SilenceSnap(self.video_player, self.audio_cache,
+                                        self.settings.value("snapWindowMs", 500, type=int))
+        self.silence_snap.indexReady.connect(
+            lambda _path: self.statusBar().showMessage("Silence analysis ready; timestamps will snap to pauses.", 5000))
+        self.silence_snap.indexFailed.connect(
+            lambda _path, error: self.statusBar().showMessage(f"Silence analysis failed: {error}", 8000))
+        self.sessions.set_silence_snap(self.silence_snap)
+        # QA review of the current tab's segments, with a pre-rolled second player
+        self.review = SegmentReview(self.video_player, self.sessions)
+        self.review.segmentChanged.connect(
+            lambda index, total: self.statusBar().showMessage(f"Reviewing segment {index + 1} of {total}"))
+        self.review.reviewStopped.connect(self._on_review_stopped)
+        self._clip_exporter = None       # Running audio clip export
+        self._manifest_running = False
+        self._resync_running = False
+        self._comparison_running = False
+        # JSON-RPC control socket for foot pedals and scripts (off unless enabled)
+        self.control_server = ControlServer(self, self)
+        # Live statistics of the current transcript, next to the editor
+        self.stats_panel = StatsPanel(self.video_player)
+        self.stats_panel.set_editor(self.sessions.current_editor())
+        self.sessions.currentEditorChanged.connect(self.stats_panel.set_editor)
 
         splitter.addWidget(self.video_player)
-        splitter.addWidget(self.text_editor)
+        splitter.addWidget(self.sessions)
+        splitter.addWidget(self.stats_panel)
         splitter.setStretchFactor(0, 3)
         splitter.setStretchFactor(1, 2)
+        splitter.setStretchFactor(2, 1)
         splitter_state = self.settings.value("splitterState")
         if splitter_state:
             splitter.restoreState(splitter_state)
+        self.stats_panel.setVisible(self.settings.value("statsPanel", False, type=bool))
 
         central_widget = QWidget()
         # Add slight margin around the central widget's layout
@@ -125,6 +191,11 @@ class MainWindow(QMainWindow):
         self.setup_shortcuts()
         self.load_settings()
 
+    @property
+    def text_editor(self):
+        """The TextEditor of the current session tab."""
+        return self.sessions.current_editor()
+
 
     def setup_menu(self, get_icon):
         menu_bar = self.menuBar()
@@ -132,25 +203,56 @@ class MainWindow(QMainWindow):
 
         # --- File Menu ---
         file_menu = menu_bar.addMenu("&File")
+        new_tab_action = QAction("New Tab", self)
+        new_tab_action.setShortcut(QKeySequence.AddTab) # Standard Ctrl+T
+        new_tab_action.triggered.connect(self.sessions.new_session)
+        file_menu.addAction(new_tab_action)
+
+        close_tab_action = QAction("Close Tab", self)
+        close_tab_action.setShortcut(QKeySequence.Close) # Standard Ctrl+W
+        close_tab_action.triggered.connect(self.sessions.close_current_tab)
+        file_menu.addAction(close_tab_action)
+
+        file_menu.addSeparator()
+
         load_video_action = QAction(get_icon("load_menu.png"), "Load Video...", self)
         load_video_action.triggered.connect(self.video_player.load_video)
         file_menu.addAction(load_video_action)
 
+        open_url_action = QAction("Open Video URL...", self)
+        open_url_action.triggered.connect(self.video_player.load_video_url)
+        file_menu.addAction(open_url_action)
+
         load_transcript_action = QAction(get_icon("load_menu.png"), "Load Transcript...", self)
-        load_transcript_action.triggered.connect(self.text_editor.load_transcript_file)
+        load_transcript_action.triggered.connect(lambda: self.text_editor.load_transcript_file())
         file_menu.addAction(load_transcript_action)
 
+        import_action = QAction("Import Annotations...", self)
+        import_action.setToolTip("Import SRT, WebVTT, Praat TextGrid or ELAN annotations as a transcript")
+        import_action.triggered.connect(self.import_annotations)
+        file_menu.addAction(import_action)
+
+        open_project_action = QAction(get_icon("load_menu.png"), "Open Project...", self)
+        open_project_action.triggered.connect(self.open_project)
+        file_menu.addAction(open_project_action)
+
         # Save action - Shortcut defined here ONLY
         save_action = QAction("Save Transcript", self)
         save_action.setShortcut(QKeySequence.Save) # Standard Ctrl+S
-        save_action.triggered.connect(self.text_editor.save_transcript)
+        save_action.triggered.connect(lambda: self.text_editor.save_transcript())
         file_menu.addAction(save_action)
 
         save_as_action = QAction("Save Transcript As...", self)
         save_as_action.setShortcut(QKeySequence.SaveAs)
-        save_as_action.triggered.connect(self.text_editor.save_transcript_as)
+        save_as_action.triggered.connect(lambda: self.text_editor.save_transcript_as())
         file_menu.addAction(save_as_action)
 
+        # Project sidecars (.annotime) next to saved transcripts
+        self.project_files_action = QAction("Save Project Files (.annotime)", self, checkable=True)
+        self.project_files_action.setChecked(self.sessions.project_files_enabled)
+        self.project_files_action.triggered.connect(self.sessions.set_project_files)
+        file_menu.addAction(self.project_files_action)
+
         file_menu.addSeparator()
 
         clear_text_action = QAction(get_icon("clear_menu.png"), "Clear Text", self)
@@ -169,10 +271,24 @@ class MainWindow(QMainWindow):
         self.word_wrap_action = QAction("Word Wrap", self, checkable=True)
         # Load setting state before connecting trigger
         self.word_wrap_action.setChecked(self.settings.value("wordWrap", False, type=bool))
-        self.word_wrap_action.triggered.connect(self.text_editor.toggle_word_wrap)
+        self.word_wrap_action.triggered.connect(self.sessions.set_word_wrap)
         view_menu.addAction(self.word_wrap_action)
-        # Initialize state in editor
-        self.text_editor.toggle_word_wrap(self.word_wrap_action.isChecked())
+        # Initialize state in editors
+        self.sessions.set_word_wrap(self.word_wrap_action.isChecked())
+
+        self.stats_panel_action = QAction("Statistics Panel", self, checkable=True)
+        self.stats_panel_action.setChecked(self.stats_panel.isVisibleTo(self))
+        self.stats_panel_action.triggered.connect(self.stats_panel.setVisible)
+        view_menu.addAction(self.stats_panel_action)
+
+        # Per tab; for transcripts too long to edit comfortably as text
+        self.table_view_action = QAction("Segment Table", self, checkable=True)
+        self.table_view_action.setToolTip("Show the current transcript as a table of start, end and text")
+        self.table_view_action.triggered.connect(
+            lambda enabled: self.text_editor.set_table_view(enabled) if self.text_editor else None)
+        self.sessions.currentEditorChanged.connect(
+            lambda editor: self.table_view_action.setChecked(editor is not None and editor.table_view_shown()))
+        view_menu.addAction(self.table_view_action)
 
         # --- Playback Menu ---
         playback_menu = menu_bar.addMenu("&Playback")
@@ -182,8 +298,8 @@ class MainWindow(QMainWindow):
         self.auto_pause_action.setChecked(self.settings.value("autoPause", True, type=bool))
         self.auto_pause_action.triggered.connect(self.toggle_auto_pause) # Connect to handler
         playback_menu.addAction(self.auto_pause_action)
-        # Initialize state in editor
-        self.text_editor.set_auto_pause(self.auto_pause_action.isChecked())
+        # Initialize state in editors
+        self.sessions.set_auto_pause(self.auto_pause_action.isChecked())
 
         playback_menu.addSeparator()
 
@@ -196,12 +312,103 @@ class MainWindow(QMainWindow):
         set_loop_interval_action.triggered.connect(self.set_loop_interval)
         playback_menu.addAction(set_loop_interval_action)
 
+        playback_menu.addSeparator()
+
+        self.snap_action = QAction("Snap Timestamps to Silence", self, checkable=True)
+        self.snap_action.triggered.connect(self.toggle_silence_snap)
+        playback_menu.addAction(self.snap_action)
+
+        snap_window_action = QAction("Set Snap Window...", self)
+        snap_window_action.triggered.connect(self.set_snap_window)
+        playback_menu.addAction(snap_window_action)
+
+        playback_menu.addSeparator()
+
+        self.review_action = QAction("Review Segments", self, checkable=True)
+        self.review_action.setShortcut(QKeySequence("Ctrl+R"))
+        self.review_action.triggered.connect(self.toggle_review)
+        playback_menu.addAction(self.review_action)
+
+        next_segment_action = QAction("Next Segment", self)
+        next_segment_action.setShortcut(QKeySequence(Qt.ALT + Qt.Key_Down))
+        next_segment_action.triggered.connect(self.review.next_segment)
+        playback_menu.addAction(next_segment_action)
+
+        previous_segment_action = QAction("Previous Segment", self)
+        previous_segment_action.setShortcut(QKeySequence(Qt.ALT + Qt.Key_Up))
+        previous_segment_action.triggered.connect(self.review.previous_segment)
+        playback_menu.addAction(previous_segment_action)
+
+        replay_segment_action = QAction("Replay Segment", self)
+        replay_segment_action.setShortcut(QKeySequence(Qt.ALT + Qt.Key_R))
+        replay_segment_action.triggered.connect(self.review.replay_segment)
+        playback_menu.addAction(replay_segment_action)
+
+        playback_menu.addSeparator()
+        self.control_socket_action = QAction("Control Socket (Foot Pedals, Scripts)", self, checkable=True)
+        self.control_socket_action.setToolTip("Accept JSON-RPC commands (play/pause, seek, loop, insert timestamp) "
+                                              "on a local socket")
+        self.control_socket_action.triggered.connect(self.toggle_control_socket)
+        playback_menu.addAction(self.control_socket_action)
+
+        # --- Tools Menu ---
+        tools_menu = menu_bar.addMenu("&Tools")
+        retime_action = QAction("Shift / Rescale Timestamps...", self)
+        retime_action.triggered.connect(self.retime_timestamps)
+        tools_menu.addAction(retime_action)
+
+        resync_action = QAction("Resync to New Media...", self)
+        resync_action.setToolTip("Find the offset and drift of a new encode of the video and retime the transcript to it")
+        resync_action.triggered.connect(self.resync_to_new_media)
+        tools_menu.addAction(resync_action)
+
+        compare_action = QAction("Compare With Transcript...", self)
+        compare_action.setToolTip("Word/character error rates and boundary agreement of another annotator's transcript")
+        compare_action.triggered.connect(self.compare_with_transcript)
+        tools_menu.addAction(compare_action)
+
+        export_clips_action = QAction("Export Audio Clips...", self)
+        export_clips_action.triggered.connect(self.export_audio_clips)
+        tools_menu.addAction(export_clips_action)
+
+        manifest_action = QAction("Build Corpus Manifest...", self)
+        manifest_action.triggered.connect(self.build_corpus_manifest)
+        tools_menu.addAction(manifest_action)
+
         # --- Help Menu ---
         help_menu = menu_bar.addMenu("&Help")
         shortcuts_action = QAction("Keyboard Shortcuts", self)
         shortcuts_action.triggered.connect(self.show_shortcuts)
         help_menu.addAction(shortcuts_action)
 
+        help_menu.addSeparator()
+        tracing_menu = help_menu.addMenu("Performance Tracing")
+        self.tracing_action = QAction("Enable Tracing", self, checkable=True)
+        self.tracing_action.setChecked(tracer.enabled)
+        self.tracing_action.triggered.connect(self.toggle_tracing)
+        tracing_menu.addAction(self.tracing_action)
+
+        export_trace_action = QAction("Export Chrome Trace...", self)
+        export_trace_action.triggered.connect(self.export_trace)
+        tracing_menu.addAction(export_trace_action)
+
+        latency_report_action = QAction("Show Latency Report", self)
+        latency_report_action.triggered.connect(self.show_latency_report)
+        tracing_menu.addAction(latency_report_action)
+
+        clock_report_action = QAction("Show Playback Clock Accuracy", self)
+        clock_report_action.triggered.connect(self.show_clock_report)
+        tracing_menu.addAction(clock_report_action)
+
+        frame_stats_action = QAction("Show Video Frame Statistics", self)
+        frame_stats_action.triggered.connect(self.show_frame_stats)
+        tracing_menu.addAction(frame_stats_action)
+
+        dump_log_action = QAction("Dump Recent Log...", self)
+        dump_log_action.triggered.connect(self.dump_recent_log)
+        help_menu.addAction(dump_log_action)
+
+        help_menu.addSeparator()
         about_action = QAction("About Annotime", self)
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
@@ -213,10 +420,10 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence(Qt.CTRL + Qt.Key_Space), self, activated=self.video_player.toggle_play_pause)
 
     def toggle_auto_pause(self, checked):
-        """Updates the auto-pause setting in the editor and saves it."""
-        self.text_editor.set_auto_pause(checked)
+        """Updates the auto-pause setting in the editors and saves it."""
+        self.sessions.set_auto_pause(checked)
         self.settings.setValue("autoPause", checked)
-        print(f"Auto-pause on timestamp {'enabled' if checked else 'disabled'}.")
+        log.info("Auto-pause on timestamp %s.", "enabled" if checked else "disabled")
 
     def set_loop_interval(self):
         current_interval_sec = self.video_player.loop_interval_ms / 1000.0
@@ -227,7 +434,256 @@ class MainWindow(QMainWindow):
             new_interval_ms = int(new_interval_sec * 1000)
             self.video_player.set_loop_interval(new_interval_ms)
             self.settings.setValue("loopInterval", new_interval_ms)
-            print(f"Loop interval set to {new_interval_sec} seconds.")
+            log.info("Loop interval set to %s seconds.", new_interval_sec)
+
+    def toggle_control_socket(self, checked):
+        """Starts or stops the control socket (see widgets.control_server)."""
+        if not checked:
+            self.control_server.stop()
+            self.settings.setValue("controlSocket", False)
+            return
+        error = self.control_server.start(socket_name_from_env())
+        if error:
+            self.control_socket_action.setChecked(False)
+            QMessageBox.warning(self, "Control Socket", f"Could not open the control socket:\n{error}")
+            return
+        self.settings.setValue("controlSocket", True)
+        self.statusBar().showMessage(f"Control socket listening on {self.control_server.address()}", 8000)
+
+    def toggle_silence_snap(self, checked):
+        error = self.silence_snap.set_enabled(checked)
+        if error:
+            self.snap_action.setChecked(False)
+            QMessageBox.information(self, "Snap Timestamps to Silence", error)
+        elif checked and not self.silence_snap.is_ready() and self.video_player.current_video_path:
+            self.statusBar().showMessage("Analysing the audio for pauses...", 5000)
+
+    def set_snap_window(self):
+        window_ms, ok = QInputDialog.getInt(self, "Set Snap Window",
+                                            "Move timestamps by at most (ms):",
+                                            value=self.silence_snap.window_ms, min=0, max=5000, step=50)
+        if ok:
+            self.silence_snap.set_window(window_ms)
+            self.settings.setValue("snapWindowMs", window_ms)
+            log.info("Snap window set to %d ms.", window_ms)
+
+    def toggle_review(self, checked):
+        if not checked:
+            self.review.stop()
+            return
+        error = self.review.start()
+        if error:
+            self.review_action.setChecked(False)
+            QMessageBox.information(self, "Review Segments", error)
+
+    def _on_review_stopped(self):
+        self.review_action.setChecked(False)
+        self.statusBar().clearMessage()
+
+    def retime_timestamps(self):
+        editor = self.text_editor
+        dialog = RetimeDialog(self, editor.text_edit.textCursor().hasSelection())
+        if dialog.exec_() != QDialog.Accepted: return
+        if not editor.retime_timestamps(dialog.offset_ms(), dialog.scale(), dialog.selection_only()):
+            QMessageBox.information(self, "Adjust Timestamps", "An adjustment is already running in this tab.")
+
+    def resync_to_new_media(self):
+        """Realigns the current transcript to a new encode of its video (see utils.resync)."""
+        if self._resync_running:
+            QMessageBox.information(self, "Resync to New Media", "A resync is already running.")
+            return
+        editor = self.text_editor
+        old_path = self.video_player.current_video_path
+        if not editor or not old_path:
+            QMessageBox.information(self, "Resync to New Media",
+                                    "Load the video the transcript was timed against first.")
+            return
+        start_dir = os.path.dirname(old_path) if not is_remote(old_path) else ""
+        new_path, _ = QFileDialog.getOpenFileName(self, "New Media", start_dir,
+                                                  "Media Files (*.mp4 *.avi *.mkv *.mov *.wmv *.flv *.webm "
+                                                  "*.wav *.flac *.mp3 *.m4a *.ogg);;All Files (*)")
+        if not new_path: return
+
+        def on_result(result):
+            self._resync_running = False
+            self.statusBar().clearMessage()
+            self._offer_resync(editor, new_path, result)
+
+        def on_error(error):
+            self._resync_running = False
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Resync to New Media", f"Could not compare the media:\n{error}")
+
+        self._resync_running = True
+        self.statusBar().showMessage("Matching the audio of the old and new media...")
+        run_in_background(estimate_sync, old_path, new_path, self.video_player.timeline.duration_ms or None,
+                          on_result=on_result, on_error=on_error)
+
+    def _offer_resync(self, editor, new_path, result):
+        if not result.inliers:
+            QMessageBox.warning(self, "Resync to New Media",
+                                "The audio of the two files could not be matched; nothing was changed.")
+            return
+        summary = f"Offset: {result.offset_ms / 1000:+.3f} s\n"
+        if result.scale != 1.0: summary += f"Drift: {drift_ms_per_hour(result.scale):+.1f} ms per hour\n"
+        summary += (f"Confidence: {result.confidence:.0%} "
+                    f"({len(result.inliers)} of {len(result.anchors)} excerpts agree)\n\n")
+        uncertain = result.confidence < RESYNC_MIN_CONFIDENCE
+        if uncertain: summary += "The match is uncertain; check a few segments after applying it.\n\n"
+        reply = QMessageBox.question(self, "Resync to New Media",
+                                     summary + "Retime every timestamp and load the new media?",
+                                     QMessageBox.Yes | QMessageBox.No,
+                                     QMessageBox.No if uncertain else QMessageBox.Yes)
+        if reply != QMessageBox.Yes or self.sessions.indexOf(editor) < 0: return
+        if not editor.retime_timestamps(result.offset_ms, result.scale):
+            QMessageBox.information(self, "Resync to New Media", "An adjustment is already running in this tab.")
+            return
+        if editor is self.text_editor: self.video_player.load_video_internal(new_path)
+
+    def compare_with_transcript(self):
+        """Compares another annotator's transcript of the same media with the current one (see utils.agreement)."""
+        if self._comparison_running:
+            QMessageBox.information(self, "Compare With Transcript", "A comparison is already running.")
+            return
+        editor = self.text_editor
+        if not editor: return
+        start_dir = os.path.dirname(editor.current_file_path) if editor.current_file_path else ""
+        other_path, _ = QFileDialog.getOpenFileName(self, "Compare With Transcript", start_dir,
+                                                    "Text Files (*.txt);;All Files (*)")
+        if not other_path: return
+
+        def on_result(agreement):
+            self._comparison_running = False
+            self.statusBar().clearMessage()
+            result = agreement_summary(agreement)
+            reply = QMessageBox.information(self, "Transcript Agreement",
+                                            f"{os.path.basename(other_path)} against the open transcript:\n\n"
+                                            + format_summary(result),
+                                            QMessageBox.Save | QMessageBox.Close, QMessageBox.Close)
+            if reply == QMessageBox.Save: self._save_agreement_report(other_path, result)
+
+        def on_error(error):
+            self._comparison_running = False
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Compare With Transcript", f"Could not compare with {other_path}:\n{error}")
+
+        text = editor.text_edit.toPlainText()
+        self._comparison_running = True
+        self.statusBar().showMessage(f"Comparing with {os.path.basename(other_path)}...")
+        run_in_background(lambda: compare_segments(parse_segments(text), read_segments(other_path)),
+                          on_result=on_result, on_error=on_error)
+
+    def _save_agreement_report(self, other_path, result):
+        report_path, _ = QFileDialog.getSaveFileName(self, "Save Agreement Report",
+                                                     os.path.splitext(other_path)[0] + ".agreement.json",
+                                                     "JSON (*.json);;CSV (*.csv)")
+        if not report_path: return
+        is_csv = report_path.lower().endswith(".csv")
+        try:
+            write_report([(other_path, result, "")], result, None if is_csv else report_path,
+                         report_path if is_csv else None)
+        except OSError as e:
+            QMessageBox.critical(self, "Save Agreement Report", f"Could not write {report_path}:\n{e}")
+
+    def export_audio_clips(self):
+        """Cuts the segments of the current (or every) tab into one audio clip each."""
+        if self._clip_exporter is not None:
+            QMessageBox.information(self, "Export Audio Clips", "An export is already running.")
+            return
+        dialog = ClipExportDialog(self, self.settings.value("clipExportDir", "", type=str), self.sessions.count())
+        if dialog.exec_() != QDialog.Accepted: return
+        settings = dialog.settings()
+        if not settings.output_dir:
+            QMessageBox.warning(self, "Export Audio Clips", "Choose an output folder.")
+            return
+        self.settings.setValue("clipExportDir", settings.output_dir)
+
+        current = self.sessions.current_session()
+        jobs, skipped = [], []
+        for session in (self.sessions.sessions() if dialog.all_tabs() else [current]):
+            if session is None: continue
+            video_path = self.video_player.current_video_path if session is current else session.video_path
+            segments = session.editor.segments(skip_empty=True)
+            if not video_path or not segments:
+                skipped.append(self.sessions.tabText(self.sessions.indexOf(session.editor)))
+                continue
+            jobs.append(ExportJob(session.editor.current_file_path, video_path, segments))
+        if not jobs:
+            QMessageBox.information(self, "Export Audio Clips",
+                                    "There is nothing to export: a tab needs a video and [start]-[end] segments.")
+            return
+
+        progress_dialog = QProgressDialog("Exporting audio clips...", "Cancel", 0,
+                                          sum(len(job.segments) for job in jobs), self)
+        progress_dialog.setWindowTitle("Export Audio Clips")
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+        counts = {}                      # Job index -> (done, total)
+
+        def on_progress(index, done, total):
+            counts[index] = (done, total)
+            progress_dialog.setMaximum(sum(t for _d, t in counts.values())
+                                       + sum(len(job.segments) for i, job in enumerate(jobs) if i not in counts))
+            progress_dialog.setValue(sum(d for d, _t in counts.values()))
+
+        def on_finished(results):
+            self._clip_exporter = None
+            cancelled = progress_dialog.wasCanceled()
+            progress_dialog.close()
+            lines = []
+            for job, result in zip(jobs, results):
+                name = os.path.basename(job.transcript_path or job.media_path)
+                if isinstance(result, Exception):
+                    lines.append(f"{name}: failed ({result})")
+                else:
+                    lines.append(f"{name}: {result['written']} written, {result['skipped']} up to date"
+                                 + (f", {result['removed']} removed" if result["removed"] else ""))
+            if skipped: lines.append(f"Skipped (no video or segments): {', '.join(skipped)}")
+            title = "Export Cancelled" if cancelled else "Export Finished"
+            QMessageBox.information(self, title, f"Clips in {settings.output_dir}:\n\n" + "\n".join(lines))
+
+        exporter = self._clip_exporter = ClipExporter(jobs, settings)
+        exporter.progress.connect(on_progress)
+        exporter.finished.connect(on_finished)
+        progress_dialog.canceled.connect(exporter.cancel)
+        try:
+            exporter.start()
+        except OSError as e:
+            self._clip_exporter = None
+            progress_dialog.close()
+            QMessageBox.critical(self, "Export Audio Clips", f"Could not create {settings.output_dir}:\n{e}")
+
+    def build_corpus_manifest(self):
+        """Writes a JSONL manifest of every segment in a folder of transcripts (see utils.manifest)."""
+        if self._manifest_running:
+            QMessageBox.information(self, "Build Corpus Manifest", "A manifest is already being built.")
+            return
+        corpus_dir = QFileDialog.getExistingDirectory(self, "Corpus Folder", self.settings.value("manifestCorpusDir", "", type=str))
+        if not corpus_dir: return
+        output_path, _ = QFileDialog.getSaveFileName(self, "Save Manifest", os.path.join(corpus_dir, "manifest.jsonl"),
+                                                     "JSON Lines (*.jsonl);;All Files (*)")
+        if not output_path: return
+        self.settings.setValue("manifestCorpusDir", corpus_dir)
+        cache_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "manifest_cache")
+
+        def on_result(stats):
+            self._manifest_running = False
+            self.statusBar().clearMessage()
+            QMessageBox.information(self, "Manifest Written",
+                                    f"{stats['segments']} segments from {stats['transcripts']} transcripts "
+                                    f"written to {output_path}.\n\n"
+                                    f"{stats['reprocessed']} transcripts were (re)processed, {stats['reused']} came "
+                                    f"from the cache and {stats['without_media']} have no media.")
+
+        def on_error(error):
+            self._manifest_running = False
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Build Corpus Manifest", f"Could not build the manifest:\n{error}")
+
+        self._manifest_running = True
+        self.statusBar().showMessage(f"Building the manifest of {corpus_dir}...")
+        run_in_background(build_manifest, corpus_dir, output_path, cache_dir, on_result=on_result, on_error=on_error)
 
     def clear_text_editor_confirmed(self):
          reply = QMessageBox.question(self, 'Confirm Clear',
@@ -235,7 +691,7 @@ class MainWindow(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
          if reply == QMessageBox.Yes:
             self.text_editor.clear_editor_content() # Use dedicated method in editor
-            print("Text editor cleared.")
+            log.info("Text editor cleared.")
 
     def show_shortcuts(self):
         """Displays a message box with keyboard shortcuts."""
@@ -249,6 +705,11 @@ class MainWindow(QMainWindow):
             <li><b>Alt + Left Arrow:</b> Seek Backward 5 Seconds</li>
             <li><b>Ctrl + S:</b> Save Transcript</li>
             <li><b>Ctrl + Shift + S:</b> Save Transcript As...</li>
+            <li><b>Ctrl + R:</b> Review Segments (Toggle)</li>
+            <li><b>Alt + Down / Alt + Up:</b> Next / Previous Segment (Review)</li>
+            <li><b>Alt + R:</b> Replay Segment (Review)</li>
+            <li><b>Ctrl + T:</b> New Tab</li>
+            <li><b>Ctrl + W:</b> Close Tab</li>
             <li><b>Ctrl + Q / Cmd + Q:</b> Exit Application</li>
             <li><i>Mouse Click on Timestamp:</i> Seek Video to Timestamp</li>
         </ul>
@@ -256,6 +717,89 @@ class MainWindow(QMainWindow):
         """
         QMessageBox.information(self, "Keyboard Shortcuts", shortcuts)
 
+    def toggle_tracing(self, checked):
+        tracer.set_enabled(checked)
+        log.info("Performance tracing %s.", "enabled" if checked else "disabled")
+
+    def export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "annotime_trace.json",
+                                                   "Trace Files (*.json);;All Files (*)")
+        if not file_path: return
+        try:
+            tracer.export_chrome_trace(file_path)
+            log.info("Trace exported to: %s", file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error Exporting Trace", f"Could not write trace:\n{file_path}\n\nError: {e}")
+
+    def show_latency_report(self):
+        """Shows per-operation latency percentiles collected while tracing."""
+        if not tracer.histograms():
+            QMessageBox.information(self, "Latency Report",
+                                    "No data recorded yet. Enable tracing under Help > Performance Tracing first.")
+            return
+        QMessageBox.information(self, "Latency Report (ms)",
+                                f"<pre>{tracer.latency_report()}</pre>")
+
+    def show_clock_report(self):
+        """Shows how far the interpolated playback clock is from libvlc's time updates."""
+        player = self.video_player.player
+        if not player or not player.has_media():
+            QMessageBox.information(self, "Playback Clock Accuracy", "No video loaded.")
+            return
+        QMessageBox.information(self, "Playback Clock Accuracy (ms)",
+                                f"<pre>{playback_clock(player).report()}</pre>")
+
+    def show_frame_stats(self):
+        """Frames decoded, shown and dropped per video surface (Qt-painted video only)."""
+        if self.video_player.video_output != "frames":
+            QMessageBox.information(self, "Video Frame Statistics",
+                                    "Video is rendered by the player into a native window, so frames aren't counted.\n"
+                                    "Set ANNOTIME_VIDEO_OUTPUT=frames to paint video in Qt.")
+            return
+        lines = [f"{'surface':<8} {'decoded':>8} {'shown':>8} {'dropped':>8}"]
+        for slot in range(self.video_player.surface_count()):
+            stats = self.video_player.video_surface(slot).frame_stats()
+            lines.append(f"{slot:<8} {stats['decoded']:>8} {stats['shown']:>8} {stats['dropped']:>8}")
+        QMessageBox.information(self, "Video Frame Statistics", "<pre>" + "\n".join(lines) + "</pre>")
+
+    def open_project(self):
+        """Opens a .annotime project: its transcript, video and working state."""
+        editor = self.text_editor
+        start_dir = os.path.dirname(editor.current_file_path) if editor and editor.current_file_path else ""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Project", start_dir,
+                                                   "Annotime Projects (*.annotime);;All Files (*)")
+        if not file_path: return
+        try:
+            self.sessions.open_project(file_path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error Opening Project", f"Could not open project:\n{file_path}\n\nError: {e}")
+
+    def import_annotations(self):
+        """Imports subtitles or annotations from another tool as a new, unsaved transcript."""
+        editor = self.text_editor
+        start_dir = os.path.dirname(editor.current_file_path) if editor and editor.current_file_path else ""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Annotations", start_dir, IMPORT_FILE_FILTER)
+        if not file_path: return
+        try:
+            self.sessions.import_annotations(file_path)
+        except ValueError as e:
+            QMessageBox.critical(self, "Import Annotations", f"Could not import:\n{file_path}\n\nError: {e}")
+
+    def dump_recent_log(self):
+        """Saves the in-memory log of recent events, e.g. to attach to a bug report."""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Dump Recent Log", "annotime_recent.log",
+                                                   "Log Files (*.log *.txt);;All Files (*)")
+        if not file_path: return
+        try:
+            count = dump_recent(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error Dumping Log", f"Could not write log:\n{file_path}\n\nError: {e}")
+            return
+        full_log = log_file_path()
+        QMessageBox.information(self, "Recent Log",
+                                f"Wrote {count} recent log entries to:\n{file_path}"
+                                + (f"\n\nThe full log is kept at:\n{full_log}" if full_log else ""))
+
     def show_about(self):
         """Displays the About dialog."""
         QMessageBox.about(self, "About Annotime Tool",
@@ -281,34 +825,45 @@ class MainWindow(QMainWindow):
         # Apply settings
         self.video_player.set_loop_interval(loop_interval)
         self.auto_pause_action.setChecked(auto_pause) # Update menu item state
-        self.text_editor.set_auto_pause(auto_pause)   # Update editor state
+        self.sessions.set_auto_pause(auto_pause)      # Update editor state
         self.word_wrap_action.setChecked(word_wrap)
-        self.text_editor.toggle_word_wrap(word_wrap)
-
-        # Load files and position (check existence)
-        text_path = self.settings.value("lastTextPath", None)
-        if text_path and os.path.exists(text_path):
+        self.sessions.set_word_wrap(word_wrap)
+        if self.settings.value("controlSocket", False, type=bool):
+            error = self.control_server.start(socket_name_from_env())
+            if error: log.warning("Control socket not opened: %s", error)
+            self.control_socket_action.setChecked(error is None)
+        if self.settings.value("snapToSilence", False, type=bool):
+            # Stays off silently if ffmpeg went away since
+            self.snap_action.setChecked(self.silence_snap.set_enabled(True) is None)
+
+        # Reopen the session tabs (check existence). Older versions only saved
+        # a single session under the last* keys.
+        saved_sessions = []
+        session_count = self.settings.beginReadArray("sessions")
+        for i in range(session_count):
+            self.settings.setArrayIndex(i)
+            saved_sessions.append((self.settings.value("textPath", None),
+                                   self.settings.value("videoPath", None),
+                                   self.settings.value("position", 0, type=int)))
+        self.settings.endArray()
+        if not saved_sessions:
+            saved_sessions.append((self.settings.value("lastTextPath", None),
+                                   self.settings.value("lastVideoPath", None),
+                                   self.settings.value("lastPosition", 0, type=int)))
+        current_index = self.settings.value("currentSession", 0, type=int)
+
+        for text_path, video_path, position in saved_sessions:
+            if text_path and not os.path.exists(text_path): text_path = None
+            if video_path and not media_exists(video_path): video_path = None
+            if not text_path and not video_path: continue
+            log.info("Restoring session: %s / %s at position %s", text_path, video_path, position)
             try:
-                self.text_editor.load_transcript_content(text_path)
+                self.sessions.open_session(text_path, video_path, position, activate=False)
             except Exception as e:
-                 QMessageBox.warning(self, "Error Loading Transcript", f"Could not load last transcript:\n{text_path}\n\nError: {e}")
-                 self.settings.remove("lastTextPath")
-        elif text_path: # Path saved but file missing
-            self.settings.remove("lastTextPath")
-
-        video_path = self.settings.value("lastVideoPath", None)
-        if video_path and os.path.exists(video_path):
-            try:
-                last_position = self.settings.value("lastPosition", 0, type=int)
-                print(f"Attempting to load last video: {video_path} at position {last_position}")
-                self.video_player.load_video_internal(video_path, initial_position=last_position)
-            except Exception as e:
-                QMessageBox.warning(self, "Error Loading Video", f"Could not load last video:\n{video_path}\n\nError: {e}")
-                self.settings.remove("lastVideoPath")
-                self.settings.remove("lastPosition") # Also clear position if video load fails
-        elif video_path: # Path saved but file missing
-             self.settings.remove("lastVideoPath")
-             self.settings.remove("lastPosition")
+                QMessageBox.warning(self, "Error Restoring Session",
+                                    f"Could not restore session:\n{text_path or video_path}\n\nError: {e}")
+        if 0 <= current_index < self.sessions.count():
+            self.sessions.setCurrentIndex(current_index)
 
 
     def save_settings(self):
@@ -319,57 +874,74 @@ class MainWindow(QMainWindow):
         if splitter:
              self.settings.setValue("splitterState", splitter.saveState())
 
-        # Video state
-        if self.video_player.current_video_path and os.path.exists(self.video_player.current_video_path):
-             self.settings.setValue("lastVideoPath", self.video_player.current_video_path)
-             current_pos = self.video_player.get_current_time_ms()
-             self.settings.setValue("lastPosition", current_pos if current_pos >= 0 else 0)
-        else:
-             self.settings.remove("lastVideoPath")
-             self.settings.remove("lastPosition")
-
-        # Text state (save path even if modified, user prompted on close)
-        if self.text_editor.current_file_path:
-             self.settings.setValue("lastTextPath", self.text_editor.current_file_path)
-        else:
-             self.settings.remove("lastTextPath")
+        # Session tabs: transcript path (saved even if modified, user prompted
+        # on close), video path and position of each tab
+        current = self.sessions.current_session()
+        if current:
+            current.video_path = self.video_player.current_video_path
+            current_pos = self.video_player.get_current_time_ms()
+            if current_pos >= 0: current.position_ms = current_pos
+        self.settings.beginWriteArray("sessions")
+        for i, session in enumerate(self.sessions.sessions()):
+            self.settings.setArrayIndex(i)
+            self.settings.setValue("textPath", session.editor.current_file_path or "")
+            video_path = session.video_path if media_exists(session.video_path) else ""
+            self.settings.setValue("videoPath", video_path)
+            self.settings.setValue("position", session.position_ms if video_path else 0)
+        self.settings.endArray()
+        self.settings.setValue("currentSession", self.sessions.currentIndex())
+        for key in ("lastVideoPath", "lastPosition", "lastTextPath"):
+            self.settings.remove(key)
 
         # Other settings
         self.settings.setValue("loopInterval", self.video_player.loop_interval_ms)
         self.settings.setValue("autoPause", self.auto_pause_action.isChecked())
         self.settings.setValue("wordWrap", self.word_wrap_action.isChecked())
+        self.settings.setValue("statsPanel", self.stats_panel_action.isChecked())
+        self.settings.setValue("projectFiles", self.project_files_action.isChecked())
+        self.settings.setValue("snapToSilence", self.snap_action.isChecked())
 
         self.settings.sync()
-        print("Settings saved.")
+        log.debug("Settings saved.")
 
     def closeEvent(self, event):
         """Handle window close event, prompt for unsaved changes."""
         proceed_to_close = True # Assume we can close initially
-        if self.text_editor.text_edit.document().isModified():
+        for editor in self.sessions.editors():
+             if not editor.text_edit.document().isModified(): continue
+             self.sessions.setCurrentWidget(editor)
              reply = QMessageBox.question(self, 'Confirm Exit',
                                           "The transcript has unsaved changes.\nDo you want to save before exiting?",
                                           QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel,
                                           QMessageBox.Cancel)
              if reply == QMessageBox.Save:
-                 if not self.text_editor.save_transcript():
+                 if not editor.save_transcript():
                      proceed_to_close = False # Don't close if save failed
              elif reply == QMessageBox.Cancel:
                   proceed_to_close = False
              # If Discard, proceed_to_close remains True
+             if not proceed_to_close: break
 
         if proceed_to_close:
+            self.review.stop()
+            self.control_server.stop()
             self.save_settings()
+            self.sessions.save_projects()
+            self.audio_cache.shutdown()
+            self.media_cache.shutdown()
             self.video_player.stop_video()
-            self.text_editor.stop_auto_save()
-            print("Application closing.")
-            # Optional: Clean up VLC more explicitly if needed
-            # self.video_player.release_player()
+            for editor in self.sessions.editors():
+                editor.stop_auto_save()
+            self.sessions.release_players()
+            log.info("Application closing.")
             event.accept()
         else:
             event.ignore() # Prevent closing
 
 
 if __name__ == "__main__":
+    # Needed by the player process backend in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     # Enable high DPI scaling for better visuals on modern displays
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
@@ -377,6 +949,7 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setOrganizationName("YourCompany") # Consistent naming
     app.setApplicationName("AnnotimeTool")
+    setup_logging(os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "logs"))
 
     window = MainWindow()
     window.show()
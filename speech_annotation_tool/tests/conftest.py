@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app's packages (utils, widgets) the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import timestamp
+
+
+@pytest.fixture(params=["numpy", "regex"])
+def codec_path(request, monkeypatch):
+    """Runs a test with NumPy's fast paths, then with the regex fallback."""
+    if request.param == "numpy":
+        if timestamp.np is None: pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(timestamp, "np", None)
+    return request.param
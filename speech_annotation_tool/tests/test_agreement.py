@@ -0,0 +1,80 @@
+"""Agreement: the bit-parallel edit distance and the pairing of segments."""
+import random
+
+from utils.agreement import combine, compare_segments, compare_texts, edit_distance, summary
+from utils.segments import Segment
+
+
+def reference_distance(a, b):
+    """Textbook Levenshtein dynamic programme."""
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def test_edit_distance_matches_dynamic_programme():
+    rng = random.Random(11)
+    for _ in range(500):
+        alphabet = rng.choice(["ab", "abcd", "abcdefghijklmnopqrstuvwxyz"])
+        # Past 64 tokens the bit vectors span more than one machine word
+        a = "".join(rng.choice(alphabet) for _ in range(rng.randrange(rng.choice([8, 100]))))
+        b = list(a) if rng.random() < 0.5 else [rng.choice(alphabet) for _ in range(rng.randrange(100))]
+        for _ in range(rng.randrange(5)):
+            if b: b[rng.randrange(len(b))] = rng.choice(alphabet)
+        b = "".join(b)
+        assert edit_distance(a, b) == reference_distance(a, b)
+        assert edit_distance(a.split("a"), b.split("a")) == reference_distance(a.split("a"), b.split("a"))
+    assert edit_distance("", "") == 0
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance(["a", "b"], []) == 2
+
+
+def test_matching_segments_are_paired():
+    reference = [Segment(0, 0, 1000, "Hello world"), Segment(1, 2000, 3000, "good morning")]
+    hypothesis = [Segment(0, 50, 980, "hello word"), Segment(1, 2100, 3000, "Good morning")]
+    agreement = compare_segments(reference, hypothesis)
+    assert agreement[:7] == (2, 2, 2, 4, 1, 23, 1)
+    assert list(agreement.start_deviations) == [50, 100]
+    assert list(agreement.end_deviations) == [-20, 0]
+    assert summary(agreement)["wer"] == 0.25
+
+
+def test_each_segment_is_paired_once_by_largest_overlap():
+    # One hypothesis segment spans two reference segments: words are compared
+    # over the whole region, and it pairs with the one it overlaps most
+    reference = [Segment(0, 0, 1000, "a b"), Segment(1, 1000, 2000, "c")]
+    hypothesis = [Segment(0, 0, 1600, "a b c")]
+    agreement = compare_segments(reference, hypothesis)
+    assert (agreement.paired, agreement.word_errors) == (1, 0)
+    assert (list(agreement.start_deviations), list(agreement.end_deviations)) == ([0], [600])
+
+    swapped = compare_segments(hypothesis, reference)
+    assert swapped.paired == 1
+    assert (list(swapped.start_deviations), list(swapped.end_deviations)) == ([0], [-600])
+
+
+def test_unpaired_segments():
+    # No overlap: the reference words are deleted and the others inserted
+    agreement = compare_segments([Segment(0, 0, 1000, "yes")], [Segment(0, 5000, 6000, "no")])
+    assert agreement[:7] == (1, 1, 0, 1, 2, 3, 5)
+    assert not agreement.start_deviations
+
+    # A zero-length segment overlaps nothing
+    agreement = compare_segments([Segment(0, 0, 1000, "x")], [Segment(0, 500, 500, "")])
+    assert (agreement.paired, agreement.word_errors) == (0, 1)
+
+    assert summary(compare_segments([], []))["wer"] is None
+
+
+def test_compare_texts_and_combine():
+    text = "[00:00:01.000]-[00:00:02.000] one two\n[00:00:03.000]-[00:00:04.000] three"
+    same = compare_texts(text, text)
+    assert same[:7] == (2, 2, 2, 3, 0, 12, 0)
+    other = compare_texts(text, text.replace("two", "too"))
+    total = combine([same, other])
+    assert total[:7] == (4, 4, 4, 6, 1, 24, 1)
+    assert list(total.start_deviations) == [0, 0, 0, 0]
@@ -0,0 +1,117 @@
+"""Audio cache: chunked decoding into the memory map and LRU eviction, with ffmpeg stubbed out."""
+import os
+
+import pytest
+
+from utils import audio_cache
+from utils.audio_cache import AudioCache, AudioCacheError
+
+np = pytest.importorskip("numpy")
+
+RATE = 1000          # Samples per second, so sample i is at i ms
+LENGTH_MS = 2500     # Three one-second chunks, the last one partial
+TRACK_BYTES = LENGTH_MS * audio_cache.SAMPLE_BYTES
+
+
+class _FakeFfmpeg:
+    """Popen stand-in that "decodes" sample i as the value i."""
+    calls = []
+
+    def __init__(self, command, **kwargs):
+        self.calls.append(command)
+        self.returncode = 0
+        self._media_path = command[command.index("-i") + 1]
+        self._start = round(float(command[command.index("-ss") + 1]) * RATE)
+        self._count = round(float(command[command.index("-t") + 1]) * RATE)
+
+    def communicate(self):
+        if "broken" in os.path.basename(self._media_path):
+            self.returncode = 1
+            return b"", b"Invalid data found when processing input"
+        return np.arange(self._start, self._start + self._count, dtype="<i2").tobytes(), b""
+
+    def kill(self):
+        pass
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    _FakeFfmpeg.calls = []
+    monkeypatch.setattr(audio_cache, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(audio_cache.subprocess, "Popen", _FakeFfmpeg)
+    return _FakeFfmpeg
+
+
+@pytest.fixture
+def media(tmp_path):
+    """Creates a distinct fake media file and returns its path."""
+    def create(name):
+        path = tmp_path / name
+        path.write_bytes(name.encode() * 100)
+        return str(path)
+    return create
+
+
+def open_cache(tmp_path, **kwargs):
+    return AudioCache(str(tmp_path / "cache"), sample_rate=RATE, chunk_seconds=1, workers=2, **kwargs)
+
+
+def test_chunks_are_decoded_into_the_map(tmp_path, ffmpeg, media):
+    cache = open_cache(tmp_path)
+    try:
+        track = cache.open(media("a.mp4"), length_ms=LENGTH_MS)
+        assert track.wait(5)
+        assert len(ffmpeg.calls) == 3 and track.progress() == 1.0
+        assert track.samples().tolist() == list(range(LENGTH_MS))
+        assert track.samples(900, 1100).tolist() == list(range(900, 1100))
+        assert not track.samples(0, 10).flags.writeable
+        assert cache.open(track.media_path) is track
+    finally:
+        cache.shutdown()
+
+    cache = open_cache(tmp_path)         # The finished file is reused without decoding
+    try:
+        track = cache.open(media("a.mp4"))
+        assert track.is_complete() and len(ffmpeg.calls) == 3
+        assert track.samples(2000).tolist() == list(range(2000, LENGTH_MS))
+    finally:
+        cache.shutdown()
+
+
+def test_failed_decode(tmp_path, ffmpeg, media):
+    cache = open_cache(tmp_path)
+    try:
+        track = cache.open(media("broken.mp4"), length_ms=LENGTH_MS)
+        assert not track.wait(5)
+        assert "Invalid data" in track.error
+        with pytest.raises(AudioCacheError):
+            track.samples()
+    finally:
+        cache.shutdown()
+
+
+def test_least_recently_used_track_is_evicted(tmp_path, ffmpeg, media):
+    cache = open_cache(tmp_path, max_bytes=2 * TRACK_BYTES)
+    try:
+        tracks = {}
+        for used, name in enumerate(["a.mp4", "b.mp4"]):
+            tracks[name] = cache.open(media(name), length_ms=LENGTH_MS)
+            assert tracks[name].wait(5)
+            meta_path = cache._paths(tracks[name].key)[1]
+            os.utime(meta_path, (1000 + used, 1000 + used))    # a.mp4 was used first
+        assert cache.open(media("c.mp4"), length_ms=LENGTH_MS).wait(5)
+        cached = sorted(os.listdir(cache.cache_dir))
+        assert len(cached) == 4
+        assert not any(name.startswith(tracks["a.mp4"].key) for name in cached)
+    finally:
+        cache.shutdown()
+
+    cache = open_cache(tmp_path, max_bytes=2 * TRACK_BYTES)
+    try:
+        calls = len(ffmpeg.calls)
+        assert cache.open(media("b.mp4")).is_complete()
+        assert len(ffmpeg.calls) == calls
+        assert cache.open(media("a.mp4"), length_ms=LENGTH_MS).wait(5)
+        assert len(ffmpeg.calls) == calls + 3
+    finally:
+        cache.shutdown()
@@ -0,0 +1,132 @@
+"""The media cache against a local HTTP server standing in for the remote one."""
+import http.client
+import os
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import media_cache
+from utils.media_cache import MediaCache
+
+BLOCK = 4096
+FILES = {"/a.mp4": bytes(range(256)) * 40 + b"end of a",              # 2.5 blocks
+         "/b.mp4": b"".join(i.to_bytes(4, "little") for i in range(2000))}
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    """Serves FILES with Range support and records every request."""
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def _respond(self, send_body):
+        data = FILES.get(self.path)
+        self.requests.append((self.command, self.path, self.headers.get("Range")))
+        if data is None:
+            self.send_error(404)
+            return
+        start, end, status = 0, len(data) - 1, 200
+        match = re.match(r"bytes=(\d+)-(\d+)$", self.headers.get("Range", ""))
+        if match:
+            start, end, status = int(match.group(1)), min(end, int(match.group(2))), 206
+        self.send_response(status)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if send_body: self.wfile.write(data[start:end + 1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    _Upstream.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_cache, "BLOCK_SIZE", BLOCK)
+    monkeypatch.setattr(media_cache, "READAHEAD_BLOCKS", 0)   # Upstream requests only come from the reads
+    return str(tmp_path / "cache")
+
+
+def fetch(url, range_header=None):
+    """(status, body) of a GET to the cache's local server."""
+    parts = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parts.netloc, timeout=10)
+    connection.request("GET", parts.path, headers={"Range": range_header} if range_header else {})
+    response = connection.getresponse()
+    result = response.status, response.read()
+    connection.close()
+    return result
+
+
+def upstream_reads():
+    return [request for request in _Upstream.requests if request[0] == "GET"]
+
+
+def test_range_and_full_reads(upstream, cache_dir):
+    cache = MediaCache(cache_dir)
+    try:
+        url = cache.local_url(upstream + "/a.mp4")
+        data = FILES["/a.mp4"]
+        assert fetch(url, "bytes=100-199") == (206, data[100:200])
+        assert upstream_reads() == [("GET", "/a.mp4", f"bytes=0-{BLOCK - 1}")]
+        assert fetch(url) == (200, data)
+        assert fetch(url, "bytes=-8") == (206, b"end of a")
+        assert fetch(url, f"bytes={len(data) - 5}-") == (206, data[-5:])
+        status, _body = fetch(url, f"bytes={len(data)}-")
+        assert status == 416
+        assert len(upstream_reads()) == 2     # The first block, then the two missing ones in one request
+        assert cache.media(upstream + "/a.mp4").cached_fraction() == 1.0
+    finally:
+        cache.shutdown()
+
+
+def test_reopening_uses_the_cached_blocks(upstream, cache_dir):
+    cache = MediaCache(cache_dir)
+    assert fetch(cache.local_url(upstream + "/a.mp4"))[1] == FILES["/a.mp4"]
+    cache.shutdown()
+    reads = len(upstream_reads())
+
+    cache = MediaCache(cache_dir)
+    try:
+        url = cache.local_url(upstream + "/a.mp4")
+        assert fetch(url) == (200, FILES["/a.mp4"])
+        assert fetch(url, "bytes=5000-5099") == (206, FILES["/a.mp4"][5000:5100])
+        assert len(upstream_reads()) == reads    # Only revalidated (HEAD), nothing fetched
+    finally:
+        cache.shutdown()
+
+
+def test_least_recently_used_media_is_evicted(upstream, cache_dir):
+    cache = MediaCache(cache_dir)
+    fetch(cache.local_url(upstream + "/a.mp4"))
+    cache.shutdown()
+    a_files = [name for name in os.listdir(cache_dir)]
+    assert len(a_files) == 3                  # .data, .map and .json
+
+    # Room for b.mp4 but not for both
+    cache = MediaCache(cache_dir, max_bytes=3 * BLOCK)
+    try:
+        assert fetch(cache.local_url(upstream + "/b.mp4"))[1] == FILES["/b.mp4"]
+        remaining = os.listdir(cache_dir)
+        assert not set(a_files) & set(remaining)
+        assert len(remaining) == 3
+    finally:
+        cache.shutdown()
@@ -0,0 +1,26 @@
+"""retime_text: shifting and scaling every transcript timestamp, on both codec paths."""
+import random
+
+from utils.timestamp import format_times, find_times, retime_text
+
+DAY_MS = 24 * 3600 * 1000
+
+
+def test_retime_text(codec_path):
+    text = "[00:00:01.000]-[00:00:02.500] héllo\n[25:00:00.000]-[25:00:01.000] x"
+    new_text, count, clamped = retime_text(text, offset_ms=-1500)
+    assert (count, clamped) == (4, 1)
+    assert new_text == "[00:00:00.000]-[00:00:01.000] héllo\n[24:59:58.500]-[24:59:59.500] x"
+    scaled, _count, _clamped = retime_text(text, scale=2.0)
+    assert find_times(scaled) == [2000, 5000, 50 * 3600000, 50 * 3600000 + 2000]
+    assert retime_text("nothing", 100) == ("nothing", 0, 0)
+
+
+def test_retime_round_trip(codec_path):
+    rng = random.Random(2)
+    values = [rng.randrange(DAY_MS * 2) for _ in range(300)]
+    text = " ".join(f"[{stamp}] w" for stamp in format_times(values))
+    shifted, count, clamped = retime_text(text, offset_ms=90 * 60000)
+    assert (count, clamped) == (len(values), 0)
+    restored, _count, _clamped = retime_text(shifted, offset_ms=-90 * 60000)
+    assert restored == text
@@ -0,0 +1,48 @@
+"""Segment statistics: incremental line replacement must match a rebuild from the whole text."""
+import random
+
+from utils.segment_stats import SegmentStats, stats_for_text
+from utils.timestamp import format_time
+
+
+def random_line(rng):
+    kind = rng.random()
+    if kind < 0.2: return rng.choice(["", "plain text", "[00:00:01.000] no pair"])
+    # Coarse times on a short range, so segments overlap, touch and repeat
+    start, end = rng.randrange(40) * 500, rng.randrange(40) * 500
+    if kind > 0.4 and end < start: start, end = end, start
+    return f"[{format_time(start)}]-[{format_time(end)}] text"
+
+
+def aggregates(stats):
+    return (stats.lines, stats.count, stats.incomplete, stats.total_ms, stats.covered_ms,
+            stats.histogram, stats._points, stats._counts, stats._gaps)
+
+
+def test_replace_lines_matches_rebuild():
+    rng = random.Random(7)
+    for _ in range(300):
+        lines = [random_line(rng) for _ in range(rng.randrange(1, 10))]
+        stats = SegmentStats()
+        stats.reset(lines)
+        for _ in range(rng.randrange(1, 8)):
+            first = rng.randrange(len(lines) + 1)
+            removed = rng.randrange(len(lines) - first + 1)
+            # Sometimes enough lines for the batch parser (a paste)
+            new = [random_line(rng) for _ in range(rng.choice([0, 1, 2, 3, 40]))]
+            if removed == len(lines) and not new: new = [""]     # A document always has a line
+            stats.replace_lines(first, removed, new)
+            lines[first:first + removed] = new
+            assert aggregates(stats) == aggregates(stats_for_text("\n".join(lines)))
+
+
+def test_gaps_and_coverage():
+    stats = stats_for_text("\n".join([
+        "[00:00:01.000]-[00:00:03.000] a", "[00:00:02.000]-[00:00:04.000] b",
+        "[00:00:10.000]-[00:00:11.000] c", "[00:00:05.000]-[00:00:05.000] empty"]))
+    assert (stats.count, stats.incomplete, stats.total_ms, stats.covered_ms) == (3, 1, 5000, 4000)
+    assert stats.longest_gaps() == [(4000, 10000)]
+    assert stats.longest_gaps(media_length_ms=20000) == [(11000, 20000), (4000, 10000), (0, 1000)]
+    assert stats.coverage(20000) == 0.2
+    stats.replace_lines(2, 1, [])
+    assert (stats.first_start_ms(), stats.last_end_ms(), stats.longest_gaps()) == (1000, 4000, [])
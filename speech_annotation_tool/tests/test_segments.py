@@ -0,0 +1,48 @@
+"""Segment parsing: the NumPy batch path must agree with the line-by-line regex."""
+import random
+
+import pytest
+
+from utils import segments
+from utils.segments import Segment, parse_segment_line, parse_segments, segment_times, segment_times_for_lines
+from utils.timestamp import format_time
+
+LINE_FORMS = ["[{a}]-[{b}] text", "[{a}]-[{b}]", "[{a}]-[{b}]x", "[{a}]-[{b}]　wide space",
+              " [{a}] - [{b}]  spaced", "\t[{a}]-[{b}] tab", "\r[{a}]-[{b}]\r", "[{a}] -[{b}] dash",
+              "[{a}]-[{b}]-[{a}] three", "[{a}]-[{b}] [{b}]-[{a}] two pairs", "text [{a}] inline",
+              "[{a}] [{b}] no dash", "-[{a}]-[{b}] leading dash", "héllo wörld", ""]
+
+
+@pytest.fixture(params=["numpy", "regex"])
+def parse_path(request, monkeypatch):
+    if request.param == "numpy":
+        if segments.np is None: pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(segments, "np", None)
+    return request.param
+
+
+def random_lines(rng, count):
+    lines = []
+    for _ in range(count):
+        a, b = format_time(rng.randrange(10 ** 7)), format_time(rng.randrange(10 ** 7))
+        lines.append(rng.choice(LINE_FORMS).format(a=a, b=b))
+    return lines
+
+
+def test_parse_segments(parse_path):
+    text = "[00:00:01.000]-[00:00:02.500] hello\nnothing\n  [00:00:03.000] - [00:00:03.000]\n[100:00:00.000]-[100:00:01.5] x"
+    assert parse_segments(text) == [Segment(0, 1000, 2500, "hello"), Segment(2, 3000, 3000, ""),
+                                    Segment(3, 360000000, 360001500, "x")]
+    assert [segment.line for segment in parse_segments(text, skip_empty=True)] == [0, 3]
+    assert parse_segments("") == []
+
+
+def test_batch_matches_line_by_line(parse_path):
+    rng = random.Random(5)
+    for _ in range(300):
+        lines = random_lines(rng, rng.randrange(80))
+        expected = [segment for segment in (parse_segment_line(text, line) for line, text in enumerate(lines))
+                    if segment is not None]
+        assert parse_segments("\n".join(lines)) == expected
+        assert segment_times_for_lines(lines) == [segment_times(text) for text in lines]
@@ -0,0 +1,78 @@
+"""Line diffs, three-way merges and the on-disk comparison built on them."""
+import random
+
+from utils.text_diff import (CONFLICT_END, CONFLICT_SEPARATOR, CONFLICT_START, apply_hunks,
+                             compare_with_disk, diff_hunks, merge3)
+
+BASE = ["[00:00:01.000]-[00:00:02.000] one", "two", "three", "four", "five", "six"]
+
+
+def random_edit(rng, lines):
+    lines = list(lines)
+    for _ in range(rng.randrange(4)):
+        position = rng.randrange(len(lines) + 1)
+        action = rng.choice(["insert", "delete", "replace"])
+        if action == "insert" or position == len(lines):
+            lines.insert(position, rng.choice("abcxyz"))
+        elif action == "delete":
+            del lines[position]
+        else:
+            lines[position] = rng.choice("abcxyz")
+    return lines
+
+
+def test_diff_hunks_round_trip():
+    rng = random.Random(3)
+    for _ in range(300):
+        old = [rng.choice("abcd") for _ in range(rng.randrange(12))]
+        new = random_edit(rng, old)
+        hunks = diff_hunks(old, new)
+        assert apply_hunks(old, hunks) == new
+        assert (hunks == []) == (old == new)
+    assert diff_hunks(BASE, BASE[:2] + ["new"] + BASE[2:]) == [(2, 2, ["new"])]
+    assert diff_hunks(BASE, BASE[:-1]) == [(5, 6, [])]
+
+
+def test_merge_without_conflicts():
+    ours = ["ONE"] + BASE[1:]
+    theirs = BASE[:4] + ["FIVE", "inserted"] + BASE[5:]
+    assert merge3(BASE, ours, theirs) == (["ONE"] + BASE[1:4] + ["FIVE", "inserted"] + BASE[5:], 0)
+    assert merge3(BASE, ours, BASE) == (ours, 0)
+    assert merge3(BASE, BASE, theirs) == (theirs, 0)
+    assert merge3(BASE, ours, ours) == (ours, 0)           # The same edit on both sides
+
+    rng = random.Random(4)
+    for _ in range(200):
+        edited = random_edit(rng, BASE)
+        assert merge3(BASE, edited, BASE) == (edited, 0)
+        assert merge3(BASE, BASE, edited) == (edited, 0)
+
+
+def test_merge_conflicts():
+    ours = BASE[:2] + ["THREE (yours)"] + BASE[3:]
+    theirs = BASE[:2] + ["THREE (disk)"] + BASE[3:5]
+    merged, conflicts = merge3(BASE, ours, theirs)
+    assert conflicts == 1
+    assert merged == BASE[:2] + [CONFLICT_START, "THREE (yours)", CONFLICT_SEPARATOR,
+                                 "THREE (disk)", CONFLICT_END] + BASE[3:5]
+
+    # Different lines inserted at the same place
+    merged, conflicts = merge3(BASE, BASE[:1] + ["mine"] + BASE[1:], BASE[:1] + ["theirs"] + BASE[1:])
+    assert conflicts == 1
+    assert merged == BASE[:1] + [CONFLICT_START, "mine", CONFLICT_SEPARATOR, "theirs", CONFLICT_END] + BASE[1:]
+
+
+def test_compare_with_disk(tmp_path):
+    path = tmp_path / "transcript.txt"
+    base_text = "\n".join(BASE)
+    path.write_text(base_text, encoding="utf-8")
+    assert compare_with_disk(str(path), base_text, base_text + "\nmine") is None
+
+    theirs_text = "\n".join(["ONE"] + BASE[1:])
+    path.write_text(theirs_text, encoding="utf-8")
+    ours = BASE + ["mine"]
+    change = compare_with_disk(str(path), base_text, "\n".join(ours), merge=True)
+    assert change["text"] == theirs_text
+    assert apply_hunks(ours, change["reload"]) == theirs_text.split("\n")
+    assert apply_hunks(ours, change["merge"]) == ["ONE"] + BASE[1:] + ["mine"]
+    assert change["conflicts"] == 0
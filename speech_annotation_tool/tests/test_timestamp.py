@@ -0,0 +1,120 @@
+"""Round trips of the timestamp codec, on both the NumPy and the regex paths.
+
+Run from the speech_annotation_tool directory: python -m pytest tests
+"""
+import random
+
+import pytest
+
+from utils import timestamp
+from utils.timestamp import (format_time, parse_time, format_srt_time, parse_srt_time, format_frames,
+                             parse_frames, format_times, parse_times, find_times)
+
+DAY_MS = 24 * 3600 * 1000
+VALUES = [0, 1, 999, 1000, 59999, 60000, 3599999, 3600000, DAY_MS - 1, DAY_MS, DAY_MS + 12345,
+          99 * 3600000 + 3599999]
+
+
+# --- Single timestamps ---
+@pytest.mark.parametrize("ms", VALUES)
+def test_format_parse_round_trip(ms):
+    assert parse_time(format_time(ms)) == ms
+
+
+def test_hours_are_not_wrapped():
+    assert format_time(25 * 3600000) == "25:00:00.000"
+    assert format_time(100 * 3600000 + 1) == "100:00:00.001"
+    assert parse_time("100:00:00.001") == 100 * 3600000 + 1
+
+
+@pytest.mark.parametrize("ms", [-1, -1000, -DAY_MS])
+def test_negative_values_clamp_to_zero(ms):
+    assert format_time(ms) == "00:00:00.000"
+    assert parse_time(format_time(ms)) == 0
+
+
+@pytest.mark.parametrize("ms", VALUES)
+def test_srt_round_trip(ms):
+    text = format_srt_time(ms)
+    assert "," in text
+    assert parse_srt_time(text) == ms
+    assert parse_time(text) == ms
+
+
+def test_short_fractions():
+    assert parse_time("00:00:01.5") == 1500
+    assert parse_time("00:00:01,25") == 1250
+    assert parse_time(" 00:00:01.005 ") == 1005
+
+
+@pytest.mark.parametrize("text", ["", "1:00:00.000", "00:60:00.000", "00:00:60.000", "00:00:00.0000",
+                                  "00:00:00", "[00:00:00.000]", "00:00:00.000x"])
+def test_invalid_timestamps(text):
+    with pytest.raises(ValueError):
+        parse_time(text)
+
+
+# --- Frame timecodes ---
+@pytest.mark.parametrize("fps", [24, 25, 29.97, 30, 60])
+def test_frames_round_trip(fps):
+    for frame in range(int(fps)):
+        timecode = f"01:02:03:{frame:02}"
+        assert format_frames(parse_frames(timecode, fps), fps) == timecode
+
+
+@pytest.mark.parametrize("fps", [25, 29.97])
+def test_frames_round_down_to_frame_start(fps):
+    for ms in range(0, 5000, 7):
+        start = parse_frames(format_frames(ms, fps), fps)
+        assert start <= ms < start + 1000 / fps + 1
+
+
+def test_invalid_frames():
+    with pytest.raises(ValueError):
+        parse_frames("00:00:00:25", 25)
+    with pytest.raises(ValueError):
+        parse_frames("00:00:00.10", 25)
+    with pytest.raises(ValueError):
+        format_frames(0, 0)
+
+
+# --- Batch helpers ---
+def test_batch_round_trip(codec_path):
+    values = VALUES + [random.Random(1).randrange(DAY_MS * 3) for _ in range(500)]
+    texts = format_times(values)
+    assert texts == [format_time(ms) for ms in values]
+    assert parse_times(texts) == values
+    assert parse_times(format_times(values, ',')) == values
+
+
+def test_batch_clamps_and_wide_hours(codec_path):
+    values = [-5, 0, 100 * 3600000]
+    assert format_times(values) == ["00:00:00.000", "00:00:00.000", "100:00:00.000"]
+    assert parse_times(["00:00:01.5", "100:00:00.000"]) == [1500, 100 * 3600000]
+    assert parse_times([]) == []
+
+
+def test_batch_accepts_any_iterable(codec_path):
+    assert format_times(ms for ms in [1, 2]) == ["00:00:00.001", "00:00:00.002"]
+    assert format_times(range(3), ',')[2] == "00:00:00,002"
+    assert parse_times(text for text in ["00:00:01.000"]) == [1000]
+
+
+def test_batch_leaves_input_unchanged():
+    if timestamp.np is None: pytest.skip("NumPy is not installed")
+    values = timestamp.np.array([-5, 1000], dtype=timestamp.np.int64)
+    assert format_times(values) == ["00:00:00.000", "00:00:01.000"]
+    assert values.tolist() == [-5, 1000]
+
+
+def test_batch_rejects_invalid(codec_path):
+    with pytest.raises(ValueError):
+        parse_times(["00:00:01.000", "00:61:00.000"])
+
+
+def test_find_times(codec_path):
+    text = ("[00:00:01.000]-[00:00:02.500] hello [00:00:03,250]\n"
+            "bare 00:00:04.000 [100:00:00.001] [00:00:05.5] [00:99:00.000]")
+    assert find_times(text) == [1000, 2500, 3250, 100 * 3600000 + 1, 5500]
+    assert find_times(text, bracketed=False) == [1000, 2500, 3250, 4000, 100 * 3600000 + 1, 5500]
+    assert find_times("no timestamps") == []
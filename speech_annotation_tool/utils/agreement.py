@@ -0,0 +1,313 @@
+"""Agreement between two annotators' transcripts: WER/CER and boundary deviations.
+
+Headless: python -m utils.agreement REFERENCE_DIR HYPOTHESIS_DIR -o report.json [--csv report.csv] [--jobs N]
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+from .segments import parse_segments
+from .manifest import LazyPool, iter_transcript_paths
+from .log import get_logger
+
+log = get_logger(__name__)
+
+BOUNDARY_TOLERANCE_MS = 200      # Boundaries closer than this count as agreeing
+CHUNK_SIZE = 16
+
+_WORD_RE = re.compile(r"\w+(?:['’]\w+)*")
+
+# Totals of one comparison (or several combined); deviations are signed ms,
+# hypothesis minus reference, one per paired segment
+Agreement = namedtuple("Agreement", "ref_segments hyp_segments paired ref_words word_errors "
+                                    "ref_chars char_errors start_deviations end_deviations")
+
+CSV_FIELDS = ("path", "ref_segments", "hyp_segments", "paired", "ref_words", "word_errors", "wer",
+              "ref_chars", "char_errors", "cer", "start_mean_abs_ms", "start_median_abs_ms",
+              "start_p95_abs_ms", "start_max_abs_ms", "start_within_tolerance", "end_mean_abs_ms",
+              "end_median_abs_ms", "end_p95_abs_ms", "end_max_abs_ms", "end_within_tolerance", "error")
+
+
+def words(text):
+    return _WORD_RE.findall(text.casefold())
+
+
+# --- Edit distance ---
+def edit_distance(a, b):
+    """Levenshtein distance between two sequences of hashable tokens."""
+    # Annotators mostly agree: only the part between the common prefix and suffix differs
+    limit = min(len(a), len(b))
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[len(a) - 1 - suffix] == b[len(b) - 1 - suffix]:
+        suffix += 1
+    a, b = a[prefix:len(a) - suffix], b[prefix:len(b) - suffix]
+    if len(a) < len(b): a, b = b, a
+    m = len(b)
+    if not m: return len(a)
+    # Myers (1999), in Hyyro's formulation for global distance: bit i of the
+    # vectors is the vertical delta of row i of the current column
+    masks = {}
+    for i, token in enumerate(b):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    all_ones = (1 << m) - 1
+    last = 1 << (m - 1)
+    positive, negative = all_ones, 0
+    score = m
+    for token in a:
+        eq = masks.get(token, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        hp = negative | ~(xh | positive)
+        hn = positive & xh
+        if hp & last: score += 1
+        elif hn & last: score -= 1
+        hp = (hp << 1) | 1
+        hn <<= 1
+        positive = (hn | ~(xv | hp)) & all_ones
+        negative = hp & xv & all_ones
+    return score
+
+
+# --- Comparing ---
+def _overlaps(reference, hypothesis):
+    """Sweeps both segment lists in start order.
+
+    Returns (regions, pairs): regions are lists of (side, index) of segments
+    that overlap each other, in start order (side 0 is the reference); pairs
+    are (overlap_ms, ref index, hyp index) of every overlapping pair.
+    """
+    events = sorted([(s.start_ms, 0, i) for i, s in enumerate(reference)]
+                    + [(s.start_ms, 1, i) for i, s in enumerate(hypothesis)])
+    sides = (reference, hypothesis)
+    active = ([], [])                # Segments of each side whose end hasn't been passed
+    regions, pairs = [], []
+    region_end = None
+    for start, side, index in events:
+        end = sides[side][index].end_ms
+        if region_end is None or start >= region_end:
+            regions.append([])
+            active = ([], [])
+            region_end = end
+        else:
+            region_end = max(region_end, end)
+        regions[-1].append((side, index))
+        if end <= start: continue    # Zero length: overlaps nothing
+        other = active[1 - side]
+        other[:] = [j for j in other if sides[1 - side][j].end_ms > start]
+        for j in other:
+            overlap = min(end, sides[1 - side][j].end_ms) - start
+            pairs.append((overlap, index, j) if side == 0 else (overlap, j, index))
+        active[side].append(index)
+    return regions, pairs
+
+
+def compare_segments(reference, hypothesis):
+    """Agreement of two lists of utils.segments.Segment."""
+    regions, pairs = _overlaps(reference, hypothesis)
+    ref_words = word_errors = ref_chars = char_errors = 0
+    sides = (reference, hypothesis)
+    for region in regions:
+        tokens = ([], [])
+        for side, index in region:
+            tokens[side].extend(words(sides[side][index].text))
+        ref_text, hyp_text = (" ".join(side_words) for side_words in tokens)
+        ref_words += len(tokens[0])
+        ref_chars += len(ref_text)
+        word_errors += edit_distance(tokens[0], tokens[1])
+        char_errors += edit_distance(ref_text, hyp_text)
+
+    start_deviations, end_deviations = array('l'), array('l')
+    ref_paired, hyp_paired = set(), set()
+    for _overlap, i, j in sorted(pairs, key=lambda pair: -pair[0]):
+        if i in ref_paired or j in hyp_paired: continue
+        ref_paired.add(i)
+        hyp_paired.add(j)
+        start_deviations.append(hypothesis[j].start_ms - reference[i].start_ms)
+        end_deviations.append(hypothesis[j].end_ms - reference[i].end_ms)
+    return Agreement(len(reference), len(hypothesis), len(ref_paired), ref_words, word_errors,
+                     ref_chars, char_errors, start_deviations, end_deviations)
+
+
+def compare_texts(reference_text, hypothesis_text):
+    return compare_segments(parse_segments(reference_text), parse_segments(hypothesis_text))
+
+
+def read_segments(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        return parse_segments(file.read())
+
+
+def compare_files(reference_path, hypothesis_path):
+    return compare_segments(read_segments(reference_path), read_segments(hypothesis_path))
+
+
+def combine(agreements):
+    """Sums several Agreements (e.g. over a corpus)."""
+    counts = [0] * 7
+    start_deviations, end_deviations = array('l'), array('l')
+    for agreement in agreements:
+        for i in range(7):
+            counts[i] += agreement[i]
+        start_deviations.extend(agreement.start_deviations)
+        end_deviations.extend(agreement.end_deviations)
+    return Agreement(*counts, start_deviations, end_deviations)
+
+
+# --- Reporting ---
+def _deviation_stats(deviations, tolerance_ms):
+    if not deviations:
+        return {"mean_abs_ms": None, "median_abs_ms": None, "p95_abs_ms": None, "max_abs_ms": None,
+                "within_tolerance": None}
+    values = sorted(abs(value) for value in deviations)
+    count = len(values)
+    return {"mean_abs_ms": round(sum(values) / count, 1),
+            "median_abs_ms": (values[(count - 1) // 2] + values[count // 2]) / 2,
+            "p95_abs_ms": values[min(count - 1, int(count * 0.95))],
+            "max_abs_ms": values[-1],
+            "within_tolerance": round(sum(1 for value in values if value <= tolerance_ms) / count, 4)}
+
+
+def summary(agreement, tolerance_ms=BOUNDARY_TOLERANCE_MS):
+    """The Agreement as a JSON-ready dict: counts, error rates and boundary statistics."""
+    return {"ref_segments": agreement.ref_segments,
+            "hyp_segments": agreement.hyp_segments,
+            "paired": agreement.paired,
+            "ref_words": agreement.ref_words,
+            "word_errors": agreement.word_errors,
+            "wer": round(agreement.word_errors / agreement.ref_words, 4) if agreement.ref_words else None,
+            "ref_chars": agreement.ref_chars,
+            "char_errors": agreement.char_errors,
+            "cer": round(agreement.char_errors / agreement.ref_chars, 4) if agreement.ref_chars else None,
+            "start": _deviation_stats(agreement.start_deviations, tolerance_ms),
+            "end": _deviation_stats(agreement.end_deviations, tolerance_ms)}
+
+
+def format_summary(result):
+    """A summary() dict as a few lines of text."""
+    def rate(value):
+        return "n/a" if value is None else f"{value:.2%}"
+    lines = [f"Segments: {result['ref_segments']} reference, {result['hyp_segments']} other, "
+             f"{result['paired']} paired",
+             f"WER: {rate(result['wer'])} ({result['word_errors']} errors in {result['ref_words']} words)",
+             f"CER: {rate(result['cer'])} ({result['char_errors']} errors in {result['ref_chars']} characters)"]
+    for boundary in ("start", "end"):
+        stats = result[boundary]
+        if stats["max_abs_ms"] is None: continue
+        lines.append(f"{boundary.capitalize()} deviation: mean {stats['mean_abs_ms']:.0f} ms, median "
+                     f"{stats['median_abs_ms']:.0f} ms, 95% {stats['p95_abs_ms']} ms, max {stats['max_abs_ms']} ms; "
+                     f"{stats['within_tolerance']:.0%} within {BOUNDARY_TOLERANCE_MS} ms")
+    return "\n".join(lines)
+
+
+def _csv_row(path, result, error=""):
+    row = {"path": path, "error": error}
+    if result is not None:
+        row.update({key: value for key, value in result.items() if key not in ("start", "end")})
+        for boundary in ("start", "end"):
+            row.update({f"{boundary}_{key}": value for key, value in result[boundary].items()})
+    return row
+
+
+def write_report(files, total, json_path=None, csv_path=None):
+    """Writes per-file results and the total as JSON and/or CSV.
+
+    files is a list of (path, summary dict or None, error message or "").
+    """
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as out:
+            json.dump({"total": total,
+                       "files": [dict(path=path, error=error or None, **(result or {}))
+                                 for path, result, error in files]},
+                      out, ensure_ascii=False, indent=1)
+    if csv_path:
+        with open(csv_path, "w", encoding="utf-8", newline="") as out:
+            writer = csv.DictWriter(out, CSV_FIELDS)
+            writer.writeheader()
+            for path, result, error in files:
+                writer.writerow(_csv_row(path, result, error))
+            writer.writerow(_csv_row("TOTAL", total))
+
+
+# --- Folders ---
+def iter_pairs(reference_dir, hypothesis_dir):
+    """Yields (relative path, reference path, hypothesis path or None) in a stable order."""
+    for path in iter_transcript_paths(reference_dir):
+        relative = os.path.relpath(path, reference_dir)
+        other = os.path.join(hypothesis_dir, relative)
+        yield relative, path, other if os.path.isfile(other) else None
+
+
+def _compare_task(task):
+    relative, reference_path, hypothesis_path = task
+    try:
+        return relative, compare_files(reference_path, hypothesis_path), ""
+    except (OSError, ValueError) as e:
+        return relative, None, str(e)
+
+
+def compare_folders(reference_dir, hypothesis_dir, workers=None, progress=None):
+    """Compares every transcript in reference_dir with the one at the same place in hypothesis_dir.
+
+    Returns (files, total) for write_report(). progress(files_done) is called
+    as results come in. Transcripts missing from hypothesis_dir are listed
+    with an error and left out of the total.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    tasks, files = [], []
+    for relative, reference_path, hypothesis_path in iter_pairs(reference_dir, hypothesis_dir):
+        if hypothesis_path is None:
+            files.append((relative, None, "no transcript in the other folder"))
+        else:
+            tasks.append((relative, reference_path, hypothesis_path))
+    pool = LazyPool(_compare_task, workers, CHUNK_SIZE)
+    agreements = []
+    try:
+        for done, (relative, agreement, error) in enumerate(pool.map(tasks), 1):
+            if error: log.warning("Comparing %s failed: %s", relative, error)
+            else: agreements.append(agreement)
+            files.append((relative, summary(agreement) if agreement else None, error))
+            if progress: progress(done)
+    finally:
+        pool.close()
+    files.sort(key=lambda file: file[0])
+    total = summary(combine(agreements))
+    log.info("Compared %d transcripts of %s with %s: WER %s, CER %s", len(agreements), reference_dir,
+             hypothesis_dir, total["wer"], total["cer"])
+    return files, total
+
+
+# --- Command line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two annotators' transcripts: WER/CER and boundary agreement")
+    parser.add_argument("reference", help="folder of reference transcripts (searched recursively)")
+    parser.add_argument("hypothesis", help="folder of the transcripts compared with them, same layout")
+    parser.add_argument("-o", "--output", default="agreement.json", help="JSON report to write")
+    parser.add_argument("--csv", help="also write a CSV report (one row per transcript and a TOTAL row)")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+    for folder in (args.reference, args.hypothesis):
+        if not os.path.isdir(folder): parser.error(f"{folder} is not a folder")
+    started = time.perf_counter()
+    files, total = compare_folders(args.reference, args.hypothesis, args.jobs or None,
+                                   progress=lambda done: print(f"\r{done} transcripts compared", end="",
+                                                               file=sys.stderr, flush=True))
+    print(file=sys.stderr)
+    write_report(files, total, args.output, args.csv)
+    failed = sum(1 for _path, result, _error in files if result is None)
+    print(format_summary(total))
+    print(f"{len(files) - failed} transcripts compared ({failed} missing or unreadable) "
+          f"in {time.perf_counter() - started:.1f} s -> {args.output}" + (f", {args.csv}" if args.csv else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
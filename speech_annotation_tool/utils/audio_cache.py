@@ -0,0 +1,334 @@
+"""Shared cache of decoded audio: a media file's sound as mono, fixed-rate PCM."""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # Audio analysis is unavailable without NumPy
+    np = None
+
+from .project import fingerprint
+from .log import get_logger
+
+log = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLE_BYTES = 2
+CHUNK_SECONDS = 120
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+CACHE_FORMAT_VERSION = 1
+
+_CREATION_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0) if sys.platform == "win32" else 0
+
+
+class AudioCacheError(RuntimeError):
+    """Audio can't be decoded (no ffmpeg/NumPy, unreadable media, ffmpeg failed)."""
+
+
+def find_ffmpeg():
+    return os.environ.get("ANNOTIME_FFMPEG") or shutil.which("ffmpeg")
+
+
+def find_ffprobe():
+    return os.environ.get("ANNOTIME_FFPROBE") or shutil.which("ffprobe")
+
+
+def probe_duration_ms(media_path):
+    """Duration of a media file according to ffprobe, or None."""
+    ffprobe = find_ffprobe()
+    if not ffprobe: return None
+    try:
+        result = subprocess.run([ffprobe, "-v", "error", "-show_entries", "format=duration",
+                                 "-of", "default=noprint_wrappers=1:nokey=1", media_path],
+                                capture_output=True, text=True, timeout=30,
+                                creationflags=_CREATION_FLAGS)
+        return round(float(result.stdout.strip()) * 1000)
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        log.warning("Could not probe duration of %s: %s", media_path, e)
+        return None
+
+
+# --- A decoded (or decoding) audio track ---
+class DecodedAudio:
+    """A media file's PCM cache file, possibly still being decoded.
+
+    16-bit little-endian mono read through a NumPy memory map, so a time range
+    is a zero-copy slice; each chunk can be used as soon as it is decoded.
+    """
+
+    def __init__(self, key, media_path, pcm_path, sample_count, sample_rate, chunk_samples, complete):
+        self.key = key
+        self.media_path = media_path
+        self.pcm_path = pcm_path
+        self.sample_count = sample_count
+        self.sample_rate = sample_rate
+        self.chunk_samples = chunk_samples
+        self.error = None
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._callbacks = []
+        chunk_count = max(1, -(-sample_count // chunk_samples))
+        self._chunk_done = [complete] * chunk_count
+        self._pending = 0 if complete else chunk_count
+        self._pcm = np.memmap(pcm_path, dtype="<i2", mode="r+" if not complete else "r",
+                              shape=(sample_count,)) if sample_count else np.zeros(0, dtype="<i2")
+        if complete: self._finished.set()
+
+    @property
+    def duration_ms(self):
+        return self.sample_count * 1000 // self.sample_rate
+
+    def is_complete(self):
+        return self._finished.is_set() and self.error is None
+
+    def progress(self):
+        """Fraction of chunks decoded."""
+        with self._lock:
+            return sum(self._chunk_done) / len(self._chunk_done)
+
+    def wait(self, timeout=None):
+        """Blocks until decoding ended; returns True if it completed successfully."""
+        self._finished.wait(timeout)
+        return self.is_complete()
+
+    def add_done_callback(self, callback):
+        """Calls callback(decoded_audio) once decoding ended (on a worker thread)."""
+        with self._lock:
+            if not self._finished.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def sample_index(self, time_ms):
+        return max(0, min(self.sample_count, int(time_ms) * self.sample_rate // 1000))
+
+    def is_ready(self, start_ms=0, end_ms=None):
+        """True if every chunk overlapping the range has been decoded."""
+        first, last = self._chunk_span(start_ms, end_ms)
+        with self._lock:
+            return all(self._chunk_done[first:last + 1])
+
+    def samples(self, start_ms=0, end_ms=None):
+        """Read-only int16 view of a time range (no copy).
+
+        Raises AudioCacheError if the range hasn't been decoded yet.
+        """
+        if not self.is_ready(start_ms, end_ms):
+            raise AudioCacheError(self.error or "This part of the audio is not decoded yet")
+        view = self._pcm[self.sample_index(start_ms):
+                         self.sample_count if end_ms is None else self.sample_index(end_ms)]
+        view.flags.writeable = False
+        return view
+
+    def _chunk_span(self, start_ms, end_ms):
+        first = self.sample_index(start_ms) // self.chunk_samples
+        end = self.sample_count if end_ms is None else self.sample_index(end_ms)
+        last = max(first, (max(end, 1) - 1) // self.chunk_samples)
+        return min(first, len(self._chunk_done) - 1), min(last, len(self._chunk_done) - 1)
+
+    # Called by the cache's workers
+    def _write_chunk(self, index, data):
+        start = index * self.chunk_samples
+        samples = np.frombuffer(data, dtype="<i2")
+        count = min(len(samples), self.sample_count - start, self.chunk_samples)
+        if count > 0: self._pcm[start:start + count] = samples[:count]
+        with self._lock:
+            self._chunk_done[index] = True
+            self._pending -= 1
+            return self._pending == 0
+
+    def _finish(self, error=None):
+        with self._lock:
+            if self._finished.is_set(): return
+            self.error = error
+            self._finished.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                log.exception("Audio decode callback failed")
+
+
+# --- The cache ---
+class AudioCache:
+    """Decodes media audio on a pool of ffmpeg workers into a size-capped LRU of PCM files."""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, sample_rate=SAMPLE_RATE,
+                 workers=None, chunk_seconds=CHUNK_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.chunk_samples = chunk_seconds * sample_rate
+        self.workers = workers or os.cpu_count() or 2
+        self._executor = None
+        self._lock = threading.Lock()
+        self._tracks = OrderedDict()      # key -> DecodedAudio, least recently used first
+        self._processes = set()
+        self._closed = False
+
+    def is_available(self):
+        return np is not None and find_ffmpeg() is not None
+
+    def open(self, media_path, length_ms=None):
+        """Returns the DecodedAudio of a media file, starting to decode it if needed.
+
+        length_ms (e.g. from the player) saves probing the duration.
+        Raises AudioCacheError.
+        """
+        if np is None: raise AudioCacheError("NumPy is required for audio analysis")
+        try:
+            key = self._key(media_path)
+        except OSError as e:
+            raise AudioCacheError(f"Cannot read {media_path}: {e}") from e
+        with self._lock:
+            track = self._tracks.get(key)
+            if track and track.error is None:
+                self._tracks.move_to_end(key)
+                return track
+
+        track = self._open_cached(key, media_path)
+        if track is None:
+            track = self._start_decode(key, media_path, length_ms)
+        with self._lock:
+            self._tracks[key] = track
+            self._tracks.move_to_end(key)
+        return track
+
+    def shutdown(self):
+        """Stops decoding; partial files are discarded on the next start."""
+        self._closed = True
+        if self._executor: self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    # --- Cache files ---
+    def _key(self, media_path):
+        stored = fingerprint(media_path, sampled=True)
+        text = f"{stored['size']}:{stored['hash']}:{self.sample_rate}"
+        return hashlib.blake2b(text.encode("ascii"), digest_size=12).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".pcm", base + ".json"
+
+    def _open_cached(self, key, media_path):
+        pcm_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            if (meta.get("version") != CACHE_FORMAT_VERSION or not meta.get("complete")
+                    or meta.get("sample_rate") != self.sample_rate
+                    or os.path.getsize(pcm_path) != meta["sample_count"] * SAMPLE_BYTES):
+                return None
+            os.utime(meta_path)   # Marks it recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        log.debug("Using cached audio %s for %s", key, media_path)
+        return DecodedAudio(key, media_path, pcm_path, meta["sample_count"], self.sample_rate,
+                            self.chunk_samples, complete=True)
+
+    def _start_decode(self, key, media_path, length_ms):
+        if self._closed: raise AudioCacheError("The audio cache is shut down")
+        ffmpeg = find_ffmpeg()
+        if not ffmpeg: raise AudioCacheError("ffmpeg was not found (install it or set ANNOTIME_FFMPEG)")
+        if not length_ms or length_ms <= 0: length_ms = probe_duration_ms(media_path)
+        if not length_ms: raise AudioCacheError(f"Could not determine the duration of {media_path}")
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pcm_path, meta_path = self._paths(key)
+        if os.path.exists(meta_path): os.remove(meta_path)
+        sample_count = length_ms * self.sample_rate // 1000
+        with open(pcm_path, "wb") as file:
+            file.truncate(sample_count * SAMPLE_BYTES)   # Sparse; untouched ranges read as silence
+        track = DecodedAudio(key, media_path, pcm_path, sample_count, self.sample_rate,
+                             self.chunk_samples, complete=False)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="audio-decode")
+        log.info("Decoding audio of %s (%d ms) in %d chunks", media_path, length_ms, len(track._chunk_done))
+        for index in range(len(track._chunk_done)):
+            self._executor.submit(self._decode_chunk, ffmpeg, track, index)
+        return track
+
+    def _decode_chunk(self, ffmpeg, track, index):
+        if track._finished.is_set(): return   # An earlier chunk failed
+        start_s = index * track.chunk_samples / track.sample_rate
+        command = [ffmpeg, "-nostdin", "-v", "error", "-ss", f"{start_s:.3f}",
+                   "-t", f"{track.chunk_samples / track.sample_rate:.3f}", "-i", track.media_path,
+                   "-vn", "-ac", "1", "-ar", str(track.sample_rate), "-f", "s16le", "-acodec", "pcm_s16le", "-"]
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       creationflags=_CREATION_FLAGS)
+            with self._lock:
+                self._processes.add(process)
+            try:
+                data, errors = process.communicate()
+            finally:
+                with self._lock:
+                    self._processes.discard(process)
+            if process.returncode != 0:
+                raise AudioCacheError(errors.decode("utf-8", "replace").strip()
+                                      or f"ffmpeg exited with code {process.returncode}")
+            if track._write_chunk(index, data):
+                self._complete(track)
+        except Exception as e:
+            if not self._closed: log.error("Decoding audio of %s failed: %s", track.media_path, e)
+            track._finish(str(e))
+
+    def _complete(self, track):
+        pcm_path, meta_path = self._paths(track.key)
+        meta = {"version": CACHE_FORMAT_VERSION, "complete": True, "media_path": track.media_path,
+                "sample_rate": track.sample_rate, "sample_count": track.sample_count}
+        track._pcm.flush()
+        with open(meta_path, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        log.info("Audio of %s decoded to cache", track.media_path)
+        self._enforce_cap(keep=track.key)
+        track._finish()
+
+    def _enforce_cap(self, keep=None):
+        """Deletes the least recently used cache files over the size cap (never keep)."""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".pcm"): continue
+            key = name[:-4]
+            pcm_path, meta_path = self._paths(key)
+            try:
+                used = os.path.getmtime(meta_path) if os.path.exists(meta_path) else 0
+                entries.append((used, key, os.path.getsize(pcm_path)))
+            except OSError:
+                continue
+        with self._lock:
+            decoding = {key for key, track in self._tracks.items()
+                        if not track._finished.is_set() and key != keep}
+            recent = next(reversed(self._tracks), None)
+        total = sum(size for _used, _key, size in entries)
+        for _used, key, size in sorted(entries):
+            if total <= self.max_bytes: break
+            if key in decoding or key in (recent, keep): continue
+            try:
+                for path in self._paths(key):
+                    if os.path.exists(path): os.remove(path)
+            except OSError as e:   # Still mapped (Windows)
+                log.debug("Could not evict cached audio %s: %s", key, e)
+                continue
+            with self._lock:
+                self._tracks.pop(key, None)
+            total -= size
+            log.debug("Evicted cached audio %s (%d bytes)", key, size)
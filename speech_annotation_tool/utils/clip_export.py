@@ -0,0 +1,326 @@
+"""Cuts transcript segments into WAV/FLAC clips with ffmpeg, for building speech datasets."""
+import json
+import multiprocessing
+import os
+import subprocess
+import threading
+import wave
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .audio_cache import _CREATION_FLAGS, find_ffmpeg, find_ffprobe
+from .project import fingerprint
+from .log import get_logger
+
+log = get_logger(__name__)
+
+EXPORT_FORMATS = ("wav", "flac")
+INDEX_SUFFIX = ".clips.json"
+INDEX_VERSION = 1
+SAMPLE_BYTES = 2
+READ_FRAMES = 65536
+
+# One transcript's clips: segments are utils.segments.Segment tuples
+ExportJob = namedtuple("ExportJob", "transcript_path media_path segments")
+# sample_rate / channels of None keep the media's own
+ExportSettings = namedtuple("ExportSettings", "output_dir format sample_rate channels")
+
+
+class ClipExportError(RuntimeError):
+    """A media file can't be exported (no ffmpeg, no audio, ffmpeg failed)."""
+
+
+class ExportCancelled(ClipExportError):
+    pass
+
+
+def job_name(job):
+    """Base name of a job's clips: the transcript's (or else the media's) file name."""
+    return os.path.splitext(os.path.basename(job.transcript_path or job.media_path))[0]
+
+
+def clip_file_name(name, segment, fmt):
+    return f"{name}_{segment.start_ms:09d}_{segment.end_ms:09d}.{fmt}"
+
+
+def probe_audio(media_path):
+    """(sample_rate, channels) of the first audio stream. Raises ClipExportError."""
+    ffprobe = find_ffprobe()
+    if not ffprobe: raise ClipExportError("ffprobe was not found")
+    try:
+        result = subprocess.run([ffprobe, "-v", "error", "-select_streams", "a:0",
+                                 "-show_entries", "stream=sample_rate,channels",
+                                 "-of", "default=noprint_wrappers=1", media_path],
+                                capture_output=True, text=True, timeout=60,
+                                creationflags=_CREATION_FLAGS)
+    except (OSError, subprocess.SubprocessError) as e:
+        raise ClipExportError(f"Could not probe {media_path}: {e}") from e
+    fields = dict(line.strip().split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+    try:
+        return int(fields["sample_rate"]), int(fields["channels"])
+    except (KeyError, ValueError):
+        raise ClipExportError(f"{media_path} has no audio stream") from None
+
+
+# --- Clip writers ---
+class _WavWriter:
+    def __init__(self, path, sample_rate, channels):
+        self.path = path
+        self.part_path = path + ".part"
+        self._wave = wave.open(self.part_path, "wb")
+        self._wave.setnchannels(channels)
+        self._wave.setsampwidth(SAMPLE_BYTES)
+        self._wave.setframerate(sample_rate)
+
+    def write(self, data):
+        self._wave.writeframesraw(data)
+
+    def close(self):
+        self._wave.close()
+        os.replace(self.part_path, self.path)
+
+    def abort(self):
+        self._wave.close()
+        _remove(self.part_path)
+
+
+class _FlacWriter:
+    def __init__(self, path, sample_rate, channels):
+        self.path = path
+        self.part_path = path + ".part"
+        self._process = subprocess.Popen(
+            [find_ffmpeg(), "-v", "error", "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels),
+             "-i", "-", "-f", "flac", "-y", self.part_path],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            creationflags=_CREATION_FLAGS)
+
+    def write(self, data):
+        self._process.stdin.write(data)
+
+    def close(self):
+        self._process.stdin.close()
+        errors = self._process.stderr.read()
+        if self._process.wait() != 0:
+            _remove(self.part_path)
+            raise ClipExportError(errors.decode("utf-8", "replace").strip() or "FLAC encoding failed")
+        os.replace(self.part_path, self.path)
+
+    def abort(self):
+        self._process.kill()
+        self._process.wait()
+        _remove(self.part_path)
+
+
+_WRITERS = {"wav": _WavWriter, "flac": _FlacWriter}
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# --- Exporting one media file ---
+def _read_index(index_path):
+    try:
+        with open(index_path, "r", encoding="utf-8") as file:
+            index = json.load(file)
+        return index if index.get("version") == INDEX_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def export_media(job, settings, progress=None, cancelled=None):
+    """Writes the clips of one job that are missing or out of date.
+
+    progress(done, total) is called as clips are finished; cancelled() is
+    polled while decoding. Returns a summary dict. Raises ClipExportError.
+    """
+    if settings.format not in _WRITERS: raise ClipExportError(f"Unknown clip format '{settings.format}'")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg: raise ClipExportError("ffmpeg was not found")
+    name = job_name(job)
+    clip_dir = os.path.join(settings.output_dir, name)
+    index_path = os.path.join(clip_dir, name + INDEX_SUFFIX)
+    try:
+        media_print = fingerprint(job.media_path, sampled=True)
+    except OSError as e:
+        raise ClipExportError(f"Cannot read {job.media_path}: {e}") from e
+    segments = sorted((s for s in job.segments if s.end_ms > s.start_ms), key=lambda s: (s.start_ms, s.end_ms))
+    # Two segments with the same span share one clip
+    unique = list({(s.start_ms, s.end_ms): s for s in segments}.values())
+    source_rate = source_channels = None
+    if settings.sample_rate is None or settings.channels is None:
+        source_rate, source_channels = probe_audio(job.media_path)
+    sample_rate = settings.sample_rate or source_rate
+    channels = settings.channels or source_channels
+    state = {"fingerprint": [media_print["size"], media_print["hash"]], "format": settings.format,
+             "sample_rate": sample_rate, "channels": channels}
+
+    old = _read_index(index_path) or {}
+    old_files = {clip["file"] for clip in old.get("clips", [])}
+    # Clips of an index written for other media or settings are all out of date
+    up_to_date = old_files if all(old.get(key) == value for key, value in state.items()) else set()
+    stale = [s for s in unique
+             if clip_file_name(name, s, settings.format) not in up_to_date
+             or not os.path.exists(os.path.join(clip_dir, clip_file_name(name, s, settings.format)))]
+    total = len(unique)
+    if progress: progress(total - len(stale), total)
+
+    os.makedirs(clip_dir, exist_ok=True)
+    if stale:
+        _cut(ffmpeg, job.media_path, clip_dir, name, stale, settings.format, sample_rate, channels,
+             lambda done: progress(total - len(stale) + done, total) if progress else None, cancelled)
+
+    current = {clip_file_name(name, s, settings.format) for s in unique}
+    removed = 0
+    for file_name in old_files - current:
+        path = os.path.join(clip_dir, file_name)
+        if os.path.exists(path):
+            _remove(path)
+            removed += 1
+    index = dict(state, version=INDEX_VERSION, media_path=os.path.abspath(job.media_path),
+                 transcript_path=job.transcript_path and os.path.abspath(job.transcript_path),
+                 clips=[{"file": clip_file_name(name, s, settings.format), "line": s.line,
+                         "start_ms": s.start_ms, "end_ms": s.end_ms, "text": s.text} for s in segments])
+    part_path = index_path + ".part"
+    with open(part_path, "w", encoding="utf-8") as file:
+        json.dump(index, file, ensure_ascii=False, indent=1)
+    os.replace(part_path, index_path)
+    log.info("Exported %s: %d clips written, %d up to date, %d removed",
+             name, len(stale), total - len(stale), removed)
+    return {"name": name, "written": len(stale), "skipped": total - len(stale), "removed": removed}
+
+
+def _cut(ffmpeg, media_path, clip_dir, name, segments, fmt, sample_rate, channels, progress, cancelled):
+    """Decodes media_path once and writes the clips of segments (sorted by start)."""
+    first_ms = segments[0].start_ms
+    last_ms = max(s.end_ms for s in segments)
+    frame_bytes = SAMPLE_BYTES * channels
+    # Clip frame ranges relative to the start of the decoded stream
+    spans = [(round((s.start_ms - first_ms) * sample_rate / 1000), round((s.end_ms - first_ms) * sample_rate / 1000), s)
+             for s in segments]
+    process = subprocess.Popen(
+        [ffmpeg, "-v", "error", "-ss", f"{first_ms / 1000:.3f}", "-t", f"{(last_ms - first_ms) / 1000:.3f}",
+         "-i", media_path, "-vn", "-ac", str(channels), "-ar", str(sample_rate), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=_CREATION_FLAGS)
+    writer_class = _WRITERS[fmt]
+    active = []                                # (end frame, start frame, writer)
+    next_span = done = position = 0
+    try:
+        while next_span < len(spans) or active:
+            if cancelled and cancelled(): raise ExportCancelled("Export cancelled")
+            data = process.stdout.read(READ_FRAMES * frame_bytes)
+            frames = len(data) // frame_bytes
+            if frames == 0:
+                if process.wait() != 0:
+                    raise ClipExportError(process.stderr.read().decode("utf-8", "replace").strip()
+                                          or f"ffmpeg exited with code {process.returncode}")
+                break                          # Media ended before the last segments
+            chunk_end = position + frames
+            while next_span < len(spans) and spans[next_span][0] < chunk_end:
+                start, end, segment = spans[next_span]
+                path = os.path.join(clip_dir, clip_file_name(name, segment, fmt))
+                active.append((end, start, writer_class(path, sample_rate, channels)))
+                next_span += 1
+            still_active = []
+            for end, start, writer in active:
+                low, high = max(start, position), min(end, chunk_end)
+                if low < high:
+                    writer.write(data[(low - position) * frame_bytes:(high - position) * frame_bytes])
+                if end <= chunk_end:
+                    writer.close()
+                    done += 1
+                    progress(done)
+                else:
+                    still_active.append((end, start, writer))
+            active = still_active
+            position = chunk_end
+        # Segments past the end of the media get what there was (possibly nothing)
+        while next_span < len(spans):
+            start, end, segment = spans[next_span]
+            active.append((end, start, writer_class(os.path.join(clip_dir, clip_file_name(name, segment, fmt)),
+                                                    sample_rate, channels)))
+            next_span += 1
+        for _end, _start, writer in active:
+            writer.close()
+            done += 1
+            progress(done)
+        active = []
+    except BaseException:
+        for _end, _start, writer in active:
+            writer.abort()
+        raise
+    finally:
+        if process.poll() is None: process.kill()   # Done before the end of the decoded range
+        process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+# --- Exporting many media files on a process pool ---
+_progress_queue = None
+_cancel_event = None
+
+
+def _init_worker(progress_queue, cancel_event):
+    global _progress_queue, _cancel_event
+    _progress_queue, _cancel_event = progress_queue, cancel_event
+
+
+def _run_job(index, job, settings):
+    # Runs in a pool process; progress is throttled to whole percents
+    last = [-1]
+
+    def progress(done, total):
+        percent = done * 100 // total if total else 100
+        if percent != last[0] or done == total:
+            last[0] = percent
+            _progress_queue.put((index, done, total))
+
+    return export_media(job, settings, progress, _cancel_event.is_set)
+
+
+def export_clips(jobs, settings, workers=None, on_progress=None, cancel_event=None):
+    """Exports the clips of several jobs, one media file per pool process.
+
+    on_progress(job_index, done, total) is called from a helper thread. Set
+    cancel_event (from export_cancel_event()) to stop. Returns a list with
+    each job's summary dict, or the exception it raised.
+    """
+    if not jobs: return []
+    context = multiprocessing.get_context("spawn")
+    progress_queue = context.Queue()
+    cancel_event = cancel_event or context.Event()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+
+    def forward_progress():
+        while True:
+            item = progress_queue.get()
+            if item is None: return
+            if on_progress: on_progress(*item)
+
+    forwarder = threading.Thread(target=forward_progress, name="clip-export-progress", daemon=True)
+    forwarder.start()
+    results = [None] * len(jobs)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(progress_queue, cancel_event)) as pool:
+            futures = {pool.submit(_run_job, index, job, settings): index for index, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    log.warning("Exporting clips of %s failed: %s", jobs[index].media_path, e)
+                    results[index] = e
+    finally:
+        progress_queue.put(None)
+        forwarder.join(timeout=5)
+    return results
+
+
+def export_cancel_event():
+    """An event that cancels export_clips when set (shared with the pool processes)."""
+    return multiprocessing.get_context("spawn").Event()
@@ -0,0 +1,107 @@
+"""JSON-RPC 2.0 framing and dispatch for the control socket (one JSON message per line)."""
+import inspect
+import json
+import os
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+UNAVAILABLE = -32000             # The app can't do it now (no media loaded, ...)
+
+DEFAULT_SOCKET_NAME = "annotime-control"
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+class RpcError(Exception):
+    """Raised by a handler to answer with a JSON-RPC error."""
+
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def socket_name_from_env(default=DEFAULT_SOCKET_NAME):
+    """Local socket name (a path, or a name Qt places in the temp folder / as a Windows pipe)."""
+    return os.environ.get("ANNOTIME_CONTROL_SOCKET", "").strip() or default
+
+
+def notification(method, params=None):
+    """A notification line (without the newline)."""
+    message = {"jsonrpc": "2.0", "method": method}
+    if params is not None: message["params"] = params
+    return _encode(message)
+
+
+def _error(request_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data is not None: error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+class Dispatcher:
+    """Calls registered handlers for request lines and builds their response lines."""
+
+    def __init__(self):
+        self._methods = {}       # name -> (handler, signature, passes the connection)
+        self.on_error = None     # on_error(method, exception) for handler failures
+
+    def register(self, name, handler, with_connection=False):
+        """Registers handler(**params) (handler(connection, **params) with with_connection)."""
+        signature = inspect.signature(handler)
+        if with_connection:
+            parameters = list(signature.parameters.values())[1:]
+            signature = signature.replace(parameters=parameters)
+        self._methods[name] = (handler, signature, with_connection)
+
+    def methods(self):
+        return sorted(self._methods)
+
+    def handle_line(self, line, connection=None):
+        """Response line (without the newline) for one request line, or None for notifications."""
+        try:
+            message = json.loads(line)
+        except ValueError as e:  # Also covers invalid UTF-8
+            return _encode(_error(None, PARSE_ERROR, f"Parse error: {e}"))
+        if isinstance(message, list):
+            if not message: return _encode(_error(None, INVALID_REQUEST, "Empty batch"))
+            responses = [response for response in (self._call(item, connection) for item in message)
+                         if response is not None]
+            return _encode(responses) if responses else None
+        response = self._call(message, connection)
+        return None if response is None else _encode(response)
+
+    def _call(self, request, connection):
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0":
+            return _error(None, INVALID_REQUEST, "Not a JSON-RPC 2.0 request")
+        request_id = request.get("id")
+        is_notification = "id" not in request
+        method = request.get("method")
+        entry = self._methods.get(method) if isinstance(method, str) else None
+        if entry is None:
+            if is_notification: return None
+            return _error(request_id, METHOD_NOT_FOUND, f"Unknown method: {method}")
+        handler, signature, with_connection = entry
+        params = request.get("params", {})
+        args, kwargs = (params, {}) if isinstance(params, list) else ((), params)
+        try:
+            if not isinstance(kwargs, dict): raise TypeError("params must be an object or an array")
+            signature.bind(*args, **kwargs)
+        except TypeError as e:
+            if is_notification: return None
+            return _error(request_id, INVALID_PARAMS, str(e))
+        try:
+            result = handler(connection, *args, **kwargs) if with_connection else handler(*args, **kwargs)
+        except RpcError as e:
+            if is_notification: return None
+            return _error(request_id, e.code, e.message, e.data)
+        except Exception as e:
+            if self.on_error: self.on_error(method, e)
+            if is_notification: return None
+            return _error(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        if is_notification: return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
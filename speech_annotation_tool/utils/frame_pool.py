@@ -0,0 +1,105 @@
+"""Reusable frame buffers shared by a video decoder thread and the GUI."""
+import ctypes
+import threading
+from collections import namedtuple
+
+BUFFER_COUNT = 3
+BYTES_PER_PIXEL = 4
+SCRATCH = -1                # Index of the buffer decoded into when all others are taken
+
+# buffer keeps the memory alive for as long as the frame is referenced
+Frame = namedtuple("Frame", "index generation buffer address width height pitch")
+
+
+class FramePool:
+    """Buffers for one video surface. on_frame() is called, on the decoder
+    thread, when a frame becomes ready and the GUI hasn't been told yet."""
+
+    def __init__(self, on_frame=None, count=BUFFER_COUNT):
+        self.on_frame = on_frame
+        self.count = count
+        self.target_size = (0, 0)        # Device pixels of the surface, set by the GUI
+        self._lock = threading.Lock()
+        self._frames = []
+        self._scratch = None
+        self._generation = 0
+        self._free = []
+        self._ready = None               # Index of the newest unshown frame
+        self._shown = None               # Index of the frame on screen
+        self._notified = False
+        self.decoded = 0
+        self.shown = 0
+        self.dropped = 0
+
+    # --- Decoder side ---
+    def fit(self, width, height):
+        """Frame size for a source of width x height: scaled down (never up) to
+        fit target_size with the same aspect ratio, in even dimensions."""
+        target_width, target_height = self.target_size
+        if width <= 0 or height <= 0: return width, height
+        scale = 1.0
+        if target_width > 0 and target_height > 0:
+            scale = min(1.0, target_width / width, target_height / height)
+        return max(2, int(width * scale) & ~1), max(2, int(height * scale) & ~1)
+
+    def setup(self, width, height):
+        """(Re)allocates the buffers for a new frame size. Returns the pitch.
+
+        Buffers of the previous size stay valid for as long as a Frame refers to them.
+        """
+        pitch = width * BYTES_PER_PIXEL
+        with self._lock:
+            self._generation += 1
+            self._frames = []
+            for index in range(self.count):
+                buffer = ctypes.create_string_buffer(pitch * height)
+                self._frames.append(Frame(index, self._generation, buffer, ctypes.addressof(buffer),
+                                          width, height, pitch))
+            self._scratch = ctypes.create_string_buffer(pitch * height)
+            self._free = list(range(self.count))
+            self._ready = self._shown = None
+            self._notified = False
+        return pitch
+
+    def acquire(self):
+        """(index, address) of a buffer to decode into, or None before setup.
+
+        If the decoder holds more buffers than are free, it gets a scratch
+        buffer whose frames are never shown.
+        """
+        with self._lock:
+            if not self._frames: return None
+            if not self._free: return SCRATCH, ctypes.addressof(self._scratch)
+            index = self._free.pop()
+            return index, self._frames[index].address
+
+    def publish(self, index):
+        """Marks a decoded buffer as the newest frame and notifies the GUI if needed."""
+        with self._lock:
+            if index is None or index >= len(self._frames): return
+            self.decoded += 1
+            if index == SCRATCH:
+                self.dropped += 1
+                return
+            if self._ready is not None:
+                self.dropped += 1
+                self._free.append(self._ready)
+            self._ready = index
+            notify = not self._notified
+            self._notified = True
+        if notify and self.on_frame: self.on_frame()
+
+    # --- GUI side ---
+    def take(self):
+        """The newest frame, which stays reserved until the next take(); None if there is none."""
+        with self._lock:
+            self._notified = False
+            if self._ready is None: return None
+            if self._shown is not None: self._free.append(self._shown)
+            self._shown, self._ready = self._ready, None
+            self.shown += 1
+            return self._frames[self._shown]
+
+    def stats(self):
+        with self._lock:
+            return {"decoded": self.decoded, "shown": self.shown, "dropped": self.dropped}
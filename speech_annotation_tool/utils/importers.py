@@ -0,0 +1,322 @@
+"""Streaming importers for SRT, WebVTT, Praat TextGrid and ELAN annotations."""
+import html
+import os
+import queue
+import re
+import xml.parsers.expat
+from collections import namedtuple
+
+from .timestamp import format_time
+
+BATCH_LINES = 2000
+READ_CHUNK = 1 << 16
+
+# line is the 1-based line in the source file where the entry starts
+Cue = namedtuple("Cue", "start_ms end_ms text line")
+ImportIssue = namedtuple("ImportIssue", "line message")
+
+FORMATS = {".srt": "srt", ".vtt": "vtt", ".textgrid": "textgrid", ".eaf": "eaf"}
+FILE_FILTER = ("Annotations (*.srt *.vtt *.TextGrid *.textgrid *.eaf);;SubRip (*.srt);;WebVTT (*.vtt);;"
+               "Praat TextGrid (*.TextGrid *.textgrid);;ELAN (*.eaf);;All Files (*)")
+
+# SRT "00:00:01,000" and WebVTT "00:01.000" (hours optional) cue times
+_CUE_TIME = r'(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})'
+_TIMING_RE = re.compile(r'\s*' + _CUE_TIME + r'\s*-->\s*' + _CUE_TIME + r'(?:\s|$)')
+_TAG_RE = re.compile(r'<[^>]*>')
+_FRACTION_SCALE = (0, 100, 10, 1)
+
+
+class ImportFormatError(ValueError):
+    """The file isn't in a format that can be imported."""
+
+
+def detect_format(file_path):
+    """Import format ("srt", "vtt", "textgrid" or "eaf") for a file name."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in FORMATS:
+        raise ImportFormatError(f"Unsupported annotation format: {extension or os.path.basename(file_path)}")
+    return FORMATS[extension]
+
+
+def segment_line(cue):
+    """The transcript line for a cue."""
+    return f"[{format_time(cue.start_ms)}]-[{format_time(cue.end_ms)}] {cue.text}"
+
+
+def iter_entries(file_path, fmt=None, tier=None):
+    """Yields the Cues and ImportIssues of a file, in file order."""
+    fmt = fmt or detect_format(file_path)
+    if fmt == "eaf":
+        with open(file_path, "rb") as file:
+            yield from _eaf_entries(file, tier)
+        return
+    with open(file_path, "r", encoding="utf-8-sig", errors="replace", newline=None) as file:
+        if fmt == "srt": yield from _cue_entries(file, webvtt=False)
+        elif fmt == "vtt": yield from _cue_entries(file, webvtt=True)
+        elif fmt == "textgrid": yield from _textgrid_entries(file, tier)
+        else: raise ImportFormatError(f"Unsupported annotation format: {fmt}")
+
+
+def iter_batches(file_path, fmt=None, tier=None, batch_lines=BATCH_LINES):
+    """Yields (transcript lines, issues) batches of up to batch_lines lines each."""
+    lines, issues = [], []
+    for entry in iter_entries(file_path, fmt, tier):
+        if isinstance(entry, ImportIssue):
+            issues.append(entry)
+            continue
+        if entry.end_ms < entry.start_ms:
+            issues.append(ImportIssue(entry.line, "ends before it starts (imported as is)"))
+        lines.append(segment_line(entry))
+        if len(lines) >= batch_lines:
+            yield lines, issues
+            lines, issues = [], []
+    if lines or issues: yield lines, issues
+
+
+def feed_batches(file_path, out, cancel, fmt=None, tier=None, batch_lines=BATCH_LINES):
+    """Puts the iter_batches() of a file on the bounded queue `out`, blocking
+    while it is full, followed by None, or by the exception that stopped the
+    import. Returns early once `cancel` (a threading.Event) is set."""
+    end = None
+    try:
+        for batch in iter_batches(file_path, fmt, tier, batch_lines):
+            if not _put(out, batch, cancel): return
+    except Exception as e:  # Handed to the consumer with the batches read so far
+        end = e
+    _put(out, end, cancel)
+
+
+def _put(out, item, cancel):
+    while not cancel.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _cue_ms(hours, minutes, seconds, fraction):
+    return ((int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)) * 1000
+            + int(fraction) * _FRACTION_SCALE[len(fraction)])
+
+
+def _cue_text(lines, markup=False):
+    """One transcript line for the (possibly multi-line) text of a cue, without
+    the subtitle markup (<i>, <v Speaker>, &amp;) if markup is set."""
+    text = " ".join(line.strip() for line in lines if line.strip())
+    return html.unescape(_TAG_RE.sub("", text)) if markup else text
+
+
+# --- SRT and WebVTT ---
+def _cue_entries(file, webvtt):
+    """Cues are blocks separated by blank lines: an optional identifier, the
+    "start --> end" timing line and the text."""
+    block, block_line = [], 0
+    number = 0
+    for number, line in enumerate(file, 1):
+        line = line.rstrip("\n")
+        if number == 1 and webvtt:
+            if not line.startswith("WEBVTT"):
+                yield ImportIssue(1, "missing WEBVTT header")
+            else:
+                block, block_line = [None], 1   # The header block (with any metadata) is not a cue
+                continue
+        if line.strip():
+            if not block: block_line = number
+            block.append(line)
+            continue
+        if block: yield from _cue_block(block, block_line, webvtt)
+        block = []
+    if block: yield from _cue_block(block, block_line, webvtt)
+
+
+def _cue_block(block, first_line, webvtt):
+    if block[0] is None: return
+    if webvtt and block[0].split(None, 1)[0] in ("NOTE", "STYLE", "REGION"): return
+    for offset, line in enumerate(block[:2]):
+        match = _TIMING_RE.match(line)
+        if match: break
+    else:
+        yield ImportIssue(first_line, f"no cue timing in {block[0][:40]!r}")
+        return
+    groups = match.groups()
+    yield Cue(_cue_ms(*groups[:4]), _cue_ms(*groups[4:]), _cue_text(block[offset + 1:], markup=True),
+              first_line + offset)
+
+
+# --- Praat TextGrid ---
+# Praat reads a text file as a sequence of numbers, quoted strings and <flags>
+# and skips everything else (the "xmin =" labels of the long form), so one
+# tokenizer reads both the long and the short ("short text file") form.
+_TOKEN_RE = re.compile(r'"|<[a-z]+>|\[\d*\]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|!.*$')
+
+
+def _textgrid_tokens(file):
+    """Yields (line, token): floats for numbers, str for strings and flags."""
+    string, string_line = None, 0
+    for number, line in enumerate(file, 1):
+        position = 0
+        if string is not None:
+            # Inside a multi-line string: "" is an escaped quote
+            position = _string_end(line, 0)
+            if position < 0:
+                string.append(line)
+                continue
+            string.append(line[:position - 1])
+            yield string_line, "".join(string).replace('""', '"')
+            string = None
+        while True:
+            match = _TOKEN_RE.search(line, position)
+            if not match: break
+            token = match.group()
+            if token == '"':
+                end = _string_end(line, match.end())
+                if end < 0:
+                    string, string_line = [line[match.end():]], number
+                    break
+                yield number, line[match.end():end - 1].replace('""', '"')
+                position = end
+                continue
+            position = match.end()
+            if token[0] in "[!": continue        # Item indexes and comments
+            if token[0] == "<": yield number, token
+            else: yield number, float(token)
+
+
+def _string_end(line, position):
+    """Index just past the closing quote of a string starting at position, or -1."""
+    while True:
+        quote = line.find('"', position)
+        if quote < 0: return -1
+        if line.startswith('""', quote):
+            position = quote + 2
+            continue
+        return quote + 1
+
+
+class _TextGridError(Exception):
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+def _textgrid_entries(file, tier_name):
+    """A TextGrid is read by position, so reading stops at the first value of the wrong kind."""
+    tokens = _textgrid_tokens(file)
+
+    def take(kind, what):
+        for line, token in tokens:
+            if isinstance(token, kind): return line, token
+            raise _TextGridError(line, f"expected {what}")
+        raise _TextGridError(None, f"file ends before {what}")
+
+    try:
+        _line, file_type = take(str, "the file type")
+        _line, object_class = take(str, "the object class")
+        if file_type != "ooTextFile" or object_class != "TextGrid":
+            raise _TextGridError(1, f"not a TextGrid text file ({file_type!r}, {object_class!r})")
+        take(float, "xmin")
+        take(float, "xmax")
+        _line, flag = take(str, "<exists>")
+        tier_count = take(float, "the tier count")[1] if flag == "<exists>" else 0
+        found = False
+        for _ in range(int(tier_count)):
+            _line, tier_class = take(str, "a tier class")
+            _line, name = take(str, "a tier name")
+            take(float, "the tier xmin")
+            take(float, "the tier xmax")
+            _line, size = take(float, "the interval count")
+            wanted = (not found and tier_class == "IntervalTier"
+                      and (tier_name is None or name == tier_name))
+            found = found or wanted
+            for _ in range(int(size)):
+                if tier_class == "IntervalTier":
+                    line, start = take(float, "an interval start")
+                    _line, end = take(float, "an interval end")
+                    _line, text = take(str, "an interval text")
+                    if wanted and text.strip():
+                        yield Cue(int(round(start * 1000)), int(round(end * 1000)), _cue_text(text.splitlines()), line)
+                else:
+                    take(float, "a point time")
+                    take(str, "a point mark")
+            if wanted: return              # The rest of the file is other tiers
+    except _TextGridError as e:
+        yield ImportIssue(e.line or 0, str(e))
+        return
+    if not found:
+        yield ImportIssue(0, f"no interval tier named {tier_name!r}" if tier_name else "no interval tier")
+
+
+# --- ELAN ---
+class _EafReader:
+    """expat handlers collecting the cues of one tier; entries() drains them after each chunk."""
+
+    def __init__(self, parser, tier_name):
+        self.parser = parser
+        self.tier_name = tier_name
+        self.time_slots = {}             # TIME_SLOT_ID -> ms, or None for unaligned slots
+        self.tier = None                 # TIER_ID of the imported tier, once chosen
+        self.in_tier = None
+        self.annotation = None           # [line, ref1, ref2] of the current aligned annotation
+        self.text = None                 # Text parts of its ANNOTATION_VALUE
+        self.pending = []
+
+    def start(self, name, attributes):
+        if name == "TIME_SLOT":
+            value = attributes.get("TIME_VALUE")
+            self.time_slots[attributes.get("TIME_SLOT_ID")] = int(value) if value and value.isdigit() else None
+        elif name == "TIER":
+            self.in_tier = attributes.get("TIER_ID")
+        elif name == "ALIGNABLE_ANNOTATION":
+            if self.tier is None and (self.tier_name is None or self.in_tier == self.tier_name):
+                self.tier = self.in_tier
+            if self.in_tier == self.tier:
+                self.annotation = [self.parser.CurrentLineNumber,
+                                   attributes.get("TIME_SLOT_REF1"), attributes.get("TIME_SLOT_REF2")]
+        elif name == "ANNOTATION_VALUE" and self.annotation is not None:
+            self.text = []
+
+    def end(self, name):
+        if name == "TIER":
+            self.in_tier = None
+        elif name == "ANNOTATION_VALUE" and self.text is not None:
+            self.annotation.append("".join(self.text))
+            self.text = None
+        elif name == "ALIGNABLE_ANNOTATION" and self.annotation is not None:
+            line, ref1, ref2, *text = self.annotation
+            self.annotation = None
+            start, end = self.time_slots.get(ref1), self.time_slots.get(ref2)
+            if start is None or end is None:
+                missing = ref1 if start is None else ref2
+                self.pending.append(ImportIssue(line, f"time slot {missing} is unaligned or missing"))
+            else:
+                self.pending.append(Cue(start, end, _cue_text("".join(text).splitlines()), line))
+
+    def characters(self, data):
+        if self.text is not None: self.text.append(data)
+
+    def entries(self):
+        pending, self.pending = self.pending, []
+        return pending
+
+
+def _eaf_entries(file, tier_name):
+    parser = xml.parsers.expat.ParserCreate()
+    reader = _EafReader(parser, tier_name)
+    parser.StartElementHandler = reader.start
+    parser.EndElementHandler = reader.end
+    parser.CharacterDataHandler = reader.characters
+    try:
+        while True:
+            chunk = file.read(READ_CHUNK)
+            parser.Parse(chunk, not chunk)
+            yield from reader.entries()
+            if not chunk: break
+    except xml.parsers.expat.ExpatError as e:
+        yield from reader.entries()
+        yield ImportIssue(e.lineno, f"not valid XML ({xml.parsers.expat.errors.messages[e.code]}); import stopped")
+        return
+    if reader.tier is None:
+        yield ImportIssue(0, f"no tier named {tier_name!r} with aligned annotations" if tier_name
+                          else "no tier with aligned annotations")
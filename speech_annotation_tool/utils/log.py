@@ -0,0 +1,153 @@
+"""Application logging: levels, lazy formatting, ring buffer and async file."""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import deque
+
+ROOT_LOGGER = "annotime"
+LOG_FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s [%(threadName)s] %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_RING_CAPACITY = 5000
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+
+def get_logger(name):
+    """Returns a child of the application logger, e.g. get_logger(__name__)."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class lazy:
+    """Log argument evaluated only if the record is formatted."""
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last ``capacity`` records; formatting is deferred to dump time."""
+
+    def __init__(self, capacity=DEFAULT_RING_CAPACITY):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self):
+        lines = []
+        for record in list(self.records):
+            try:
+                lines.append(self.format(record))
+            except Exception as e:
+                lines.append(f"<unformattable record {record.name}: {e}>")
+        return lines
+
+
+class _Logging:
+    """Handlers installed by setup_logging."""
+
+    def __init__(self):
+        self.ring = None
+        self.listener = None
+        self.file_path = None
+        self.lock = threading.Lock()
+
+
+_state = _Logging()
+
+
+def level_from_env(default=logging.INFO):
+    name = os.environ.get("ANNOTIME_LOG_LEVEL", "").strip().upper()
+    if not name: return default
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else default
+
+
+def setup_logging(log_dir=None, level=None, console_level=logging.WARNING,
+                  ring_capacity=DEFAULT_RING_CAPACITY, max_bytes=DEFAULT_MAX_BYTES,
+                  backup_count=DEFAULT_BACKUP_COUNT):
+    """Installs the ring buffer, console and (if log_dir is given) async file handlers.
+
+    Safe to call more than once; later calls only change the level.
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level if level is not None else level_from_env())
+    with _state.lock:
+        if _state.ring is not None:
+            return root
+        formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+        root.propagate = False
+
+        _state.ring = RingBufferHandler(ring_capacity)
+        _state.ring.setFormatter(formatter)
+        root.addHandler(_state.ring)
+
+        console = logging.StreamHandler()
+        console.setLevel(console_level)
+        console.setFormatter(formatter)
+
+        handlers = [console]
+        file_error = None
+        if log_dir:
+            try:
+                os.makedirs(log_dir, exist_ok=True)
+                _state.file_path = os.path.join(log_dir, "annotime.log")
+                file_handler = logging.handlers.RotatingFileHandler(
+                    _state.file_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+                file_handler.setFormatter(formatter)
+                handlers.append(file_handler)
+            except OSError as e:
+                _state.file_path = None
+                file_error = e
+
+        # Console and file writes happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _state.listener = logging.handlers.QueueListener(log_queue, *handlers,
+                                                         respect_handler_level=True)
+        _state.listener.start()
+        atexit.register(shutdown_logging)
+    if file_error is not None:
+        root.warning("Could not open log file in %s: %s", log_dir, file_error)
+    return root
+
+
+def shutdown_logging():
+    """Flushes pending records to the file and stops the writer thread."""
+    with _state.lock:
+        listener, _state.listener = _state.listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def set_level(level):
+    logging.getLogger(ROOT_LOGGER).setLevel(level)
+
+
+def log_file_path():
+    return _state.file_path
+
+
+def recent_lines():
+    """Formatted records currently held in the ring buffer, oldest first."""
+    return _state.ring.lines() if _state.ring is not None else []
+
+
+def dump_recent(path):
+    """Writes the ring buffer to ``path``. Returns the number of lines written."""
+    lines = recent_lines()
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines))
+        if lines: file.write("\n")
+    return len(lines)
@@ -0,0 +1,298 @@
+"""Incremental JSONL manifest of every segment in a transcript corpus.
+
+Headless: python -m utils.manifest CORPUS_DIR -o manifest.jsonl [--cache DIR] [--jobs N]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+
+from .segments import parse_segments
+from .project import PROJECT_SUFFIX, read_project, resolve_path, ProjectError
+from .media_cache import is_remote
+from .log import get_logger
+
+log = get_logger(__name__)
+
+TRANSCRIPT_SUFFIX = ".txt"
+MEDIA_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg", ".opus",
+                    ".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm")
+BATCH_SIZE = 256
+CACHE_VERSION = 1
+_HASH_BLOCK = 1024 * 1024
+
+
+def default_cache_dir(output_path):
+    return os.path.abspath(output_path) + ".cache"
+
+
+# --- Walking the corpus ---
+def walk_corpus(corpus_dir):
+    """Yields (folder, sorted file names) in a stable order, skipping hidden folders."""
+    for directory, subdirs, files in os.walk(corpus_dir):
+        subdirs[:] = sorted(d for d in subdirs if not d.startswith("."))
+        yield directory, sorted(files)
+
+
+def iter_transcript_paths(corpus_dir):
+    """Yields the path of every transcript under corpus_dir in a stable order."""
+    for directory, files in walk_corpus(corpus_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() == TRANSCRIPT_SUFFIX:
+                yield os.path.join(directory, name)
+
+
+def iter_transcripts(corpus_dir):
+    """Yields (transcript path, media path or "") in a stable order, one folder at a time."""
+    for directory, files in walk_corpus(corpus_dir):
+        names = set(files)
+        media_by_stem = {}
+        for name in files:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in MEDIA_EXTENSIONS and stem not in media_by_stem:
+                media_by_stem[stem] = name
+        for name in files:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() != TRANSCRIPT_SUFFIX: continue
+            media_path = None
+            if stem + PROJECT_SUFFIX in names:
+                media_path = _project_media(os.path.join(directory, stem + PROJECT_SUFFIX))
+            if media_path is None and stem in media_by_stem:
+                media_path = os.path.join(directory, media_by_stem[stem])
+            yield os.path.join(directory, name), media_path or ""
+
+
+def _project_media(sidecar):
+    """The media a project file names (resolved), or None."""
+    try:
+        return resolve_path(sidecar, read_project(sidecar).get("media"))
+    except (OSError, ProjectError):
+        return None
+
+
+def _file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# --- Processing one transcript (in a pool process) ---
+def _process(task):
+    """Writes a transcript's manifest fragment.
+
+    Returns (path, hash, segment count, media found), with a count of None
+    when the content is unchanged and the cached fragment still applies.
+    """
+    path, media_path, fragment_path, stored_hash = task
+    content_hash = _file_hash(path)
+    if content_hash == stored_hash and os.path.exists(fragment_path):
+        return path, content_hash, None, None
+    count = 0
+    part_path = fragment_path + ".part"
+    with open(part_path, "w", encoding="utf-8") as out:
+        if media_path:
+            if not is_remote(media_path): media_path = os.path.abspath(media_path)
+            transcript_path = os.path.abspath(path)
+            with open(path, "r", encoding="utf-8", errors="replace") as file:
+                text = file.read()
+            for segment in parse_segments(text, skip_empty=True):
+                out.write(json.dumps({"media_path": media_path,
+                                      "offset": segment.start_ms / 1000,
+                                      "duration": (segment.end_ms - segment.start_ms) / 1000,
+                                      "text": segment.text.strip(),
+                                      "transcript_path": transcript_path,
+                                      "line": segment.line}, ensure_ascii=False))
+                out.write("\n")
+                count += 1
+    os.replace(part_path, fragment_path)
+    return path, content_hash, count, bool(media_path)
+
+
+# --- The cache ---
+class _ManifestCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.fragment_dir = os.path.join(cache_dir, "fragments")
+        os.makedirs(self.fragment_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        version = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) != CACHE_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS files")
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(CACHE_VERSION),))
+        self.db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, "
+                        "mtime_ns INTEGER, hash TEXT, media_key TEXT, segments INTEGER, has_media INTEGER, "
+                        "run INTEGER)")
+        self.db.commit()
+
+    def fragment_path(self, path):
+        key = hashlib.blake2b(path.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.fragment_dir, key + ".jsonl")
+
+    def lookup(self, path):
+        return self.db.execute("SELECT size, mtime_ns, hash, media_key FROM files WHERE path = ?",
+                               (path,)).fetchone()
+
+    def close(self):
+        self.db.close()
+
+
+# --- Building ---
+class LazyPool:
+    """Process pool for fn that is only started once there is work for it (none on an up-to-date rebuild).
+
+    map() yields results in completion order.
+    """
+
+    def __init__(self, fn, workers, chunksize=8):
+        self.fn = fn
+        self.workers = workers
+        self.chunksize = chunksize
+        self._pool = None
+
+    def map(self, tasks):
+        if self.workers == 1 or len(tasks) < 2: return map(self.fn, tasks)
+        if self._pool is None:
+            self._pool = multiprocessing.get_context("spawn").Pool(min(self.workers, len(tasks)))
+        return self._pool.imap_unordered(self.fn, tasks, chunksize=self.chunksize)
+
+    def close(self):
+        if self._pool is None: return
+        self._pool.close()
+        self._pool.join()
+
+
+def build_manifest(corpus_dir, output_path, cache_dir=None, workers=None, progress=None):
+    """Writes the manifest of every transcript under corpus_dir, reusing cached results.
+
+    progress(files_seen, files_reprocessed) is called after each batch.
+    Returns a dict of counts.
+    """
+    corpus_dir = os.path.abspath(corpus_dir)
+    cache = _ManifestCache(cache_dir or default_cache_dir(output_path))
+    workers = max(1, workers or os.cpu_count() or 1)
+    run = time.time_ns()
+    stats = {"transcripts": 0, "reprocessed": 0, "reused": 0, "segments": 0,
+             "without_media": 0, "removed": 0}
+    pool = LazyPool(_process, workers)
+    try:
+        batch = []
+        for path, media_key in iter_transcripts(corpus_dir):
+            batch.append((path, media_key))
+            if len(batch) >= BATCH_SIZE:
+                _run_batch(cache, batch, run, pool, stats)
+                batch = []
+                if progress: progress(stats["transcripts"], stats["reprocessed"])
+        if batch: _run_batch(cache, batch, run, pool, stats)
+        if progress: progress(stats["transcripts"], stats["reprocessed"])
+    finally:
+        pool.close()
+
+    try:
+        _write_output(cache, run, output_path, stats)
+        _remove_stale(cache, run, corpus_dir, stats)
+    finally:
+        cache.close()
+    log.info("Manifest %s: %d transcripts (%d reprocessed), %d segments",
+             output_path, stats["transcripts"], stats["reprocessed"], stats["segments"])
+    return stats
+
+
+def _run_batch(cache, batch, run, pool, stats):
+    tasks, stats_by_path = [], {}
+    for path, media_key in batch:
+        try:
+            info = os.stat(path)
+        except OSError as e:
+            log.warning("Skipping %s: %s", path, e)
+            continue
+        stats["transcripts"] += 1
+        stats_by_path[path] = (info.st_size, info.st_mtime_ns, media_key)
+        row = cache.lookup(path)
+        fragment_path = cache.fragment_path(path)
+        if (row and row[0] == info.st_size and row[1] == info.st_mtime_ns and row[3] == media_key
+                and os.path.exists(fragment_path)):
+            cache.db.execute("UPDATE files SET run = ? WHERE path = ?", (run, path))
+            stats["reused"] += 1
+            continue
+        stored_hash = row[2] if row and row[3] == media_key else None
+        tasks.append((path, media_key, fragment_path, stored_hash))
+
+    for path, content_hash, count, has_media in pool.map(tasks):
+        size, mtime_ns, media_key = stats_by_path[path]
+        if count is None:      # Touched, content unchanged
+            cache.db.execute("UPDATE files SET size = ?, mtime_ns = ?, run = ? WHERE path = ?",
+                             (size, mtime_ns, run, path))
+            stats["reused"] += 1
+        else:
+            cache.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (path, size, mtime_ns, content_hash, media_key, count,
+                              int(has_media), run))
+            stats["reprocessed"] += 1
+    cache.db.commit()
+
+
+def _write_output(cache, run, output_path, stats):
+    part_path = output_path + ".part"
+    with open(part_path, "w", encoding="utf-8") as out:
+        rows = cache.db.execute("SELECT path, segments, has_media FROM files WHERE run = ? ORDER BY path", (run,))
+        for path, segments, has_media in rows:
+            if not has_media or not segments:
+                if not has_media: stats["without_media"] += 1
+                continue
+            stats["segments"] += segments
+            with open(cache.fragment_path(path), "r", encoding="utf-8") as fragment:
+                while True:
+                    block = fragment.read(_HASH_BLOCK)
+                    if not block: break
+                    out.write(block)
+    os.replace(part_path, output_path)
+
+
+def _remove_stale(cache, run, corpus_dir, stats):
+    """Forgets transcripts under corpus_dir that were deleted (or moved) since the last build.
+
+    Entries of other corpora sharing the cache are left alone.
+    """
+    prefix = os.path.join(corpus_dir, "")
+    stale = cache.db.execute("SELECT path FROM files WHERE run != ? AND substr(path, 1, ?) = ?",
+                             (run, len(prefix), prefix)).fetchall()
+    for (path,) in stale:
+        try:
+            os.remove(cache.fragment_path(path))
+        except OSError:
+            pass
+    cache.db.executemany("DELETE FROM files WHERE path = ?", stale)
+    cache.db.commit()
+    stats["removed"] = len(stale)
+
+
+# --- Command line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a JSONL segment manifest of a transcript corpus")
+    parser.add_argument("corpus", help="folder searched (recursively) for .txt transcripts")
+    parser.add_argument("-o", "--output", default="manifest.jsonl", help="manifest to write")
+    parser.add_argument("--cache", help="cache folder (default: <output>.cache)")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    stats = build_manifest(args.corpus, args.output, args.cache, args.jobs or None,
+                           progress=lambda seen, done: print(f"\r{seen} transcripts, {done} reprocessed",
+                                                             end="", file=sys.stderr, flush=True))
+    print(file=sys.stderr)
+    print(f"{stats['segments']} segments from {stats['transcripts']} transcripts "
+          f"({stats['reprocessed']} reprocessed, {stats['reused']} cached, "
+          f"{stats['without_media']} without media, {stats['removed']} removed) "
+          f"in {time.perf_counter() - started:.1f} s -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
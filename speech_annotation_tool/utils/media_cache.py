@@ -0,0 +1,474 @@
+"""Local read-ahead block cache for media on HTTP servers and network shares."""
+import hashlib
+import http.client
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+BLOCK_SIZE = 1024 * 1024
+READAHEAD_BLOCKS = 8
+MAX_FETCH_BLOCKS = 8            # Largest single range request
+PREFETCH_BLOCKS_AROUND = 1      # Blocks fetched on each side of a prefetched time
+MAX_PREFETCH_TIMES = 64
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+NETWORK_TIMEOUT_S = 15
+SEND_CHUNK = 256 * 1024
+CACHE_FORMAT_VERSION = 1
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class MediaCacheError(OSError):
+    """Remote media can't be reached or changed while it was being read."""
+
+
+def is_remote(path):
+    """True for media that is played through the cache (URLs and UNC paths)."""
+    if not path: return False
+    lowered = path.lower()
+    return lowered.startswith(("http://", "https://")) or path.startswith(("\\\\", "//"))
+
+
+def media_exists(path):
+    """os.path.exists for local files; remote media is assumed to exist."""
+    return bool(path) and (is_remote(path) or os.path.exists(path))
+
+
+# --- Sources ---
+class _HttpSource:
+    """Range reads from an HTTP server, one keep-alive connection per thread."""
+
+    def __init__(self, url):
+        self.url = url
+        parts = urllib.parse.urlsplit(url)
+        self._https = parts.scheme.lower() == "https"
+        self._host = parts.netloc
+        self._target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        self._local = threading.local()
+
+    def stat(self):
+        """(size, validator) of the remote file."""
+        response, _body = self._request("HEAD")
+        if response.status != 200:
+            raise MediaCacheError(f"{self.url}: HTTP {response.status} {response.reason}")
+        size = int(response.getheader("Content-Length", "-1"))
+        if size < 0: raise MediaCacheError(f"{self.url}: the server did not report the size")
+        if response.getheader("Accept-Ranges", "").lower() != "bytes":
+            log.warning("%s does not advertise range requests; trying anyway", self.url)
+        return size, response.getheader("ETag") or response.getheader("Last-Modified") or ""
+
+    def read(self, offset, length):
+        response, body = self._request("GET", {"Range": f"bytes={offset}-{offset + length - 1}"})
+        if response.status != 206:
+            raise MediaCacheError(f"{self.url}: expected a partial response, got HTTP {response.status}")
+        return body
+
+    def _request(self, method, headers=None):
+        for attempt in (1, 2):     # Retry once on a connection the server has closed
+            connection = self._connection()
+            try:
+                connection.request(method, self._target, headers=headers or {})
+                response = connection.getresponse()
+                return response, response.read()
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                self._local.connection = None
+                if attempt == 2: raise MediaCacheError(f"{self.url}: {e}") from e
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            connection = self._local.connection = cls(self._host, timeout=NETWORK_TIMEOUT_S)
+        return connection
+
+
+class _FileSource:
+    """Reads from a (slow) file system path, e.g. a network share."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def stat(self):
+        info = os.stat(self.path)
+        return info.st_size, str(info.st_mtime_ns)
+
+    def read(self, offset, length):
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return file.read(length)
+
+
+def _source_for(path):
+    return _HttpSource(path) if path.lower().startswith(("http://", "https://")) else _FileSource(path)
+
+
+# --- One cached media file ---
+class CachedMedia:
+    """Block-cached view of one remote file. Thread-safe."""
+
+    def __init__(self, cache, key, source, size, validator):
+        self.cache = cache
+        self.key = key
+        self.source = source
+        self.size = size
+        self.block_count = (size + BLOCK_SIZE - 1) // BLOCK_SIZE
+        self.name = os.path.basename(urllib.parse.urlsplit(source.url).path
+                                     if isinstance(source, _HttpSource) else source.path.replace("\\", "/"))
+        self.last_offset = 0             # Where the player last read, for prefetch priority
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._in_flight = {}             # Block -> Event set once fetched (or failed)
+        data_path, map_path, meta_path = cache._paths(key)
+        present = cache._load_map(key, size, validator)
+        if present is None:
+            present = bytearray(self.block_count)
+            with open(data_path, "wb") as file:
+                file.truncate(size)      # Sparse where the file system allows
+            with open(map_path, "wb") as file:
+                file.write(present)
+            with open(meta_path, "w", encoding="utf-8") as file:
+                json.dump({"version": CACHE_FORMAT_VERSION, "source": cache._source_id(source),
+                           "size": size, "validator": validator, "block_size": BLOCK_SIZE}, file)
+        self._present = present
+        self._data = open(data_path, "r+b")
+        self._map = open(map_path, "r+b")
+
+    def cached_fraction(self):
+        return sum(self._present) / self.block_count if self.block_count else 1.0
+
+    def read(self, offset, length):
+        """Bytes offset..offset+length (clipped to the file), fetching what is missing."""
+        length = max(0, min(length, self.size - offset))
+        if length == 0: return b""
+        first, last = offset // BLOCK_SIZE, (offset + length - 1) // BLOCK_SIZE
+        self.last_offset = offset
+        self._ensure(first, last)
+        self.cache._submit_readahead(self, last + 1, last + READAHEAD_BLOCKS)
+        with self._file_lock:
+            self._data.seek(offset)
+            return self._data.read(length)
+
+    def prefetch_block(self, block):
+        if 0 <= block < self.block_count and not self._present[block]:
+            self._ensure(block, block)
+
+    def close(self):
+        with self._file_lock:
+            self._data.close()
+            self._map.close()
+
+    # --- Fetching ---
+    def _ensure(self, first, last):
+        """Makes blocks first..last present, fetching missing runs or waiting for them."""
+        block = first
+        while block <= last:
+            if self._present[block]:
+                block += 1
+                continue
+            with self._lock:
+                event = self._in_flight.get(block)
+                if event is None:
+                    # Claim a run of missing blocks nobody is fetching yet
+                    end = block
+                    while (end + 1 <= last and end + 1 - block < MAX_FETCH_BLOCKS
+                           and not self._present[end + 1] and end + 1 not in self._in_flight):
+                        end += 1
+                    event = threading.Event()
+                    for index in range(block, end + 1):
+                        self._in_flight[index] = event
+                    claimed = True
+                else:
+                    claimed = False
+            if claimed:
+                self._fetch(block, end, event)
+            else:
+                event.wait(NETWORK_TIMEOUT_S * 2)
+            if not self._present[block]:
+                raise MediaCacheError(f"Could not fetch block {block} of {self.name}")
+
+    def _fetch(self, first, last, event):
+        try:
+            offset = first * BLOCK_SIZE
+            length = min(self.size, (last + 1) * BLOCK_SIZE) - offset
+            started = time.perf_counter()
+            data = self.source.read(offset, length)
+            if len(data) != length:
+                raise MediaCacheError(f"{self.name} returned {len(data)} of {length} bytes")
+            with self._file_lock:
+                self._data.seek(offset)
+                self._data.write(data)
+                self._data.flush()
+                self._map.seek(first)
+                self._map.write(b"\x01" * (last - first + 1))
+                self._map.flush()
+                for block in range(first, last + 1):
+                    self._present[block] = 1
+            log.debug("Fetched %s blocks %d-%d in %.0f ms", self.name, first, last,
+                      (time.perf_counter() - started) * 1000)
+            self.cache._added(length)
+        except (OSError, ValueError) as e:
+            log.warning("Fetching %s blocks %d-%d failed: %s", self.name, first, last, e)
+        finally:
+            with self._lock:
+                for block in range(first, last + 1):
+                    self._in_flight.pop(block, None)
+            event.set()
+
+
+# --- The cache and its local server ---
+class MediaCache:
+    """Serves remote media to the player from a size-capped on-disk block cache."""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, workers=2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._media = {}                 # Token -> CachedMedia
+        self._tokens = {}                # Source path/URL -> token
+        self._readahead = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="media-readahead")
+        self._prefetch = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-prefetch")
+        self._prefetch_generation = {}   # Token -> latest prefetch request
+        self._added_bytes = 0
+        self._server = None
+        self._closed = False
+
+    def local_url(self, path):
+        """URL on 127.0.0.1 that plays path through the cache. Raises MediaCacheError."""
+        if self._closed: raise MediaCacheError("The media cache has been shut down")
+        self._start_server()
+        with self._lock:
+            token = self._tokens.get(path)
+        if token is None:
+            media = self._open(path)
+            token = media.key
+            with self._lock:
+                self._media[token] = media
+                self._tokens[path] = token
+        media = self._media[token]
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{token}/{urllib.parse.quote(media.name or 'media')}"
+
+    def media(self, path):
+        """The CachedMedia of a path opened with local_url, or None."""
+        with self._lock:
+            token = self._tokens.get(path)
+            return self._media.get(token)
+
+    def prefetch_times(self, path, times_ms, duration_ms):
+        """Fetches the blocks around media times in the background, nearest the playhead first.
+
+        Replaces the previous prefetch request for the same media.
+        """
+        media = self.media(path)
+        if media is None or duration_ms <= 0 or not times_ms: return
+        bytes_per_ms = media.size / duration_ms
+        current = media.last_offset
+        offsets = sorted({int(t * bytes_per_ms) for t in times_ms if 0 <= t <= duration_ms},
+                         key=lambda offset: abs(offset - current))[:MAX_PREFETCH_TIMES]
+        blocks = []
+        for offset in offsets:
+            center = offset // BLOCK_SIZE
+            for block in range(center - PREFETCH_BLOCKS_AROUND, center + PREFETCH_BLOCKS_AROUND + 1):
+                if 0 <= block < media.block_count and block not in blocks: blocks.append(block)
+        with self._lock:
+            generation = self._prefetch_generation.get(media.key, 0) + 1
+            self._prefetch_generation[media.key] = generation
+        self._prefetch.submit(self._run_prefetch, media, blocks, generation)
+
+    def shutdown(self):
+        self._closed = True
+        self._readahead.shutdown(wait=False, cancel_futures=True)
+        self._prefetch.shutdown(wait=False, cancel_futures=True)
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            media, self._media, self._tokens = list(self._media.values()), {}, {}
+        for item in media:
+            item.close()
+
+    # --- Internals ---
+    def _open(self, path):
+        source = _source_for(path)
+        try:
+            size, validator = source.stat()
+        except OSError as e:
+            raise MediaCacheError(f"Cannot open {path}: {e}") from e
+        os.makedirs(self.cache_dir, exist_ok=True)
+        key = hashlib.blake2b(self._source_id(source).encode("utf-8"), digest_size=12).hexdigest()
+        self._enforce_cap(extra=size, keep=key)
+        media = CachedMedia(self, key, source, size, validator)
+        log.info("Playing %s through the media cache (%.0f%% cached)", path, media.cached_fraction() * 100)
+        return media
+
+    @staticmethod
+    def _source_id(source):
+        return source.url if isinstance(source, _HttpSource) else os.path.normcase(source.path)
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".data", base + ".map", base + ".json"
+
+    def _load_map(self, key, size, validator):
+        """Block map of a cache entry that is still valid for this size/validator, else None."""
+        data_path, map_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            if (meta.get("version") != CACHE_FORMAT_VERSION or meta.get("size") != size
+                    or meta.get("validator") != validator or meta.get("block_size") != BLOCK_SIZE
+                    or os.path.getsize(data_path) != size):
+                log.info("Cached media %s is out of date", key)
+                return None
+            with open(map_path, "rb") as file:
+                present = bytearray(file.read())
+            os.utime(meta_path)          # Recently used
+        except (OSError, ValueError):
+            return None
+        block_count = (size + BLOCK_SIZE - 1) // BLOCK_SIZE
+        return present if len(present) == block_count else None
+
+    def _submit_readahead(self, media, first, last):
+        if self._closed: return
+        last = min(last, media.block_count - 1)
+        if first > last or all(media._present[first:last + 1]): return
+        try:
+            self._readahead.submit(self._run_readahead, media, first, last)
+        except RuntimeError:
+            pass   # Shut down
+
+    def _run_readahead(self, media, first, last):
+        try:
+            for block in range(first, last + 1):
+                if self._closed: return
+                if not media._present[block]:
+                    media._ensure(block, min(last, block + MAX_FETCH_BLOCKS - 1))
+        except MediaCacheError as e:
+            log.debug("Read-ahead of %s stopped: %s", media.name, e)
+
+    def _run_prefetch(self, media, blocks, generation):
+        for block in blocks:
+            if self._closed or self._prefetch_generation.get(media.key) != generation: return
+            try:
+                media.prefetch_block(block)
+            except MediaCacheError as e:
+                log.debug("Prefetch of %s stopped: %s", media.name, e)
+                return
+
+    def _added(self, length):
+        with self._lock:
+            self._added_bytes += length
+            check = self._added_bytes >= 64 * BLOCK_SIZE
+            if check: self._added_bytes = 0
+        if check: self._enforce_cap()
+
+    def _enforce_cap(self, extra=0, keep=None):
+        """Deletes the least recently used cached media over the cap (never open ones)."""
+        with self._lock:
+            open_keys = set(self._media) | {keep}
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".map"): continue
+            key = name[:-4]
+            data_path, map_path, meta_path = self._paths(key)
+            try:
+                with open(map_path, "rb") as file:
+                    used_bytes = sum(file.read()) * BLOCK_SIZE
+                entries.append((os.path.getmtime(meta_path), key, used_bytes))
+            except OSError:
+                continue
+        total = extra + sum(used for _mtime, _key, used in entries)
+        for _mtime, key, used in sorted(entries):
+            if total <= self.max_bytes: break
+            if key in open_keys: continue
+            try:
+                for path in self._paths(key):
+                    if os.path.exists(path): os.remove(path)
+                total -= used
+                log.info("Evicted cached media %s (%.0f MB)", key, used / 1e6)
+            except OSError as e:
+                log.debug("Could not evict cached media %s: %s", key, e)
+
+    def _start_server(self):
+        if self._server: return
+        cache = self
+
+        class Handler(_ProxyHandler):
+            media_cache = cache
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="media-cache-server", daemon=True).start()
+        log.info("Media cache serving on port %d", self._server.server_address[1])
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """Answers the player's (range) requests from a CachedMedia."""
+    protocol_version = "HTTP/1.1"
+    media_cache = None
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        token = self.path.lstrip("/").split("/", 1)[0]
+        media = self.media_cache._media.get(token)
+        if media is None:
+            self.send_error(404)
+            return
+        start, end = 0, media.size - 1
+        status = 200
+        match = _RANGE_RE.match(self.headers.get("Range", "").strip())
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                if match.group(2): end = min(end, int(match.group(2)))
+            else:                        # Suffix range: the last N bytes
+                start = max(0, media.size - int(match.group(2)))
+            if start >= media.size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{media.size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Type", mimetypes.guess_type(media.name)[0] or "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206: self.send_header("Content-Range", f"bytes {start}-{end}/{media.size}")
+        self.end_headers()
+        if not send_body: return
+        position = start
+        try:
+            while position <= end:
+                data = media.read(position, min(SEND_CHUNK, end - position + 1))
+                self.wfile.write(data)
+                position += len(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # The player seeks by dropping the connection
+        except MediaCacheError as e:
+            log.warning("Serving %s failed: %s", media.name, e)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        log.debug("media cache: " + format, *args)
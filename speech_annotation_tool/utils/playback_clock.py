@@ -0,0 +1,188 @@
+"""Playback clock that interpolates a PlayerBackend's coarse get_time() between engine updates."""
+import threading
+import time
+
+from .tracing import LatencyHistogram
+
+RESYNC_MS = 1500           # Engine jumps larger than this are seeks, not playback
+DEFAULT_STEP_MS = 250      # Assumed engine update step until one has been seen
+MIN_STEP_MS = 10
+MAX_STEP_MS = 1000
+TIGHT_BOUND_MS = 20        # Updates seen within this long count towards the residual
+SEEK_SETTLE_S = 2.0        # How long to wait for the engine to report a seek target
+MAX_EVENT_LAG_MS = 5000    # Larger apparent input delays mean the event clock was reset
+
+
+class PlaybackClock:
+    """Interpolated time of one player. Thread-safe (engine events may call in)."""
+
+    def __init__(self, player, now=time.monotonic):
+        self.player = player
+        self.now = now
+        self._lock = threading.Lock()
+        self._playing = False
+        self._rate = 1.0
+        self._anchor_ms = -1.0          # Time at _anchor_at (frozen while paused)
+        self._anchor_at = now()
+        self._engine_ms = -1            # Last engine time and when it was last seen
+        self._engine_seen_at = 0.0
+        self._step_ms = DEFAULT_STEP_MS
+        self._seek_target_ms = None
+        self._seek_until = 0.0
+        # Accuracy statistics (see report())
+        self.residual = LatencyHistogram()      # |interpolated - engine| at updates, in us
+        self.residual_sum_ms = 0.0
+        self.engine_lag = LatencyHistogram()    # How far get_time() alone was behind, in us
+        self.resyncs = 0
+        try:
+            player.add_time_listener(self._on_engine_time)
+        except Exception:
+            pass   # Polling in time_ms() still keeps the clock in sync
+
+    # --- Reading ---
+    def time_ms(self, at=None):
+        """Playback time in ms at monotonic time at (default now), or -1 if there is none."""
+        player = self.player
+        if not player.has_media(): return -1
+        engine_ms = player.get_time()
+        if engine_ms < 0: return -1
+        playing = player.is_playing()
+        rate = player.get_rate() or 1.0
+        now = self.now()
+        with self._lock:
+            self._set_transport(playing, rate, now)
+            self._observe(engine_ms, now)
+            estimate = self._predict(now)
+            if self._playing and self._seek_target_ms is None:
+                self.engine_lag.record(max(0.0, estimate - engine_ms) * 1000)
+            if at is not None and at < now:
+                if self._playing and at >= self._anchor_at:
+                    estimate -= (now - at) * 1000.0 * self._rate
+                elif self._playing:
+                    estimate = self._anchor_ms   # Before playback (re)started
+        return max(0, int(round(estimate)))
+
+    def resync(self, time_ms=None):
+        """Restarts interpolation, e.g. after a seek to time_ms (default: the engine time)."""
+        now = self.now()
+        with self._lock:
+            self.resyncs += 1
+            if time_ms is None:
+                self._anchor_ms = float(self._engine_ms)
+                self._seek_target_ms = None
+            else:
+                # The engine keeps reporting the old time until the seek completes
+                self._anchor_ms = float(time_ms)
+                self._seek_target_ms = float(time_ms)
+                self._seek_until = now + SEEK_SETTLE_S
+            self._anchor_at = now
+
+    # --- Accuracy ---
+    def summary(self):
+        count = self.residual.count
+        return {"updates": count, "resyncs": self.resyncs, "engine_step_ms": self._step_ms,
+                "bias_ms": self.residual_sum_ms / count if count else 0.0,
+                "residual": self.residual.summary(), "engine_lag": self.engine_lag.summary()}
+
+    def report(self):
+        """Plain-text accuracy report (milliseconds)."""
+        s = self.summary()
+        lines = [f"{'error':<30} {'count':>7} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"]
+        for label, h in (("interpolated clock (residual)", s["residual"]),
+                         ("get_time() alone (lag)", s["engine_lag"])):
+            lines.append(f"{label:<30} {h['count']:>7} {h['mean_us'] / 1000:>8.2f} "
+                         f"{h['p50_us'] / 1000:>8.2f} {h['p90_us'] / 1000:>8.2f} "
+                         f"{h['p99_us'] / 1000:>8.2f} {h['max_us'] / 1000:>8.2f}")
+        lines.append("")
+        lines.append(f"engine update step: {s['engine_step_ms']:.0f} ms, "
+                     f"residual bias: {s['bias_ms']:+.2f} ms, resyncs: {s['resyncs']}")
+        if not s["updates"]:
+            lines.append(f"No engine update was seen within {TIGHT_BOUND_MS} ms of happening yet "
+                         "(play for a while; polled backends only report them rarely).")
+        return "\n".join(lines)
+
+    # --- Internals (called with the lock held) ---
+    def _on_engine_time(self, time_ms):
+        # May run on an engine thread
+        if time_ms < 0: return
+        with self._lock:
+            self._observe(time_ms, self.now())
+
+    def _predict(self, now):
+        if not self._playing or self._seek_target_ms is not None: return self._anchor_ms
+        return self._anchor_ms + (now - self._anchor_at) * 1000.0 * self._rate
+
+    def _rebase(self, time_ms, now):
+        self._anchor_ms = float(time_ms)
+        self._anchor_at = now
+
+    def _set_transport(self, playing, rate, now):
+        if playing == self._playing and rate == self._rate: return
+        self._rebase(self._predict(now), now)     # Freeze (pause) or restart from here
+        self._playing = playing
+        self._rate = rate
+
+    def _observe(self, engine_ms, now):
+        previous_ms, previous_seen_at = self._engine_ms, self._engine_seen_at
+        self._engine_ms, self._engine_seen_at = engine_ms, now
+        if self._seek_target_ms is not None:
+            if abs(engine_ms - self._seek_target_ms) > 2 * self._step_ms and now < self._seek_until:
+                return                            # Still the time from before the seek
+            self._seek_target_ms = None
+            self._rebase(engine_ms, now)
+            return
+        if previous_ms < 0 or self._anchor_ms < 0:
+            self._rebase(engine_ms, now)
+            return
+        predicted = self._predict(now)
+        if abs(predicted - engine_ms) > max(RESYNC_MS, self._step_ms * 2):
+            self.resyncs += 1                     # Seek or loop the clock did not hear about
+            self._rebase(engine_ms, now)
+            return
+        if not self._playing:
+            if engine_ms != previous_ms: self._rebase(max(predicted, engine_ms), now)
+            return
+        if engine_ms != previous_ms:
+            step = engine_ms - previous_ms
+            if 0 < step <= MAX_STEP_MS:
+                self._step_ms = min(MAX_STEP_MS, max(MIN_STEP_MS, 0.8 * self._step_ms + 0.2 * step))
+            upper = engine_ms + (now - previous_seen_at) * 1000.0 * self._rate
+            if step > 0 and upper - engine_ms <= TIGHT_BOUND_MS:
+                self.residual.record(abs(predicted - engine_ms) * 1000)
+                self.residual_sum_ms += predicted - engine_ms
+        else:
+            upper = engine_ms + self._step_ms * self._rate
+        clamped = min(max(predicted, engine_ms), upper)
+        if clamped != predicted: self._rebase(clamped, now)
+
+
+class InputClock:
+    """Maps input event timestamps (ms, any epoch) to time.monotonic() seconds.
+
+    The offset between the two clocks is taken from the event that arrived
+    with the least delay, so an event handled late (the UI thread was busy)
+    still maps to when the key was actually pressed.
+    """
+
+    def __init__(self, now=time.monotonic):
+        self.now = now
+        self._offset_ms = None
+
+    def monotonic_at(self, timestamp_ms):
+        now = self.now()
+        if not timestamp_ms: return now           # Platform gives no event times
+        offset = now * 1000.0 - timestamp_ms
+        if self._offset_ms is None or offset < self._offset_ms or offset - self._offset_ms > MAX_EVENT_LAG_MS:
+            self._offset_ms = offset
+        return min(now, (timestamp_ms + self._offset_ms) / 1000.0)
+
+
+input_clock = InputClock()
+
+
+def playback_clock(player):
+    """The PlaybackClock of a player backend, created on first use."""
+    clock = getattr(player, "_playback_clock", None)
+    if clock is None:
+        clock = player._playback_clock = PlaybackClock(player)
+    return clock
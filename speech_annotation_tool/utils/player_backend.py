@@ -0,0 +1,153 @@
+"""Player backend protocol shared by the widgets, which never talk to libvlc directly."""
+import os
+
+
+class PlayerState:
+    """Backend-neutral playback states."""
+    NOTHING = "nothing"
+    OPENING = "opening"
+    BUFFERING = "buffering"
+    PLAYING = "playing"
+    PAUSED = "paused"
+    STOPPED = "stopped"
+    ENDED = "ended"
+    ERROR = "error"
+
+    # States in which there is no meaningful playback position
+    IDLE = (NOTHING, STOPPED, ENDED)
+
+
+class PlayerBackend:
+    """Narrow interface of a media player. Times are in milliseconds."""
+    name = "abstract"
+    video_frames = False     # Supports set_video_frame_pool
+
+    # --- Media ---
+    def load(self, path):
+        """Opens a media file (parsing may continue asynchronously). Raises on failure."""
+        raise NotImplementedError
+
+    def unload(self):
+        raise NotImplementedError
+
+    def has_media(self):
+        raise NotImplementedError
+
+    def get_length(self):
+        """Media duration, or <= 0 while unknown."""
+        raise NotImplementedError
+
+    # --- Transport ---
+    def play(self):
+        """Starts playback; returns False if it could not be started."""
+        raise NotImplementedError
+
+    def pause(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def is_playing(self):
+        raise NotImplementedError
+
+    def get_state(self):
+        """One of the PlayerState values."""
+        raise NotImplementedError
+
+    def get_time(self):
+        """Current playback time, or -1 when there is none."""
+        raise NotImplementedError
+
+    def set_time(self, time_ms):
+        raise NotImplementedError
+
+    def set_position(self, ratio):
+        """Seeks to a fraction (0.0-1.0) of the media length."""
+        raise NotImplementedError
+
+    def is_seekable(self):
+        raise NotImplementedError
+
+    def set_loop(self, start_ms, end_ms):
+        """Loops start..end inside the engine, independent of the UI thread.
+
+        Returns False if the backend can't, in which case the UI loops by seeking.
+        """
+        return False
+
+    def clear_loop(self):
+        pass
+
+    def set_rate(self, rate):
+        raise NotImplementedError
+
+    def get_rate(self):
+        raise NotImplementedError
+
+    # --- Audio/video output ---
+    def set_volume(self, volume):
+        raise NotImplementedError
+
+    def set_mute(self, muted):
+        raise NotImplementedError
+
+    def set_video_window(self, window_id):
+        """Renders video into the native window with this id (no-op if unsupported)."""
+        raise NotImplementedError
+
+    def set_video_frame_pool(self, pool):
+        """Decodes video into a FramePool instead of a native window.
+
+        Returns False if the backend can't, in which case a window is used.
+        """
+        return False
+
+    def video_size(self):
+        """(width, height) of the video track, (0, 0) if unknown."""
+        raise NotImplementedError
+
+    # --- Misc ---
+    def add_time_listener(self, callback):
+        """Calls callback(time_ms) when the engine reports a new time.
+
+        The callback may run on an engine thread and must not touch widgets.
+        """
+        raise NotImplementedError
+
+    def spawn(self):
+        """Creates another player sharing this one's engine (e.g. vlc.Instance)."""
+        raise NotImplementedError
+
+    def release(self):
+        raise NotImplementedError
+
+
+BACKEND_NAMES = ("vlc", "simulated", "process")
+VIDEO_OUTPUTS = ("auto", "native", "frames")   # Frames are opt-in for now: "auto" means "native"
+
+
+def backend_name_from_env(default="vlc"):
+    return os.environ.get("ANNOTIME_PLAYER_BACKEND", "").strip().lower() or default
+
+
+def video_output_from_env(default="auto"):
+    output = os.environ.get("ANNOTIME_VIDEO_OUTPUT", "").strip().lower() or default
+    return output if output in VIDEO_OUTPUTS else "auto"
+
+
+def create_backend(name="vlc"):
+    """Creates a backend by name. Raises ValueError/RuntimeError on failure."""
+    if name == "vlc":
+        from .vlc_backend import VlcBackend
+        return VlcBackend()
+    if name == "simulated":
+        from .simulated_backend import SimulatedBackend
+        return SimulatedBackend()
+    if name == "process" or name.startswith("process:"):
+        from .process_backend import ProcessBackend
+        inner = name.partition(":")[2] or "vlc"
+        if inner not in BACKEND_NAMES or inner == "process":
+            raise ValueError(f"Unknown player backend '{inner}' for the player process")
+        return ProcessBackend(inner)
+    raise ValueError(f"Unknown player backend '{name}' (expected one of {', '.join(BACKEND_NAMES)})")
@@ -0,0 +1,131 @@
+"""Bounded pool of player backends shared by the session tabs.
+
+All players are spawned from one backend, so with libvlc they share a single
+``vlc.Instance``. Recently used sessions keep their player (media parsed,
+paused at the last position) so switching back to them does not reload
+anything. When the pool is over its player count or memory cap, the least
+recently used player is stopped and handed to the next session that needs
+one.
+"""
+from collections import OrderedDict
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# Rough per-player costs used for the memory cap. libvlc does not report real
+# usage, so this counts the decoder/vout picture pool plus fixed overhead.
+BASE_PLAYER_BYTES = 24 * 1024 * 1024
+PICTURE_POOL_FRAMES = 8
+
+
+class PoolEntry:
+    """A player slot, owned by at most one session at a time."""
+
+    def __init__(self, slot, player):
+        self.slot = slot                  # Index of the video surface for this player
+        self.player = player
+        self.session_id = None
+        self.video_path = None            # Media currently loaded (warm) in the player
+
+    def is_warm_for(self, video_path):
+        return (video_path is not None and self.video_path == video_path
+                and self.player.has_media())
+
+    def estimated_bytes(self):
+        if not self.player.has_media():
+            return 0
+        width, height = self.player.video_size()
+        return BASE_PLAYER_BYTES + width * height * 4 * PICTURE_POOL_FRAMES
+
+
+class PlayerPool:
+    """LRU pool of player backends keyed by session id."""
+
+    def __init__(self, root_player, max_players=3, memory_cap_mb=768, on_evict=None):
+        # New players are spawned from root_player, sharing its engine
+        self.root_player = root_player
+        self.max_players = max(1, max_players)
+        self.memory_cap_bytes = memory_cap_mb * 1024 * 1024
+        # Called as on_evict(session_id, position_ms) when a session goes cold
+        self.on_evict = on_evict
+        self._entries = OrderedDict()     # session_id -> PoolEntry, oldest first
+        self._slot_count = 0
+        self._free = [self._new_entry(root_player)]  # Stopped entries ready for reuse
+
+    def acquire(self, session_id):
+        """Returns the entry for a session, evicting the LRU entry if needed."""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._entries.move_to_end(session_id)
+            return entry
+
+        if self._free:
+            entry = self._free.pop()
+        elif self._slot_count < self.max_players:
+            entry = self._new_entry(self.root_player.spawn())
+        else:
+            entry = self._evict_oldest()
+
+        entry.session_id = session_id
+        self._entries[session_id] = entry
+        self.enforce_memory_cap()
+        return entry
+
+    def get(self, session_id):
+        return self._entries.get(session_id)
+
+    @property
+    def spare_slot(self):
+        """Surface slot for a short-lived extra player; pooled players never reach it."""
+        return self.max_players
+
+    def release(self, session_id):
+        """Stops a session's player and returns it to the free list."""
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._reset(entry)
+            self._free.append(entry)
+
+    def enforce_memory_cap(self):
+        """Evicts LRU players until the estimated total fits the cap.
+
+        The most recently used player is never evicted.
+        """
+        while len(self._entries) > 1 and self.estimated_bytes() > self.memory_cap_bytes:
+            self._free.append(self._evict_oldest())
+
+    def estimated_bytes(self):
+        return sum(entry.estimated_bytes() for entry in self._entries.values())
+
+    def entries(self):
+        return list(self._entries.values()) + list(self._free)
+
+    def release_all(self):
+        # The root player goes last, it may own the shared engine
+        for entry in sorted(self.entries(), key=lambda e: e.player is self.root_player):
+            try:
+                entry.player.release()
+            except Exception as e:
+                log.error("Error releasing pooled player: %s", e)
+        self._entries.clear()
+        self._free = []
+
+    def _new_entry(self, player):
+        entry = PoolEntry(self._slot_count, player)
+        self._slot_count += 1
+        return entry
+
+    def _evict_oldest(self):
+        session_id, entry = self._entries.popitem(last=False)
+        position = entry.player.get_time() if entry.player.has_media() else -1
+        self._reset(entry)
+        log.info("Evicted session %s (slot %d)", session_id, entry.slot)
+        if self.on_evict:
+            self.on_evict(session_id, position)
+        return entry
+
+    def _reset(self, entry):
+        entry.player.unload()
+        entry.session_id = None
+        entry.video_path = None
@@ -0,0 +1,470 @@
+"""PlayerBackend that runs the real player in a child process, so the UI never waits on the engine."""
+import atexit
+import itertools
+import multiprocessing
+import struct
+import time
+import weakref
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+from .player_backend import PlayerBackend, PlayerState, create_backend
+from .log import get_logger
+
+log = get_logger(__name__)
+
+PUBLISH_INTERVAL_S = 0.01        # Child loop period while idle
+HEALTH_CHECK_INTERVAL_S = 0.5
+HANG_TIMEOUT_S = 5.0
+STARTUP_GRACE_S = 15.0           # Importing libvlc in a fresh process can be slow
+LOOP_TOLERANCE_MS = 30           # Matches the UI loop's early jump-back
+RESTORE_TIMEOUT_S = 3.0          # How long a restored player may take to start before it's seeked anyway
+READ_RETRIES = 100
+
+_STATE_CODES = (PlayerState.NOTHING, PlayerState.OPENING, PlayerState.BUFFERING, PlayerState.PLAYING,
+                PlayerState.PAUSED, PlayerState.STOPPED, PlayerState.ENDED, PlayerState.ERROR)
+_STATE_INDEX = {state: code for code, state in enumerate(_STATE_CODES)}
+
+_HAS_MEDIA, _PLAYING, _SEEKABLE = 1, 2, 4
+
+# Block layout: a sequence counter (odd while the child is writing) + the status
+_SEQ = struct.Struct("<I")
+_STATUS = struct.Struct("<Iqqiiiidd")
+BLOCK_SIZE = _SEQ.size + _STATUS.size
+
+# published_at (time.monotonic, shared by both processes) doubles as the heartbeat
+Status = namedtuple("Status", "ack time_ms length_ms state flags width height rate published_at")
+_EMPTY_STATUS = Status(0, -1, -1, 0, 0, 0, 0, 1.0, 0.0)
+
+
+class ClockBlock:
+    """Seqlock-protected player status in a shared memory block.
+
+    The child publishes each player's time, state, length and video size about
+    every 10 ms. Only the child writes; readers never block and just retry a
+    torn read, so getters cost a few struct unpacks and no IPC.
+    """
+
+    def __init__(self, name=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=BLOCK_SIZE)
+            self.shm.buf[:BLOCK_SIZE] = bytes(BLOCK_SIZE)
+        else:
+            # The child shares the UI process's resource tracker, which
+            # forgets the block when the UI process unlinks it
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._buf = self.shm.buf
+
+    def write(self, status):
+        seq = (_SEQ.unpack_from(self._buf, 0)[0] + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(self._buf, 0, seq)                    # Odd: write in progress
+        _STATUS.pack_into(self._buf, _SEQ.size, *status)
+        _SEQ.pack_into(self._buf, 0, (seq + 1) & 0xFFFFFFFF)
+
+    def read(self):
+        """Returns a consistent Status, or None if the writer kept interfering."""
+        buf = self._buf
+        for _ in range(READ_RETRIES):
+            seq = _SEQ.unpack_from(buf, 0)[0]
+            if seq & 1: continue
+            status = _STATUS.unpack_from(buf, _SEQ.size)
+            if _SEQ.unpack_from(buf, 0)[0] == seq:
+                return Status._make(status)
+        return None
+
+    def close(self, unlink=False):
+        self._buf = None
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# --- Child process ---
+class _HostedPlayer:
+    """A player inside the child process and the block it publishes to."""
+
+    def __init__(self, backend, block_name):
+        self.backend = backend
+        self.block = ClockBlock(block_name)
+        self.ack = 0
+        self.loop = None
+        self.muted = False
+        self._restore = None             # (time_ms, playing, deadline) while a restore is under way
+
+    def restore(self, time_ms, playing):
+        """Starts putting a recreated player back at time_ms, playing or paused.
+
+        The engine only seeks once playback has started, so the player runs
+        muted until tick() sees it playing, then seeks (and pauses).
+        """
+        self.backend.set_mute(True)
+        self.backend.play()
+        self._restore = (time_ms, playing, time.monotonic() + RESTORE_TIMEOUT_S)
+
+    def apply(self, method, args):
+        """Runs a command; seeks and play/pause during a restore change its target instead."""
+        restore = self._restore
+        if method == "set_mute":
+            self.muted = bool(args[0])
+            if restore: return
+        elif restore and method == "set_time":
+            self._restore = (args[0],) + restore[1:]
+            return
+        elif restore and method in ("play", "pause"):
+            self._restore = (restore[0], method == "play", restore[2])
+            return
+        elif restore and method in ("stop", "load", "unload", "set_position"):
+            self._finish_restore(seek=False)
+        getattr(self.backend, method)(*args)
+
+    def _finish_restore(self, seek=True):
+        time_ms, playing, _deadline = self._restore
+        self._restore = None
+        backend = self.backend
+        if seek and time_ms > 0: backend.set_time(time_ms)
+        if not playing: backend.pause()
+        backend.set_mute(self.muted)
+
+    def tick(self, now):
+        backend = self.backend
+        if self._restore and (backend.is_playing() or now >= self._restore[2]):
+            self._finish_restore()
+        if self._restore:
+            # Publish where the player is headed, not the muted run-up
+            time_ms, playing, _deadline = self._restore
+        else:
+            playing = backend.is_playing()
+            time_ms = backend.get_time()
+        if self.loop and playing and time_ms >= self.loop[1] - LOOP_TOLERANCE_MS:
+            backend.set_time(self.loop[0])
+            time_ms = self.loop[0]
+        flags = ((_HAS_MEDIA if backend.has_media() else 0) | (_PLAYING if playing else 0)
+                 | (_SEEKABLE if backend.is_seekable() else 0))
+        width, height = backend.video_size()
+        self.block.write((self.ack, time_ms, backend.get_length(),
+                          _STATE_INDEX.get(backend.get_state(), _STATE_INDEX[PlayerState.ERROR]),
+                          flags, width, height, backend.get_rate(), now))
+
+    def close(self):
+        self.backend.release()
+        self.block.close()
+
+
+def _host_main(conn, inner_name):
+    """Child process entry point: applies commands and publishes status."""
+    players = {}
+    root = None
+    while True:
+        try:
+            ready = conn.poll(PUBLISH_INTERVAL_S)
+            while ready:
+                message = conn.recv()
+                if message is None:
+                    for player in players.values(): player.close()
+                    return
+                player_id, seq, method, args = message
+                try:
+                    if method == "create":
+                        backend = root.spawn() if root else create_backend(inner_name)
+                        root = root or backend
+                        players[player_id] = _HostedPlayer(backend, args[0])
+                    elif method == "release":
+                        players.pop(player_id).close()
+                    else:
+                        player = players[player_id]
+                        if method == "set_loop": player.loop = args
+                        elif method == "clear_loop": player.loop = None
+                        elif method == "restore": player.restore(*args)
+                        else: player.apply(method, args)
+                except Exception as e:
+                    log.error("Player process: %s%s failed: %s", method, args, e)
+                if player_id in players: players[player_id].ack = seq
+                ready = conn.poll(0)
+        except (EOFError, OSError):
+            return  # The UI process went away
+        now = time.monotonic()
+        for player in players.values():
+            player.tick(now)
+
+
+class _PlayerHost:
+    """The child process shared by a backend and everything spawned from it.
+
+    The child draws the video into the UI's native window (X11 window ids and
+    Windows HWNDs, not macOS NSViews). If it dies or stops publishing for
+    HANG_TIMEOUT_S, it is restarted and every player is recreated with its
+    media, position, rate, volume and loop.
+    """
+
+    def __init__(self, inner_name):
+        self.inner_name = inner_name
+        self.generation = 0
+        self.refs = 0
+        self.process = None
+        self.conn = None
+        self.started_at = 0.0
+        self.start()
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_host_main, args=(receiver, self.inner_name),
+                                       name="annotime-player", daemon=True)
+        self.process.start()
+        receiver.close()
+        self.conn = sender
+        self.started_at = time.monotonic()
+        self.generation += 1
+        log.info("Player process started (pid %s, %s)", self.process.pid, self.inner_name)
+
+    def restart(self):
+        self.kill()
+        self.start()
+
+    def send(self, message):
+        try:
+            self.conn.send(message)
+        except (OSError, ValueError) as e:
+            log.warning("Player process unreachable: %s", e)
+
+    def is_healthy(self, published_at):
+        if not self.process.is_alive(): return False
+        now = time.monotonic()
+        if published_at < self.started_at:
+            return now - self.started_at < STARTUP_GRACE_S  # Not published yet
+        return now - published_at < HANG_TIMEOUT_S
+
+    def kill(self):
+        if self.process is None: return
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+            if self.process.is_alive(): self.process.kill()
+        self.conn.close()
+
+    def shutdown(self):
+        self.send(None)
+        self.process.join(2.0)
+        self.kill()
+        self.process = None
+
+
+# --- UI process side ---
+_live_backends = weakref.WeakSet()
+
+
+@atexit.register
+def _release_all():
+    """Stops the player processes and frees their blocks if the app exits without releasing."""
+    for backend in list(_live_backends):
+        backend.release()
+
+
+class ProcessBackend(PlayerBackend):
+    """Proxy for a player living in the child process.
+
+    Commands go one way over a pipe and return immediately. Until the child has
+    processed one, getters report its expected result (e.g. the seek target).
+    A-B loops run in the child, so they keep their timing while the UI is busy.
+    """
+    name = "process"
+    _ids = itertools.count(1)
+
+    def __init__(self, inner_name="vlc", _host=None):
+        self._host = _host or _PlayerHost(inner_name)
+        self._host.refs += 1
+        self._id = next(self._ids)
+        self._block = ClockBlock()
+        self._status = _EMPTY_STATUS
+        self._seq = 0
+        self._expected = {}              # Field -> (seq, value) until the child acks seq
+        self._generation = None
+        self._next_health_check = 0.0
+        self._time_listeners = []
+        self._last_reported_ms = -1
+        # Replayed into a restarted child
+        self._path = None
+        self._window_id = None
+        self._rate = 1.0
+        self._volume = None
+        self._muted = False
+        self._loop = None
+        self._sync_host()
+        _live_backends.add(self)
+
+    # --- Media ---
+    def load(self, path):
+        self._path = path
+        self._send("load", path)
+        self._expect(has_media=True, state=PlayerState.NOTHING, time_ms=-1, length_ms=-1)
+
+    def unload(self):
+        self._path = None
+        self._send("unload")
+        self._expect(has_media=False, playing=False, state=PlayerState.NOTHING, time_ms=-1)
+
+    def has_media(self):
+        return self._field("has_media")
+
+    def get_length(self):
+        return self._field("length_ms")
+
+    # --- Transport ---
+    def play(self):
+        if not self.has_media(): return False
+        self._send("play")
+        self._expect(playing=True, state=PlayerState.PLAYING)
+        return True
+
+    def pause(self):
+        if not self.is_playing(): return
+        self._send("pause")
+        self._expect(playing=False, state=PlayerState.PAUSED)
+
+    def stop(self):
+        self._send("stop")
+        self._expect(playing=False, state=PlayerState.STOPPED, time_ms=-1)
+
+    def is_playing(self):
+        return self._field("playing")
+
+    def get_state(self):
+        return self._field("state")
+
+    def get_time(self):
+        time_ms = self._field("time_ms")
+        if time_ms != self._last_reported_ms:
+            self._last_reported_ms = time_ms
+            for callback in self._time_listeners:
+                callback(time_ms)
+        return time_ms
+
+    def set_time(self, time_ms):
+        self._send("set_time", int(time_ms))
+        self._expect(time_ms=int(time_ms))
+
+    def set_position(self, ratio):
+        self._send("set_position", ratio)
+        length = self.get_length()
+        if length > 0: self._expect(time_ms=int(ratio * length))
+
+    def is_seekable(self):
+        return self._field("seekable")
+
+    def set_rate(self, rate):
+        self._rate = rate
+        self._send("set_rate", rate)
+        self._expect(rate=rate)
+
+    def get_rate(self):
+        return self._field("rate")
+
+    def set_loop(self, start_ms, end_ms):
+        self._loop = (int(start_ms), int(end_ms))
+        self._send("set_loop", *self._loop)
+        return True
+
+    def clear_loop(self):
+        self._loop = None
+        self._send("clear_loop")
+
+    # --- Audio/video output ---
+    def set_volume(self, volume):
+        self._volume = int(volume)
+        self._send("set_volume", self._volume)
+
+    def set_mute(self, muted):
+        self._muted = bool(muted)
+        self._send("set_mute", self._muted)
+
+    def set_video_window(self, window_id):
+        self._window_id = window_id
+        self._send("set_video_window", window_id)
+
+    def video_size(self):
+        status = self._read()
+        return (status.width, status.height)
+
+    # --- Misc ---
+    def add_time_listener(self, callback):
+        # Called from get_time on the caller's thread, as there is no engine thread here
+        self._time_listeners.append(callback)
+
+    def spawn(self):
+        return ProcessBackend(self._host.inner_name, _host=self._host)
+
+    def release(self):
+        if self._block is None: return
+        self._host.send((self._id, self._next_seq(), "release", ()))
+        self._host.refs -= 1
+        if self._host.refs == 0:
+            self._host.shutdown()
+        self._block.close(unlink=True)
+        self._block = None
+        self._time_listeners = []
+
+    # --- Internals ---
+    def _next_seq(self):
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        return self._seq
+
+    def _send(self, method, *args):
+        self._sync_host()
+        self._host.send((self._id, self._next_seq(), method, args))
+
+    def _expect(self, **fields):
+        for name, value in fields.items():
+            self._expected[name] = (self._seq, value)
+
+    def _read(self):
+        """Latest published status (the previous one if the read was torn)."""
+        status = self._block.read() if self._block is not None else None
+        if status is not None: self._status = status
+        now = time.monotonic()
+        if now >= self._next_health_check and self._block is not None:
+            self._next_health_check = now + HEALTH_CHECK_INTERVAL_S
+            if not self._host.is_healthy(self._status.published_at):
+                log.warning("Player process stopped responding; restarting it")
+                self._host.restart()
+            self._sync_host()
+        return self._status
+
+    def _field(self, name):
+        status = self._read()
+        expected = self._expected.get(name)
+        if expected is not None:
+            if status.ack < expected[0]:
+                return expected[1]
+            del self._expected[name]
+        if name == "has_media": return bool(status.flags & _HAS_MEDIA)
+        if name == "playing": return bool(status.flags & _PLAYING)
+        if name == "seekable": return bool(status.flags & _SEEKABLE)
+        if name == "state": return _STATE_CODES[status.state]
+        return getattr(status, name)
+
+    def _sync_host(self):
+        """(Re)creates this player in the child after it (re)started."""
+        if self._generation == self._host.generation: return
+        restarted = self._generation is not None
+        last = self._status
+        self._generation = self._host.generation
+        self._seq = 0
+        self._expected.clear()
+        self._block.write(_EMPTY_STATUS)
+        send = lambda method, *args: self._host.send((self._id, self._next_seq(), method, args))
+        send("create", self._block.name)
+        if self._window_id is not None: send("set_video_window", self._window_id)
+        if self._volume is not None: send("set_volume", self._volume)
+        send("set_mute", self._muted)
+        if self._rate != 1.0: send("set_rate", self._rate)
+        if self._loop: send("set_loop", *self._loop)
+        if self._path is not None:
+            send("load", self._path)
+            self._expect(has_media=True)
+            if restarted:
+                send("restore", max(0, last.time_ms), bool(last.flags & _PLAYING))
+                log.info("Player %d restored at %d ms", self._id, last.time_ms)
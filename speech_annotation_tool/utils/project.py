@@ -0,0 +1,249 @@
+"""Project sidecars: a transcript's working state, saved next to it as "<name>.annotime"."""
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+from .segments import Segment, parse_segments
+from .log import get_logger
+
+log = get_logger(__name__)
+
+PROJECT_SUFFIX = ".annotime"
+PROJECT_FORMAT = "annotime-project"
+PROJECT_VERSION = 1
+MEDIA_SAMPLE_BYTES = 1024 * 1024
+
+# Segment table columns and their array typecodes
+_SEGMENT_COLUMNS = (("line", "i"), ("column", "i"), ("start_ms", "q"), ("end_ms", "q"))
+
+_write_lock = threading.Lock()
+_write_generations = {}     # Sidecar path -> generation of the newest requested write
+
+
+class ProjectError(ValueError):
+    """The sidecar is unreadable, not a project file or from a newer version."""
+
+
+def project_path_for(transcript_path):
+    """Sidecar path for a transcript ("a/b.txt" -> "a/b.annotime")."""
+    return os.path.splitext(transcript_path)[0] + PROJECT_SUFFIX
+
+
+# --- Fingerprints ---
+def fingerprint(path, sampled=False):
+    """Size, mtime and hash of a file; sampled hashes only its head and tail."""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        if sampled and stat.st_size > 2 * MEDIA_SAMPLE_BYTES:
+            digest.update(str(stat.st_size).encode("ascii"))
+            digest.update(file.read(MEDIA_SAMPLE_BYTES))
+            file.seek(-MEDIA_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(file.read(MEDIA_SAMPLE_BYTES))
+        else:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+def fingerprint_matches(path, stored, sampled=False):
+    """True if the file still has the stored fingerprint."""
+    if not stored or not path: return False
+    try:
+        stat = os.stat(path)
+        if stat.st_size != stored.get("size"): return False
+        if stat.st_mtime_ns == stored.get("mtime_ns"): return True
+        return fingerprint(path, sampled)["hash"] == stored.get("hash")
+    except OSError:
+        return False
+
+
+# --- Segment table ---
+def encode_segments(segments, lines):
+    """Packs segments into base64 columns; lines are the transcript's lines."""
+    columns = {
+        "line": [segment.line for segment in segments],
+        "column": [len(lines[segment.line]) - len(segment.text) for segment in segments],
+        "start_ms": [segment.start_ms for segment in segments],
+        "end_ms": [segment.end_ms for segment in segments],
+    }
+    table = {"count": len(segments)}
+    for name, typecode in _SEGMENT_COLUMNS:
+        values = array(typecode, columns[name])
+        if sys.byteorder == "big": values.byteswap()
+        table[name] = base64.b64encode(values.tobytes()).decode("ascii")
+    return table
+
+
+def decode_segments(table, lines):
+    """Rebuilds the Segment list of encode_segments from the same transcript lines.
+
+    Raises ProjectError if the table doesn't fit the lines.
+    """
+    try:
+        columns = []
+        for name, typecode in _SEGMENT_COLUMNS:
+            values = array(typecode, base64.b64decode(table[name]))
+            if sys.byteorder == "big": values.byteswap()
+            columns.append(values.tolist())
+        line_numbers, text_columns, starts, ends = columns
+        if not all(len(column) == table["count"] for column in columns):
+            raise ProjectError("Segment table columns differ in length")
+        return [Segment(line, start_ms, end_ms, lines[line][column:])
+                for line, column, start_ms, end_ms in zip(line_numbers, text_columns, starts, ends)]
+    except ProjectError:
+        raise
+    except (KeyError, TypeError, ValueError, IndexError) as e:
+        raise ProjectError(f"Invalid segment table: {e}") from e
+
+
+# --- Reading and writing ---
+def read_project(project_path):
+    """Loads a sidecar. Raises OSError or ProjectError."""
+    with open(project_path, "r", encoding="utf-8") as file:
+        try:
+            project = json.load(file)
+        except ValueError as e:
+            raise ProjectError(f"Not a valid project file: {e}") from e
+    if not isinstance(project, dict) or project.get("format") != PROJECT_FORMAT:
+        raise ProjectError("Not an Annotime project file")
+    if not isinstance(project.get("transcript"), dict):
+        raise ProjectError("The project file has no transcript entry")
+    version = project.get("version")
+    if not isinstance(version, int) or version > PROJECT_VERSION:
+        raise ProjectError(f"Unsupported project version {version} (this version reads up to {PROJECT_VERSION})")
+    return project
+
+
+def resolve_path(project_path, entry):
+    """Absolute path of a transcript/media entry, relative to the sidecar if possible."""
+    if not entry: return None
+    base_dir = os.path.dirname(os.path.abspath(project_path))
+    relative = entry.get("path")
+    if relative:
+        path = os.path.normpath(os.path.join(base_dir, relative))
+        if os.path.exists(path): return path
+    return entry.get("abs_path") or None
+
+
+def load_project(transcript_path):
+    """Returns the validated sidecar of a transcript, or None if there is no usable one.
+
+    The result is the stored project with resolved paths: "transcript_path",
+    "media_path" (None if the media is gone) and "media_valid".
+    """
+    project_path = project_path_for(transcript_path)
+    if not os.path.exists(project_path): return None
+    try:
+        project = read_project(project_path)
+    except (OSError, ProjectError) as e:
+        log.warning("Ignoring project file %s: %s", project_path, e)
+        return None
+    if not fingerprint_matches(transcript_path, project["transcript"].get("fingerprint")):
+        log.info("Project file %s is out of date (the transcript changed)", project_path)
+        return None
+    media = project.get("media") or {}
+    media_path = resolve_path(project_path, media)
+    project["transcript_path"] = transcript_path
+    project["media_path"] = media_path if media_path and os.path.exists(media_path) else None
+    project["media_valid"] = bool(project["media_path"]) and fingerprint_matches(
+        project["media_path"], media.get("fingerprint"), sampled=True)
+    return project
+
+
+def new_write_generation(project_path):
+    """Reserves a write; only the newest reserved write of a path is committed."""
+    with _write_lock:
+        generation = _write_generations.get(project_path, 0) + 1
+        _write_generations[project_path] = generation
+        return generation
+
+
+def write_project(project_path, state, text=None, segments=None, segment_table=None, generation=None):
+    """Writes a sidecar for the transcript next to it (atomically).
+
+    state holds "media" ({"path", "length_ms", "width", "height"} or None),
+    "view", "playback" and "snap_audit". text is the transcript as loaded
+    in the editor (unmodified since it was read or saved); its segment table
+    is stored, reusing segment_table or segments if they are already known
+    for that text, parsing it otherwise. Returns False if the file no longer holds
+    text or a newer write of the same sidecar was requested meanwhile.
+    """
+    transcript_path = state["transcript_path"]
+    base_dir = os.path.dirname(os.path.abspath(project_path))
+    stat = os.stat(transcript_path)
+    with open(transcript_path, "rb") as file:
+        data = file.read()
+    if text is not None and not _same_text(data, text):
+        log.info("Not saving project file %s: the transcript changed on disk", project_path)
+        return False
+    transcript_fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                              "hash": hashlib.blake2b(data, digest_size=16).hexdigest()}
+    project = {
+        "format": PROJECT_FORMAT,
+        "version": PROJECT_VERSION,
+        "saved_at": time.time(),
+        "transcript": {"path": _relative_path(transcript_path, base_dir),
+                       "fingerprint": transcript_fingerprint},
+        "media": None,
+        "segments": None,
+        "view": state.get("view"),
+        "playback": state.get("playback"),
+        "snap_audit": state.get("snap_audit") or [],
+    }
+    media = state.get("media")
+    if media and media.get("path") and os.path.exists(media["path"]):
+        project["media"] = {
+            "path": _relative_path(media["path"], base_dir),
+            "abs_path": os.path.abspath(media["path"]),
+            "fingerprint": fingerprint(media["path"], sampled=True),
+            "length_ms": media.get("length_ms", 0),
+            "width": media.get("width", 0),
+            "height": media.get("height", 0),
+        }
+    if segment_table is not None:
+        project["segments"] = segment_table
+    elif text is not None:
+        if segments is None: segments = parse_segments(text)
+        project["segments"] = encode_segments(segments, text.split('\n'))
+
+    data = json.dumps(project, separators=(',', ':'))
+    with _write_lock:
+        if generation is not None and _write_generations.get(project_path) != generation:
+            log.debug("Skipping superseded write of %s", project_path)
+            return False
+        file_descriptor, temp_path = tempfile.mkstemp(prefix=".annotime-", dir=base_dir)
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                file.write(data)
+            os.replace(temp_path, project_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    log.debug("Project saved to %s (%d bytes)", project_path, len(data))
+    return True
+
+
+def _same_text(data, text):
+    """True if the file bytes read (like the editor does) as text."""
+    try:
+        decoded = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return decoded.replace("\r\n", "\n").replace("\r", "\n") == text
+
+
+def _relative_path(path, base_dir):
+    try:
+        return os.path.relpath(os.path.abspath(path), base_dir)
+    except ValueError:   # Different drive on Windows
+        return None
@@ -0,0 +1,203 @@
+"""Finds how a transcript's timing maps onto a new encode of its media."""
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+try:
+    import numpy as np
+except ImportError:  # Resyncing is unavailable without NumPy
+    np = None
+
+from .audio_cache import _CREATION_FLAGS, find_ffmpeg, probe_duration_ms
+from .silence import energy_envelope
+from .log import get_logger
+
+log = get_logger(__name__)
+
+SAMPLE_RATE = 4000           # Enough of the speech band to line up two encodes
+ANCHOR_COUNT = 6
+WINDOW_S = 20                # Length of each old excerpt
+MAX_OFFSET_S = 120           # How far the new media may be shifted either way
+ENVELOPE_FRAME_MS = 5
+ENVELOPE_FLOOR_DB = -70.0    # Quieter frames count as this loud, so encoder noise floors don't matter
+FINE_S = 2                   # Waveform excerpt used to refine a match
+FINE_SLACK_S = 0.05          # How far the refinement may move a match
+MIN_SCORE = 0.3              # Envelope correlation below this is no match
+MIN_FINE_SCORE = 0.3
+MIN_DISTINCTNESS = 1.5       # The peak must beat the next best match by this factor
+AGREEMENT_MS = 40            # Anchors within this of the fitted line agree with it
+MIN_DRIFT_MS = 5             # Drift across the media smaller than this is left out
+MAX_DRIFT = 0.01             # Larger speed changes (e.g. PAL speed-up) smear the excerpts beyond matching
+DECODE_WORKERS = 4
+MIN_CONFIDENCE = 0.5         # Results below this should be checked by hand
+
+# old_ms and new_ms are the centres of the excerpt in each media (new_ms is None
+# when the excerpt wasn't found); score is its peak normalised correlation (0-1)
+Anchor = namedtuple("Anchor", "old_ms new_ms score")
+# new time = old time * scale + offset_ms; confidence is 0-1
+ResyncResult = namedtuple("ResyncResult", "offset_ms scale confidence anchors inliers")
+
+
+class ResyncError(RuntimeError):
+    """The media can't be analysed (no ffmpeg/NumPy, unreadable media)."""
+
+
+def drift_ms_per_hour(scale):
+    return (scale - 1.0) * 3600 * 1000
+
+
+def estimate_sync(old_path, new_path, old_duration_ms=None, anchors=ANCHOR_COUNT,
+                  window_s=WINDOW_S, max_offset_s=MAX_OFFSET_S, sample_rate=SAMPLE_RATE):
+    """Returns the ResyncResult mapping times in old_path onto new_path."""
+    if np is None: raise ResyncError("NumPy is required to resync media")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg: raise ResyncError("ffmpeg was not found (install it or set ANNOTIME_FFMPEG)")
+    duration_ms = old_duration_ms or probe_duration_ms(old_path)
+    if not duration_ms: raise ResyncError(f"Could not determine the duration of {old_path}")
+
+    window_s = min(window_s, duration_ms / 1000)
+    span_s = max(0.0, duration_ms / 1000 - window_s)
+    starts = [span_s * (i + 0.5) / anchors for i in range(anchors)]
+    search_starts = [max(0.0, start - max_offset_s) for start in starts]
+    search_s = window_s + 2 * max_offset_s
+    with ThreadPoolExecutor(DECODE_WORKERS) as executor:
+        old = executor.map(lambda start: decode_excerpt(ffmpeg, old_path, start, window_s, sample_rate), starts)
+        new = executor.map(lambda start: decode_excerpt(ffmpeg, new_path, start, search_s, sample_rate),
+                           search_starts)
+        references, searches = np.stack(list(old)), np.stack(list(new))
+
+    lags_s, scores = locate(references, searches, sample_rate)
+    found = []
+    for start, search_start, lag_s, score in zip(starts, search_starts, lags_s, scores):
+        new_ms = (search_start + lag_s + window_s / 2) * 1000 if score > 0 else None
+        found.append(Anchor(round((start + window_s / 2) * 1000), None if new_ms is None else round(new_ms),
+                            float(score)))
+    result = fit_sync(found, duration_ms)
+    log.info("Resync %s -> %s: offset %d ms, drift %.1f ms/h, confidence %.2f (%d/%d anchors)",
+             old_path, new_path, result.offset_ms, drift_ms_per_hour(result.scale), result.confidence,
+             len(result.inliers), len(found))
+    return result
+
+
+def decode_excerpt(ffmpeg, media_path, start_s, duration_s, sample_rate=SAMPLE_RATE):
+    """duration_s of mono audio from start_s as float32, zero-padded past the end of the media."""
+    command = [ffmpeg, "-nostdin", "-v", "error", "-ss", f"{start_s:.3f}", "-t", f"{duration_s:.3f}",
+               "-i", media_path, "-vn", "-ac", "1", "-ar", str(sample_rate),
+               "-f", "s16le", "-acodec", "pcm_s16le", "-"]
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=120, creationflags=_CREATION_FLAGS)
+    except (OSError, subprocess.SubprocessError) as e:
+        raise ResyncError(f"Could not run ffmpeg: {e}") from e
+    if result.returncode != 0:
+        raise ResyncError(result.stderr.decode("utf-8", "replace").strip()
+                          or f"ffmpeg exited with code {result.returncode}")
+    samples = np.zeros(int(round(duration_s * sample_rate)), dtype=np.float32)
+    data = np.frombuffer(result.stdout[:len(result.stdout) & ~1], dtype="<i2")[:len(samples)]
+    samples[:len(data)] = data
+    return samples
+
+
+def locate(references, searches, sample_rate=SAMPLE_RATE):
+    """Where each reference row starts within the same row of searches, in seconds.
+
+    Returns (lags_s, scores). The energy envelopes are matched first: they
+    survive re-encoding and small drift (which would smear a waveform match
+    over a long excerpt). The middle FINE_S of the reference's waveform then
+    refines that to a fraction of a millisecond, if it matches clearly.
+    score is the envelope's peak correlation, 0 where nothing was found.
+    """
+    frame_rate = 1000 / ENVELOPE_FRAME_MS
+    envelopes = [np.stack([np.maximum(energy_envelope(row, sample_rate, ENVELOPE_FRAME_MS), ENVELOPE_FLOOR_DB)
+                           for row in rows]) for rows in (references, searches)]
+    frame_lags, scores = correlate(*envelopes)
+    lags_s = frame_lags / frame_rate
+
+    # Fine: the middle of each reference against the search around its coarse match
+    found = np.flatnonzero(scores > 0)
+    fine_length = min(int(FINE_S * sample_rate), references.shape[1])
+    slack = int(FINE_SLACK_S * sample_rate)
+    fine_start = (references.shape[1] - fine_length) // 2
+    windows, offsets = [], []
+    for row in found:
+        offset = int(round(lags_s[row] * sample_rate)) + fine_start - slack
+        window = np.zeros(fine_length + 2 * slack, dtype=np.float32)
+        source = searches[row, max(0, offset):max(0, offset + len(window))]
+        window[max(0, -offset):max(0, -offset) + len(source)] = source
+        windows.append(window)
+        offsets.append(offset)
+    if windows:
+        fine_references = np.diff(references[found, fine_start:fine_start + fine_length], axis=-1)
+        fine_lags, fine_scores = correlate(fine_references, np.diff(np.stack(windows), axis=-1),
+                                           min_score=MIN_FINE_SCORE)
+        for row, offset, lag, score in zip(found, offsets, fine_lags, fine_scores):
+            if score > 0: lags_s[row] = (offset + lag - fine_start) / sample_rate
+    return lags_s, scores
+
+
+def correlate(references, searches, min_score=MIN_SCORE):
+    """Best match of each reference row within the same row of searches.
+
+    Returns (lags, scores): the sample offset of each reference in its search
+    row, with sub-sample precision, and the peak normalised correlation (0 if
+    the reference is flat or no peak stands out).
+    """
+    references = references - references.mean(axis=-1, keepdims=True)
+    n, m = references.shape[-1], searches.shape[-1]
+    size = 1 << int(n + m - 1).bit_length()
+    spectrum = np.fft.rfft(searches, size) * np.conj(np.fft.rfft(references, size))
+    products = np.fft.irfft(spectrum, size)[:, :m - n + 1]
+
+    # Normalise by the reference and by the search window under it (mean removed)
+    sums = np.zeros((len(searches), m + 1))
+    squares = np.zeros((len(searches), m + 1))
+    np.cumsum(searches, axis=-1, out=sums[:, 1:])
+    np.cumsum(np.square(searches, dtype=np.float64), axis=-1, out=squares[:, 1:])
+    window_sums = sums[:, n:] - sums[:, :m - n + 1]
+    window_energy = np.maximum(squares[:, n:] - squares[:, :m - n + 1] - window_sums ** 2 / n, 0)
+    reference_norm = np.sqrt(np.square(references, dtype=np.float64).sum(axis=-1, keepdims=True))
+    scores = products / np.maximum(reference_norm * np.sqrt(window_energy), 1e-9)
+
+    lags = np.zeros(len(scores))
+    peaks = np.zeros(len(scores))
+    guard = max(2, (m - n) // 100)           # Neighbourhood of the peak left out of the runner-up
+    for row, (score, norm) in enumerate(zip(scores, reference_norm[:, 0])):
+        if norm < 1e-6: continue             # Flat (silent) excerpt
+        peak = int(np.argmax(score))
+        rest = np.concatenate([score[:max(0, peak - guard)], score[peak + guard + 1:]])
+        runner_up = max(rest.max(), 0.0) if len(rest) else 0.0
+        if score[peak] < min_score or score[peak] < MIN_DISTINCTNESS * runner_up: continue
+        shift = 0.0
+        if 0 < peak < len(score) - 1:        # Parabolic interpolation between samples
+            left, centre, right = score[peak - 1:peak + 2]
+            denominator = left - 2 * centre + right
+            if denominator < 0: shift = 0.5 * (left - right) / denominator
+        lags[row] = peak + shift
+        peaks[row] = score[peak]
+    return lags, peaks
+
+
+def fit_sync(anchors, duration_ms):
+    """Fits new = old * scale + offset through the largest group of agreeing anchors."""
+    found = [anchor for anchor in anchors if anchor.new_ms is not None]
+    if not found: return ResyncResult(0, 1.0, 0.0, anchors, [])
+
+    def line_through(points):
+        if len(points) < 2 or len({p.old_ms for p in points}) < 2:
+            return 1.0, float(np.median([p.new_ms - p.old_ms for p in points]))
+        scale, offset = np.polyfit([p.old_ms for p in points], [p.new_ms for p in points], 1)
+        return float(scale), float(offset)
+
+    def agreeing(scale, offset):
+        return [p for p in found if abs(p.old_ms * scale + offset - p.new_ms) <= AGREEMENT_MS]
+
+    # Try the line through every pair (and the constant offset of every anchor); keep the
+    # one most anchors agree with
+    candidates = [line_through([p]) for p in found] + [line_through(pair) for pair in combinations(found, 2)]
+    candidates = [(scale, offset) for scale, offset in candidates if abs(scale - 1.0) <= MAX_DRIFT]
+    inliers = max((agreeing(*candidate) for candidate in candidates), key=len)
+    scale, offset = line_through(inliers)
+    if abs(scale - 1.0) * duration_ms < MIN_DRIFT_MS:
+        scale, offset = 1.0, float(np.median([p.new_ms - p.old_ms for p in inliers]))
+    confidence = len(inliers) / len(anchors) * float(np.median([p.score for p in inliers]))
+    return ResyncResult(round(offset), scale, confidence, anchors, inliers)
@@ -0,0 +1,237 @@
+"""Transcript statistics kept up to date line by line, without rescanning."""
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+
+from .segments import segment_times, segment_times_for_lines
+
+# Upper edges (ms) of the segment-length histogram bins; the last bin is open
+HISTOGRAM_EDGES_MS = (1000, 2000, 3000, 5000, 8000, 12000, 20000, 30000)
+RATE_SAMPLE_S = 10           # How often the annotation rate is sampled
+RATE_WINDOW_S = 600          # Recent window for the current rate
+MAX_RATE_SAMPLES = 24 * 360  # A day of samples
+
+
+def stats_for_text(text):
+    """A SegmentStats built from a whole transcript (for a worker thread)."""
+    stats = SegmentStats()
+    stats.reset(text.split('\n'))
+    return stats
+
+
+def histogram_labels():
+    labels, low = [], 0
+    for edge in HISTOGRAM_EDGES_MS:
+        labels.append(f"{low // 1000}-{edge // 1000}s")
+        low = edge
+    labels.append(f"{low // 1000}s+")
+    return labels
+
+
+class SegmentStats:
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._clear()
+
+    def _clear(self):
+        self.lines = []                  # Per line: (start_ms, end_ms) or None
+        self.count = 0                   # Segments with end > start
+        self.incomplete = 0              # Timestamp pairs with end <= start
+        self.total_ms = 0                # Sum of segment lengths (overlaps counted twice)
+        self.covered_ms = 0              # Length of the union of the segments
+        self.histogram = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        self.revision = getattr(self, "revision", 0) + 1   # Bumped by every change to the aggregates
+        # Coverage: counts[i] segments cover [points[i], points[i + 1]). Adjacent spans
+        # always differ in count, and the outer spans are covered, so every span with a
+        # count of 0 is exactly one gap.
+        self._points = []
+        self._counts = []
+        self._gaps = []                  # Sorted (length, start, end) of the zero-count spans
+        self._samples = deque(maxlen=MAX_RATE_SAMPLES)   # (clock time, count, total_ms)
+        self._session_start = None
+
+    # --- Feeding lines ---
+    def reset(self, line_texts):
+        """Starts over from a whole transcript (a load), also restarting the rate."""
+        self._clear()
+        self.lines = segment_times_for_lines(line_texts)
+        self._rebuild()
+        self.start_session()
+
+    def replace_lines(self, first, removed, line_texts):
+        """Replaces `removed` lines starting at line `first` with the given line texts."""
+        new = segment_times_for_lines(line_texts)
+        old = self.lines[first:first + removed]
+        if old == new: return
+        for times in old:
+            if times: self._remove(*times)
+        for times in new:
+            if times: self._add(*times)
+        self.lines[first:first + removed] = new
+        self.revision += 1
+
+    # --- Queries ---
+    def first_start_ms(self):
+        return self._points[0] if self._points else None
+
+    def last_end_ms(self):
+        return self._points[-1] if self._points else None
+
+    def coverage(self, media_length_ms):
+        """Covered fraction (0-1) of the media, or None without a media length."""
+        if not media_length_ms or media_length_ms <= 0: return None
+        return min(1.0, self.covered_ms / media_length_ms)
+
+    def longest_gaps(self, n=5, media_length_ms=0):
+        """The n longest unannotated stretches as [(start_ms, end_ms)], longest first.
+
+        With a media length, the stretches before the first and after the
+        last segment count as gaps too.
+        """
+        gaps = [(start, end) for _length, start, end in self._gaps[-n:]]
+        if media_length_ms and media_length_ms > 0:
+            if not self._points:
+                gaps.append((0, media_length_ms))
+            else:
+                if self._points[0] > 0: gaps.append((0, self._points[0]))
+                if self._points[-1] < media_length_ms: gaps.append((self._points[-1], media_length_ms))
+        gaps.sort(key=lambda gap: gap[0] - gap[1])
+        return gaps[:n]
+
+    # --- Annotation rate ---
+    def start_session(self):
+        self._samples.clear()
+        self._session_start = self._clock()
+        self._samples.append((self._session_start, self.count, self.total_ms))
+
+    def sample(self):
+        """Records the current totals for the rate, at most every RATE_SAMPLE_S."""
+        now = self._clock()
+        if self._session_start is None: self.start_session()
+        if now - self._samples[-1][0] >= RATE_SAMPLE_S:
+            self._samples.append((now, self.count, self.total_ms))
+
+    def rate(self, window_s=None):
+        """(segments per hour, annotated media seconds per hour) over the session or
+        the last window_s seconds, or None if too little time has passed."""
+        if self._session_start is None: return None
+        now = self._clock()
+        if window_s is None:
+            since, count, total_ms = self._samples[0]
+        else:
+            index = bisect_left(self._samples, (now - window_s,))
+            since, count, total_ms = self._samples[min(index, len(self._samples) - 1)]
+        elapsed_h = (now - since) / 3600
+        if elapsed_h * 3600 < RATE_SAMPLE_S: return None
+        return (self.count - count) / elapsed_h, (self.total_ms - total_ms) / 1000 / elapsed_h
+
+    def rate_history(self):
+        """[(seconds since the session started, annotated ms)] samples for plotting."""
+        if self._session_start is None: return []
+        return [(at - self._session_start, total_ms) for at, _count, total_ms in self._samples]
+
+    # --- Aggregates ---
+    def _add(self, start, end):
+        if end <= start:
+            self.incomplete += 1
+            return
+        self.count += 1
+        self.total_ms += end - start
+        self.histogram[bisect_right(HISTOGRAM_EDGES_MS, end - start)] += 1
+        self._cover(start, end, 1)
+
+    def _remove(self, start, end):
+        if end <= start:
+            self.incomplete -= 1
+            return
+        self.count -= 1
+        self.total_ms -= end - start
+        self.histogram[bisect_right(HISTOGRAM_EDGES_MS, end - start)] -= 1
+        self._cover(start, end, -1)
+
+    def _rebuild(self):
+        """Computes the aggregates of all lines in one sweep."""
+        deltas = {}
+        for times in self.lines:
+            if not times: continue
+            start, end = times
+            if end <= start:
+                self.incomplete += 1
+                continue
+            self.count += 1
+            self.total_ms += end - start
+            self.histogram[bisect_right(HISTOGRAM_EDGES_MS, end - start)] += 1
+            deltas[start] = deltas.get(start, 0) + 1
+            deltas[end] = deltas.get(end, 0) - 1
+        depth = 0
+        for time_ms in sorted(deltas):
+            if not deltas[time_ms]: continue
+            if self._points:
+                if depth: self.covered_ms += time_ms - self._points[-1]
+                else: self._gaps.append((time_ms - self._points[-1], self._points[-1], time_ms))
+            depth += deltas[time_ms]
+            self._points.append(time_ms)
+            self._counts.append(depth)
+        if self._counts: self._counts.pop()      # The count after the last point is 0
+        self._gaps.sort()
+
+    def _cover(self, start, end, delta):
+        points, counts = self._points, self._counts
+        self._update_gaps(start, end, remove=True)
+        i = self._split(start)
+        j = self._split(end)
+        for k in range(i, j):
+            before = counts[k]
+            counts[k] = before + delta
+            if before == 0 and delta > 0: self.covered_ms += points[k + 1] - points[k]
+            elif counts[k] == 0 and delta < 0: self.covered_ms -= points[k + 1] - points[k]
+        self._merge(bisect_left(points, end))
+        self._merge(bisect_left(points, start))
+        self._update_gaps(start, end, remove=False)
+
+    def _split(self, time_ms):
+        """Index of a breakpoint at time_ms, added if needed."""
+        points, counts = self._points, self._counts
+        index = bisect_left(points, time_ms)
+        if index < len(points) and points[index] == time_ms: return index
+        if not points:
+            points.append(time_ms)
+        elif index == 0:
+            points.insert(0, time_ms)
+            counts.insert(0, 0)
+        elif index == len(points):
+            points.append(time_ms)
+            counts.append(0)
+        else:
+            points.insert(index, time_ms)
+            counts.insert(index, counts[index - 1])
+        return index
+
+    def _merge(self, index):
+        """Drops the breakpoint at index if it no longer separates different counts,
+        and trims uncovered spans off the ends."""
+        points, counts = self._points, self._counts
+        if 0 < index < len(points) - 1 and counts[index - 1] == counts[index]:
+            del points[index]
+            del counts[index]
+        while counts and counts[0] == 0:
+            del points[0]
+            del counts[0]
+        while counts and counts[-1] == 0:
+            del points[-1]
+            del counts[-1]
+        if not counts: points.clear()
+
+    def _update_gaps(self, start, end, remove):
+        """Takes out (or puts back) the gaps touching [start, end], the only ones a change there can affect."""
+        points, counts = self._points, self._counts
+        lo = max(0, bisect_left(points, start) - 1)
+        hi = min(len(counts), bisect_right(points, end))
+        for k in range(lo, hi):
+            if counts[k] != 0: continue
+            gap = (points[k + 1] - points[k], points[k], points[k + 1])
+            if remove:
+                index = bisect_left(self._gaps, gap)
+                if index < len(self._gaps) and self._gaps[index] == gap: del self._gaps[index]
+            else:
+                insort(self._gaps, gap)
@@ -0,0 +1,73 @@
+"""Compact per-line segment times for the segment table."""
+from array import array
+
+from .segments import segment_times_for_lines
+
+try:
+    import numpy as np
+except ImportError:  # time_order() sorts in Python
+    np = None
+
+NO_TIME = -1
+
+
+def store_for_text(text):
+    """A SegmentStore built from a whole transcript (for a worker thread)."""
+    store = SegmentStore()
+    store.reset(text.split('\n'))
+    return store
+
+
+def _times_arrays(line_texts):
+    starts, ends = array('q'), array('q')
+    for times in segment_times_for_lines(line_texts):
+        if times:
+            starts.append(times[0])
+            ends.append(times[1])
+        else:
+            starts.append(NO_TIME)
+            ends.append(NO_TIME)
+    return starts, ends
+
+
+class SegmentStore:
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.revision = 0        # Bumped when a line is added or removed, or its times change
+
+    def __len__(self):
+        return len(self.starts)
+
+    def reset(self, line_texts):
+        self.starts, self.ends = _times_arrays(line_texts)
+        self.revision += 1
+
+    def replace_lines(self, first, removed, line_texts):
+        """Replaces `removed` lines starting at line `first` with the given line texts."""
+        starts, ends = _times_arrays(line_texts)
+        end = first + removed
+        if len(starts) == removed and starts == self.starts[first:end] and ends == self.ends[first:end]:
+            return               # Only the text changed
+        self.starts[first:end] = starts
+        self.ends[first:end] = ends
+        self.revision += 1
+
+    def times(self, line):
+        """(start_ms, end_ms) of a line, or None if it has no timestamp pair."""
+        start = self.starts[line]
+        return None if start == NO_TIME else (start, self.ends[line])
+
+    def time_order(self, by_end=False, descending=False):
+        """Line numbers of the segment lines sorted by start (or end) time, ties in line order."""
+        keys = self.ends if by_end else self.starts
+        if np is not None:
+            values = np.array(keys, dtype=np.int64)
+            lines = np.flatnonzero(values >= 0)
+            lines = lines[np.argsort(values[lines], kind="stable")]
+            if descending: lines = lines[::-1]
+            return array('q', lines.tobytes())
+        lines = [line for line, key in enumerate(keys) if key != NO_TIME]
+        lines.sort(key=keys.__getitem__)
+        if descending: lines.reverse()
+        return array('q', lines)
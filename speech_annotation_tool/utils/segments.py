@@ -0,0 +1,108 @@
+"""Transcript segments: lines that start with a "[start]-[end]" timestamp pair.
+
+Plain Python (no Qt), shared by the review queue and the batch tools.
+"""
+import re
+from collections import namedtuple
+
+from .timestamp import TIMESTAMP_PATTERN, parse_time, _locate_times_np, _match_to_ms
+
+try:
+    import numpy as np
+except ImportError:  # parse_segments matches line by line
+    np = None
+
+# "[00:00:01.000]-[00:00:02.500] text" at the start of a line
+SEGMENT_RE = re.compile(r'\s*\[(' + TIMESTAMP_PATTERN + r')\]\s*-\s*\[(' + TIMESTAMP_PATTERN + r')\]\s?')
+
+# line is the 0-based line (QTextDocument block) number
+Segment = namedtuple("Segment", "line start_ms end_ms text")
+
+# Below this many lines, segment_times_for_lines() matches them one by one
+_BATCH_LINES = 32
+
+
+def parse_segment_line(line_text, line=0):
+    """Returns the Segment for one transcript line, or None if it has no timestamp pair."""
+    match = SEGMENT_RE.match(line_text)
+    if not match: return None
+    return Segment(line, parse_time(match.group(1)), parse_time(match.group(6)),
+                   line_text[match.end():])
+
+
+def segment_times(line_text):
+    """(start_ms, end_ms) of a segment line, or None.
+
+    Reads the times from the line's match groups, without parse_time's second regex pass.
+    """
+    match = SEGMENT_RE.match(line_text)
+    if not match: return None
+    groups = match.groups()
+    return _match_to_ms(groups[1:5]), _match_to_ms(groups[6:10])
+
+
+def parse_segments(text, skip_empty=False):
+    """Parses every segment line of a transcript, in document order.
+
+    With skip_empty, segments whose end is not after their start are left out.
+    """
+    located = _locate_segments_np(text) if np is not None else None
+    if located is None:
+        segments = [segment for segment in (parse_segment_line(line_text, line)
+                                            for line, line_text in enumerate(text.split('\n')))
+                    if segment is not None]
+    else:
+        lines, segment_lines, starts, ends, other_lines = located
+        texts = [lines[line] for line in segment_lines]
+        texts = [text[30:] if len(text) > 29 and text[29].isspace() else text[29:] for text in texts]
+        segments = list(map(Segment, segment_lines, starts, ends, texts))
+        if other_lines:
+            segments += filter(None, (parse_segment_line(lines[line], line) for line in other_lines))
+            segments.sort(key=lambda segment: segment.line)
+    if skip_empty: segments = [segment for segment in segments if segment.end_ms > segment.start_ms]
+    return segments
+
+
+def segment_times_for_lines(line_texts):
+    """[(start_ms, end_ms) or None] for each line, parsed in one batch for many lines."""
+    located = (_locate_segments_np("\n".join(line_texts))
+               if np is not None and len(line_texts) >= _BATCH_LINES else None)
+    if located is None: return [segment_times(text) for text in line_texts]
+    _lines, segment_lines, starts, ends, other_lines = located
+    times = [None] * len(line_texts)
+    for line, start_ms, end_ms in zip(segment_lines, starts, ends):
+        times[line] = (start_ms, end_ms)
+    for line in other_lines:
+        times[line] = segment_times(line_texts[line])
+    return times
+
+
+def _locate_segments_np(text):
+    """Finds the segment lines from the timestamps NumPy locates in one pass, or returns None to use the regex.
+
+    Lines that are exactly "[start]-[end]..." are read from the located
+    timestamps. Returns (lines, their line numbers, start times, end times,
+    other lines holding a timestamp, which must be matched with SEGMENT_RE).
+    """
+    data = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    located = _locate_times_np(data)
+    if located is None: return None
+    starts, ms = located
+    lines = text.split('\n')
+    if not starts.size: return lines, [], [], [], []
+    newlines = np.flatnonzero(data == 10)
+    line_of = np.searchsorted(newlines, starts)
+    line_start = np.concatenate(([0], newlines + 1))[line_of]
+    # "[HH:MM:SS.mmm]-[HH:MM:SS.mmm]" from the first column: 14 + 1 + 14 bytes
+    paired = np.zeros(starts.size, dtype=bool)
+    paired[:-1] = ((starts[:-1] == line_start[:-1]) & (starts[1:] - starts[:-1] == 15)
+                   & (data[starts[:-1] + 14] == ord('-')))
+    second = np.roll(paired, 1)
+    segment_lines = line_of[paired]
+    # Leading spaces, spaces around the dash, stamps further into the line, ...
+    others = line_of[~(paired | second)]
+    if others.size:
+        is_segment_line = np.zeros(len(lines), dtype=bool)
+        is_segment_line[segment_lines] = True
+        others = np.unique(others[~is_segment_line[others]])
+    return lines, segment_lines.tolist(), ms[paired].tolist(), ms[second].tolist(), others.tolist()
@@ -0,0 +1,78 @@
+"""Silence detection on decoded audio, for snapping timestamps to pauses."""
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # Silence detection is unavailable without NumPy
+    np = None
+
+FRAME_MS = 10
+NOISE_FLOOR_PERCENTILE = 10
+MARGIN_DB = 10.0
+MIN_SILENCE_MS = 80
+_BLOCK_FRAMES = 6000            # Frames converted at a time (1 minute at 10 ms)
+_SILENT_DB = -120.0             # Level of digital silence
+
+
+def energy_envelope(samples, sample_rate, frame_ms=FRAME_MS):
+    """RMS level in dB (relative to int16 full scale) of consecutive frames.
+
+    samples is an int16 array, e.g. a DecodedAudio view; it is read in
+    blocks so the whole file is never converted to float at once.
+    """
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_length
+    envelope = np.empty(frame_count, dtype=np.float32)
+    full_scale = np.float32(32768.0 ** 2)
+    for first in range(0, frame_count, _BLOCK_FRAMES):
+        last = min(frame_count, first + _BLOCK_FRAMES)
+        block = np.asarray(samples[first * frame_length:last * frame_length], dtype=np.float32)
+        power = np.square(block).reshape(last - first, frame_length).mean(axis=1) / full_scale
+        envelope[first:last] = 10.0 * np.log10(np.maximum(power, 1e-12))
+    return np.maximum(envelope, _SILENT_DB, out=envelope)
+
+
+class SilenceIndex:
+    """Silent runs of a media file, searchable by time."""
+
+    def __init__(self, starts_ms, ends_ms, threshold_db=None):
+        self.starts_ms = list(starts_ms)
+        self.ends_ms = list(ends_ms)
+        self.threshold_db = threshold_db
+
+    def __len__(self):
+        return len(self.starts_ms)
+
+    @classmethod
+    def from_envelope(cls, envelope, frame_ms=FRAME_MS, margin_db=MARGIN_DB,
+                      min_silence_ms=MIN_SILENCE_MS):
+        if len(envelope) == 0: return cls([], [])
+        floor, median = np.percentile(envelope, (NOISE_FLOOR_PERCENTILE, 50))
+        threshold = min(floor + margin_db, median)
+        silent = np.concatenate(([False], envelope <= threshold, [False]))
+        edges = np.flatnonzero(np.diff(silent.view(np.int8)))
+        starts, ends = edges[0::2], edges[1::2]         # Frame ranges [start, end)
+        keep = (ends - starts) * frame_ms >= min_silence_ms
+        return cls((starts[keep] * frame_ms).tolist(), (ends[keep] * frame_ms).tolist(), float(threshold))
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate, frame_ms=FRAME_MS, **kwargs):
+        return cls.from_envelope(energy_envelope(samples, sample_rate, frame_ms), frame_ms, **kwargs)
+
+    def is_silent(self, time_ms):
+        i = bisect_right(self.starts_ms, time_ms) - 1
+        return i >= 0 and time_ms <= self.ends_ms[i]
+
+    def snap(self, time_ms, window_ms):
+        """Nearest silent time within window_ms of time_ms, or None if there is none.
+
+        Times already in a pause are returned unchanged.
+        """
+        i = bisect_right(self.starts_ms, time_ms) - 1
+        if i >= 0 and time_ms <= self.ends_ms[i]: return time_ms
+        candidates = []
+        if i >= 0: candidates.append(self.ends_ms[i])                     # End of the pause before
+        if i + 1 < len(self.starts_ms): candidates.append(self.starts_ms[i + 1])  # Start of the next
+        nearest = min(candidates, key=lambda candidate: abs(candidate - time_ms), default=None)
+        if nearest is None or abs(nearest - time_ms) > window_ms: return None
+        return nearest
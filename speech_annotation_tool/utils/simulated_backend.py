@@ -0,0 +1,239 @@
+"""Deterministic simulated implementation of the PlayerBackend protocol."""
+import ctypes
+import threading
+import time
+
+from .player_backend import PlayerBackend, PlayerState
+
+DEFAULT_LENGTH_MS = 2 * 3600 * 1000
+SIMULATED_FPS = 25
+
+
+class VirtualClock:
+    """Manually advanced clock, in seconds."""
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def __call__(self):
+        return self._now
+
+    def advance(self, seconds):
+        self._now += seconds
+
+    def advance_ms(self, milliseconds):
+        self._now += milliseconds / 1000.0
+
+
+class SimulatedBackend(PlayerBackend):
+    """Virtual-clock player with a seek latency and time granularity model."""
+    name = "simulated"
+    video_frames = True
+
+    def __init__(self, clock=None, length_ms=DEFAULT_LENGTH_MS, seek_latency_ms=0,
+                 time_granularity_ms=0, video_size=(1280, 720)):
+        self.clock = clock or time.monotonic
+        self.default_length_ms = length_ms
+        self.seek_latency_ms = seek_latency_ms
+        self.time_granularity_ms = time_granularity_ms
+        self._video_size = video_size
+        self._path = None
+        self._length_ms = -1
+        self._state = PlayerState.NOTHING
+        self._rate = 1.0
+        self._volume = 50
+        self._muted = False
+        # Media time is anchor_ms plus clock time elapsed since anchor_clock
+        self._anchor_ms = 0.0
+        self._anchor_clock = self.clock()
+        self._seek_ready_at = None       # Clock time a pending seek completes
+        self._seek_target_ms = 0.0
+        self._seek_resume_state = None
+        self._time_listeners = []
+        self._last_reported_ms = -1
+        self._frame_pool = None
+        self._render_stop = threading.Event()
+        self._render_thread = None
+
+    # --- Media ---
+    def load(self, path, length_ms=None):
+        self._path = path
+        self._length_ms = length_ms or self.default_length_ms
+        self._state = PlayerState.STOPPED
+        self._anchor_ms = 0.0
+        self._anchor_clock = self.clock()
+        self._seek_ready_at = None
+
+    def unload(self):
+        self._path = None
+        self._length_ms = -1
+        self._state = PlayerState.NOTHING
+
+    def has_media(self):
+        return self._path is not None
+
+    def get_length(self):
+        return self._length_ms
+
+    # --- Transport ---
+    def play(self):
+        if not self.has_media(): return False
+        self._update()
+        if self._state == PlayerState.BUFFERING:
+            self._seek_resume_state = PlayerState.PLAYING
+        elif self._state != PlayerState.PLAYING:
+            if self._state in (PlayerState.STOPPED, PlayerState.ENDED) and self._anchor_ms >= self._length_ms:
+                self._anchor_ms = 0.0
+            self._anchor_clock = self.clock()
+            self._state = PlayerState.PLAYING
+        return True
+
+    def pause(self):
+        self._update()
+        if self._state == PlayerState.PLAYING:
+            self._anchor_ms = self._media_time()
+            self._state = PlayerState.PAUSED
+        elif self._state == PlayerState.BUFFERING:
+            self._seek_resume_state = PlayerState.PAUSED
+
+    def stop(self):
+        if self.has_media():
+            self._state = PlayerState.STOPPED
+        self._anchor_ms = 0.0
+        self._seek_ready_at = None
+
+    def is_playing(self):
+        self._update()
+        return self._state == PlayerState.PLAYING
+
+    def get_state(self):
+        self._update()
+        return self._state
+
+    def get_time(self):
+        self._update()
+        if not self.has_media() or self._state in (PlayerState.NOTHING, PlayerState.STOPPED):
+            return -1
+        time_ms = int(self._media_time())
+        if self.time_granularity_ms > 0:
+            time_ms -= time_ms % self.time_granularity_ms
+        if time_ms != self._last_reported_ms:
+            self._last_reported_ms = time_ms
+            for callback in self._time_listeners:
+                callback(time_ms)
+        return time_ms
+
+    def set_time(self, time_ms):
+        if not self.has_media(): return
+        self._update()
+        target = float(max(0, min(time_ms, self._length_ms)))
+        if self.seek_latency_ms > 0:
+            if self._state != PlayerState.BUFFERING:
+                self._seek_resume_state = (PlayerState.PLAYING if self._state == PlayerState.PLAYING
+                                           else PlayerState.PAUSED)
+                # Time stays where it was until the seek completes
+                self._anchor_ms = self._media_time()
+            self._state = PlayerState.BUFFERING
+            self._seek_target_ms = target
+            self._seek_ready_at = self.clock() + self.seek_latency_ms / 1000.0
+        else:
+            self._anchor_ms = target
+            self._anchor_clock = self.clock()
+            if self._state in (PlayerState.STOPPED, PlayerState.ENDED):
+                self._state = PlayerState.PAUSED
+
+    def set_position(self, ratio):
+        if self._length_ms > 0:
+            self.set_time(ratio * self._length_ms)
+
+    def is_seekable(self):
+        return self.has_media()
+
+    def set_rate(self, rate):
+        self._update()
+        if self._state == PlayerState.PLAYING:
+            self._anchor_ms = self._media_time()
+            self._anchor_clock = self.clock()
+        self._rate = float(rate)
+
+    def get_rate(self):
+        return self._rate
+
+    # --- Audio/video output ---
+    def set_volume(self, volume):
+        self._volume = int(volume)
+
+    def set_mute(self, muted):
+        self._muted = bool(muted)
+
+    def set_video_window(self, window_id):
+        pass
+
+    def set_video_frame_pool(self, pool):
+        self._frame_pool = pool
+        if self._render_thread is None:
+            self._render_thread = threading.Thread(target=self._render_frames, name="simulated-video", daemon=True)
+            self._render_thread.start()
+        return True
+
+    def video_size(self):
+        return self._video_size if self.has_media() else (0, 0)
+
+    # --- Misc ---
+    def add_time_listener(self, callback):
+        self._time_listeners.append(callback)
+
+    def spawn(self):
+        return SimulatedBackend(self.clock, self.default_length_ms, self.seek_latency_ms,
+                                self.time_granularity_ms, self._video_size)
+
+    def release(self):
+        self.unload()
+        self._time_listeners = []
+        self._render_stop.set()
+
+    # --- Internals ---
+    def _render_frames(self):
+        """Render thread: a grey level and a bar that follow the media time."""
+        size, last_ms = None, None
+        while not self._render_stop.wait(1.0 / SIMULATED_FPS):
+            pool = self._frame_pool
+            if pool is None or not self.has_media(): continue
+            time_ms = int(self._media_time())
+            if time_ms == last_ms: continue
+            last_ms = time_ms
+            if pool.fit(*self._video_size) != size:
+                size = pool.fit(*self._video_size)
+                pool.setup(*size)
+            acquired = pool.acquire()
+            if acquired is None: continue
+            index, address = acquired
+            width, height = size
+            pitch = width * 4
+            shade = 40 + (time_ms // 40) % 160
+            bar = width * (time_ms % 10000) // 10000
+            # 0xffRRGGBB pixels, as RV32 frames are
+            plain = bytes((shade, shade, shade, 255)) * width
+            marked = plain[:bar * 4] + b"\xff" * 4 * min(16, width - bar) + plain[(bar + 16) * 4:]
+            for y in range(height):
+                ctypes.memmove(address + y * pitch, marked if abs(y - height // 2) < 8 else plain, pitch)
+            pool.publish(index)
+
+
+    def _media_time(self):
+        if self._state != PlayerState.PLAYING:
+            return self._anchor_ms
+        elapsed_ms = (self.clock() - self._anchor_clock) * 1000.0 * self._rate
+        return min(self._anchor_ms + elapsed_ms, float(self._length_ms))
+
+    def _update(self):
+        """Applies pending seek completion and end of media."""
+        now = self.clock()
+        if self._state == PlayerState.BUFFERING and now >= self._seek_ready_at:
+            self._anchor_ms = self._seek_target_ms
+            self._anchor_clock = self._seek_ready_at
+            self._state = self._seek_resume_state or PlayerState.PAUSED
+            self._seek_ready_at = None
+        if self._state == PlayerState.PLAYING and self._media_time() >= self._length_ms:
+            self._anchor_ms = float(self._length_ms)
+            self._state = PlayerState.ENDED
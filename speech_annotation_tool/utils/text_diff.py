@@ -0,0 +1,109 @@
+"""Line diffs and three-way merges of transcripts, as (start, end, lines) hunks."""
+from difflib import SequenceMatcher
+
+CONFLICT_START = "<<<<<<< yours"
+CONFLICT_SEPARATOR = "======="
+CONFLICT_END = ">>>>>>> on disk"
+
+
+def diff_hunks(old_lines, new_lines):
+    """Hunks that turn old_lines into new_lines."""
+    # Most external edits touch a few lines; only diff what lies between
+    # the common prefix and suffix
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and old_lines[len(old_lines) - 1 - suffix] == new_lines[len(new_lines) - 1 - suffix]):
+        suffix += 1
+    old_mid = old_lines[prefix:len(old_lines) - suffix]
+    new_mid = new_lines[prefix:len(new_lines) - suffix]
+    if not old_mid and not new_mid: return []
+    if not old_mid or not new_mid:
+        return [(prefix, prefix + len(old_mid), new_mid)]
+    hunks = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_mid, new_mid).get_opcodes():
+        if tag != "equal":
+            hunks.append((prefix + i1, prefix + i2, new_mid[j1:j2]))
+    return hunks
+
+
+def apply_hunks(lines, hunks):
+    """Returns lines with the hunks applied."""
+    result, position = [], 0
+    for start, end, replacement in hunks:
+        result.extend(lines[position:start])
+        result.extend(replacement)
+        position = end
+    result.extend(lines[position:])
+    return result
+
+
+def merge3(base_lines, ours_lines, theirs_lines):
+    """Three-way merge of two edits of base_lines.
+
+    Returns (lines, conflicts). Where both sides changed the same lines
+    differently, both versions are kept between conflict markers.
+    """
+    ours = [(start, end, lines, 0) for start, end, lines in diff_hunks(base_lines, ours_lines)]
+    theirs = [(start, end, lines, 1) for start, end, lines in diff_hunks(base_lines, theirs_lines)]
+    changes = sorted(ours + theirs, key=lambda hunk: (hunk[0], hunk[1]))
+
+    # Group hunks that overlap, or insert at the same place
+    groups = []
+    for hunk in changes:
+        group = groups[-1] if groups else None
+        if group and (hunk[0] < group["end"] or hunk[0] == group["hunks"][-1][0]):
+            group["hunks"].append(hunk)
+            group["end"] = max(group["end"], hunk[1])
+        else:
+            groups.append({"start": hunk[0], "end": hunk[1], "hunks": [hunk]})
+
+    merged, position, conflicts = [], 0, 0
+    for group in groups:
+        start, end = group["start"], group["end"]
+        merged.extend(base_lines[position:start])
+        region = base_lines[start:end]
+        sides = [[(s - start, e - start, lines) for s, e, lines, side in group["hunks"] if side == which]
+                 for which in (0, 1)]
+        ours_region = apply_hunks(region, sides[0])
+        theirs_region = apply_hunks(region, sides[1])
+        if not sides[1] or ours_region == theirs_region:
+            merged.extend(ours_region)
+        elif not sides[0]:
+            merged.extend(theirs_region)
+        else:
+            conflicts += 1
+            merged.append(CONFLICT_START)
+            merged.extend(ours_region)
+            merged.append(CONFLICT_SEPARATOR)
+            merged.extend(theirs_region)
+            merged.append(CONFLICT_END)
+        position = end
+    merged.extend(base_lines[position:])
+    return merged, conflicts
+
+
+def compare_with_disk(path, base_text, ours_text, merge=False):
+    """Compares a transcript on disk with the editor's copy (on a worker thread).
+
+    base_text is what the file held when it was last loaded or saved, and
+    ours_text the editor's text. Returns None if the file still holds
+    base_text (e.g. it was only touched, or this was our own save).
+    Otherwise returns a dict with the new text, the hunks that reload it
+    into the editor and, with merge, the hunks of a three-way merge and
+    the number of its conflicts.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        theirs_text = file.read()
+    if theirs_text == base_text: return None
+    ours = ours_text.split('\n')
+    theirs = theirs_text.split('\n')
+    change = {"text": theirs_text, "reload": diff_hunks(ours, theirs),
+              "merge": None, "conflicts": 0}
+    if merge:
+        merged, change["conflicts"] = merge3(base_text.split('\n'), ours, theirs)
+        change["merge"] = diff_hunks(ours, merged)
+    return change
@@ -1,7 +1,291 @@
-from PyQt5.QtCore import QTime
+"""Timestamp codec shared by the player, the editor and the batch tools.
 
+Everything here is plain Python (no Qt), so it can be used from worker
+threads, child processes and headless scripts alike.
 
-def format_time(milliseconds):
-    """Converts milliseconds to HH:MM:SS.zzz format."""
-    time = QTime(0, 0, 0).addMSecs(milliseconds)
-    return time.toString("hh:mm:ss.zzz")
+Transcript timestamps are written as ``HH:MM:SS.mmm``. Hours are not wrapped
+at 24 (a 25 hour recording is ``25:00:00.000``) and negative values are
+clamped to zero. The parser also accepts the SRT comma variant
+(``HH:MM:SS,mmm``) and 1-3 digit fractions (``.5`` is 500 ms). Frame based
+timecodes (``HH:MM:SS:FF``) are handled by the ``*_frames`` helpers.
+
+The batch helpers use NumPy when it is installed to convert whole arrays of
+fixed-width timestamps at once, and fall back to compiled regex scans.
+"""
+import math
+import re
+
+try:
+    import numpy as np
+except ImportError:  # Batch helpers fall back to the regex path
+    np = None
+
+# Single timestamp, with the fraction separated by '.' or ',' (SRT)
+TIMESTAMP_PATTERN = r'(\d{2,}):([0-5]\d):([0-5]\d)[.,](\d{1,3})'
+TIMESTAMP_RE = re.compile(TIMESTAMP_PATTERN)
+FULL_TIMESTAMP_RE = re.compile(r'\s*' + TIMESTAMP_PATTERN + r'\s*\Z')
+# Timestamp as written into the transcript, e.g. "[00:01:02.345]"
+BRACKETED_TIMESTAMP_RE = re.compile(r'\[(' + TIMESTAMP_PATTERN + r')\]')
+# Same, as a single group, for re.split based rewriting
+_BRACKETED_SPLIT_RE = re.compile(r'\[(\d{2,}:[0-5]\d:[0-5]\d[.,]\d{1,3})\]')
+# Frame based timecode, e.g. "00:01:02:12" (';' is the drop-frame separator)
+FRAME_TIMESTAMP_RE = re.compile(r'\s*(\d{2,}):([0-5]\d):([0-5]\d)[:;](\d{2,})\s*\Z')
+
+# Multipliers for a 1, 2 or 3 digit millisecond fraction
+_FRACTION_SCALE = (0, 100, 10, 1)
+
+# Digit columns of the canonical 12 character "HH:MM:SS.mmm" layout
+_DIGIT_COLUMNS = (0, 1, 3, 4, 6, 7, 9, 10, 11)
+_DIGIT_WEIGHTS = (36000000, 3600000, 600000, 60000, 10000, 1000, 100, 10, 1)
+
+
+def format_time(milliseconds, separator='.'):
+    """Converts milliseconds to HH:MM:SS.mmm (negative values clamp to 0)."""
+    milliseconds = int(milliseconds)
+    if milliseconds < 0:
+        milliseconds = 0
+    seconds, ms = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}{separator}{ms:03}"
+
+
+def format_srt_time(milliseconds):
+    """Converts milliseconds to the SRT form HH:MM:SS,mmm."""
+    return format_time(milliseconds, ',')
+
+
+def parse_time(time_str):
+    """Parses HH:MM:SS.mmm (or HH:MM:SS,mmm) into milliseconds.
+
+    Raises ValueError if the string is not a timestamp.
+    """
+    match = FULL_TIMESTAMP_RE.match(time_str)
+    if not match:
+        raise ValueError(f"Invalid time format '{time_str}'")
+    return _match_to_ms(match.groups())
+
+
+# SRT timestamps only differ in the separator, which parse_time accepts
+parse_srt_time = parse_time
+
+
+def format_frames(milliseconds, fps):
+    """Converts milliseconds to a HH:MM:SS:FF timecode at the given frame rate."""
+    if fps <= 0:
+        raise ValueError(f"Invalid frame rate {fps}")
+    milliseconds = max(0, int(milliseconds))
+    seconds, ms = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    frame = int(ms * fps // 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02}:{frame:02}"
+
+
+def parse_frames(time_str, fps):
+    """Parses a HH:MM:SS:FF timecode into milliseconds at the given frame rate.
+
+    Raises ValueError if the string is malformed or the frame number does not
+    exist at this frame rate.
+    """
+    if fps <= 0:
+        raise ValueError(f"Invalid frame rate {fps}")
+    match = FRAME_TIMESTAMP_RE.match(time_str)
+    if not match:
+        raise ValueError(f"Invalid timecode format '{time_str}'")
+    hours, minutes, seconds, frame = (int(g) for g in match.groups())
+    if frame >= fps:
+        raise ValueError(f"Frame {frame} out of range for {fps} fps in '{time_str}'")
+    # Round up so that formatting the result gives back the same frame
+    frame_ms = math.ceil(frame * 1000 / fps)
+    return (hours * 3600 + minutes * 60 + seconds) * 1000 + frame_ms
+
+
+# --- Batch API ---
+# These work on whole sequences or text blobs at once: one compiled regex
+# scan and a single comprehension instead of a Python call per timestamp.
+
+def format_times(values, separator='.'):
+    """Formats an iterable of millisecond values, returning a list of strings."""
+    if np is not None:
+        if not isinstance(values, (list, tuple, np.ndarray)):
+            values = list(values)
+        result = _format_times_np(values, separator)
+        if result is not None:
+            return result
+    template = "%02d:%02d:%02d" + separator + "%03d"
+    out = []
+    append = out.append
+    for ms in values:
+        ms = int(ms)
+        if ms < 0:
+            ms = 0
+        s, f = divmod(ms, 1000)
+        m, s = divmod(s, 60)
+        h, m = divmod(m, 60)
+        append(template % (h, m, s, f))
+    return out
+
+
+def parse_times(strings):
+    """Parses an iterable of timestamp strings, returning a list of milliseconds.
+
+    Raises ValueError naming the first string that is not a timestamp.
+    """
+    if np is not None:
+        if not isinstance(strings, (list, tuple)):
+            strings = list(strings)
+        result = _parse_times_np(strings)
+        if result is not None:
+            return result
+    match = FULL_TIMESTAMP_RE.match
+    out = []
+    append = out.append
+    for time_str in strings:
+        m = match(time_str)
+        if m is None:
+            raise ValueError(f"Invalid time format '{time_str}'")
+        append(_match_to_ms(m.groups()))
+    return out
+
+
+def find_times(text, bracketed=True):
+    """Returns every timestamp in ``text`` as milliseconds, in document order.
+
+    With ``bracketed`` only transcript style "[HH:MM:SS.mmm]" timestamps are
+    matched, otherwise any bare timestamp is.
+    """
+    if bracketed:
+        if np is not None:
+            result = _find_times_np(text)
+            if result is not None:
+                return result
+        return [_match_to_ms(groups[1:]) for groups in BRACKETED_TIMESTAMP_RE.findall(text)]
+    return [_match_to_ms(groups) for groups in TIMESTAMP_RE.findall(text)]
+
+
+def retime_text(text, offset_ms=0, scale=1.0):
+    """Rewrites every "[HH:MM:SS.mmm]" in ``text`` as round(t * scale + offset_ms).
+
+    ``scale`` corrects a linear clock drift (e.g. 1.0001 for +360 ms per hour).
+    The text is split once around the timestamps, which are converted with the
+    batch helpers, so there is no per-match Python callback. Results below zero
+    are clamped. Returns (new_text, number of timestamps, number clamped).
+    """
+    if np is not None:
+        result = _retime_text_np(text, offset_ms, scale)
+        if result is not None:
+            return result
+    parts = _BRACKETED_SPLIT_RE.split(text)
+    stamps = parts[1::2]
+    if not stamps:
+        return text, 0, 0
+    if np is not None:
+        values = np.rint(np.asarray(parse_times(stamps), dtype=np.float64) * scale + offset_ms)
+        clamped = int((values < 0).sum())
+    else:
+        values = [int(round(ms * scale + offset_ms)) for ms in parse_times(stamps)]
+        clamped = sum(1 for ms in values if ms < 0)
+    parts[1::2] = ["[" + stamp + "]" for stamp in format_times(values)]
+    return "".join(parts), len(stamps), clamped
+
+
+def _match_to_ms(groups):
+    hours, minutes, seconds, fraction = groups
+    return ((int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000
+            + int(fraction) * _FRACTION_SCALE[len(fraction)])
+
+
+# --- NumPy fast paths ---
+# Each returns None when the input is not in the canonical fixed-width layout,
+# in which case the caller falls back to the regex path.
+
+def _digits_to_ms(digits):
+    """Converts an (n, 9) array of HHMMSSmmm digit values into milliseconds."""
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= (digits[:, 2] <= 5) & (digits[:, 4] <= 5)  # minutes and seconds < 60
+    return digits @ np.array(_DIGIT_WEIGHTS, dtype=np.int64), valid
+
+
+def _format_times_np(values, separator):
+    ms = np.array(values, dtype=np.int64).ravel()  # A copy: the caller's array is left alone
+    if ms.size == 0:
+        return []
+    ms = np.maximum(ms, 0)
+    hours, rest = np.divmod(ms, 3600000)
+    if hours.max() > 99:
+        return None
+    minutes, rest = np.divmod(rest, 60000)
+    seconds, fraction = np.divmod(rest, 1000)
+    buf = np.empty((ms.size, 12), dtype=np.uint8)
+    buf[:, [2, 5]] = ord(':')
+    buf[:, 8] = ord(separator)
+    buf[:, _DIGIT_COLUMNS] = np.stack([hours // 10, hours % 10, minutes // 10, minutes % 10,
+                                      seconds // 10, seconds % 10, fraction // 100,
+                                      fraction // 10 % 10, fraction % 10], axis=1) + ord('0')
+    return buf.view('S12').ravel().astype('U12').tolist()
+
+
+def _parse_times_np(strings):
+    if not strings:
+        return []
+    joined = "".join(strings)
+    if len(joined) != 12 * len(strings) or not joined.isascii():
+        return None
+    buf = np.frombuffer(joined.encode('ascii'), dtype=np.uint8).reshape(-1, 12)
+    if not ((buf[:, 2] == 58) & (buf[:, 5] == 58) & ((buf[:, 8] == 46) | (buf[:, 8] == 44))).all():
+        return None
+    ms, valid = _digits_to_ms(buf[:, _DIGIT_COLUMNS].astype(np.int64) - ord('0'))
+    if not valid.all():
+        return None
+    return ms.tolist()
+
+
+def _find_times_np(text):
+    located = _locate_times_np(np.frombuffer(text.encode('utf-8'), dtype=np.uint8))
+    return None if located is None else located[1].tolist()
+
+
+def _retime_text_np(text, offset_ms, scale):
+    # Canonical timestamps keep their width, so they are rewritten in place
+    data = np.frombuffer(bytearray(text.encode('utf-8')), dtype=np.uint8)
+    located = _locate_times_np(data)
+    if located is None:
+        return None
+    starts, ms = located
+    if not starts.size:
+        return text, 0, 0
+    values = np.rint(ms * scale + offset_ms).astype(np.int64)
+    clamped = int((values < 0).sum())
+    np.maximum(values, 0, out=values)
+    hours, rest = np.divmod(values, 3600000)
+    if hours.max() > 99:
+        return None
+    minutes, rest = np.divmod(rest, 60000)
+    seconds, fraction = np.divmod(rest, 1000)
+    columns = starts[:, None] + (np.array(_DIGIT_COLUMNS, dtype=np.int64) + 1)
+    data[columns] = np.stack([hours // 10, hours % 10, minutes // 10, minutes % 10,
+                              seconds // 10, seconds % 10, fraction // 100,
+                              fraction // 10 % 10, fraction % 10], axis=1) + ord('0')
+    data[starts + 9] = ord('.')
+    return data.tobytes().decode('utf-8'), int(starts.size), clamped
+
+
+def _locate_times_np(data):
+    """Start offsets and values of the "[HH:MM:SS.mmm]" timestamps in UTF-8 bytes."""
+    if data.size < 14:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Candidate "[HH:MM:SS.mmm]" windows, checked on their punctuation first
+    starts = np.flatnonzero(data[:-13] == ord('['))
+    starts = starts[(data[starts + 3] == 58) & (data[starts + 6] == 58)
+                    & ((data[starts + 9] == 46) | (data[starts + 9] == 44))
+                    & (data[starts + 13] == 93)]
+    columns = starts[:, None] + (np.array(_DIGIT_COLUMNS, dtype=np.int64) + 1)
+    ms, valid = _digits_to_ms(data[columns].astype(np.int64) - ord('0'))
+    # Every "digit]" must close one of the canonical matches, otherwise there is
+    # a 3+ digit hour or short fraction timestamp that only the regex handles
+    ends = np.flatnonzero(data[1:] == ord(']')) + 1
+    ends = ends[(data[ends - 1] >= ord('0')) & (data[ends - 1] <= ord('9'))]
+    if not np.array_equal(ends, starts[valid] + 13):
+        return None
+    return starts[valid], ms[valid]
@@ -0,0 +1,234 @@
+"""Low-overhead tracing of hot paths, exportable as a Chrome trace."""
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_CAPACITY = 200000
+
+# Names of the end-to-end flows measured by the widgets
+KEYPRESS_TO_TIMESTAMP = "keypress-to-timestamp-inserted"
+CLICK_TO_FRAME = "click-to-frame-shown"
+
+
+class LatencyHistogram:
+    """Log-scaled latency histogram, four buckets per power of two (microseconds)."""
+    BUCKETS_PER_OCTAVE = 4
+    NUM_BUCKETS = 4 * 40  # Up to about 2^40 us, far beyond anything we record
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def record(self, duration_us):
+        if duration_us < 1:
+            index = 0
+        else:
+            index = min(int(math.log2(duration_us) * self.BUCKETS_PER_OCTAVE) + 1,
+                        self.NUM_BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_us += duration_us
+        if duration_us > self.max_us:
+            self.max_us = duration_us
+
+    def bucket_upper_us(self, index):
+        return 2 ** (index / self.BUCKETS_PER_OCTAVE)
+
+    def percentile(self, p):
+        """Approximate p-th percentile (upper bound of its bucket), in microseconds."""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self.bucket_upper_us(index), self.max_us)
+        return self.max_us
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_us": self.total_us / self.count if self.count else 0.0,
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "max_us": self.max_us,
+        }
+
+    def buckets(self):
+        """Non-empty buckets as (upper_bound_us, count) pairs."""
+        return [(self.bucket_upper_us(i), c) for i, c in enumerate(self.counts) if c]
+
+
+class _NullSpan:
+    """Shared do-nothing context manager returned while tracing is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start_ns")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start_ns, time.perf_counter_ns(),
+                             self.category, self.args)
+        return False
+
+
+class Tracer:
+    """Ring buffer of trace events plus per-operation latency histograms.
+
+    While disabled (the default, unless ANNOTIME_TRACE=1), spans cost a single
+    attribute check. export_chrome_trace output opens in ui.perfetto.dev.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.enabled = False
+        self._events = deque(maxlen=capacity)
+        self._histograms = {}
+        self._flows = {}
+        self._lock = threading.Lock()  # Guards histogram creation only
+        self._epoch_ns = time.perf_counter_ns()
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+        if not self.enabled:
+            self._flows.clear()
+
+    def clear(self):
+        self._events.clear()
+        self._histograms.clear()
+        self._flows.clear()
+
+    # --- Recording ---
+    def span(self, name, category="app", args=None):
+        """Context manager timing a block of code."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def complete(self, name, start_ns, end_ns, category="app", args=None):
+        """Records a finished span given its perf_counter_ns bounds."""
+        self._events.append(("X", name, category, start_ns, end_ns - start_ns,
+                             threading.get_ident(), args))
+        self.histogram(name).record((end_ns - start_ns) / 1000.0)
+
+    def counter(self, name, value):
+        if self.enabled:
+            self._events.append(("C", name, "counter", time.perf_counter_ns(), 0,
+                                 threading.get_ident(), value))
+
+    def begin_flow(self, name, restart=True):
+        """Marks the start of an end-to-end latency measurement."""
+        if self.enabled and (restart or name not in self._flows):
+            self._flows[name] = time.perf_counter_ns()
+
+    def end_flow(self, name, args=None):
+        """Completes a flow started with begin_flow; does nothing if none is pending."""
+        start_ns = self._flows.pop(name, None)
+        if start_ns is not None and self.enabled:
+            self.complete(name, start_ns, time.perf_counter_ns(), "latency", args)
+
+    def flow_pending(self, name):
+        return name in self._flows
+
+    # --- Reporting ---
+    def histogram(self, name):
+        hist = self._histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(name, LatencyHistogram())
+        return hist
+
+    def histograms(self):
+        return dict(self._histograms)
+
+    def latency_report(self):
+        """Plain-text table of per-operation latency percentiles (milliseconds)."""
+        lines = [f"{'operation':<36} {'count':>7} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"]
+        for name, hist in sorted(self._histograms.items()):
+            s = hist.summary()
+            lines.append(f"{name:<36} {s['count']:>7} {s['mean_us'] / 1000:>8.2f} "
+                         f"{s['p50_us'] / 1000:>8.2f} {s['p90_us'] / 1000:>8.2f} "
+                         f"{s['p99_us'] / 1000:>8.2f} {s['max_us'] / 1000:>8.2f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Returns the buffered events in Chrome trace event format."""
+        pid = os.getpid()
+        events = []
+        thread_ids = set()
+        for phase, name, category, ts_ns, dur_ns, tid, payload in list(self._events):
+            thread_ids.add(tid)
+            event = {"ph": phase, "name": name, "cat": category, "pid": pid, "tid": tid,
+                     "ts": (ts_ns - self._epoch_ns) / 1000.0}
+            if phase == "X":
+                event["dur"] = dur_ns / 1000.0
+                if payload:
+                    event["args"] = payload
+            else:
+                event["args"] = {name: payload}
+            events.append(event)
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for tid in thread_ids:
+            events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                           "args": {"name": names.get(tid, f"thread-{tid}")}})
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"latency": {name: hist.summary() for name, hist in self._histograms.items()}},
+        }
+
+    def export_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(), file)
+        return path
+
+
+# Process-wide tracer used by the widgets
+tracer = Tracer()
+if os.environ.get("ANNOTIME_TRACE", "") not in ("", "0"):
+    tracer.set_enabled(True)
+
+
+def traced(name=None, category="app"):
+    """Decorator recording a span for every call while tracing is enabled."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            start_ns = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.complete(span_name, start_ns, time.perf_counter_ns(), category)
+        return wrapper
+    return decorator
@@ -0,0 +1,224 @@
+"""In-process libvlc implementation of the PlayerBackend protocol."""
+import ctypes
+import sys
+
+import vlc
+
+from .player_backend import PlayerBackend, PlayerState
+from .frame_pool import SCRATCH
+from .log import get_logger
+
+log = get_logger(__name__)
+
+_STATES = {
+    vlc.State.NothingSpecial: PlayerState.NOTHING,
+    vlc.State.Opening: PlayerState.OPENING,
+    vlc.State.Buffering: PlayerState.BUFFERING,
+    vlc.State.Playing: PlayerState.PLAYING,
+    vlc.State.Paused: PlayerState.PAUSED,
+    vlc.State.Stopped: PlayerState.STOPPED,
+    vlc.State.Ended: PlayerState.ENDED,
+    vlc.State.Error: PlayerState.ERROR,
+}
+
+
+# libvlc's video callback types, declared here because python-vlc passes the
+# format callback's chroma as an immutable string, which can't be written to
+_VideoFormatCb = ctypes.CFUNCTYPE(ctypes.c_uint, ctypes.POINTER(ctypes.c_void_p), ctypes.c_void_p,
+                                  ctypes.POINTER(ctypes.c_uint), ctypes.POINTER(ctypes.c_uint),
+                                  ctypes.POINTER(ctypes.c_uint), ctypes.POINTER(ctypes.c_uint))
+_VideoCleanupCb = ctypes.CFUNCTYPE(None, ctypes.c_void_p)
+_VideoLockCb = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p))
+_VideoUnlockCb = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p))
+_VideoDisplayCb = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p)
+_PICTURE_BASE = 2            # Picture ids are pool indexes plus this, so none is NULL
+_callback_setters = None
+
+
+def _video_callback_setters():
+    """(libvlc_video_set_callbacks, libvlc_video_set_format_callbacks), or None if libvlc lacks them."""
+    global _callback_setters
+    if _callback_setters is None:
+        try:
+            _callback_setters = (
+                ctypes.CFUNCTYPE(None, ctypes.c_void_p, _VideoLockCb, _VideoUnlockCb, _VideoDisplayCb,
+                                 ctypes.c_void_p)(("libvlc_video_set_callbacks", vlc.dll)),
+                ctypes.CFUNCTYPE(None, ctypes.c_void_p, _VideoFormatCb, _VideoCleanupCb)(
+                    ("libvlc_video_set_format_callbacks", vlc.dll)))
+        except (AttributeError, TypeError, OSError) as e:
+            log.warning("libvlc has no video callbacks (%s); video is drawn into a window", e)
+            _callback_setters = ()
+    return _callback_setters or None
+
+
+class _SharedInstance:
+    """Reference-counted vlc.Instance, released with its last player."""
+
+    def __init__(self, vlc_args):
+        self.instance = vlc.Instance(vlc_args)
+        self.refs = 0
+
+
+class VlcBackend(PlayerBackend):
+    """A vlc.MediaPlayer. Players made with spawn() share one vlc.Instance."""
+    name = "vlc"
+    video_frames = True
+
+    def __init__(self, vlc_args=None, _shared=None):
+        self._shared = _shared or _SharedInstance(vlc_args or [])
+        self._shared.refs += 1
+        self.instance = self._shared.instance
+        self.media_player = self.instance.media_player_new()
+        self._time_listeners = []
+        self._events_attached = False
+        self._video_callbacks = None     # Keeps the ctypes callbacks alive while libvlc holds them
+
+    # --- Media ---
+    def load(self, path):
+        if self.get_state() not in (PlayerState.NOTHING, PlayerState.STOPPED, PlayerState.ERROR):
+            self.media_player.stop()
+        media = self.instance.media_new(path)
+        if not media: raise RuntimeError("Failed to create VLC media object.")
+        media.parse_async()
+        self.media_player.set_media(media)
+        media.release()
+
+    def unload(self):
+        if self.get_state() not in (PlayerState.NOTHING, PlayerState.STOPPED):
+            self.media_player.stop()
+        self.media_player.set_media(None)
+
+    def has_media(self):
+        return self.media_player.get_media() is not None
+
+    def get_length(self):
+        return self.media_player.get_length()
+
+    # --- Transport ---
+    def play(self):
+        return self.media_player.play() != -1
+
+    def pause(self):
+        # libvlc's pause() toggles, so only call it while playing
+        if self.media_player.is_playing(): self.media_player.pause()
+
+    def stop(self):
+        if self.media_player.get_state() != vlc.State.Stopped: self.media_player.stop()
+
+    def is_playing(self):
+        return bool(self.media_player.is_playing())
+
+    def get_state(self):
+        return _STATES.get(self.media_player.get_state(), PlayerState.ERROR)
+
+    def get_time(self):
+        return self.media_player.get_time()
+
+    def set_time(self, time_ms):
+        self.media_player.set_time(int(time_ms))
+
+    def set_position(self, ratio):
+        self.media_player.set_position(ratio)
+
+    def is_seekable(self):
+        return bool(self.media_player.is_seekable())
+
+    def set_rate(self, rate):
+        self.media_player.set_rate(rate)
+
+    def get_rate(self):
+        return self.media_player.get_rate()
+
+    # --- Audio/video output ---
+    def set_volume(self, volume):
+        self.media_player.audio_set_volume(int(volume))
+
+    def set_mute(self, muted):
+        self.media_player.audio_set_mute(bool(muted))
+
+    def set_video_window(self, window_id):
+        if sys.platform.startswith("linux"): self.media_player.set_xwindow(window_id)
+        elif sys.platform == "win32": self.media_player.set_hwnd(window_id)
+        elif sys.platform == "darwin":
+            try: self.media_player.set_nsobject(window_id)
+            except Exception as e_mac: log.warning("macOS: %s", e_mac)
+
+    def set_video_frame_pool(self, pool):
+        """Decodes into the pool's buffers as RV32 at the size pool.fit picks (libvlc "vmem").
+
+        Returns False if this libvlc can't, so a window is used instead. The
+        callbacks run on libvlc's decoder thread and must not raise.
+        """
+        setters = _video_callback_setters()
+        if setters is None: return False
+        set_callbacks, set_format_callbacks = setters
+        fallback = []            # A buffer of the current size for when the pool has none to give
+
+        def setup(_opaque, chroma, width, height, pitches, lines):
+            try:
+                frame_width, frame_height = pool.fit(width[0], height[0])
+                ctypes.memmove(chroma, b"RV32", 4)
+                width[0], height[0] = frame_width, frame_height
+                pitches[0] = pitch = pool.setup(frame_width, frame_height)
+                lines[0] = frame_height
+                fallback[:] = [ctypes.create_string_buffer(pitch * frame_height)]
+                return pool.count
+            except Exception:
+                log.exception("Video format setup failed")
+                return 0         # libvlc stops the video output
+
+        def lock(_opaque, planes):
+            acquired = pool.acquire()
+            if acquired is None:
+                if not fallback: return None
+                acquired = SCRATCH, ctypes.addressof(fallback[0])     # Counted as dropped
+            index, address = acquired
+            planes[0] = address
+            return index + _PICTURE_BASE
+
+        def display(_opaque, picture):
+            try:
+                pool.publish((picture or 0) - _PICTURE_BASE)
+            except Exception:
+                log.exception("Publishing a video frame failed")
+
+        self._video_callbacks = (_VideoFormatCb(setup), _VideoCleanupCb(lambda _opaque: None),
+                                 _VideoLockCb(lock), _VideoUnlockCb(lambda _opaque, _picture, _planes: None),
+                                 _VideoDisplayCb(display))
+        format_cb, cleanup_cb, lock_cb, unlock_cb, display_cb = self._video_callbacks
+        set_format_callbacks(self.media_player, format_cb, cleanup_cb)
+        set_callbacks(self.media_player, lock_cb, unlock_cb, display_cb, None)
+        return True
+
+    def video_size(self):
+        try:
+            return tuple(self.media_player.video_get_size(0))
+        except Exception:
+            return (0, 0)
+
+    # --- Misc ---
+    def add_time_listener(self, callback):
+        self._time_listeners.append(callback)
+        if not self._events_attached:
+            self.media_player.event_manager().event_attach(vlc.EventType.MediaPlayerTimeChanged,
+                                                           self._on_time_changed)
+            self._events_attached = True
+
+    def _on_time_changed(self, event):
+        for callback in self._time_listeners:
+            callback(event.u.new_time)
+
+    def spawn(self):
+        return VlcBackend(_shared=self._shared)
+
+    def release(self):
+        try:
+            self.unload()
+        except Exception as e:
+            log.error("Error stopping media player: %s", e)
+        self.media_player.release()
+        self.media_player = None
+        self._shared.refs -= 1
+        if self._shared.refs == 0:
+            self.instance.release()
+        self.instance = None
@@ -0,0 +1,48 @@
+"""Runs plain functions on Qt's global thread pool.
+
+The function runs on a pool thread and must not touch widgets; its result
+(or exception) is delivered back through queued signals, i.e. on the GUI
+thread.
+"""
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)    # The function's return value
+    failed = pyqtSignal(object)      # The exception it raised
+
+
+class Worker(QRunnable):
+    """QRunnable calling fn(*args, **kwargs)."""
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            log.error("Background task %s failed:\n%s", getattr(self.fn, "__name__", self.fn),
+                      traceback.format_exc())
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+def run_in_background(fn, *args, on_result=None, on_error=None, **kwargs):
+    """Starts fn on the global thread pool. Returns the Worker."""
+    worker = Worker(fn, *args, **kwargs)
+    if on_result: worker.signals.finished.connect(on_result)
+    if on_error: worker.signals.failed.connect(on_error)
+    QThreadPool.globalInstance().start(worker)
+    return worker
@@ -0,0 +1,97 @@
+import os
+
+from PyQt5.QtWidgets import (QDialog, QFormLayout, QComboBox, QLineEdit, QPushButton, QHBoxLayout,
+                             QDialogButtonBox, QVBoxLayout, QFileDialog, QRadioButton, QButtonGroup)
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.clip_export import EXPORT_FORMATS, ExportSettings, export_clips, export_cancel_event
+from utils.workers import run_in_background
+
+SAMPLE_RATES = [None, 8000, 16000, 22050, 24000, 44100, 48000]
+
+
+# --- Export Audio Clips Dialog ---
+class ClipExportDialog(QDialog):
+    """Asks where and how to write one audio clip per transcript segment."""
+
+    def __init__(self, parent=None, output_dir="", tab_count=1):
+        super().__init__(parent)
+        self.setWindowTitle("Export Audio Clips")
+
+        self.dir_edit = QLineEdit(output_dir)
+        browse_button = QPushButton("Browse...")
+        browse_button.clicked.connect(self._browse)
+        dir_layout = QHBoxLayout()
+        dir_layout.addWidget(self.dir_edit)
+        dir_layout.addWidget(browse_button)
+
+        self.format_combo = QComboBox()
+        self.format_combo.addItems([fmt.upper() for fmt in EXPORT_FORMATS])
+
+        self.rate_combo = QComboBox()
+        for rate in SAMPLE_RATES:
+            self.rate_combo.addItem("Keep original" if rate is None else f"{rate} Hz", rate)
+
+        self.channels_combo = QComboBox()
+        self.channels_combo.addItem("Keep original", None)
+        self.channels_combo.addItem("Mono (downmix)", 1)
+        self.channels_combo.addItem("Stereo", 2)
+
+        self.current_radio = QRadioButton("Current tab")
+        self.all_radio = QRadioButton(f"All open tabs ({tab_count})")
+        self.current_radio.setChecked(True)
+        scope_group = QButtonGroup(self)
+        scope_group.addButton(self.current_radio)
+        scope_group.addButton(self.all_radio)
+        scope_layout = QHBoxLayout()
+        scope_layout.addWidget(self.current_radio)
+        scope_layout.addWidget(self.all_radio)
+
+        form = QFormLayout()
+        form.addRow("Output folder:", dir_layout)
+        form.addRow("Format:", self.format_combo)
+        form.addRow("Sample rate:", self.rate_combo)
+        form.addRow("Channels:", self.channels_combo)
+        form.addRow("Transcripts:", scope_layout)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText("Export")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+
+    def settings(self):
+        return ExportSettings(self.dir_edit.text().strip(), EXPORT_FORMATS[self.format_combo.currentIndex()],
+                              self.rate_combo.currentData(), self.channels_combo.currentData())
+
+    def all_tabs(self):
+        return self.all_radio.isChecked()
+
+    def _browse(self):
+        directory = QFileDialog.getExistingDirectory(self, "Export Clips To", self.dir_edit.text())
+        if directory: self.dir_edit.setText(directory)
+
+
+class ClipExporter(QObject):
+    """Runs utils.clip_export.export_clips off the GUI thread."""
+    progress = pyqtSignal(int, int, int)     # Job index, clips done, clips in the job
+    finished = pyqtSignal(object)            # List of per-job summaries or exceptions
+
+    def __init__(self, jobs, settings):
+        super().__init__()
+        self.jobs = jobs
+        self.settings = settings
+        self._cancel_event = export_cancel_event()
+
+    def start(self):
+        os.makedirs(self.settings.output_dir, exist_ok=True)
+        run_in_background(export_clips, self.jobs, self.settings,
+                          on_progress=self.progress.emit, cancel_event=self._cancel_event,
+                          on_result=self.finished.emit,
+                          on_error=lambda error: self.finished.emit([error] * len(self.jobs)))
+
+    def cancel(self):
+        self._cancel_event.set()
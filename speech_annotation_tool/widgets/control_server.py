@@ -0,0 +1,236 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket, QAbstractSocket
+
+from utils.control_protocol import Dispatcher, RpcError, notification, INVALID_PARAMS, UNAVAILABLE
+from utils.tracing import tracer
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+MAX_LINE_BYTES = 1024 * 1024
+TIME_MIN_INTERVAL_MS = 10
+TIME_DEFAULT_INTERVAL_MS = 100
+MAX_PENDING_BYTES = 64 * 1024    # A subscriber this far behind misses time updates until it catches up
+EVENTS = ("time",)
+
+
+class _Connection:
+    def __init__(self, socket):
+        self.socket = socket
+        self.buffer = b""
+        self.received_at = None          # time.monotonic() of the data being handled
+        self.time_interval_s = None      # Set while subscribed to time updates
+        self.time_due = 0.0
+        self.time_sent = None            # (time_ms, playing) of the last update sent
+
+
+class ControlServer(QObject):
+    """Local JSON-RPC control socket (see utils.control_protocol) for foot pedals and scripts.
+
+    Requests are read and answered on the GUI thread as soon as they
+    arrive, independent of which widget has focus. Time updates are read
+    from the playback clock once per tick and the same line goes to every
+    subscriber that is due; updates that haven't changed (paused) or that a
+    slow subscriber hasn't read yet are dropped rather than queued.
+    """
+
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._connections = {}           # QLocalSocket -> _Connection
+        self._time_timer = QTimer(self)
+        self._time_timer.setTimerType(Qt.PreciseTimer)
+        self._time_timer.timeout.connect(self._send_time)
+
+        self.dispatcher = Dispatcher()
+        self.dispatcher.on_error = lambda method, e: log.exception("Control request %s failed", method)
+        for name, handler in (("play", self.play), ("pause", self.pause), ("toggle_play_pause", self.toggle_play_pause),
+                              ("seek", self.seek), ("loop", self.loop), ("get_state", self.get_state),
+                              ("methods", self.dispatcher.methods)):
+            self.dispatcher.register(name, handler)
+        for name, handler in (("insert_timestamp", self.insert_timestamp), ("subscribe", self.subscribe),
+                              ("unsubscribe", self.unsubscribe)):
+            self.dispatcher.register(name, handler, with_connection=True)
+
+    # --- Server ---
+    def start(self, name):
+        """Starts listening on name; returns an error message, or None."""
+        if self._server.isListening(): self.stop()
+        # Listening may replace a socket that is in use, so look for a live server first
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(200):
+            probe.abort()
+            return f"Another Annotime window is already listening on {name}."
+        if self._server.listen(name): return self._started()
+        if self._server.serverError() == QAbstractSocket.AddressInUseError:
+            QLocalServer.removeServer(name)      # Left behind by a crash
+            if self._server.listen(name): return self._started()
+        return self._server.errorString()
+
+    def _started(self):
+        log.info("Control socket listening on %s", self._server.fullServerName())
+        return None
+
+    def stop(self):
+        for socket in list(self._connections):
+            socket.abort()
+        self._connections.clear()
+        self._time_timer.stop()
+        if self._server.isListening():
+            self._server.close()
+            log.info("Control socket closed.")
+
+    def is_listening(self):
+        return self._server.isListening()
+
+    def address(self):
+        return self._server.fullServerName()
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            self._connections[socket] = _Connection(socket)
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            socket.disconnected.connect(lambda socket=socket: self._on_disconnected(socket))
+            log.debug("Control client connected (%d open).", len(self._connections))
+
+    def _on_disconnected(self, socket):
+        if self._connections.pop(socket, None) is not None: self._update_time_timer()
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        connection = self._connections.get(socket)
+        if connection is None: return
+        connection.received_at = time.monotonic()
+        data = connection.buffer + bytes(socket.readAll())
+        lines = data.split(b"\n")
+        connection.buffer = lines.pop()
+        if len(connection.buffer) > MAX_LINE_BYTES:
+            log.warning("Dropping a control client that sent a line over %d bytes.", MAX_LINE_BYTES)
+            socket.abort()
+            return
+        replies = []
+        for line in lines:
+            if not line.strip(): continue
+            with tracer.span("control.dispatch", "control"):
+                reply = self.dispatcher.handle_line(line, connection)
+            if reply is not None: replies.append(reply)
+        # One write for everything that arrived together
+        if replies and socket in self._connections:
+            socket.write(("\n".join(replies) + "\n").encode("utf-8"))
+
+    # --- Methods ---
+    def _media_player(self):
+        video_player = self.main_window.video_player
+        if not video_player.player or not video_player.player.has_media():
+            raise RpcError(UNAVAILABLE, "No video loaded")
+        return video_player
+
+    def get_state(self):
+        video_player = self.main_window.video_player
+        player = video_player.player
+        has_media = bool(player and player.has_media())
+        editor = self.main_window.text_editor
+        return {"media": video_player.current_video_path if has_media else None,
+                "time_ms": video_player.get_current_time_ms() if has_media else -1,
+                "length_ms": player.get_length() if has_media else 0,
+                "playing": has_media and player.is_playing(),
+                "looping": video_player.is_looping,
+                "loop_interval_ms": video_player.loop_interval_ms,
+                "transcript": editor.current_file_path if editor else None,
+                "modified": bool(editor and editor.text_edit.document().isModified()),
+                "segment_open": bool(editor and editor.last_timestamp_inserted)}
+
+    def play(self):
+        video_player = self._media_player()
+        if not video_player.player.is_playing(): video_player.toggle_play_pause()
+        return self.get_state()
+
+    def pause(self):
+        video_player = self._media_player()
+        if video_player.player.is_playing(): video_player.toggle_play_pause()
+        return self.get_state()
+
+    def toggle_play_pause(self):
+        self._media_player().toggle_play_pause()
+        return self.get_state()
+
+    def seek(self, time_ms=None, offset_ms=None):
+        """Seeks to time_ms, or by offset_ms from the current time."""
+        video_player = self._media_player()
+        if (time_ms is None) == (offset_ms is None):
+            raise RpcError(INVALID_PARAMS, "Give either time_ms or offset_ms")
+        if not isinstance(time_ms if offset_ms is None else offset_ms, (int, float)):
+            raise RpcError(INVALID_PARAMS, "Times are numbers of ms")
+        target = time_ms if offset_ms is None else video_player.get_current_time_ms() + offset_ms
+        if video_player.is_looping: video_player.stop_loop()
+        video_player.set_time_ms(max(0, int(target)))
+        return {"time_ms": video_player.get_current_time_ms()}
+
+    def loop(self, enabled=None, interval_ms=None):
+        """Loops the last interval_ms (toggles without enabled)."""
+        video_player = self._media_player()
+        if interval_ms is not None:
+            if not isinstance(interval_ms, (int, float)): raise RpcError(INVALID_PARAMS, "interval_ms must be a number")
+            video_player.set_loop_interval(int(interval_ms))
+        if enabled is None or bool(enabled) != video_player.is_looping: video_player.toggle_loop()
+        return {"looping": video_player.is_looping, "loop_interval_ms": video_player.loop_interval_ms}
+
+    def insert_timestamp(self, connection):
+        """Same as Ctrl+I in the current tab, timed from when the request arrived."""
+        self._media_player()
+        editor = self.main_window.text_editor
+        if editor is None or editor.text_edit.isReadOnly(): raise RpcError(UNAVAILABLE, "The transcript can't be edited now")
+        editor.insert_timestamp_action(pressed_at=connection.received_at if connection else None)
+        return self.get_state()
+
+    def subscribe(self, connection, event="time", interval_ms=TIME_DEFAULT_INTERVAL_MS):
+        """Sends "time" notifications every interval_ms while the time or play state changes."""
+        if event not in EVENTS: raise RpcError(INVALID_PARAMS, f"Unknown event: {event}")
+        if not isinstance(interval_ms, (int, float)): raise RpcError(INVALID_PARAMS, "interval_ms must be a number")
+        interval_ms = max(TIME_MIN_INTERVAL_MS, int(interval_ms))
+        connection.time_interval_s = interval_ms / 1000
+        connection.time_due = 0.0
+        connection.time_sent = None
+        self._update_time_timer()
+        return {"event": event, "interval_ms": interval_ms}
+
+    def unsubscribe(self, connection, event="time"):
+        if event not in EVENTS: raise RpcError(INVALID_PARAMS, f"Unknown event: {event}")
+        connection.time_interval_s = None
+        self._update_time_timer()
+        return {"event": event}
+
+    # --- Time updates ---
+    def _update_time_timer(self):
+        intervals = [c.time_interval_s for c in self._connections.values() if c.time_interval_s is not None]
+        if not intervals:
+            self._time_timer.stop()
+            return
+        interval_ms = round(min(intervals) * 1000)
+        if self._time_timer.interval() != interval_ms or not self._time_timer.isActive():
+            self._time_timer.start(interval_ms)
+
+    def _send_time(self):
+        now = time.monotonic()
+        video_player = self.main_window.video_player
+        player = video_player.player
+        has_media = bool(player and player.has_media())
+        state = (video_player.get_current_time_ms() if has_media else -1, has_media and player.is_playing())
+        line = None
+        for socket, connection in self._connections.items():
+            if connection.time_interval_s is None or now < connection.time_due - 0.002: continue
+            if state == connection.time_sent: continue           # Paused: nothing new
+            if socket.bytesToWrite() > MAX_PENDING_BYTES: continue
+            if line is None:
+                line = (notification("time", {"time_ms": state[0], "playing": state[1]}) + "\n").encode("utf-8")
+            socket.write(line)
+            connection.time_sent = state
+            due = connection.time_due + connection.time_interval_s
+            connection.time_due = due if due > now else now + connection.time_interval_s
@@ -0,0 +1,70 @@
+from PyQt5.QtWidgets import (QDialog, QFormLayout, QDoubleSpinBox, QCheckBox, QLabel,
+                             QDialogButtonBox, QVBoxLayout)
+
+from utils.timestamp import format_time
+
+MS_PER_HOUR = 3600 * 1000
+
+
+# --- Shift / Rescale Timestamps Dialog ---
+class RetimeDialog(QDialog):
+    """Asks for a constant offset and a linear drift to apply to all timestamps.
+
+    A timestamp t becomes t * (1 + drift / 1 hour) + offset.
+    """
+
+    def __init__(self, parent=None, has_selection=False):
+        super().__init__(parent)
+        self.setWindowTitle("Shift / Rescale Timestamps")
+
+        self.offset_spin = QDoubleSpinBox()
+        self.offset_spin.setRange(-86400.0, 86400.0)
+        self.offset_spin.setDecimals(3)
+        self.offset_spin.setSingleStep(0.1)
+        self.offset_spin.setSuffix(" s")
+        self.offset_spin.setToolTip("Added to every timestamp (negative moves them earlier)")
+
+        self.drift_spin = QDoubleSpinBox()
+        self.drift_spin.setRange(-600000.0, 600000.0)
+        self.drift_spin.setDecimals(1)
+        self.drift_spin.setSingleStep(10.0)
+        self.drift_spin.setSuffix(" ms / hour")
+        self.drift_spin.setToolTip("Linear clock drift correction: how much later the new media "
+                                   "is after each hour of the old one")
+
+        self.selection_check = QCheckBox("Only timestamps in the selected text")
+        self.selection_check.setEnabled(has_selection)
+        self.selection_check.setChecked(has_selection)
+
+        self.preview_label = QLabel()
+        self.offset_spin.valueChanged.connect(self._update_preview)
+        self.drift_spin.valueChanged.connect(self._update_preview)
+
+        form = QFormLayout()
+        form.addRow("Offset:", self.offset_spin)
+        form.addRow("Drift:", self.drift_spin)
+        form.addRow(self.selection_check)
+        form.addRow("Example:", self.preview_label)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        self._update_preview()
+
+    def offset_ms(self):
+        return round(self.offset_spin.value() * 1000)
+
+    def scale(self):
+        return 1.0 + self.drift_spin.value() / MS_PER_HOUR
+
+    def selection_only(self):
+        return self.selection_check.isEnabled() and self.selection_check.isChecked()
+
+    def _update_preview(self):
+        example = MS_PER_HOUR
+        self.preview_label.setText(f"{format_time(example)} → "
+                                   f"{format_time(round(example * self.scale() + self.offset_ms()))}")
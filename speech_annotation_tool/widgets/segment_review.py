@@ -0,0 +1,283 @@
+from bisect import bisect_left, bisect_right
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+
+from utils.player_backend import PlayerState
+from utils.timestamp import format_time
+from utils.tracing import tracer
+from utils.log import get_logger, lazy
+
+log = get_logger(__name__)
+
+PREROLL_POLL_MS = 20
+PREROLL_TIMEOUT_MS = 3000
+SEEK_TOLERANCE_MS = 250     # How close the standby player must be to its target
+END_TOLERANCE_MS = 15       # Stop this close to the segment end rather than wait again
+
+
+# --- Segment review queue ---
+class SegmentReview(QObject):
+    """Plays the current tab's segments one at a time for QA passes.
+
+    The active player plays segment N from its start and pauses at its end.
+    Meanwhile a second player, spawned from the session's player so it shares
+    the same engine, is kept muted and paused at the start of segment N+1.
+    Moving on to the next segment swaps the two players, so playback starts
+    without waiting for a seek; the player that just finished becomes the
+    standby for N+2.
+    """
+    segmentChanged = pyqtSignal(int, int)   # Index, number of segments
+    reviewStopped = pyqtSignal()
+
+    def __init__(self, video_player, sessions):
+        super().__init__()
+        self.video_player = video_player
+        self.sessions = sessions
+        self.active = False
+        self.segments = []
+        self.index = -1
+        self._editor = None
+        self._home_player = None          # The session's pooled player
+        self._spare_player = None         # Spawned for the duration of the review
+        self._slots = {}                  # id(player) -> video surface slot
+        self._standby = None
+        self._standby_target_ms = None
+        self._standby_ready = False
+        self._preroll_starting = False
+        self._preroll_elapsed_ms = 0
+        self._end_ms = 0
+        self._segments_dirty = False
+
+        self._end_timer = QTimer(self)
+        self._end_timer.setSingleShot(True)
+        self._end_timer.setTimerType(Qt.PreciseTimer)
+        self._end_timer.timeout.connect(self._check_segment_end)
+        self._preroll_timer = QTimer(self)
+        self._preroll_timer.setInterval(PREROLL_POLL_MS)
+        self._preroll_timer.timeout.connect(self._poll_preroll)
+
+        # Switching tabs or loading another video ends the review
+        sessions.currentEditorChanged.connect(lambda _editor: self.stop())
+        video_player.videoLoaded.connect(lambda _duration: self.stop())
+
+    # --- Starting and stopping ---
+    def start(self):
+        """Starts reviewing from the segment at the cursor.
+
+        Returns None on success or a message explaining why review can't start.
+        """
+        if self.active: return None
+        player = self.video_player.player
+        session = self.sessions.current_session()
+        entry = self.sessions.pool.get(session.id) if self.sessions.pool and session else None
+        video_path = self.video_player.current_video_path
+        if entry is None or not player or not player.has_media() or not video_path:
+            return "Load a video in this tab first."
+        editor = session.editor
+        segments = editor.segments(skip_empty=True)
+        if not segments:
+            return "The transcript has no [start]-[end] segments to review."
+
+        # Created on the first review and reused by every later one
+        spare_slot = self.sessions.pool.spare_slot
+        try:
+            spare = player.spawn()
+            self.video_player.attach_surface(spare, self.video_player.video_surface(spare_slot))
+            spare.load(self.video_player.media_url(video_path))
+        except Exception as e:
+            log.exception("Could not create the review player: %s", e)
+            return f"Could not create the second player:\n{e}"
+
+        if self.video_player.is_looping: self.video_player.stop_loop()
+        self.active = True
+        self.segments = segments
+        self._editor = editor
+        self._home_player = player
+        self._spare_player = spare
+        self._slots = {id(player): entry.slot, id(spare): spare_slot}
+        self._standby = spare
+        self._standby_target_ms = None
+        self._standby_ready = False
+        self._segments_dirty = False
+        # Timestamp clicks pick the segment to review instead of just seeking
+        editor.jump_to_time_signal.disconnect(self.video_player.set_time_ms)
+        editor.jump_to_time_signal.connect(self.play_at_time)
+        editor.text_edit.document().contentsChanged.connect(self._mark_dirty)
+
+        log.info("Segment review started (%d segments)", len(segments))
+        self.play_segment(self._index_for_line(editor.text_edit.textCursor().blockNumber()))
+        return None
+
+    def stop(self):
+        """Ends the review, handing playback back to the session's own player."""
+        if not self.active: return
+        self.active = False
+        self._end_timer.stop()
+        self._preroll_timer.stop()
+        video_player = self.video_player
+        editor = self._editor
+        home, spare = self._home_player, self._spare_player
+
+        editor.jump_to_time_signal.disconnect(self.play_at_time)
+        editor.jump_to_time_signal.connect(video_player.set_time_ms)
+        editor.text_edit.document().contentsChanged.disconnect(self._mark_dirty)
+        editor.player = home
+
+        position = spare.get_time() if spare.has_media() else -1
+        if video_player.player is spare:
+            spare.pause()
+            video_player.activate_player(home, self._slots[id(home)], video_player.current_video_path)
+            if position >= 0: video_player.set_time_ms(position)
+        elif video_player.player is home:
+            video_player.pause_video(from_user=False)
+        elif position >= 0 and spare is not self._standby:
+            # A tab switch already moved the player on; leave home where review ended
+            home.set_time(position)
+        spare.release()
+
+        self._editor = self._home_player = self._spare_player = self._standby = None
+        self._slots = {}
+        self.segments = []
+        self.index = -1
+        log.info("Segment review stopped")
+        self.reviewStopped.emit()
+
+    # --- Navigation ---
+    def next_segment(self):
+        if not self.active: return
+        self._refresh_segments()
+        if self.index + 1 >= len(self.segments):
+            log.info("Last segment reached")
+            return
+        self.play_segment(self.index + 1)
+
+    def previous_segment(self):
+        if not self.active: return
+        self._refresh_segments()
+        self.play_segment(max(0, self.index - 1))
+
+    def replay_segment(self):
+        if not self.active: return
+        self._refresh_segments()
+        self.play_segment(self.index)
+
+    def play_at_time(self, time_ms):
+        """Plays the segment containing a clicked timestamp."""
+        if not self.active: return
+        self._refresh_segments()
+        starts = [segment.start_ms for segment in self.segments]
+        self.play_segment(max(0, bisect_right(starts, time_ms) - 1))
+
+    def play_segment(self, index):
+        if not self.active or not self.segments: return
+        index = max(0, min(index, len(self.segments) - 1))
+        segment = self.segments[index]
+        self._end_timer.stop()
+        with tracer.span("review.play_segment", "review"):
+            if self._standby_ready and self._standby_target_ms == segment.start_ms:
+                self._swap_players()
+            else:
+                self.video_player.set_time_ms(segment.start_ms)
+            self.video_player.play_video()
+        self.index = index
+        self._end_ms = segment.end_ms
+        self._end_timer.start(self._wall_ms(segment.end_ms - segment.start_ms))
+        self._select_line(segment.line)
+        log.debug("Reviewing segment %d/%d: %s -> %s", index + 1, len(self.segments),
+                  lazy(format_time, segment.start_ms), lazy(format_time, segment.end_ms))
+        self.segmentChanged.emit(index, len(self.segments))
+        self._preroll(index + 1)
+
+    # --- Double buffering ---
+    def _swap_players(self):
+        """Makes the pre-rolled standby player the active one."""
+        video_player = self.video_player
+        previous, ready = video_player.player, self._standby
+        previous.pause()
+        previous.set_mute(True)
+        video_player.activate_player(ready, self._slots[id(ready)], video_player.current_video_path)
+        self._editor.player = ready
+        self._standby = previous
+        self._standby_ready = False
+
+    def _preroll(self, index):
+        """Starts parking the standby player, muted and paused, at a segment start."""
+        self._preroll_timer.stop()
+        self._standby_ready = False
+        if index >= len(self.segments):
+            self._standby_target_ms = None
+            return
+        player = self._standby
+        self._standby_target_ms = self.segments[index].start_ms
+        player.set_mute(True)
+        if player.get_state() in (PlayerState.PAUSED, PlayerState.PLAYING, PlayerState.BUFFERING):
+            player.pause()
+            player.set_time(self._standby_target_ms)
+            self._preroll_starting = False
+        else:
+            # libvlc only seeks (and decodes a frame) once playback has started
+            player.play()
+            self._preroll_starting = True
+        self._preroll_elapsed_ms = 0
+        self._preroll_timer.start()
+
+    def _poll_preroll(self):
+        player = self._standby
+        self._preroll_elapsed_ms += PREROLL_POLL_MS
+        if self._preroll_starting:
+            if player.is_playing():
+                player.pause()
+                player.set_time(self._standby_target_ms)
+                self._preroll_starting = False
+        elif (player.get_state() == PlayerState.PAUSED
+              and abs(player.get_time() - self._standby_target_ms) <= SEEK_TOLERANCE_MS):
+            self._standby_ready = True
+            self._preroll_timer.stop()
+            log.debug("Next segment pre-rolled at %s in %d ms",
+                      lazy(format_time, self._standby_target_ms), self._preroll_elapsed_ms)
+            return
+        if self._preroll_elapsed_ms >= PREROLL_TIMEOUT_MS:
+            self._preroll_timer.stop()
+            log.warning("Pre-roll of the next segment timed out; it will start with a seek")
+
+    # --- Stopping at the segment end ---
+    def _check_segment_end(self):
+        player = self.video_player.player
+        if not self.active or not player or not player.is_playing(): return  # Paused by the reviewer
+        remaining = self._end_ms - player.get_time()
+        if remaining > END_TOLERANCE_MS:
+            # Started late (seek) or the rate changed; wait for the rest
+            self._end_timer.start(self._wall_ms(remaining))
+            return
+        self.video_player.pause_video(from_user=False)
+
+    def _wall_ms(self, media_ms):
+        rate = self.video_player.player.get_rate() or 1.0
+        return max(0, int(media_ms / rate))
+
+    # --- Transcript tracking ---
+    def _mark_dirty(self):
+        self._segments_dirty = True
+
+    def _refresh_segments(self):
+        """Re-parses the transcript after edits, keeping the current segment."""
+        if not self._segments_dirty: return
+        self._segments_dirty = False
+        line = self.segments[self.index].line if 0 <= self.index < len(self.segments) else 0
+        self.segments = self._editor.segments(skip_empty=True)
+        if not self.segments:
+            self.stop()
+            return
+        self.index = self._index_for_line(line)
+
+    def _index_for_line(self, line):
+        """Index of the first segment on or after a line (the last one if none)."""
+        lines = [segment.line for segment in self.segments]
+        return min(bisect_left(lines, line), len(self.segments) - 1)
+
+    def _select_line(self, line):
+        text_edit = self._editor.text_edit
+        block = text_edit.document().findBlockByNumber(line)
+        if not block.isValid(): return
+        text_edit.setTextCursor(QTextCursor(block))
+        text_edit.ensureCursorVisible()
@@ -0,0 +1,248 @@
+from PyQt5.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QFontMetrics, QKeySequence
+
+from utils.segments import SEGMENT_RE
+from utils.segment_store import store_for_text
+from utils.timestamp import format_time, parse_time
+
+START, END, TEXT = range(3)
+HEADERS = ("Start", "End", "Text")
+
+
+class SegmentTableModel(QAbstractTableModel):
+    """The editor's lines as start / end / text rows, read when a view asks for them.
+
+    In transcript order every line is a row (lines without a timestamp pair
+    have empty times); sorted by start or end time only the segment lines
+    are. Only the times are held, in a SegmentStore kept in step with the
+    document; the text of a row is read from its document line. Edits are
+    written back to the document as undoable line replacements.
+    """
+
+    def __init__(self, editor, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.document = editor.text_edit.document()
+        self.store = None
+        self._tracker = None
+        self._sort = None                # (column, Qt.SortOrder) when sorted by time
+        self._order = None               # Line of each row when sorted by time
+
+    # --- Following the document ---
+    def track(self):
+        if self._tracker is not None: return
+        self._tracker = self.editor.track_lines(store_for_text, self._tracker_changed, adopt=self._adopt)
+
+    def untrack(self):
+        if self._tracker is None: return
+        self.editor.untrack_lines(self._tracker)
+        self._tracker = None
+        self._set_store(None)
+
+    def _adopt(self, store):
+        self._set_store(store)
+        return self
+
+    def _tracker_changed(self):
+        if self._tracker.value is None and self.store is not None: self._set_store(None)   # Reloading
+
+    def _set_store(self, store):
+        self.beginResetModel()
+        self.store = store
+        self._order = self._time_order() if store is not None else None
+        self.endResetModel()
+
+    @property
+    def revision(self):
+        return self.store.revision
+
+    def replace_lines(self, first, removed, texts):
+        """Applies a document edit (called by the editor's line tracking)."""
+        if self._sort is not None:
+            self._replace_sorted(first, removed, texts)
+            return
+        added = len(texts)
+        if added > removed:
+            self.beginInsertRows(QModelIndex(), first + removed, first + added - 1)
+            self.store.replace_lines(first, removed, texts)
+            self.endInsertRows()
+        elif added < removed:
+            self.beginRemoveRows(QModelIndex(), first + added, first + removed - 1)
+            self.store.replace_lines(first, removed, texts)
+            self.endRemoveRows()
+        else:
+            self.store.replace_lines(first, removed, texts)
+        if added:
+            self.dataChanged.emit(self.index(first, 0), self.index(first + added - 1, TEXT))
+
+    def _replace_sorted(self, first, removed, texts):
+        revision = self.store.revision
+        self.store.replace_lines(first, removed, texts)
+        if self.store.revision == revision:
+            # Only text changed: the order stands (rows off screen aren't repainted anyway)
+            self.dataChanged.emit(self.index(0, TEXT), self.index(self.rowCount() - 1, TEXT))
+            return
+        order = self._time_order()
+        if len(order) != len(self._order):
+            self.beginResetModel()
+            self._order = order
+            self.endResetModel()
+            return
+        # Same rows in a new order: keep the selection and current row on their lines
+        self.layoutAboutToBeChanged.emit()
+        shift = len(texts) - removed
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            line = self._order[index.row()]
+            if line >= first + removed: line += shift
+            try:
+                new_indexes.append(self.index(order.index(line), index.column()))
+            except ValueError:
+                new_indexes.append(QModelIndex())
+        self._order = order
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def _time_order(self):
+        if self._sort is None: return None
+        column, order = self._sort
+        return self.store.time_order(by_end=column == END, descending=order == Qt.DescendingOrder)
+
+    # --- Rows ---
+    def line(self, row):
+        """Document line of a row."""
+        return self._order[row] if self._order is not None else row
+
+    def row_of(self, line):
+        """Row showing a document line, or None if it isn't shown (sorted, no timestamps)."""
+        if self.store is None: return None
+        if self._order is None: return min(line, len(self.store) - 1)
+        try:
+            return self._order.index(line)
+        except ValueError:
+            return None
+
+    def time_ms(self, index):
+        """Start or end time of a time cell, or None."""
+        if self.store is None or index.column() == TEXT: return None
+        times = self.store.times(self.line(index.row()))
+        return times[index.column()] if times else None
+
+    # --- QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.store is None: return 0
+        return len(self._order) if self._order is not None else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole): return None
+        line = self.line(index.row())
+        if index.column() == TEXT:
+            if role == Qt.ToolTipRole: return None
+            text = self.document.findBlockByNumber(line).text()
+            match = SEGMENT_RE.match(text)
+            return text[match.end():] if match else text
+        times = self.store.times(line)
+        if role == Qt.ToolTipRole: return "Click to seek, double-click to edit" if times else None
+        return format_time(times[index.column()]) if times else ""
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return None
+        if orientation == Qt.Horizontal: return HEADERS[section]
+        return str(self.line(section) + 1)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and not self.editor.text_edit.isReadOnly(): flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid(): return False
+        line = self.line(index.row())
+        text = self.document.findBlockByNumber(line).text()
+        match = SEGMENT_RE.match(text)
+        if index.column() == TEXT:
+            prefix = text[:match.end()] if match else ""
+            if prefix and not prefix[-1].isspace() and value: prefix += " "
+            return self.editor.replace_line(line, prefix + value)
+        try:
+            timestamp = format_time(parse_time(str(value).strip()))
+        except ValueError:
+            return False
+        if match:
+            start, end = match.span(1 if index.column() == START else 6)
+            new_text = text[:start] + timestamp + text[end:]
+        else:
+            new_text = f"[{timestamp}]-[{timestamp}] {text}"
+        return self.editor.replace_line(line, new_text)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Start or End sort by that time; Text restores the transcript order."""
+        self.beginResetModel()
+        self._sort = (column, order) if column in (START, END) else None
+        self._order = self._time_order() if self.store is not None else None
+        self.endResetModel()
+
+
+class SegmentTableView(QTableView):
+    """Table view of a TextEditor's transcript, for transcripts too long to edit as text.
+
+    Rows have a fixed height and the time columns a fixed width, so only the
+    rows on screen are ever read. Click a time to seek to it.
+    """
+    seekRequest = pyqtSignal(int)
+
+    def __init__(self, editor, parent=None):
+        super().__init__(parent)
+        self.setModel(SegmentTableModel(editor, self))
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.setWordWrap(False)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(TEXT, QHeaderView.Stretch)
+        header.setToolTip("Click Start or End to sort by time, Text for the transcript order")
+        header.setSortIndicator(TEXT, Qt.AscendingOrder)
+        self.setSortingEnabled(True)
+        self.set_font(editor.text_edit.font())
+        self.clicked.connect(self._on_clicked)
+        self._pending_line = None        # go_to_line() target while the store is being built
+        self.model().modelReset.connect(self._on_reset)
+
+    def set_font(self, font):
+        self.setFont(font)
+        metrics = QFontMetrics(font)
+        self.verticalHeader().setDefaultSectionSize(metrics.height() + 6)
+        for column in (START, END):
+            self.horizontalHeader().resizeSection(column, metrics.width("00:00:00.000") + 16)
+
+    def _on_clicked(self, index):
+        time_ms = self.model().time_ms(index)
+        if time_ms is not None: self.seekRequest.emit(time_ms)
+
+    def keyPressEvent(self, event):
+        # Undo and redo the document's edits (made from here or in the text view)
+        if event.matches(QKeySequence.Undo): self.model().document.undo()
+        elif event.matches(QKeySequence.Redo): self.model().document.redo()
+        else: super().keyPressEvent(event)
+
+    def _on_reset(self):
+        if self._pending_line is not None and self.model().store is not None:
+            self.go_to_line(self._pending_line)
+
+    def go_to_line(self, line):
+        self._pending_line = line if self.model().store is None else None
+        row = self.model().row_of(line)
+        if row is None or row < 0: return
+        index = self.model().index(row, TEXT)
+        self.setCurrentIndex(index)
+        self.scrollTo(index, QAbstractItemView.PositionAtCenter)
+
+    def current_line(self):
+        index = self.currentIndex()
+        return self.model().line(index.row()) if index.isValid() else None
@@ -0,0 +1,401 @@
+import os
+from itertools import count
+from PyQt5.QtWidgets import QTabWidget, QMessageBox
+from PyQt5.QtCore import QSize, QTimer, pyqtSignal
+
+from .text_editor import TextEditor
+from utils.player_pool import PlayerPool
+from utils.media_cache import media_exists
+from utils.project import (load_project, read_project, resolve_path, write_project,
+                           project_path_for, new_write_generation)
+from utils.workers import run_in_background
+from utils.importers import detect_format
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+LOOP_STATE_KEYS = {"interval_ms", "is_looping", "start_ms", "end_ms"}
+TIMELINE_REFRESH_MS = 700
+
+
+class Session:
+    """Per-tab state that lives outside the tab's TextEditor."""
+    _ids = count(1)
+
+    def __init__(self, editor):
+        self.id = next(self._ids)
+        self.editor = editor
+        self.video_path = None
+        self.position_ms = 0
+        self.loop_state = None
+        self.media_length_ms = 0          # Probed by the player or read from the project file
+        self.media_size = (0, 0)
+
+
+# --- Tabbed video/transcript sessions ---
+class SessionTabs(QTabWidget):
+    """Tabs of TextEditors, each paired with its own video.
+
+    There is a single VideoPlayer widget; switching tabs points it at the
+    session's player backend from the shared PlayerPool. Recently used sessions stay
+    loaded and paused, so switching back to them is instant.
+    """
+    currentEditorChanged = pyqtSignal(object)
+
+    def __init__(self, video_player, icon_path_func, default_icon_size=QSize(24, 24),
+                 auto_pause_enabled=True, max_players=3, memory_cap_mb=768, project_files=False):
+        super().__init__()
+        self.video_player = video_player
+        self.get_icon_path = icon_path_func
+        self.default_icon_size = default_icon_size
+        self.auto_pause_enabled = auto_pause_enabled
+        self.word_wrap_enabled = False
+        self.project_files_enabled = project_files   # Write .annotime sidecars
+        self.silence_snap = None
+
+        self.pool = None
+        if video_player.player:
+            self.pool = PlayerPool(video_player.player, max_players, memory_cap_mb,
+                                   on_evict=self._handle_eviction)
+
+        self._sessions = {}   # editor -> Session
+        self._active = None
+
+        # The timeline shows the current transcript's segments, refreshed after edits settle
+        self._timeline_timer = QTimer(self)
+        self._timeline_timer.setSingleShot(True)
+        self._timeline_timer.setInterval(TIMELINE_REFRESH_MS)
+        self._timeline_timer.timeout.connect(self._refresh_timeline)
+        video_player.timeline.segmentActivated.connect(
+            lambda line: self.current_editor().go_to_line(line) if self.current_editor() else None)
+        # Remote media: prefetch around the segments once the duration is known
+        video_player.videoLoaded.connect(self._on_video_loaded)
+
+        self.setTabsClosable(True)
+        self.setMovable(True)
+        self.setDocumentMode(True)
+        self.tabCloseRequested.connect(self.close_tab)
+        self.currentChanged.connect(self._switch_to)
+
+        self.new_session()
+
+    # --- Session access ---
+    def current_editor(self):
+        return self.currentWidget()
+
+    def current_session(self):
+        return self._sessions.get(self.currentWidget())
+
+    def sessions(self):
+        """Sessions in tab order."""
+        return [self._sessions[self.widget(i)] for i in range(self.count())]
+
+    def editors(self):
+        return [self.widget(i) for i in range(self.count())]
+
+    # --- Creating and closing tabs ---
+    def new_session(self, activate=True):
+        editor = TextEditor(None, self.get_icon_path, self.default_icon_size,
+                            self.auto_pause_enabled)
+        editor.toggle_word_wrap(self.word_wrap_enabled)
+        editor.silence_snap = self.silence_snap
+        editor.jump_to_time_signal.connect(self.video_player.set_time_ms)
+        editor.transcriptPathChanged.connect(lambda _path, e=editor: self._update_title(e))
+        editor.transcriptSaved.connect(lambda _path, e=editor: self.save_project(self._sessions[e]))
+        editor.transcriptLoaded.connect(lambda _path, e=editor: self._on_transcript_loaded(e))
+        editor.text_edit.document().modificationChanged.connect(
+            lambda _modified, e=editor: self._update_title(e))
+        editor.text_edit.document().contentsChanged.connect(
+            lambda e=editor: self._timeline_timer.start() if e is self.current_editor() else None)
+        session = Session(editor)
+        self._sessions[editor] = session
+        index = self.addTab(editor, "Untitled")
+        if activate: self.setCurrentIndex(index)
+        return session
+
+    def open_session(self, transcript_path=None, video_path=None, position_ms=0, activate=True):
+        """Opens files in a tab, reusing the current tab if it is still empty.
+
+        If the transcript has a valid project file, the rest of the working
+        state is restored from it, including the video when none is given.
+        Only the active session's video is loaded right away; the others load
+        when their tab is first shown. Errors loading the transcript propagate.
+        """
+        session = self.current_session()
+        if session is None or not self._is_empty(session):
+            session = self.new_session(activate)
+        session.loop_state = None
+        session.media_length_ms, session.media_size = 0, (0, 0)
+        if transcript_path:
+            session.editor.load_transcript_content(transcript_path)
+            project = load_project(transcript_path)
+            if project:
+                video_path, position_ms = self._apply_project(session, project, video_path, position_ms)
+        session.video_path = video_path
+        session.position_ms = position_ms
+        self._load_session_video(session)
+        return session
+
+    def open_project(self, project_path):
+        """Opens the transcript (and through it the rest) of a .annotime file.
+
+        Raises OSError or ProjectError.
+        """
+        project = read_project(project_path)
+        transcript_path = resolve_path(project_path, project["transcript"])
+        if not transcript_path or not os.path.exists(transcript_path):
+            raise FileNotFoundError(f"The project's transcript was not found: {transcript_path}")
+        return self.open_session(transcript_path)
+
+    def import_annotations(self, file_path):
+        """Imports an SRT, WebVTT, TextGrid or ELAN file (see TextEditor.import_annotations).
+
+        Uses the current tab if its transcript is still empty (its video may
+        be loaded already), otherwise a new one. Raises ImportFormatError.
+        """
+        detect_format(file_path)
+        session = self.current_session()
+        if (session is None or session.editor.current_file_path
+                or not session.editor.text_edit.document().isEmpty()):
+            session = self.new_session()
+        session.editor.import_annotations(file_path)
+        return session
+
+    def close_tab(self, index):
+        editor = self.widget(index)
+        session = self._sessions.get(editor)
+        if session is None: return False
+        if editor.text_edit.document().isModified():
+            self.setCurrentIndex(index)
+            reply = QMessageBox.question(self, 'Close Tab',
+                                         "The transcript has unsaved changes.\nDo you want to save before closing?",
+                                         QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel,
+                                         QMessageBox.Cancel)
+            if reply == QMessageBox.Cancel: return False
+            if reply == QMessageBox.Save and not editor.save_transcript(): return False
+
+        self.save_project(session, background=False)
+        if session is self._active:
+            # The player is about to be reset, don't park it
+            self.video_player.stop_video()
+            self._active = None
+        if self.pool: self.pool.release(session.id)
+        editor.cancel_import()
+        editor.stop_auto_save()
+        del self._sessions[editor]
+        self.removeTab(index)
+        editor.deleteLater()
+        if self.count() == 0:
+            self.new_session()
+        return True
+
+    def close_current_tab(self):
+        return self.close_tab(self.currentIndex())
+
+    # --- Project files ---
+    def set_project_files(self, enabled):
+        self.project_files_enabled = enabled
+
+    def save_project(self, session, background=True):
+        """Writes the session's .annotime sidecar if project files are enabled.
+
+        Only done while the transcript is saved, so the stored segment table
+        and fingerprint describe the same text. Parsing the segments (if they
+        aren't cached) and hashing run on a worker thread unless background
+        is False.
+        """
+        editor = session.editor
+        transcript_path = editor.current_file_path
+        if (not self.project_files_enabled or not transcript_path or not os.path.exists(transcript_path)
+                or editor.text_edit.document().isModified()):
+            return False
+        self._snapshot(session)
+        segments, segment_table = editor.cached_segments()
+        state = {
+            "transcript_path": transcript_path,
+            "media": {"path": session.video_path, "length_ms": session.media_length_ms,
+                      "width": session.media_size[0], "height": session.media_size[1]}
+                     if session.video_path else None,
+            "view": editor.view_state(),
+            "playback": {"position_ms": session.position_ms, "loop": session.loop_state},
+            "snap_audit": editor.snap_audit,
+        }
+        project_path = project_path_for(transcript_path)
+        args = (project_path, state, editor.text_edit.toPlainText(), segments, segment_table,
+                new_write_generation(project_path))
+        if background:
+            run_in_background(write_project, *args)
+            return True
+        try:
+            return write_project(*args)
+        except OSError as e:
+            log.warning("Could not save project file %s: %s", project_path, e)
+            return False
+
+    def save_projects(self):
+        """Writes the sidecars of all saved sessions (before exiting)."""
+        for session in self.sessions():
+            self.save_project(session, background=False)
+
+    def _apply_project(self, session, project, video_path, position_ms):
+        """Restores a session from a validated project; returns (video_path, position_ms).
+
+        Arguments that were given explicitly win over the project file.
+        """
+        self._apply_project_view(session.editor, project)
+        media_path = project["media_path"]
+        if not video_path: video_path = media_path
+        if video_path and media_path and os.path.normcase(os.path.abspath(video_path)) == os.path.normcase(media_path):
+            media = project.get("media") or {}
+            playback = project.get("playback") or {}
+            if project["media_valid"]:
+                session.media_length_ms = int(media.get("length_ms") or 0)
+                session.media_size = (int(media.get("width") or 0), int(media.get("height") or 0))
+            if not position_ms: position_ms = int(playback.get("position_ms") or 0)
+            loop = playback.get("loop")
+            if isinstance(loop, dict) and LOOP_STATE_KEYS <= loop.keys(): session.loop_state = loop
+        log.info("Restored project state for %s", project["transcript_path"])
+        return video_path, position_ms
+
+    def _apply_project_view(self, editor, project):
+        editor.restore_view_state(project.get("view"))
+        if isinstance(project.get("snap_audit"), list): editor.snap_audit = list(project["snap_audit"])
+        if project.get("segments"): editor.set_segment_table(project["segments"])
+
+    def _on_transcript_loaded(self, editor):
+        """Restores a transcript loaded from the File menu from its project file.
+
+        The video is only taken from the project if the tab has none yet.
+        """
+        session = self._sessions.get(editor)
+        project = load_project(editor.current_file_path) if session else None
+        if not project: return
+        self._snapshot(session)
+        if session.video_path:
+            self._apply_project_view(editor, project)
+            return
+        session.video_path, session.position_ms = self._apply_project(session, project, None, 0)
+        self._load_session_video(session)
+
+    # --- Settings applied to every tab ---
+    def set_auto_pause(self, enabled):
+        self.auto_pause_enabled = enabled
+        for editor in self.editors():
+            editor.set_auto_pause(enabled)
+
+    def set_silence_snap(self, silence_snap):
+        self.silence_snap = silence_snap
+        for editor in self.editors():
+            editor.silence_snap = silence_snap
+
+    def set_word_wrap(self, enabled):
+        self.word_wrap_enabled = enabled
+        for editor in self.editors():
+            editor.toggle_word_wrap(enabled)
+
+    # --- Switching ---
+    def _switch_to(self, index):
+        session = self._sessions.get(self.widget(index))
+        if session is None or session is self._active: return
+        self._park_active()
+        self._active = session
+
+        if self.pool:
+            entry = self.pool.acquire(session.id)
+            session.editor.player = entry.player
+            warm = entry.is_warm_for(session.video_path)
+            self.video_player.activate_player(entry.player, entry.slot,
+                                              session.video_path if warm else None)
+            self.video_player.restore_loop_state(session.loop_state)
+            if not warm:
+                entry.video_path = None
+                if media_exists(session.video_path):
+                    self.video_player.load_video_internal(session.video_path,
+                                                          initial_position=session.position_ms,
+                                                          known_length_ms=session.media_length_ms)
+        self._refresh_timeline()
+        self.currentEditorChanged.emit(session.editor)
+
+    def _on_video_loaded(self, duration_ms):
+        session = self._active
+        player = self.video_player.player
+        if session is not None and player and player.has_media():
+            if duration_ms > 0: session.media_length_ms = duration_ms
+            session.media_size = player.video_size()
+        # The new media now counts towards the pool's memory cap
+        if self.pool: self.pool.enforce_memory_cap()
+        self._refresh_timeline()
+
+    def release_players(self):
+        """Releases every pooled player and their shared engine (on exit)."""
+        if not self.pool: return
+        for session in self._sessions.values():
+            session.editor.player = None
+        self.video_player.timer.stop()
+        self.video_player.player = None
+        self.pool.release_all()
+        self.pool = None
+
+    def _refresh_timeline(self):
+        self._timeline_timer.stop()
+        editor = self.current_editor()
+        if editor is None: return
+        editor.segments_async(lambda segments, e=editor: self._show_segments(e, segments))
+
+    def _show_segments(self, editor, segments):
+        if editor is not self.current_editor(): return
+        self.video_player.timeline.set_segments(segments)
+        self.video_player.prefetch_times([segment.start_ms for segment in segments])
+
+    def _park_active(self):
+        """Saves the active session's playback state and pauses its player."""
+        session = self._active
+        if session is None: return
+        self._snapshot(session)
+        player = self.video_player
+        if player.player and player.player.has_media():
+            player.pause_video(from_user=False)
+        entry = self.pool.get(session.id) if self.pool else None
+        if entry: entry.video_path = session.video_path
+
+    def _load_session_video(self, session):
+        if session is not self._active or not session.video_path: return
+        self.video_player.load_video_internal(session.video_path, initial_position=session.position_ms,
+                                              known_length_ms=session.media_length_ms)
+        self.video_player.restore_loop_state(session.loop_state)
+
+    def _snapshot(self, session):
+        """Copies the active session's playback state from the video player."""
+        if session is not self._active: return
+        player = self.video_player
+        session.video_path = player.current_video_path
+        session.loop_state = player.get_loop_state()
+        if player.player and player.player.has_media():
+            position = player.get_current_time_ms()
+            if position >= 0: session.position_ms = position
+            length = player.player.get_length()
+            if length > 0: session.media_length_ms = length
+            session.media_size = player.player.video_size()
+
+    def _handle_eviction(self, session_id, position_ms):
+        for session in self._sessions.values():
+            if session.id == session_id:
+                if position_ms >= 0: session.position_ms = position_ms
+                session.editor.player = None
+                break
+
+    # --- Helpers ---
+    def _is_empty(self, session):
+        editor = session.editor
+        video_path = self.video_player.current_video_path if session is self._active else session.video_path
+        return (not editor.current_file_path and not video_path
+                and editor.text_edit.document().isEmpty())
+
+    def _update_title(self, editor):
+        index = self.indexOf(editor)
+        if index < 0: return
+        path = editor.current_file_path
+        title = os.path.basename(path) if path else "Untitled"
+        if editor.text_edit.document().isModified(): title += " *"
+        self.setTabText(index, title)
+        self.setTabToolTip(index, path or "")
@@ -0,0 +1,100 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.audio_cache import AudioCacheError
+from utils.silence import SilenceIndex
+from utils.workers import run_in_background
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_WINDOW_MS = 500
+
+
+# --- Snapping inserted timestamps to silence ---
+class SilenceSnap(QObject):
+    """Moves inserted timestamps to the nearest pause in the audio.
+
+    While enabled, every video that gets loaded is decoded through the shared
+    AudioCache and indexed for silence in the background (once per file).
+    snap() is a lookup in that index; until it is ready, times are left as
+    they are.
+    """
+    indexReady = pyqtSignal(str)          # Media path
+    indexFailed = pyqtSignal(str, str)    # Media path, error message
+    _built = pyqtSignal(str, object)      # From the decoding thread
+
+    def __init__(self, video_player, audio_cache, window_ms=DEFAULT_WINDOW_MS):
+        super().__init__()
+        self.video_player = video_player
+        self.audio_cache = audio_cache
+        self.window_ms = window_ms
+        self.enabled = False
+        self._indexes = {}      # Media path -> SilenceIndex
+        self._pending = set()
+        self._built.connect(self._store_index)
+        video_player.videoLoaded.connect(lambda _duration: self._prepare_current())
+
+    def set_enabled(self, enabled):
+        """Enables snapping; returns an error message if it can't work here."""
+        if enabled and not self.audio_cache.is_available():
+            self.enabled = False
+            return "Snapping to silence needs ffmpeg and NumPy to analyse the audio."
+        self.enabled = enabled
+        if enabled: self._prepare_current()
+        return None
+
+    def set_window(self, window_ms):
+        self.window_ms = max(0, int(window_ms))
+
+    def is_ready(self, media_path=None):
+        return (media_path or self.video_player.current_video_path) in self._indexes
+
+    def snap(self, time_ms):
+        """Nearest silent time to time_ms in the current video, or time_ms itself."""
+        if not self.enabled: return time_ms
+        index = self._indexes.get(self.video_player.current_video_path)
+        if index is None: return time_ms
+        snapped = index.snap(time_ms, self.window_ms)
+        return time_ms if snapped is None else snapped
+
+    # --- Building the index ---
+    def _prepare_current(self):
+        media_path = self.video_player.current_video_path
+        if not self.enabled or not media_path: return
+        if media_path in self._indexes or media_path in self._pending: return
+        player = self.video_player.player
+        length_ms = player.get_length() if player and player.has_media() else 0
+        try:
+            audio = self.audio_cache.open(media_path, length_ms if length_ms > 0 else None)
+        except AudioCacheError as e:
+            log.warning("Cannot index silence of %s: %s", media_path, e)
+            self.indexFailed.emit(media_path, str(e))
+            return
+        self._pending.add(media_path)
+        audio.add_done_callback(
+            lambda audio, path=media_path: run_in_background(self._build_index, path, audio))
+
+    def _build_index(self, media_path, audio):
+        # Runs on a worker thread
+        if audio.error:
+            index = AudioCacheError(audio.error)
+        else:
+            try:
+                index = SilenceIndex.from_samples(audio.samples(), audio.sample_rate)
+            except Exception as e:
+                log.exception("Silence analysis of %s failed", media_path)
+                index = e
+        try:
+            self._built.emit(media_path, index)
+        except RuntimeError:   # Finished while the application was closing
+            pass
+
+    def _store_index(self, media_path, index):
+        self._pending.discard(media_path)
+        if isinstance(index, Exception):
+            self.indexFailed.emit(media_path, str(index))
+            return
+        self._indexes[media_path] = index
+        log.info("Silence index ready for %s: %d pauses (threshold %.1f dB)",
+                 media_path, len(index), index.threshold_db or 0.0)
+        self.indexReady.emit(media_path)
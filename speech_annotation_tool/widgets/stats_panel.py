@@ -0,0 +1,193 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QFormLayout, QLabel, QListWidget, QListWidgetItem,
+                             QProgressBar, QSizePolicy, QToolTip)
+from PyQt5.QtCore import Qt, QTimer, QSize, QRectF
+from PyQt5.QtGui import QPainter, QColor, QFontMetrics
+
+from utils.segment_stats import histogram_labels, RATE_SAMPLE_S, RATE_WINDOW_S
+from utils.timestamp import format_time
+
+REFRESH_DELAY_MS = 200      # Coalesces the refreshes of a burst of edits
+GAP_COUNT = 8
+
+
+def format_duration(ms):
+    seconds = int(round(ms / 1000))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+# --- Segment-length histogram ---
+class _Histogram(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.labels = histogram_labels()
+        self.counts = [0] * len(self.labels)
+        self.setMouseTracking(True)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def sizeHint(self):
+        return QSize(220, 110)
+
+    def set_counts(self, counts):
+        if counts == self.counts: return
+        self.counts = list(counts)
+        self.update()
+
+    def _bar_rects(self):
+        label_height = QFontMetrics(self.font()).height()
+        width = self.width() / len(self.counts)
+        height = self.height() - label_height - 2
+        top = max(self.counts) or 1
+        return [QRectF(i * width + 1, height * (1 - count / top), width - 2, height * count / top)
+                for i, count in enumerate(self.counts)], label_height
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#fafafa"))
+        rects, label_height = self._bar_rects()
+        for rect in rects:
+            painter.fillRect(rect, QColor("#9ab8d8"))
+        painter.setPen(QColor("#1f2d3d"))
+        width = self.width() / len(self.labels)
+        for i, label in enumerate(self.labels):
+            # Label every other bin when they don't fit
+            if QFontMetrics(self.font()).width(label) > width and i % 2: continue
+            painter.drawText(QRectF(i * width - width / 2, self.height() - label_height, width * 2, label_height),
+                             Qt.AlignCenter, label)
+
+    def mouseMoveEvent(self, event):
+        i = min(len(self.counts) - 1, int(event.x() / max(1, self.width()) * len(self.counts)))
+        QToolTip.showText(event.globalPos(), f"{self.labels[i]}: {self.counts[i]} segments", self)
+
+
+# --- Statistics panel ---
+class StatsPanel(QWidget):
+    """Live statistics of the current transcript: totals, coverage of the media,
+    a segment-length histogram, the longest gaps and the annotation rate.
+
+    Reads the editor's SegmentStats, which edits keep up to date, so a
+    refresh never rescans the transcript. Double-click a gap to seek to it.
+    """
+
+    def __init__(self, video_player, parent=None):
+        super().__init__(parent)
+        self.video_player = video_player
+        self.editor = None
+        self._shown_revision = None
+
+        self.count_label = QLabel()
+        self.total_label = QLabel()
+        self.coverage_bar = QProgressBar()
+        self.coverage_bar.setRange(0, 1000)
+        self.coverage_bar.setTextVisible(True)
+        self.span_label = QLabel()
+        self.rate_label = QLabel()
+        self.rate_label.setWordWrap(True)
+        self.histogram = _Histogram()
+        self.gap_list = QListWidget()
+        self.gap_list.setToolTip("Double-click to seek to the gap")
+        self.gap_list.itemDoubleClicked.connect(
+            lambda item: self.video_player.set_time_ms(item.data(Qt.UserRole)))
+
+        form = QFormLayout()
+        form.addRow("Segments:", self.count_label)
+        form.addRow("Annotated:", self.total_label)
+        form.addRow("Coverage:", self.coverage_bar)
+        form.addRow("Span:", self.span_label)
+        form.addRow("Rate:", self.rate_label)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.addLayout(form)
+        layout.addWidget(QLabel("Segment lengths:"))
+        layout.addWidget(self.histogram)
+        layout.addWidget(QLabel("Longest gaps:"))
+        layout.addWidget(self.gap_list, stretch=1)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.rate_timer = QTimer(self)
+        self.rate_timer.setInterval(RATE_SAMPLE_S * 1000)
+        self.rate_timer.timeout.connect(self._sample_rate)
+        video_player.videoLoaded.connect(lambda _duration: self._schedule(force=True))
+
+    def set_editor(self, editor):
+        if editor is self.editor: return
+        if self.editor is not None: self.editor.statsChanged.disconnect(self._schedule)
+        self.editor = editor
+        if editor is not None:
+            editor.statsChanged.connect(self._schedule)
+            if self.isVisible(): editor.track_stats()
+        self._schedule(force=True)
+
+    # --- Refreshing ---
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.editor is not None: self.editor.track_stats()
+        self.rate_timer.start()
+        self._schedule(force=True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.rate_timer.stop()
+        self.refresh_timer.stop()
+
+    def _schedule(self, force=False):
+        if force: self._shown_revision = None
+        if self.isVisible() and not self.refresh_timer.isActive(): self.refresh_timer.start()
+
+    def _sample_rate(self):
+        stats = self.editor.stats if self.editor else None
+        if stats is None: return
+        stats.sample()
+        self._show_rate(stats)
+
+    def refresh(self):
+        stats = self.editor.stats if self.editor else None
+        if stats is None:
+            for label in (self.count_label, self.total_label, self.span_label, self.rate_label):
+                label.setText("..." if self.editor else "")
+            self.coverage_bar.setValue(0)
+            self.coverage_bar.setFormat("")
+            self.histogram.set_counts([0] * len(self.histogram.counts))
+            self.gap_list.clear()
+            return
+        media_length_ms = self.video_player.timeline.duration_ms
+        revision = (stats, stats.revision, media_length_ms)
+        if revision == self._shown_revision: return
+        self._shown_revision = revision
+
+        self.count_label.setText(f"{stats.count}" + (f" ({stats.incomplete} without an end)" if stats.incomplete else ""))
+        overlap_ms = stats.total_ms - stats.covered_ms
+        self.total_label.setText(format_duration(stats.total_ms)
+                                 + (f" ({format_duration(overlap_ms)} overlapping)" if overlap_ms > 0 else ""))
+        coverage = stats.coverage(media_length_ms)
+        if coverage is None:
+            self.coverage_bar.setValue(0)
+            self.coverage_bar.setFormat(f"{format_duration(stats.covered_ms)} (no media length)")
+        else:
+            self.coverage_bar.setValue(int(coverage * 1000))
+            self.coverage_bar.setFormat(f"{coverage * 100:.1f}% of {format_duration(media_length_ms)}")
+        first, last = stats.first_start_ms(), stats.last_end_ms()
+        self.span_label.setText(f"{format_time(first)} - {format_time(last)}" if first is not None else "-")
+        self.histogram.set_counts(stats.histogram)
+
+        self.gap_list.clear()
+        for start, end in stats.longest_gaps(GAP_COUNT, media_length_ms):
+            item = QListWidgetItem(f"{format_time(start)} - {format_time(end)}  ({(end - start) / 1000:.1f} s)")
+            item.setData(Qt.UserRole, start)
+            self.gap_list.addItem(item)
+        self._show_rate(stats)
+
+    def _show_rate(self, stats):
+        session, recent = stats.rate(), stats.rate(RATE_WINDOW_S)
+        if session is None:
+            self.rate_label.setText("-")
+            return
+        text = f"{session[0]:.0f} segments/h, {session[1] / 60:.1f} min annotated/h this session"
+        if recent is not None and recent != session:
+            text += f"; {recent[0]:.0f}/h, {recent[1] / 60:.1f} min/h in the last {RATE_WINDOW_S // 60} min"
+        self.rate_label.setText(text)
@@ -1,20 +1,34 @@
-import vlc
-import re
 import os
+import queue
+import threading
+import time
 # Added QHBoxLayout explicitly if needed, QSizePolicy
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QFileDialog,
                              QMessageBox, QHBoxLayout, QLabel, QPlainTextEdit,
-                             QSizePolicy, QTextEdit, QShortcut, QFrame) # Added QFrame
+                             QSizePolicy, QTextEdit, QShortcut, QFrame, QStackedWidget) # Added QFrame
 from PyQt5.QtGui import (QTextCursor, QKeySequence, QTextCharFormat, QColor as QtGuiQColor,
                          QFont, QIcon, QPainter, QTextFormat)
-from PyQt5.QtCore import Qt, QTimer, QSize, QRect, pyqtSignal, QEvent
+from PyQt5.QtCore import Qt, QTimer, QSize, QRect, pyqtSignal, QEvent, QFileSystemWatcher
 
+from .segment_table import SegmentTableView
+from utils.timestamp import format_time, parse_time, retime_text, BRACKETED_TIMESTAMP_RE
+from utils.segments import parse_segments
+from utils.project import decode_segments, ProjectError
+from utils.text_diff import compare_with_disk
+from utils.segment_stats import stats_for_text
+from utils.workers import run_in_background
+from utils.importers import feed_batches, detect_format
+from utils.playback_clock import playback_clock, input_clock
+from utils.tracing import tracer, traced, KEYPRESS_TO_TIMESTAMP, CLICK_TO_FRAME
+from utils.log import get_logger
 
-try:
-    from .video_player import format_time
-except ImportError as e:
-     print(f"CRITICAL: Could not import format_time from .video_player - {e}")
-     def format_time(ms): return str(ms)
+log = get_logger(__name__)
+
+DISK_CHECK_DELAY_MS = 300   # Lets a script finish writing before the file is read back
+IMPORT_QUEUE_BATCHES = 4    # Batches an import may read ahead of the editor
+IMPORT_TICK_MS = 15
+IMPORT_TICK_BUDGET_MS = 25  # Time per tick spent inserting batches, so the GUI stays responsive
+IMPORT_REPORTED_ISSUES = 1000
 
 
 # --- Line Number Area Class (No changes) ---
@@ -48,7 +62,7 @@ class LineNumberTextEdit(QPlainTextEdit):
         # Call initializers AFTER setting up connections and line number area
         self.update_line_number_area_width()
         self.highlight_current_line()
-        self.timestamp_regex = re.compile(r'\[(\d{2}:\d{2}:\d{2}\.\d{3})\]')
+        self.timestamp_regex = BRACKETED_TIMESTAMP_RE
 
     def line_number_area_width(self):
         digits = max(2, len(str(self.blockCount() or 1))) # Ensure at least 1 for calculation
@@ -79,6 +93,7 @@ class LineNumberTextEdit(QPlainTextEdit):
         # Ensure width is recalculated on resize
         self.line_number_area.setGeometry(QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height()))
 
+    @traced("editor.paint_line_numbers")
     def paint_line_numbers(self, event):
         painter = QPainter(self.line_number_area)
         painter.fillRect(event.rect(), QtGuiQColor(238, 238, 238)) # Slightly lighter gray
@@ -108,6 +123,7 @@ class LineNumberTextEdit(QPlainTextEdit):
             bottom = top + int(self.blockBoundingRect(block).height())
             block_number += 1
 
+    @traced("editor.highlight_current_line")
     def highlight_current_line(self):
         extra_selections = []
         if not self.isReadOnly():
@@ -138,47 +154,86 @@ class LineNumberTextEdit(QPlainTextEdit):
                          timestamp_str = first_match.group(1)
                          try:
                              time_ms = self.parse_time(timestamp_str)
-                             print(f"Timestamp clicked: {timestamp_str} -> {time_ms} ms")
+                             log.debug("Timestamp clicked: %s -> %d ms", timestamp_str, time_ms)
+                             tracer.begin_flow(CLICK_TO_FRAME)
                              self.seekRequest.emit(time_ms)
                              event.accept()
                              return
                          except ValueError as e:
-                             print(f"Error parsing timestamp '{timestamp_str}': {e}")
+                             log.error("Error parsing timestamp '%s': %s", timestamp_str, e)
 
         super().mousePressEvent(event)
 
 
     def parse_time(self, time_str):
-        try:
-            parts = time_str.split(':')
-            sec_ms_parts = parts[2].split('.')
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            seconds = int(sec_ms_parts[0])
-            # Handle milliseconds with varying length (e.g., .1, .12, .123)
-            ms_str = sec_ms_parts[1]
-            milliseconds = int(ms_str.ljust(3, '0')[:3]) # Pad/truncate to 3 digits
+        return parse_time(time_str)
+
+
+# --- Line Tracking ---
+class _LineTracker:
+    """An object kept in step with an editor's lines (see TextEditor.track_lines)."""
+
+    def __init__(self, build, on_changed, adopt=None):
+        self.build = build
+        self.on_changed = on_changed
+        self.adopt = adopt
+        self.value = None
+        self._pending = None             # Line edits made while it is being built
+        self._generation = 0
+
+    def rebuild(self, text):
+        self._generation += 1
+        generation = self._generation
+        self._pending = []
+        if self.value is not None:
+            self.value = None
+            self.on_changed()
+
+        def built(value):
+            if generation != self._generation: return
+            if self.adopt: value = self.adopt(value)
+            for edit in self._pending: value.replace_lines(*edit)
+            self._pending = None
+            self.value = value
+            self.on_changed()
+
+        def failed(error):
+            if generation != self._generation: return
+            log.error("Could not build %s for the transcript: %s", self.build.__name__, error)
+            self._pending = None
+            self.on_changed()
+        run_in_background(self.build, text, on_result=built, on_error=failed)
+
+    def replace_lines(self, first, removed, texts):
+        if self._pending is not None:
+            self._pending.append((first, removed, texts))
+            return
+        if self.value is None: return        # The build failed; the next rebuild starts over
+        revision = self.value.revision
+        self.value.replace_lines(first, removed, texts)
+        if self.value.revision != revision: self.on_changed()
 
-            total_ms = (hours * 3600 + minutes * 60 + seconds) * 1000 + milliseconds
-            return total_ms
-        except (IndexError, ValueError) as e:
-             raise ValueError(f"Invalid time format '{time_str}': {e}")
+    def stop(self):
+        self._generation += 1
+        self.value = self._pending = None
 
 
 # --- Main Text Editor Widget ---
 class TextEditor(QWidget):
     jump_to_time_signal = pyqtSignal(int)
+    transcriptPathChanged = pyqtSignal(str)
+    transcriptSaved = pyqtSignal(str)   # Saved by the user (not auto-save)
+    transcriptLoaded = pyqtSignal(str)  # Loaded by the user from the File menu
+    statsChanged = pyqtSignal()         # self.stats was (re)built or updated by an edit
+    importFinished = pyqtSignal(str)    # An import_annotations() completed (the source file)
 
     # Added auto_pause_enabled parameter
-    def __init__(self, media_player: vlc.MediaPlayer, icon_path_func,
+    def __init__(self, player, icon_path_func,
                  default_icon_size=QSize(24,24), auto_pause_enabled=True):
         super().__init__()
 
-        if not media_player:
-             QMessageBox.critical(self, "Initialization Error", "Media player instance is missing.")
-             self.media_player = None
-        else:
-             self.media_player = media_player
+        # PlayerBackend; may be None until a session tab attaches one from the pool
+        self.player = player
 
         self.get_icon_path = icon_path_func
         self.default_icon_size = default_icon_size
@@ -186,8 +241,27 @@ class TextEditor(QWidget):
 
         self.last_timestamp_inserted = False
         self.last_cursor_position = None
+        self.last_start_ms = None        # Time of the start timestamp awaiting its end
+        self._key_pressed_at = None      # Monotonic time of the pending Ctrl+I key event
+
+        # SilenceSnap shared by all tabs (set by SessionTabs); None disables snapping
+        self.silence_snap = None
+        self.snap_audit = []             # Original and snapped time of each snapped insertion
 
         self.current_file_path = None
+        self._disk_text = None           # File content as last loaded or saved (merge base)
+        self._disk_check_pending = False # The file changed on disk and hasn't been handled yet
+        self._retime_worker = None       # Pending bulk timestamp edit
+        self._segments = None            # (document revision, parsed segments)
+        self._segment_table = None       # (document revision, packed table from a project file)
+        self._stats_tracker = None       # _LineTracker of the SegmentStats, once track_stats() was called
+        self._trackers = []              # _LineTrackers kept in step with the lines
+        self._block_count = 0
+        self.segment_table = None        # SegmentTableView once the table view is first shown
+        self._import = None              # (source path, queue, cancel event) while importing
+        self.import_issues = []          # ImportIssues of the last import (at most IMPORT_REPORTED_ISSUES)
+        self._import_issue_count = self._import_lines = 0
+        self._import_started = 0.0
         self.font_size = 12
         self.default_font = QFont("Arial", self.font_size)
 
@@ -199,6 +273,18 @@ class TextEditor(QWidget):
         self.save_status_timer.setSingleShot(True)
         self.save_status_timer.timeout.connect(self.clear_save_status)
 
+        # Reload the transcript when a script or sync tool rewrites it
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self._on_file_changed)
+        self.disk_check_timer = QTimer(self)
+        self.disk_check_timer.setSingleShot(True)
+        self.disk_check_timer.setInterval(DISK_CHECK_DELAY_MS)
+        self.disk_check_timer.timeout.connect(self._check_disk)
+        self.transcriptPathChanged.connect(self._watch_path)
+        self.import_timer = QTimer(self)
+        self.import_timer.setInterval(IMPORT_TICK_MS)
+        self.import_timer.timeout.connect(self._drain_import)
+
         self.init_ui()
         self.setup_shortcuts()
         if hasattr(self, 'text_edit'):
@@ -281,7 +367,10 @@ class TextEditor(QWidget):
         self.text_edit = LineNumberTextEdit()
         self.text_edit.setFont(self.default_font)
         self.text_edit.seekRequest.connect(self.jump_to_time_signal.emit)
-        main_layout.addWidget(self.text_edit, stretch=1) # Make text area expand
+        # The segment table is added next to it when first shown (set_table_view)
+        self.view_stack = QStackedWidget()
+        self.view_stack.addWidget(self.text_edit)
+        main_layout.addWidget(self.view_stack, stretch=1) # Make text area expand
 
         # --- Bottom Bar (Save Status and Button) ---
         bottom_bar_layout = QHBoxLayout()
@@ -306,6 +395,8 @@ class TextEditor(QWidget):
         # Timestamp shortcut
         self.timestamp_shortcut = QShortcut(QKeySequence("Ctrl+I"), self)
         self.timestamp_shortcut.activated.connect(self.insert_timestamp_action)
+        # See the key press before the shortcut fires, for its time and for latency tracing
+        self.text_edit.installEventFilter(self)
         # REMOVED redundant Ctrl+S shortcut - handled by QAction in main window
         # self.save_shortcut = QShortcut(QKeySequence("Ctrl+S"), self)
         # self.save_shortcut.activated.connect(self.save_transcript)
@@ -314,37 +405,72 @@ class TextEditor(QWidget):
         """Public method to enable/disable auto-pause."""
         self.auto_pause_enabled = enabled
 
-    def insert_timestamp_action(self):
-         """Handles the Ctrl+I action: auto-pauses (if enabled) and calls insertion logic."""
-         if not self.media_player:
+    def eventFilter(self, obj, event):
+        if (obj is self.text_edit and event.type() == QEvent.ShortcutOverride
+                and event.key() == Qt.Key_I and event.modifiers() == Qt.ControlModifier):
+            self._key_pressed_at = input_clock.monotonic_at(event.timestamp())
+            tracer.begin_flow(KEYPRESS_TO_TIMESTAMP)
+        return super().eventFilter(obj, event)
+
+    @traced("editor.insert_timestamp_action")
+    def insert_timestamp_action(self, pressed_at=None):
+         """Handles the Ctrl+I action: auto-pauses (if enabled) and calls insertion logic.
+
+         pressed_at (time.monotonic()) is when the insertion was asked for, if not by
+         a key press (e.g. a control socket request).
+         """
+         # Shortcut fired without the editor focused: measure from here instead
+         tracer.begin_flow(KEYPRESS_TO_TIMESTAMP, restart=False)
+         key_pressed_at, self._key_pressed_at = self._key_pressed_at, None
+         if pressed_at is None: pressed_at = key_pressed_at
+         if not self.player:
              QMessageBox.warning(self, "Warning", "Media player not available.")
              return
 
+         # Read the time of the key press itself, before pausing moves the player on
+         time_ms = None
+         if self.player.has_media():
+             with tracer.span("player.get_time", "backend"):
+                 time_ms = playback_clock(self.player).time_ms(at=pressed_at)
+
          # --- Auto-Pause Check ---
-         if self.auto_pause_enabled and self.media_player.is_playing():
-             self.media_player.pause()
-             print("Video paused on timestamp insertion (Auto-Pause enabled).")
+         if self.auto_pause_enabled and self.player.is_playing():
+             self.player.pause()
+             log.debug("Video paused on timestamp insertion (Auto-Pause enabled).")
              # TODO: Signal video player widget to update its play/pause button icon?
 
          # Call the paired timestamp insertion logic
-         self.insert_timestamp_paired()
+         self.insert_timestamp_paired(time_ms)
+         tracer.end_flow(KEYPRESS_TO_TIMESTAMP)
+
 
+    def insert_timestamp_paired(self, current_time_ms=None):
+        """ Inserts timestamps in [START]-[END] format at start of line, using two Ctrl+I presses.
 
-    def insert_timestamp_paired(self):
-        """ Inserts timestamps in [START]-[END] format at start of line, using two Ctrl+I presses."""
-        if not self.media_player or not self.media_player.get_media():
+        current_time_ms defaults to the playback time now.
+        """
+        if not self.player or not self.player.has_media():
             QMessageBox.warning(self, "Warning", "No video loaded.")
             return
 
-        current_time_ms = self.media_player.get_time()
+        if current_time_ms is None:
+            with tracer.span("player.get_time", "backend"):
+                current_time_ms = playback_clock(self.player).time_ms()
         if current_time_ms < 0: # Check for invalid time
-            print("Error: Unable to fetch valid video time.")
+            log.error("Unable to fetch valid video time.")
             return
 
+        original_ms = current_time_ms
+        snapping = self.silence_snap is not None and self.silence_snap.enabled
+        if snapping:
+            current_time_ms = self.silence_snap.snap(current_time_ms)
+            if self.last_timestamp_inserted and self.last_start_ms is not None and current_time_ms <= self.last_start_ms:
+                current_time_ms = original_ms   # Never end a segment before it starts
+
         try:
             timestamp_str = format_time(current_time_ms)
         except Exception as e:
-             print(f"Error formatting time {current_time_ms}: {e}")
+             log.error("Error formatting time %s: %s", current_time_ms, e)
              return
 
         cursor = self.text_edit.textCursor()
@@ -358,13 +484,15 @@ class TextEditor(QWidget):
             cursor.insertText(f"[{timestamp_str}]-", timestamp_format)
             self.last_cursor_position = cursor.position()
             self.last_timestamp_inserted = True
+            self.last_start_ms = current_time_ms
             cursor.endEditBlock()
-            print(f"Inserted Start TS: {timestamp_str}")
+            log.debug("Inserted Start TS: %s", timestamp_str)
+            if snapping: self._record_snap("start", cursor.blockNumber(), original_ms, current_time_ms)
 
         else:  # --- Inserting End Timestamp ---
             cursor.beginEditBlock()
             if self.last_cursor_position is None:
-                 print("Error: Lost position for end timestamp. Inserting at current block start.")
+                 log.warning("Lost position for end timestamp. Inserting at current block start.")
                  cursor.movePosition(QTextCursor.StartOfBlock)
                  # Insert something to indicate it's likely misplaced
                  cursor.insertText(f"<??>[{timestamp_str}] ", timestamp_format)
@@ -373,11 +501,13 @@ class TextEditor(QWidget):
                  cursor.setPosition(self.last_cursor_position)
                  # Insert end timestamp marker (note the space after)
                  cursor.insertText(f"[{timestamp_str}] ", timestamp_format)
-                 print(f"Inserted End TS: {timestamp_str}")
+                 log.debug("Inserted End TS: %s", timestamp_str)
+            if snapping: self._record_snap("end", cursor.blockNumber(), original_ms, current_time_ms)
 
             # Reset state BEFORE moving cursor for next line
             self.last_timestamp_inserted = False
             self.last_cursor_position = None
+            self.last_start_ms = None
 
             # --- Move cursor to end of current line (don't insert new block) ---
             cursor.movePosition(QTextCursor.EndOfLine)
@@ -394,20 +524,30 @@ class TextEditor(QWidget):
         self.text_edit.document().setModified(True)
 
 
+    def _record_snap(self, kind, line, original_ms, snapped_ms):
+        """Keeps both times of a snapped insertion for later audit."""
+        self.snap_audit.append({"kind": kind, "line": line, "original_ms": original_ms,
+                                "snapped_ms": snapped_ms, "at": round(time.time(), 3)})
+        log.info("Snapped %s timestamp on line %d: %s -> %s", kind, line + 1,
+                 format_time(original_ms), format_time(snapped_ms))
+        if snapped_ms != original_ms:
+            self.show_save_status(f"Snapped to silence ({snapped_ms - original_ms:+d} ms)")
+
     def increase_font_size(self):
         self.font_size += 1
         self.update_font()
-        print(f"Font size increased to: {self.font_size}")
+        log.debug("Font size increased to: %d", self.font_size)
 
     def decrease_font_size(self):
         if self.font_size > 8:
             self.font_size -= 1
             self.update_font()
-            print(f"Font size decreased to: {self.font_size}")
+            log.debug("Font size decreased to: %d", self.font_size)
 
     def update_font(self):
          new_font = QFont("Arial", self.font_size)
          self.text_edit.setFont(new_font)
+         if self.segment_table is not None: self.segment_table.set_font(new_font)
          # Update line number area calculation and repaint
          self.text_edit.update_line_number_area_width()
          self.text_edit.highlight_current_line()
@@ -417,7 +557,436 @@ class TextEditor(QWidget):
     def toggle_word_wrap(self, enabled):
          mode = QPlainTextEdit.WidgetWidth if enabled else QPlainTextEdit.NoWrap
          self.text_edit.setLineWrapMode(mode)
-         print(f"Word wrap {'enabled' if enabled else 'disabled'}.")
+         log.debug("Word wrap %s.", "enabled" if enabled else "disabled")
+
+    # --- Segments and View State (review queue, project files) ---
+    def segments(self, skip_empty=False):
+        """The transcript's segments, parsed once per document revision."""
+        revision = self.text_edit.document().revision()
+        if self._segments is None or self._segments[0] != revision:
+            segments = None
+            if self._segment_table and self._segment_table[0] == revision:
+                try:
+                    segments = decode_segments(self._segment_table[1],
+                                               self.text_edit.toPlainText().split('\n'))
+                except ProjectError as e:
+                    log.warning("Discarding stored segment table: %s", e)
+            if segments is None:
+                with tracer.span("editor.parse_segments", "editor"):
+                    segments = parse_segments(self.text_edit.toPlainText())
+            self._segments = (revision, segments)
+            self._segment_table = None
+        segments = self._segments[1]
+        if skip_empty: return [segment for segment in segments if segment.end_ms > segment.start_ms]
+        return segments
+
+    def cached_segments(self):
+        """Returns (segments, packed table) known for the current text, either may be None."""
+        revision = self.text_edit.document().revision()
+        segments = self._segments[1] if self._segments and self._segments[0] == revision else None
+        table = self._segment_table[1] if self._segment_table and self._segment_table[0] == revision else None
+        return segments, table
+
+    def segments_async(self, on_result):
+        """Calls on_result(segments) now if they are known, else after parsing on a worker thread.
+
+        A result that is outdated by further edits by then is dropped.
+        """
+        segments, table = self.cached_segments()
+        if segments is not None or table is not None:
+            on_result(self.segments())
+            return
+        revision = self.text_edit.document().revision()
+
+        def parsed(segments):
+            if self.text_edit.document().revision() != revision: return
+            self._segments = (revision, segments)
+            on_result(segments)
+        run_in_background(parse_segments, self.text_edit.toPlainText(), on_result=parsed)
+
+    def go_to_line(self, line):
+        block = self.text_edit.document().findBlockByNumber(line)
+        if not block.isValid(): return
+        self.text_edit.setTextCursor(QTextCursor(block))
+        self.text_edit.ensureCursorVisible()
+        if self.table_view_shown():
+            self.segment_table.go_to_line(line)
+            return
+        self.text_edit.setFocus()
+
+    def set_segment_table(self, table):
+        """Uses a segment table stored for the current text instead of parsing it."""
+        self._segment_table = (self.text_edit.document().revision(), table)
+
+    def view_state(self):
+        cursor = self.text_edit.textCursor()
+        return {"cursor": cursor.position(), "anchor": cursor.anchor(),
+                "scroll": self.text_edit.verticalScrollBar().value()}
+
+    def restore_view_state(self, state):
+        if not state: return
+        last = self.text_edit.document().characterCount() - 1
+        cursor = self.text_edit.textCursor()
+        cursor.setPosition(max(0, min(int(state.get("anchor", 0)), last)))
+        cursor.setPosition(max(0, min(int(state.get("cursor", 0)), last)), QTextCursor.KeepAnchor)
+        self.text_edit.setTextCursor(cursor)
+        # The scroll range is only known once laid out
+        scroll = int(state.get("scroll", 0))
+        QTimer.singleShot(0, lambda: self.text_edit.verticalScrollBar().setValue(scroll))
+
+    # --- Statistics ---
+    @property
+    def stats(self):
+        """The SegmentStats kept by track_stats(), or None while they are being built."""
+        return self._stats_tracker.value if self._stats_tracker else None
+
+    def track_stats(self):
+        """Starts keeping self.stats (a utils.segment_stats.SegmentStats) up to date.
+
+        The first build runs on a worker thread; after that each edit only
+        updates the lines it touched.
+        """
+        if self._stats_tracker is not None: return
+        self._stats_tracker = self.track_lines(stats_for_text, self.statsChanged.emit)
+
+    # --- Segment Table ---
+    def table_view_shown(self):
+        return self.segment_table is not None and self.view_stack.currentWidget() is self.segment_table
+
+    def set_table_view(self, enabled):
+        """Shows the transcript as a segment table (a widgets.segment_table.SegmentTableView)
+        instead of the text, keeping the cursor on the same line."""
+        if enabled == self.table_view_shown(): return
+        if enabled:
+            if self.segment_table is None:
+                self.segment_table = SegmentTableView(self)
+                self.segment_table.seekRequest.connect(self.jump_to_time_signal.emit)
+                self.view_stack.addWidget(self.segment_table)
+            self.segment_table.model().track()
+            self.segment_table.go_to_line(self.text_edit.textCursor().blockNumber())
+            self.view_stack.setCurrentWidget(self.segment_table)
+            self.segment_table.setFocus()
+        else:
+            line = self.segment_table.current_line()
+            self.view_stack.setCurrentWidget(self.text_edit)
+            self.segment_table.model().untrack()
+            if line is not None: self.go_to_line(line)
+            self.text_edit.setFocus()
+
+    def replace_line(self, line, text):
+        """Replaces the text of one line as a single undoable edit."""
+        block = self.text_edit.document().findBlockByNumber(line)
+        if not block.isValid() or self.text_edit.isReadOnly(): return False
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+        return True
+
+    # --- Line Tracking ---
+    def track_lines(self, build, on_changed, adopt=None):
+        """Keeps an object with replace_lines(first, removed, line_texts) in step with
+        the document's lines: build(text) makes it on a worker thread (after each
+        load), adopt(built) on the GUI thread returns the object to update."""
+        tracker = _LineTracker(build, on_changed, adopt)
+        if not self._trackers:
+            self.text_edit.document().contentsChange.connect(self._on_contents_change)
+            self._block_count = self.text_edit.document().blockCount()
+        self._trackers.append(tracker)
+        tracker.rebuild(self.text_edit.toPlainText())
+        return tracker
+
+    def untrack_lines(self, tracker):
+        tracker.stop()
+        self._trackers.remove(tracker)
+        if not self._trackers:
+            self.text_edit.document().contentsChange.disconnect(self._on_contents_change)
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        document = self.text_edit.document()
+        if position == 0 and chars_added >= document.characterCount() - 1:
+            # The whole text was replaced (a load or reload)
+            self._block_count = document.blockCount()
+            text = self.text_edit.toPlainText()
+            for tracker in self._trackers: tracker.rebuild(text)
+            return
+        with tracer.span("editor.update_lines", "editor"):
+            block = document.findBlock(position)
+            last = document.findBlock(min(position + chars_added, document.characterCount() - 1))
+            block_count = document.blockCount()
+            first = block.blockNumber()
+            removed = last.blockNumber() - first + 1 + self._block_count - block_count
+            self._block_count = block_count
+            texts = []
+            while block.isValid() and block.blockNumber() <= last.blockNumber():
+                texts.append(block.text())
+                block = block.next()
+            for tracker in self._trackers: tracker.replace_lines(first, removed, texts)
+
+    # --- External Changes ---
+    def _watch_path(self, file_path):
+        watched = self.file_watcher.files()
+        if watched: self.file_watcher.removePaths(watched)
+        self.disk_check_timer.stop()
+        self._disk_check_pending = False
+        if file_path and os.path.exists(file_path): self.file_watcher.addPath(file_path)
+
+    def _on_file_changed(self, file_path):
+        if file_path != self.current_file_path: return
+        self._disk_check_pending = True
+        self.disk_check_timer.start()    # Debounce bursts of writes
+
+    def _check_disk(self):
+        file_path = self.current_file_path
+        if not file_path: return
+        # Files replaced by rename drop out of the watcher
+        if file_path not in self.file_watcher.files():
+            if not os.path.exists(file_path):
+                log.warning("Transcript disappeared from disk: %s", file_path)
+                self._disk_check_pending = False
+                return
+            self.file_watcher.addPath(file_path)
+        if self._disk_text is None:
+            self._disk_check_pending = False
+            return
+        document = self.text_edit.document()
+        revision, modified = document.revision(), document.isModified()
+        run_in_background(compare_with_disk, file_path, self._disk_text, self.text_edit.toPlainText(), modified,
+                          on_result=lambda change: self._apply_disk_change(change, file_path, revision),
+                          on_error=lambda error: self._disk_check_failed(error, file_path))
+
+    def _disk_check_failed(self, error, file_path):
+        self._disk_check_pending = False
+        log.warning("Could not read %s after it changed on disk: %s", file_path, error)
+
+    @traced("editor.apply_disk_change")
+    def _apply_disk_change(self, change, file_path, revision):
+        if file_path != self.current_file_path: return
+        if self.text_edit.document().revision() != revision:
+            self.disk_check_timer.start()    # Edited meanwhile; diff again
+            return
+        self._disk_check_pending = False
+        if change is None: return
+        name = os.path.basename(file_path)
+        if change["merge"] is None:
+            self._patch_lines(change["reload"])
+            self.text_edit.document().setModified(False)
+            self._disk_text = change["text"]
+            log.info("Reloaded %s from disk (%d changed hunks)", file_path, len(change["reload"]))
+            self.show_save_status(f"Reloaded changes to {name} from disk.")
+            return
+
+        self.auto_save_timer.stop()    # Don't overwrite the file while the user decides
+        box = QMessageBox(QMessageBox.Question, "Transcript Changed on Disk",
+                          f"{name} was changed by another program, and you have unsaved edits.", parent=self)
+        conflicts = change["conflicts"]
+        box.setInformativeText(
+            "Merge keeps your edits and applies the changes from disk"
+            + (f" ({conflicts} conflicting place(s) keep both versions between <<<<<<< and >>>>>>> lines)."
+               if conflicts else ".")
+            + "\nReload discards your edits.\nKeep Mine ignores the changes on disk; saving will overwrite them.")
+        merge_button = box.addButton("Merge", QMessageBox.AcceptRole)
+        reload_button = box.addButton("Reload", QMessageBox.DestructiveRole)
+        box.addButton("Keep Mine", QMessageBox.RejectRole)
+        box.setDefaultButton(merge_button)
+        box.exec_()
+        clicked = box.clickedButton()
+        if self.text_edit.document().revision() != revision or file_path != self.current_file_path:
+            self.handle_modification_change(self.text_edit.document().isModified())
+            return
+        if clicked is merge_button:
+            self._patch_lines(change["merge"])
+            log.info("Merged changes to %s from disk (%d conflicts)", file_path, conflicts)
+            self.show_save_status(f"Merged changes from disk ({conflicts} conflicts)." if conflicts
+                                  else "Merged changes from disk.")
+        elif clicked is reload_button:
+            self._patch_lines(change["reload"])
+            self.text_edit.document().setModified(False)
+            log.info("Reloaded %s from disk, discarding local edits", file_path)
+        self._disk_text = change["text"]
+        self.handle_modification_change(self.text_edit.document().isModified())
+
+    def _patch_lines(self, hunks):
+        """Replaces changed lines (see utils.text_diff) in one undoable edit."""
+        if not hunks: return
+        document = self.text_edit.document()
+        scroll_value = self.text_edit.verticalScrollBar().value()
+        block_count = document.blockCount()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        for start, end, lines in reversed(hunks):   # Later hunks first, so line numbers stay valid
+            text = '\n'.join(lines)
+            if end < block_count:
+                cursor.setPosition(document.findBlockByNumber(start).position())
+                cursor.setPosition(document.findBlockByNumber(end).position(), QTextCursor.KeepAnchor)
+                cursor.insertText(text + '\n' if lines else "")
+            elif lines or start == 0:
+                if start < block_count:
+                    cursor.setPosition(document.findBlockByNumber(start).position())
+                else:
+                    cursor.setPosition(document.characterCount() - 1)
+                    text = '\n' + text
+                cursor.setPosition(document.characterCount() - 1, QTextCursor.KeepAnchor)
+                cursor.insertText(text)
+            else:
+                # Removing the last lines also removes the line break before them
+                previous = document.findBlockByNumber(start - 1)
+                cursor.setPosition(previous.position() + previous.length() - 1)
+                cursor.setPosition(document.characterCount() - 1, QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+            block_count = document.blockCount()
+        cursor.endEditBlock()
+        self.text_edit.verticalScrollBar().setValue(scroll_value)
+        self.last_timestamp_inserted = False
+
+    # --- Bulk Timestamp Edits ---
+    def retime_timestamps(self, offset_ms=0, scale=1.0, selection_only=False):
+        """Shifts and rescales every timestamp (or those in the selection).
+
+        The text is converted on a worker thread and written back as a single
+        undoable edit. Returns False if another adjustment is still running.
+        """
+        if self._retime_worker is not None: return False
+        cursor = self.text_edit.textCursor()
+        if selection_only and cursor.hasSelection():
+            start, end = cursor.selectionStart(), cursor.selectionEnd()
+            text = cursor.selection().toPlainText()
+        else:
+            start, end = 0, None
+            text = self.text_edit.toPlainText()
+            selection_only = False
+        revision = self.text_edit.document().revision()
+        self.text_edit.setReadOnly(True)
+        self.show_save_status("Adjusting timestamps...")
+        self._retime_worker = run_in_background(
+            retime_text, text, offset_ms, scale,
+            on_result=lambda result: self._apply_retime(result, start, end, revision, selection_only),
+            on_error=self._retime_failed)
+        return True
+
+    @traced("editor.apply_retime")
+    def _apply_retime(self, result, start, end, revision, selection_only):
+        self._retime_worker = None
+        self.text_edit.setReadOnly(False)
+        new_text, count, clamped = result
+        document = self.text_edit.document()
+        if document.revision() != revision:
+            QMessageBox.warning(self, "Adjust Timestamps",
+                                "The transcript changed while the timestamps were being adjusted.\n"
+                                "Nothing was changed; please run the adjustment again.")
+            self.clear_save_status()
+            return
+        if count == 0:
+            self.show_save_status("No timestamps to adjust.")
+            return
+
+        scroll_value = self.text_edit.verticalScrollBar().value()
+        position = self.text_edit.textCursor().position()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        cursor.setPosition(start)
+        cursor.setPosition(document.characterCount() - 1 if end is None else end, QTextCursor.KeepAnchor)
+        cursor.insertText(new_text)
+        cursor.endEditBlock()
+        if selection_only:
+            cursor.setPosition(start, QTextCursor.KeepAnchor)
+        else:
+            cursor.setPosition(min(position, document.characterCount() - 1))
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.verticalScrollBar().setValue(scroll_value)
+        self.last_timestamp_inserted = False
+
+        log.info("Adjusted %d timestamps (%d clamped at zero)", count, clamped)
+        self.show_save_status(f"Adjusted {count} timestamps.")
+        if clamped:
+            QMessageBox.warning(self, "Adjust Timestamps",
+                                f"{clamped} timestamp(s) would have been negative and were set to 00:00:00.000.")
+
+    def _retime_failed(self, error):
+        self._retime_worker = None
+        self.text_edit.setReadOnly(False)
+        self.clear_save_status()
+        QMessageBox.critical(self, "Adjust Timestamps", f"Could not adjust the timestamps:\n{error}")
+
+    # --- Importing Other Formats ---
+    def import_annotations(self, file_path, tier=None):
+        """Replaces the transcript with the cues of an SRT, WebVTT, TextGrid or ELAN file.
+
+        The file is parsed on a worker thread and appended in batches, with
+        the editor read-only until the import finishes. The result is an
+        unsaved transcript. Returns False if an import is already running.
+        Raises ImportFormatError for unsupported files.
+        """
+        if self._import is not None: return False
+        fmt = detect_format(file_path)
+        self.clear_editor_content()
+        self.text_edit.document().setUndoRedoEnabled(False)   # Like a load, an import can't be undone
+        self.text_edit.setReadOnly(True)
+        self.import_issues = []
+        self._import_issue_count = 0
+        self._import_lines = 0
+        batches, cancel = queue.Queue(IMPORT_QUEUE_BATCHES), threading.Event()
+        self._import = (file_path, batches, cancel)
+        self._import_started = time.perf_counter()
+        self.show_save_status(f"Importing {os.path.basename(file_path)}...")
+        run_in_background(feed_batches, file_path, batches, cancel, fmt, tier)
+        self.import_timer.start()
+        return True
+
+    def cancel_import(self):
+        if self._import is None: return
+        self._import[2].set()
+        self._finish_import(None, cancelled=True)
+
+    def _drain_import(self):
+        file_path, batches, _cancel = self._import
+        deadline = time.perf_counter() + IMPORT_TICK_BUDGET_MS / 1000
+        document = self.text_edit.document()
+        cursor = QTextCursor(document)
+        while time.perf_counter() < deadline:
+            try:
+                batch = batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None or isinstance(batch, Exception):
+                self._finish_import(batch)
+                return
+            lines, issues = batch
+            with tracer.span("editor.import_batch", "editor"):
+                if lines:
+                    cursor.movePosition(QTextCursor.End)
+                    cursor.insertText(("\n" if self._import_lines else "") + "\n".join(lines))
+            self._import_lines += len(lines)
+            self._import_issue_count += len(issues)
+            self.import_issues.extend(issues[:IMPORT_REPORTED_ISSUES - len(self.import_issues)])
+        self.show_save_status(f"Importing {os.path.basename(file_path)}... {self._import_lines} lines")
+
+    def _finish_import(self, error, cancelled=False):
+        file_path = self._import[0]
+        self._import = None
+        self.import_timer.stop()
+        self.text_edit.document().setUndoRedoEnabled(True)
+        self.text_edit.setReadOnly(False)
+        self.text_edit.moveCursor(QTextCursor.Start)
+        log.info("Imported %d lines from %s in %.1fs (%d issues%s)", self._import_lines, file_path,
+                 time.perf_counter() - self._import_started, self._import_issue_count,
+                 ", cancelled" if cancelled else "")
+        if cancelled: return
+        self.show_save_status(f"Imported {self._import_lines} lines.")
+        if error is not None:
+            QMessageBox.critical(self, "Import Annotations",
+                                 f"The import stopped after {self._import_lines} lines:\n{file_path}\n\nError: {error}")
+        elif self._import_issue_count:
+            shown = self.import_issues[:15]
+            details = "\n".join(f"line {issue.line}: {issue.message}" if issue.line else issue.message
+                                for issue in shown)
+            more = self._import_issue_count - len(shown)
+            QMessageBox.warning(self, "Import Annotations",
+                                f"Imported {self._import_lines} lines from {os.path.basename(file_path)}; "
+                                f"{self._import_issue_count} entries need attention:\n\n{details}"
+                                + (f"\n... and {more} more" if more > 0 else ""))
+            for issue in self.import_issues:
+                log.warning("%s:%d: %s", file_path, issue.line, issue.message)
+        self.importFinished.emit(file_path)
 
     def clear_editor_content(self):
         """Clears text and resets related states."""
@@ -426,8 +995,13 @@ class TextEditor(QWidget):
         self.text_edit.document().setModified(False)
         self.last_timestamp_inserted = False # Reset timestamp state too
         self.last_cursor_position = None
+        self.last_start_ms = None
+        self.snap_audit = []
+        self._segments = self._segment_table = None
+        self._disk_text = None
         # Stop auto-save timer if running
         self.handle_modification_change(False)
+        self.transcriptPathChanged.emit("")
 
 
     # --- Save/Load/Auto-Save Methods (Keep previous versions) ---
@@ -439,6 +1013,8 @@ class TextEditor(QWidget):
                  self.load_transcript_content(file_path)
              except Exception as e:
                   QMessageBox.critical(self, "Error Loading Transcript", f"Failed to load file:\n{file_path}\n\nError: {e}")
+                  return
+             self.transcriptLoaded.emit(file_path)
 
     def load_transcript_content(self, file_path):
          if not os.path.exists(file_path):
@@ -449,8 +1025,10 @@ class TextEditor(QWidget):
              self.clear_editor_content()
              self.text_edit.setPlainText(content)
              self.current_file_path = file_path
+             self._disk_text = content
              self.text_edit.document().setModified(False) # Mark as unmodified
-             print(f"Transcript loaded from: {file_path}")
+             self.transcriptPathChanged.emit(file_path)
+             log.info("Transcript loaded from: %s", file_path)
              # No need to call handle_modification_change here, done by clear_editor_content
 
 
@@ -458,7 +1036,9 @@ class TextEditor(QWidget):
         if not self.current_file_path:
             return self.save_transcript_as()
         else:
-            return self._save_to_path(self.current_file_path)
+            saved = self._save_to_path(self.current_file_path)
+            if saved: self.transcriptSaved.emit(self.current_file_path)
+            return saved
 
     def save_transcript_as(self):
         start_dir = os.path.dirname(self.current_file_path) if self.current_file_path else os.path.expanduser("~")
@@ -468,16 +1048,23 @@ class TextEditor(QWidget):
             if not new_file_path.lower().endswith(".txt"):
                  new_file_path += ".txt"
             self.current_file_path = new_file_path
-            return self._save_to_path(self.current_file_path)
+            self.transcriptPathChanged.emit(new_file_path)
+            saved = self._save_to_path(self.current_file_path)
+            if saved: self.transcriptSaved.emit(self.current_file_path)
+            return saved
         return False # User cancelled
 
+    @traced("editor.save_to_path")
     def _save_to_path(self, file_path):
         try:
             content = self.text_edit.toPlainText()
             with open(file_path, "w", encoding="utf-8") as file:
                 file.write(content)
+            if file_path == self.current_file_path:
+                self._disk_text = content
+                if file_path not in self.file_watcher.files(): self.file_watcher.addPath(file_path)
             self.text_edit.document().setModified(False)
-            print(f"Transcript saved to: {file_path}")
+            log.info("Transcript saved to: %s", file_path)
             self.show_save_status(f"Saved: {os.path.basename(file_path)}")
             # Restart auto-save timer's interval after manual save
             if self.auto_save_timer.isActive():
@@ -485,36 +1072,37 @@ class TextEditor(QWidget):
             return True
         except Exception as e:
             QMessageBox.critical(self, "Error Saving Transcript", f"Error saving transcript:\n{file_path}\n\nError: {e}")
-            print(f"Error saving transcript: {e}")
+            log.error("Error saving transcript: %s", e)
             return False
 
     def auto_save(self):
-        # Only save if path exists and modified
+        # Only save if path exists and modified, and never over changes made on disk
+        if self._disk_check_pending: return
         if self.current_file_path and self.text_edit.document().isModified():
-            print(f"Auto-saving transcript to: {self.current_file_path}")
+            log.debug("Auto-saving transcript to: %s", self.current_file_path)
             if self._save_to_path(self.current_file_path):
                  # Don't show visual status on auto-save
                  pass
             else:
-                 print("Auto-save failed.")
+                 log.warning("Auto-save failed.")
                  self.auto_save_timer.stop() # Stop trying if error
 
 
     def handle_modification_change(self, modified):
          if modified and self.current_file_path:
              if not self.auto_save_timer.isActive():
-                 print("Starting auto-save timer.")
+                 log.debug("Starting auto-save timer.")
                  self.auto_save_timer.start()
          elif not modified or not self.current_file_path:
               if self.auto_save_timer.isActive():
-                   print("Stopping auto-save timer.")
+                   log.debug("Stopping auto-save timer.")
                    self.auto_save_timer.stop()
 
 
     def stop_auto_save(self):
          if self.auto_save_timer.isActive():
              self.auto_save_timer.stop()
-             print("Auto-save timer stopped.")
+             log.debug("Auto-save timer stopped.")
 
     def show_save_status(self, message):
         self.save_status_label.setText(message)
@@ -0,0 +1,334 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy, QToolTip
+from PyQt5.QtCore import Qt, QRectF, QPointF, QSize, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QFontMetrics
+
+from utils.timestamp import format_time
+from utils.tracing import tracer, traced, CLICK_TO_FRAME
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+MIN_SPAN_MS = 1000          # Most zoomed in: one second across the whole widget
+ZOOM_STEP = 1.25            # Per wheel notch
+FOLLOW_MARGIN = 0.1         # Where the playhead lands when the view pages along
+MIN_RAW_SPAN_PX = 3         # Draw individual segments if they average at least this wide
+LOD_BASE_GAP_MS = 4         # Level k merges segments closer than LOD_BASE_GAP_MS * 4**(k-1)
+RULER_HEIGHT = 16
+LANE_HEIGHT = 18
+
+# Ruler tick steps to choose from (ms), finest first
+TICK_STEPS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 15000, 30000,
+              60000, 120000, 300000, 600000, 900000, 1800000, 3600000)
+
+
+class _SegmentSpans:
+    """Sorted segment spans with a running max of their ends for culling,
+    and coarser levels of merged spans for drawing when zoomed out."""
+
+    def __init__(self, segments):
+        ordered = sorted(segments, key=lambda segment: (segment.start_ms, segment.end_ms))
+        self.starts = [segment.start_ms for segment in ordered]
+        self.ends = [max(segment.start_ms, segment.end_ms) for segment in ordered]
+        self.lines = [segment.line for segment in ordered]
+        self.texts = [segment.text for segment in ordered]
+        # Non-decreasing, so bisect finds the first span that can reach a time
+        self.max_ends = list(accumulate(self.ends, max))
+        self.levels = []          # [(gap_ms, starts, ends)], finest first
+        starts, ends, gap = self.starts, self.ends, LOD_BASE_GAP_MS
+        while len(starts) > 1:
+            starts, ends = self._merge(starts, ends, gap)
+            self.levels.append((gap, starts, ends))
+            if len(starts) == 1: break
+            gap *= 4
+
+    def __len__(self):
+        return len(self.starts)
+
+    @staticmethod
+    def _merge(starts, ends, gap):
+        merged_starts, merged_ends = [starts[0]], [ends[0]]
+        for start, end in zip(starts, ends):
+            if start - merged_ends[-1] < gap:
+                if end > merged_ends[-1]: merged_ends[-1] = end
+            else:
+                merged_starts.append(start)
+                merged_ends.append(end)
+        return merged_starts, merged_ends
+
+    def visible(self, view_start, view_end):
+        """Index range [lo, hi) of the spans that may overlap the view."""
+        return bisect_left(self.max_ends, view_start), bisect_right(self.starts, view_end)
+
+    def level_for(self, ms_per_px):
+        """Coarsest merged level whose gaps are all under a pixel, or None."""
+        chosen = None
+        for level in self.levels:
+            if level[0] > ms_per_px: break
+            chosen = level
+        return chosen
+
+    def index_at(self, time_ms):
+        """Index of the last span starting at or before time_ms that contains it, or -1."""
+        i = bisect_right(self.starts, time_ms) - 1
+        while i >= 0 and self.max_ends[i] >= time_ms:
+            if self.ends[i] >= time_ms: return i
+            i -= 1
+        return -1
+
+
+# --- Timeline with transcript segments ---
+class SegmentTimeline(QWidget):
+    """Millisecond timeline of the media with the transcript's segments as spans.
+
+    Click or drag to seek. The mouse wheel zooms around the playhead (down
+    to MIN_SPAN_MS across the widget); Shift+wheel, a horizontal wheel or
+    dragging with the right button pans. While zoomed in, the view pages
+    along with playback. Double-clicking a span activates its transcript
+    line.
+    """
+    seekRequested = pyqtSignal(int)       # Time in ms
+    scrubStarted = pyqtSignal()
+    scrubFinished = pyqtSignal()
+    segmentActivated = pyqtSignal(int)    # Transcript line of a double-clicked span
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.duration_ms = 0
+        self.position_ms = 0
+        self.view_start_ms = 0
+        self.view_span_ms = 0             # 0: whole media
+        self._spans = _SegmentSpans([])
+        self._scrubbing = False
+        self._pan_anchor = None           # (x, view_start_ms) while panning with the right button
+        self.setMouseTracking(True)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setToolTip("Click to seek, wheel to zoom, Shift+wheel or right-drag to pan")
+        self._label_font = QFont(self.font())
+        self._label_font.setPointSizeF(max(6.0, self._label_font.pointSizeF() * 0.8))
+
+        self._colors = {
+            "background": QColor("#fafafa"), "ruler": QColor("#e4e4e4"), "tick": QColor("#8a8a8a"),
+            "span": QColor("#9ab8d8"), "span_alt": QColor("#b7cde6"), "span_lod": QColor("#8fb0d3"),
+            "span_current": QColor("#f0b060"), "border": QColor("#6f8fb2"), "text": QColor("#1f2d3d"),
+            "playhead": QColor("#d02020"), "elapsed": QColor(208, 32, 32, 28),
+        }
+
+    def sizeHint(self):
+        return QSize(400, RULER_HEIGHT + LANE_HEIGHT + 4)
+
+    def minimumSizeHint(self):
+        return QSize(100, RULER_HEIGHT + LANE_HEIGHT + 4)
+
+    # --- Model ---
+    def set_duration(self, duration_ms):
+        self.duration_ms = max(0, int(duration_ms))
+        self.view_span_ms = 0 if not self.view_span_ms else min(self.view_span_ms, self.duration_ms)
+        self._clamp_view()
+        self.update()
+
+    def set_position(self, position_ms):
+        """Moves the playhead; pages the view along if it left it."""
+        position_ms = max(0, int(position_ms))
+        if position_ms == self.position_ms: return
+        self.position_ms = position_ms
+        span = self._span()
+        if (self.view_span_ms and not self._pan_anchor
+                and not self.view_start_ms <= position_ms <= self.view_start_ms + span):
+            self.view_start_ms = position_ms - int(span * FOLLOW_MARGIN)
+            self._clamp_view()
+        self.update()
+
+    def text_at(self, time_ms):
+        """Text of the segment at time_ms, or "" between segments."""
+        i = self._spans.index_at(time_ms)
+        return self._spans.texts[i] if i >= 0 else ""
+
+    def is_scrubbing(self):
+        return self._scrubbing
+
+    def reset(self):
+        self.duration_ms = self.position_ms = self.view_start_ms = self.view_span_ms = 0
+        self.update()
+
+    @traced("timeline.set_segments")
+    def set_segments(self, segments):
+        self._spans = _SegmentSpans(segments)
+        self.update()
+
+    def zoom(self, factor, anchor_ms=None):
+        """Zooms in (factor < 1) or out, keeping anchor_ms (default the playhead) in place."""
+        if self.duration_ms <= 0 or self.width() <= 0: return
+        span = self._span()
+        new_span = int(min(self.duration_ms, max(MIN_SPAN_MS, span * factor)))
+        if anchor_ms is None:
+            anchor_ms = self.position_ms
+            if not self.view_start_ms <= anchor_ms <= self.view_start_ms + span:
+                anchor_ms = self.view_start_ms + span // 2
+        fraction = (anchor_ms - self.view_start_ms) / span if span else 0.5
+        self.view_span_ms = 0 if new_span >= self.duration_ms else new_span
+        self.view_start_ms = int(anchor_ms - fraction * self._span())
+        self._clamp_view()
+        self.update()
+
+    def pan(self, delta_ms):
+        if not self.view_span_ms: return
+        self.view_start_ms += int(delta_ms)
+        self._clamp_view()
+        self.update()
+
+    # --- Coordinates ---
+    def _span(self):
+        return self.view_span_ms or self.duration_ms
+
+    def _clamp_view(self):
+        span = self._span()
+        self.view_start_ms = max(0, min(self.view_start_ms, self.duration_ms - span))
+
+    def _ms_per_px(self):
+        return self._span() / max(1, self.width())
+
+    def time_at(self, x):
+        if self.duration_ms <= 0: return 0
+        time_ms = self.view_start_ms + x * self._ms_per_px()
+        return int(max(0, min(self.duration_ms, round(time_ms))))
+
+    def x_at(self, time_ms):
+        return (time_ms - self.view_start_ms) / self._ms_per_px()
+
+    # --- Painting ---
+    def paintEvent(self, event):
+        with tracer.span("timeline.paint", "ui"):
+            painter = QPainter(self)
+            painter.fillRect(self.rect(), self._colors["background"])
+            if self.duration_ms > 0:
+                self._paint_ruler(painter)
+                self._paint_spans(painter)
+                self._paint_playhead(painter)
+            painter.end()
+
+    def _paint_ruler(self, painter):
+        width = self.width()
+        painter.fillRect(0, 0, width, RULER_HEIGHT, self._colors["ruler"])
+        ms_per_px = self._ms_per_px()
+        # Labelled ticks at least ~90 px apart, minor ticks between them
+        step = next((s for s in TICK_STEPS if s / ms_per_px >= 90), TICK_STEPS[-1])
+        minor = next((s for s in TICK_STEPS if s / ms_per_px >= 10), step)
+        painter.setFont(self._label_font)
+        painter.setPen(self._colors["tick"])
+        view_end = self.view_start_ms + self._span()
+        first_minor = -(-self.view_start_ms // minor) * minor
+        for tick in range(first_minor, view_end + 1, minor):
+            x = int(self.x_at(tick))
+            if tick % step == 0:
+                painter.drawLine(x, RULER_HEIGHT - 7, x, RULER_HEIGHT)
+                label = self._tick_label(tick, step)
+                painter.drawText(x + 3, RULER_HEIGHT - 5, label)
+            else:
+                painter.drawLine(x, RULER_HEIGHT - 3, x, RULER_HEIGHT)
+
+    @staticmethod
+    def _tick_label(time_ms, step):
+        text = format_time(time_ms)            # HH:MM:SS.mmm
+        if step % 1000 == 0: text = text[:-4]
+        if text.startswith("00:"): text = text[3:]
+        return text
+
+    def _paint_spans(self, painter):
+        spans = self._spans
+        if not len(spans): return
+        top, height = RULER_HEIGHT + 2, LANE_HEIGHT
+        view_start, view_end = self.view_start_ms, self.view_start_ms + self._span()
+        lo, hi = spans.visible(view_start, view_end)
+        if hi <= lo: return
+        ms_per_px = self._ms_per_px()
+
+        if (hi - lo) * MIN_RAW_SPAN_PX <= self.width() or not spans.levels:
+            current = spans.index_at(self.position_ms)
+            metrics = QFontMetrics(self._label_font)
+            painter.setFont(self._label_font)
+            for i in range(lo, hi):
+                if spans.ends[i] < view_start: continue
+                x1, x2 = self.x_at(spans.starts[i]), self.x_at(spans.ends[i])
+                rect = QRectF(x1, top, max(1.0, x2 - x1), height)
+                color = ("span_current" if i == current else "span_alt" if i % 2 else "span")
+                painter.fillRect(rect, self._colors[color])
+                painter.setPen(self._colors["border"])
+                painter.drawLine(QPointF(x1, top), QPointF(x1, top + height))
+                if rect.width() > 40 and spans.texts[i]:
+                    painter.setPen(self._colors["text"])
+                    text = metrics.elidedText(spans.texts[i].strip(), Qt.ElideRight, int(rect.width()) - 6)
+                    painter.drawText(rect.adjusted(3, 0, -3, 0), Qt.AlignVCenter | Qt.AlignLeft, text)
+            return
+
+        # Zoomed out: merged spans whose gaps are below a pixel look the same
+        _gap, starts, ends = spans.level_for(ms_per_px) or (0, spans.starts, spans.ends)
+        first = bisect_left(ends, view_start)
+        last = bisect_right(starts, view_end)
+        color = self._colors["span_lod"]
+        for i in range(first, last):
+            x1, x2 = self.x_at(starts[i]), self.x_at(ends[i])
+            painter.fillRect(QRectF(x1, top, max(1.0, x2 - x1), height), color)
+
+    def _paint_playhead(self, painter):
+        x = self.x_at(self.position_ms)
+        if x > 0: painter.fillRect(QRectF(0, RULER_HEIGHT, min(x, self.width()), LANE_HEIGHT + 4),
+                                   self._colors["elapsed"])
+        if 0 <= x <= self.width():
+            painter.setPen(QPen(self._colors["playhead"], 2))
+            painter.drawLine(QPointF(x, 0), QPointF(x, self.height()))
+
+    # --- Mouse ---
+    def mousePressEvent(self, event):
+        if self.duration_ms <= 0: return
+        if event.button() == Qt.LeftButton:
+            tracer.begin_flow(CLICK_TO_FRAME)
+            self._scrubbing = True
+            self.scrubStarted.emit()
+            self._seek_to_x(event.pos().x())
+        elif event.button() == Qt.RightButton and self.view_span_ms:
+            self._pan_anchor = (event.pos().x(), self.view_start_ms)
+            self.setCursor(Qt.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._scrubbing:
+            self._seek_to_x(event.pos().x())
+        elif self._pan_anchor:
+            x, start = self._pan_anchor
+            self.view_start_ms = int(start - (event.pos().x() - x) * self._ms_per_px())
+            self._clamp_view()
+            self.update()
+        if self.duration_ms > 0:
+            QToolTip.showText(event.globalPos(), format_time(self.time_at(event.pos().x())), self)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self._scrubbing:
+            self._scrubbing = False
+            self.scrubFinished.emit()
+        elif event.button() == Qt.RightButton and self._pan_anchor:
+            self._pan_anchor = None
+            self.unsetCursor()
+
+    def mouseDoubleClickEvent(self, event):
+        if event.button() != Qt.LeftButton: return
+        i = self._spans.index_at(self.time_at(event.pos().x()))
+        if i >= 0: self.segmentActivated.emit(self._spans.lines[i])
+
+    def wheelEvent(self, event):
+        if self.duration_ms <= 0: return
+        delta = event.angleDelta()
+        if delta.x() or event.modifiers() & Qt.ShiftModifier:
+            notches = (delta.x() or delta.y()) / 120
+            self.pan(-notches * self._span() * 0.1)
+        elif delta.y():
+            self.zoom(ZOOM_STEP ** (-delta.y() / 120))
+        event.accept()
+
+    def _seek_to_x(self, x):
+        time_ms = self.time_at(x)
+        self.position_ms = time_ms
+        self.update()
+        self.seekRequested.emit(time_ms)
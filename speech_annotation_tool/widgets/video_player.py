@@ -1,82 +1,21 @@
-import sys
 import os
-import vlc
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel, QComboBox,
                              QFileDialog, QSlider, QHBoxLayout, QMessageBox, QFrame,
-                             QApplication, QStyle, QStyleOptionSlider) # Added QStyle, QStyleOptionSlider
+                             QApplication, QStackedWidget, QInputDialog, QLineEdit)
 from PyQt5.QtCore import Qt, QTimer, QSize, QUrl, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont
 
+from utils.timestamp import format_time
+from utils.player_backend import PlayerState, create_backend, backend_name_from_env, video_output_from_env
+from utils.playback_clock import playback_clock
+from utils.media_cache import is_remote
+from utils.tracing import tracer, traced, CLICK_TO_FRAME
+from utils.log import get_logger, lazy
+from .timeline import SegmentTimeline
+from .video_surface import VideoFrameWidget
 
-# Helper function (keep as is)
-def format_time(milliseconds):
-    if milliseconds < 0: milliseconds = 0
-    seconds = milliseconds // 1000
-    minutes = seconds // 60
-    hours = minutes // 60
-    ms = milliseconds % 1000
-    return f"{hours:02}:{minutes % 60:02}:{seconds % 60:02}.{ms:03}"
-
-# --- Custom Clickable Slider ---
-class ClickableSlider(QSlider):
-    """ A QSlider that allows seeking by clicking anywhere on the bar. """
-    # Signal emitting the value where the user clicked (0-1000 for timeline)
-    clickedValue = pyqtSignal(int)
-
-    def __init__(self, orientation, parent=None):
-        super().__init__(orientation, parent)
-
-    def mousePressEvent(self, event):
-        """ Handle mouse press events to allow clicking to seek. """
-        if event.button() == Qt.LeftButton:
-            # Default handling for clicking the handle
-            # super().mousePressEvent(event) # Let default handle drag start etc.
-
-            # Calculate value based on click position for setting immediately
-            # Use QStyle pixelMetric functions for accurate handle/groove geometry
-            opt = QStyleOptionSlider()
-            self.initStyleOption(opt)
-            gr = self.style().subControlRect(QStyle.CC_Slider, opt, QStyle.SC_SliderGroove, self)
-            sr = self.style().subControlRect(QStyle.CC_Slider, opt, QStyle.SC_SliderHandle, self)
-
-            if self.orientation() == Qt.Horizontal:
-                sliderLength = gr.width() # Use groove width
-                sliderPos = event.pos().x() - gr.x() # Position relative to groove start
-            else: # Vertical (not used here but for completeness)
-                sliderLength = gr.height()
-                sliderPos = event.pos().y() - gr.y()
-
-            # Calculate the value ratio
-            if sliderLength > 0:
-                 # Ensure position is within the valid range (0 to sliderLength)
-                sliderPos = max(0, min(sliderPos, sliderLength))
-                valueRatio = sliderPos / sliderLength
-            else:
-                valueRatio = 0
-
-            # For inverted sliders (not applicable here)
-            # if self.invertedAppearance(): valueRatio = 1.0 - valueRatio
-
-            newValue = self.minimum() + valueRatio * (self.maximum() - self.minimum())
-
-            # If the click is precisely on the handle, let the default QSlider behavior manage it.
-            # Otherwise, set the value and emit our custom signal.
-            # Check if click is outside the handle's clickable area
-            # handle_rect = sr.adjusted(-2, -2, 2, 2) # Add small tolerance
-            # if not handle_rect.contains(event.pos()):
-            #    self.setValue(int(newValue))
-            #    self.clickedValue.emit(int(newValue)) # Emit the calculated value
-
-            # Simpler approach: Always set value on click, let default handle dragging
-            self.setValue(int(newValue))
-            self.clickedValue.emit(int(newValue)) # Emit the value for immediate seek
-
-            # Allow default handling AFTER setting the value, enables dragging from click point
-            super().mousePressEvent(event)
+log = get_logger(__name__)
 
-        else:
-            # Handle other mouse buttons if needed
-            super().mousePressEvent(event)
 
 # --- Video Player Widget ---
 class VideoPlayer(QWidget):
@@ -86,30 +25,39 @@ class VideoPlayer(QWidget):
     SPEED_VALUES = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0]
     DEFAULT_SPEED_INDEX = SPEED_VALUES.index(1.0) # Index of 1.0x speed
 
-    def __init__(self, main_window, icon_path_func, default_icon_size=QSize(24, 24)):
+    def __init__(self, main_window, icon_path_func, default_icon_size=QSize(24, 24), player=None,
+                 backend_name=None, video_output=None):
         super().__init__()
         self.main_window = main_window
         self.get_icon_path = icon_path_func
         self.default_icon_size = default_icon_size
 
-        try:
-             vlc_args = []
-             self.instance = vlc.Instance(vlc_args)
-             self.media_player = self.instance.media_player_new()
-        except Exception as e:
-             QMessageBox.critical(self, "VLC Error", f"Failed to initialize VLC instance: {e}")
-             self.instance = None
-             self.media_player = None
-
+        # The PlayerBackend in use (see utils.player_backend); None if it failed to start
+        if player is not None:
+             self.player = player
+        else:
+             backend_name = backend_name or backend_name_from_env()
+             try:
+                  self.player = create_backend(backend_name)
+             except Exception as e:
+                  QMessageBox.critical(self, "Player Error", f"Failed to initialize the {backend_name} player: {e}")
+                  self.player = None
+
+        # "frames": Qt paints frames the backend decodes into a FramePool; "native": window embedding
+        self.video_output = self._resolve_video_output(video_output or video_output_from_env())
         self.current_video_path = None
+        self.media_cache = None         # MediaCache for remote media (set by the main window)
         self.is_muted = False
         self._last_volume_before_mute = 50
         self.seek_interval = 5000
         self.loop_interval_ms = 2000
         self.is_looping = False
+        self._engine_looping = False    # The backend loops by itself (see PlayerBackend.set_loop)
         self.loop_start_time = 0
         self.loop_end_time = 0
         self._was_playing_before_drag = False
+        self._seek_target_ms = None
+        self._players_with_listeners = set()
 
         self.timer = QTimer(self)
         self.timer.setInterval(100)
@@ -117,8 +65,9 @@ class VideoPlayer(QWidget):
 
         self._load_icons()
         self.init_ui()
-        if self.media_player:
+        if self.player:
             self.change_volume(50)
+            self._attach_player_listener(self.player)
 
 
     def _load_icons(self):
@@ -154,24 +103,22 @@ class VideoPlayer(QWidget):
         """)
 
 
-        self.video_widget = QFrame(self)
-        self.video_widget.setObjectName("videoWidget")
-        self.video_widget.setMinimumSize(320, 180)
-        layout.addWidget(self.video_widget, stretch=1)
+        # One video surface per pooled player, so a warm player keeps its last frame
+        self.video_stack = QStackedWidget(self)
+        self.video_stack.setMinimumSize(320, 180)
+        self._video_surfaces = []
+        self.video_widget = self.video_surface(0)
+        layout.addWidget(self.video_stack, stretch=1)
 
         timeline_layout = QHBoxLayout()
         timeline_layout.setSpacing(8)
-        # --- Use ClickableSlider for timeline ---
-        self.timeline_slider = ClickableSlider(Qt.Horizontal)
-        self.timeline_slider.setRange(0, 1000) # 0.0 to 1.0 position representation
-        # Connect standard signals
-        self.timeline_slider.sliderMoved.connect(self.set_position_from_slider)
-        self.timeline_slider.sliderPressed.connect(self._handle_slider_press)
-        self.timeline_slider.sliderReleased.connect(self._handle_slider_release)
-        # --- Connect custom clicked signal for immediate seek ---
-        self.timeline_slider.clickedValue.connect(self.set_position_from_slider)
-
-        timeline_layout.addWidget(self.timeline_slider)
+        # --- Millisecond timeline with the transcript's segments ---
+        self.timeline = SegmentTimeline()
+        self.timeline.seekRequested.connect(self.seek_from_timeline)
+        self.timeline.scrubStarted.connect(self._handle_slider_press)
+        self.timeline.scrubFinished.connect(self._handle_slider_release)
+
+        timeline_layout.addWidget(self.timeline)
         self.time_label = QLabel("00:00:00.000 / 00:00:00.000")
         self.time_label.setObjectName("timeLabel")
         timeline_layout.addWidget(self.time_label)
@@ -276,30 +223,30 @@ class VideoPlayer(QWidget):
     # --- Method to handle speed slider change ---
     def change_speed_from_slider(self, index):
         """Sets the playback speed based on the slider index."""
-        if not self.media_player: return
+        if not self.player: return
         try:
             # Ensure index is within bounds (should be by slider range)
             index = max(0, min(index, len(self.SPEED_VALUES) - 1))
             speed = self.SPEED_VALUES[index]
-            self.media_player.set_rate(speed)
+            self.player.set_rate(speed)
             # Update the label
             self.speed_label.setText(f"{speed:.2f}x")
-            print(f"Playback speed set to: {speed}x")
+            log.debug("Playback speed set to: %sx", speed)
         except IndexError:
-            print(f"Error: Speed slider index {index} out of bounds.")
+            log.error("Speed slider index %s out of bounds.", index)
         except Exception as e:
-             print(f"Error setting playback speed: {e}")
+             log.error("Error setting playback speed: %s", e)
 
 
     # --- Other methods remain the same ---
     # (load_video, _embed_video, _post_load_setup, toggle_play_pause, play_video, pause_video,
-    # stop_video, set_position_from_slider, set_time_ms, update_ui, change_volume,
+    # stop_video, seek_from_timeline, set_time_ms, update_ui, change_volume,
     # increase_volume_button, decrease_volume_button, toggle_mute_button, seek_forward,
     # seek_backward, set_loop_interval, toggle_loop, start_loop, _execute_start_loop,
     # stop_loop, get_current_time_ms, release_player)
 
     def _handle_slider_press(self):
-        if self.media_player and self.media_player.is_playing():
+        if self.player and self.player.is_playing():
             self._was_playing_before_drag = True
             self.pause_video(from_user=False)
         else:
@@ -310,70 +257,187 @@ class VideoPlayer(QWidget):
         # but doesn't hurt to ensure playback if it was playing before drag.
         if self._was_playing_before_drag:
             # Check state first, only play if actually paused by the drag
-            if self.media_player and not self.media_player.is_playing():
+            if self.player and not self.player.is_playing():
                 self.play_video()
         self._was_playing_before_drag = False
 
     def load_video(self):
-        start_dir = os.path.dirname(self.current_video_path) if self.current_video_path else ""
+        start_dir = (os.path.dirname(self.current_video_path)
+                     if self.current_video_path and not is_remote(self.current_video_path) else "")
         file_path, _ = QFileDialog.getOpenFileName(self, "Load Video", start_dir, "Video Files (*.mp4 *.avi *.mkv *.mov *.wmv *.flv *.webm)")
         if file_path:
              self.load_video_internal(file_path)
 
-    def load_video_internal(self, file_path, initial_position=0):
-        if not self.instance or not self.media_player:
-             QMessageBox.critical(self, "Error", "VLC components not initialized.")
+    def load_video_url(self):
+        current = self.current_video_path if is_remote(self.current_video_path) else ""
+        url, ok = QInputDialog.getText(self, "Open Video URL",
+                                       "HTTP(S) URL or network share path of the video:",
+                                       QLineEdit.Normal, current)
+        url = url.strip()
+        if not ok or not url: return
+        if not is_remote(url):
+            QMessageBox.warning(self, "Open Video URL",
+                                "Enter an http:// or https:// URL, or a \\\\server\\share path.")
+            return
+        self.load_video_internal(url)
+
+    def load_video_internal(self, file_path, initial_position=0, known_length_ms=0):
+        """Loads a video; known_length_ms (e.g. from a project file) saves waiting for the probe."""
+        if not self.player:
+             QMessageBox.critical(self, "Error", "Media player not initialized.")
              return
         try:
-            current_state = self.media_player.get_state()
-            if current_state != vlc.State.NothingSpecial and current_state != vlc.State.Stopped and current_state != vlc.State.Error:
-                self.media_player.stop()
-
-            media = self.instance.media_new(file_path)
-            if not media: raise RuntimeError("Failed to create VLC media object.")
-            media.parse_async()
-            self.media_player.set_media(media)
-            media.release()
+            with tracer.span("player.load_media", "backend"):
+                self.player.load(self.media_url(file_path))
             self.current_video_path = file_path
 
             self._embed_video()
-            print(f"Video loaded: {file_path}")
-            QTimer.singleShot(300, lambda: self._post_load_setup(initial_position))
+            log.info("Video loaded: %s", file_path)
+            # Skip the deferred setup if a tab switch replaced the player meanwhile
+            QTimer.singleShot(300, lambda player=self.player:
+                              self._post_load_setup(initial_position, known_length_ms)
+                              if player is self.player else None)
 
         except Exception as e:
             error_message = f"Could not load video file:\n{file_path}\n\nError details: {e}"
             QMessageBox.critical(self, "Error Loading Video", error_message)
-            print(f"Error loading video: {e}")
+            log.exception("Error loading video: %s", e)
             self.current_video_path = None
             self.time_label.setText("00:00:00.000 / 00:00:00.000")
-            self.timeline_slider.setValue(0)
+            self.timeline.reset()
+
+    def media_url(self, file_path):
+        """What to hand the backend for a media path: remote media goes through the cache."""
+        if self.media_cache is not None and is_remote(file_path):
+            return self.media_cache.local_url(file_path)
+        return file_path
+
+    def prefetch_times(self, times_ms):
+        """Caches the current remote media around these times (e.g. segment starts)."""
+        path = self.current_video_path
+        if self.media_cache is None or not is_remote(path) or not self.player: return
+        self.media_cache.prefetch_times(path, times_ms, self.player.get_length())
+
+    def _resolve_video_output(self, requested):
+        # Frames are opt-in until libvlc's video callbacks have had more use; "auto" means a window
+        if not self.player or not self.player.video_frames or requested != "frames": return "native"
+        return "frames"
+
+    def surface_count(self):
+        return len(self._video_surfaces)
+
+    def video_surface(self, slot):
+        """Returns the video frame for a player slot, creating it on first use."""
+        while len(self._video_surfaces) <= slot:
+            if self.video_output == "frames":
+                surface = VideoFrameWidget(self.video_stack)
+            else:
+                surface = QFrame(self.video_stack)
+                surface.setObjectName("videoWidget")
+            self.video_stack.addWidget(surface)
+            self._video_surfaces.append(surface)
+        return self._video_surfaces[slot]
+
+    def activate_player(self, player, slot=0, video_path=None):
+        """Points the controls at another player backend without reloading it.
+
+        Used when switching session tabs; the player may already be loaded
+        and paused (warm) or empty.
+        """
+        if self.timer.isActive(): self.timer.stop()
+        self.player = player
+        self._engine_looping = False    # Restored with the session's loop state
+        self.video_widget = self.video_surface(slot)
+        self.video_stack.setCurrentWidget(self.video_widget)
+        self.current_video_path = video_path
+        self.play_pause_button.setIcon(self.play_icon)
+        self.play_pause_button.setToolTip("Play (Ctrl+Space)")
+        self.time_label.setText("00:00:00.000 / 00:00:00.000")
+        self.timeline.reset()
+        if not self.player: return
+        self._attach_player_listener(self.player)
+        self._embed_video()
+        # Carry the current speed and volume over to this player
+        self.change_speed_from_slider(self.speed_slider.value())
+        self.player.set_mute(self.is_muted)
+        if not self.is_muted: self.player.set_volume(self.volume_slider.value())
+        self.update_ui()
+        if self.player.is_playing(): self.timer.start()
+
+    def get_loop_state(self):
+        return {"interval_ms": self.loop_interval_ms, "is_looping": self.is_looping,
+                "start_ms": self.loop_start_time, "end_ms": self.loop_end_time}
+
+    def restore_loop_state(self, state):
+        """Restores loop settings saved by get_loop_state (None resets looping)."""
+        if not state:
+            self.is_looping = False
+            self._engine_looping = False
+            return
+        self.set_loop_interval(state["interval_ms"])
+        self.is_looping = state["is_looping"]
+        self.loop_start_time = state["start_ms"]
+        self.loop_end_time = state["end_ms"]
+        self._engine_looping = bool(self.is_looping and self.player
+                                    and self.player.set_loop(self.loop_start_time, self.loop_end_time))
+
+    def _attach_player_listener(self, player):
+        """Listens for engine time changes, used to time seeks when tracing."""
+        if id(player) in self._players_with_listeners: return
+        try:
+            player.add_time_listener(self._on_player_time_changed)
+            self._players_with_listeners.add(id(player))
+        except Exception as e:
+            log.warning("Could not attach player time listener: %s", e)
+
+    def _on_player_time_changed(self, time_ms):
+        # May run on an engine thread; only touches the (thread-safe) tracer
+        target = self._seek_target_ms
+        if target is not None and tracer.flow_pending(CLICK_TO_FRAME):
+            if abs(time_ms - target) < 1000:
+                self._seek_target_ms = None
+                tracer.end_flow(CLICK_TO_FRAME, {"target_ms": target})
 
     def _embed_video(self):
-         if not self.media_player: return
-         widget_id = int(self.video_widget.winId())
-         if sys.platform.startswith("linux"): self.media_player.set_xwindow(widget_id)
-         elif sys.platform == "win32": self.media_player.set_hwnd(widget_id)
-         elif sys.platform == "darwin":
-             try: self.media_player.set_nsobject(widget_id)
-             except Exception as e_mac: print(f"macOS Warning: {e_mac}")
-
-    def _post_load_setup(self, initial_position):
-        if not self.media_player or not self.media_player.get_media(): return
-
-        media_duration = self.media_player.get_length()
+         if not self.player: return
+         self.attach_surface(self.player, self.video_widget)
+
+    def attach_surface(self, player, surface):
+        """Points a player's video output at a surface: its frame pool, or its native window."""
+        if isinstance(surface, VideoFrameWidget):
+            if player.set_video_frame_pool(surface.pool): return
+            log.warning("The %s player can't render into frames; embedding a window instead", player.name)
+        player.set_video_window(int(surface.winId()))
+
+    def _update_overlays(self, current_time):
+        """Caption of the segment under the playhead and the loop indicator (frame rendering only)."""
+        surface = self.video_widget
+        if not isinstance(surface, VideoFrameWidget): return
+        surface.set_caption(self.timeline.text_at(current_time).strip())
+        surface.set_looping(self.is_looping)
+
+    def _post_load_setup(self, initial_position, known_length_ms=0):
+        if not self.player or not self.player.has_media(): return
+
+        media_duration = self.player.get_length()
+        if media_duration <= 0 and known_length_ms > 0:
+            log.debug("Using the stored media length while libvlc is still parsing")
+            media_duration = known_length_ms
         retry = 0
         while media_duration <= 0 and retry < 5:
-             print(f"Waiting for media duration... Retry {retry+1}")
+             log.debug("Waiting for media duration... Retry %d", retry + 1)
              QApplication.processEvents()
              QTimer.singleShot(150 * (retry + 1), lambda: None) # Non-blocking wait
              QApplication.processEvents() # Process after wait
-             media_duration = self.media_player.get_length()
+             media_duration = self.player.get_length()
              retry += 1
 
         if media_duration <= 0:
-             print("Warning: Could not determine video duration.")
+             log.warning("Could not determine video duration.")
              media_duration = 0
 
+        self.timeline.reset()
+        self.timeline.set_duration(media_duration)
         self.videoLoaded.emit(media_duration)
         self.time_label.setText(f"00:00:00.000 / {format_time(media_duration)}")
 
@@ -387,16 +451,16 @@ class VideoPlayer(QWidget):
 
 
     def toggle_play_pause(self):
-        if not self.media_player or not self.media_player.get_media(): return
+        if not self.player or not self.player.has_media(): return
         if self.is_looping: self.stop_loop()
-        if self.media_player.is_playing():
+        if self.player.is_playing():
             self.pause_video()
         else:
-            state = self.media_player.get_state()
-            if state == vlc.State.Ended or state == vlc.State.Stopped:
+            state = self.player.get_state()
+            if state == PlayerState.ENDED or state == PlayerState.STOPPED:
                  pos_to_resume = self.get_current_time_ms()
                  # Restart from 0 if stopped or at the very end
-                 if state == vlc.State.Stopped or pos_to_resume <= 0 or pos_to_resume >= self.media_player.get_length() - 50: # Threshold for end
+                 if state == PlayerState.STOPPED or pos_to_resume <= 0 or pos_to_resume >= self.player.get_length() - 50: # Threshold for end
                      self.set_time_ms(0)
                  else:
                      self.set_time_ms(pos_to_resume) # Resume from last spot otherwise
@@ -406,24 +470,26 @@ class VideoPlayer(QWidget):
 
 
     def play_video(self):
-        if not self.media_player or not self.media_player.get_media(): return
-        if self.media_player.play() == -1: return
+        if not self.player or not self.player.has_media(): return
+        with tracer.span("player.play", "backend"):
+            if not self.player.play(): return
         if not self.timer.isActive(): self.timer.start()
         self.play_pause_button.setIcon(self.pause_icon)
         self.play_pause_button.setToolTip("Pause (Ctrl+Space)")
 
     def pause_video(self, from_user=True):
-        if not self.media_player or not self.media_player.get_media(): return
-        if self.media_player.is_playing(): self.media_player.pause()
+        if not self.player or not self.player.has_media(): return
+        with tracer.span("player.pause", "backend"):
+            self.player.pause()
         self.play_pause_button.setIcon(self.play_icon)
         self.play_pause_button.setToolTip("Play (Ctrl+Space)")
         if self.is_looping and from_user: self.stop_loop()
 
 
     def stop_video(self):
-        if not self.media_player: return
-        if self.media_player.get_state() != vlc.State.Stopped: self.media_player.stop()
-        self.timeline_slider.setValue(0)
+        if not self.player: return
+        self.player.stop()
+        self.timeline.set_position(0)
         self.time_label.setText("00:00:00.000 / 00:00:00.000")
         if self.timer.isActive(): self.timer.stop()
         self.play_pause_button.setIcon(self.play_icon)
@@ -431,80 +497,85 @@ class VideoPlayer(QWidget):
         if self.is_looping: self.stop_loop()
 
 
-    def set_position_from_slider(self, value):
-        # Handles both drag move and click (via clickedValue signal)
-        if self.media_player and self.media_player.get_media() and self.media_player.is_seekable():
-            position = value / 1000.0
-            self.media_player.set_position(position)
+    def seek_from_timeline(self, time_ms):
+        # Handles both drag move and click on the timeline
+        if self.player and self.player.has_media() and self.player.is_seekable():
+            with tracer.span("player.set_time", "backend"):
+                self.player.set_time(time_ms)
+            playback_clock(self.player).resync(time_ms)
+            if tracer.enabled: self._seek_target_ms = time_ms
             # Update time label immediately
-            current_time = self.media_player.get_time()
-            media_length = self.media_player.get_length()
+            media_length = self.player.get_length()
             if media_length > 0:
-                 self.time_label.setText(f"{format_time(current_time)} / {format_time(media_length)}")
+                 self.time_label.setText(f"{format_time(time_ms)} / {format_time(media_length)}")
 
 
     def set_time_ms(self, time_ms):
-         if not self.media_player or not self.media_player.get_media(): return
-         if self.media_player.is_seekable():
-             duration = self.media_player.get_length()
+         if not self.player or not self.player.has_media(): return
+         if self.player.is_seekable():
+             duration = self.player.get_length()
              if duration <= 0: return
              time_ms = max(0, min(time_ms, duration))
-             print(f"Seeking to time: {format_time(time_ms)}")
-             self.media_player.set_time(time_ms)
+             log.debug("Seeking to time: %s", lazy(format_time, time_ms))
+             if tracer.enabled: self._seek_target_ms = time_ms
+             with tracer.span("player.set_time", "backend"):
+                 self.player.set_time(time_ms)
+             playback_clock(self.player).resync(time_ms)
              QTimer.singleShot(50, self.update_ui)
 
 
+    @traced("player.update_ui")
     def update_ui(self):
-        if not self.media_player or not self.media_player.get_media(): return
+        if not self.player or not self.player.has_media(): return
 
-        media_length = self.media_player.get_length()
+        media_length = self.player.get_length()
         current_time = self.get_current_time_ms()
+        tracer.counter("player.time_ms", current_time)
 
         if media_length <= 0 or current_time < 0:
-             state = self.media_player.get_state() if self.media_player else vlc.State.Error
-             if state in [vlc.State.Stopped, vlc.State.Error, vlc.State.NothingSpecial]:
+             state = self.player.get_state()
+             if state in [PlayerState.STOPPED, PlayerState.ERROR, PlayerState.NOTHING]:
                  if self.time_label.text() != "00:00:00.000 / 00:00:00.000":
                      self.time_label.setText("00:00:00.000 / 00:00:00.000")
-                     self.timeline_slider.setValue(0)
+                     self.timeline.set_position(0)
              return
 
-        if self.is_looping and self.media_player.is_playing():
+        if self.is_looping and not self._engine_looping and self.player.is_playing():
             if current_time >= (self.loop_end_time - 30):
-                print(f"Looping back from {format_time(current_time)} to {format_time(self.loop_start_time)}")
+                log.debug("Looping back from %s to %s", lazy(format_time, current_time), lazy(format_time, self.loop_start_time))
                 self.set_time_ms(self.loop_start_time)
                 return
 
-        if not self.timeline_slider.isSliderDown():
-             position_ratio = float(current_time) / media_length
-             self.timeline_slider.blockSignals(True)
-             self.timeline_slider.setValue(int(position_ratio * 1000))
-             self.timeline_slider.blockSignals(False)
+        if not self.timeline.is_scrubbing():
+             if self.timeline.duration_ms != media_length: self.timeline.set_duration(media_length)
+             self.timeline.set_position(current_time)
 
         self.time_label.setText(f"{format_time(current_time)} / {format_time(media_length)}")
+        self._update_overlays(current_time)
 
-        current_state = self.media_player.get_state()
-        if current_state == vlc.State.Ended:
-             print("Video ended.")
+        current_state = self.player.get_state()
+        if current_state == PlayerState.ENDED:
+             log.info("Video ended.")
              self.stop_video()
-        elif current_state == vlc.State.Error:
-             print("VLC Player Error state detected.")
+        elif current_state == PlayerState.ERROR:
+             log.error("Player error state detected.")
              self.stop_video()
              QMessageBox.warning(self, "Playback Error", "An error occurred during playback.")
-        elif current_state == vlc.State.Paused:
+        elif current_state == PlayerState.PAUSED:
              if self.play_pause_button.icon().cacheKey() != self.play_icon.cacheKey():
                  self.play_pause_button.setIcon(self.play_icon)
                  self.play_pause_button.setToolTip("Play (Ctrl+Space)")
-        elif current_state == vlc.State.Playing:
+        elif current_state == PlayerState.PLAYING:
              if self.play_pause_button.icon().cacheKey() != self.pause_icon.cacheKey():
                   self.play_pause_button.setIcon(self.pause_icon)
                   self.play_pause_button.setToolTip("Pause (Ctrl+Space)")
 
 
     def change_volume(self, value):
-        if not self.media_player: return
+        if not self.player: return
         value = max(0, min(100, value))
         if not self.is_muted and value > 0: self._last_volume_before_mute = value
-        self.media_player.audio_set_volume(value)
+        self.player.set_volume(value)
         if self.volume_slider.value() != value:
              self.volume_slider.blockSignals(True); self.volume_slider.setValue(value); self.volume_slider.blockSignals(False)
         # Update mute button visually based on volume only
@@ -533,8 +604,8 @@ class VideoPlayer(QWidget):
 
     def toggle_mute_button(self, checked):
         self.is_muted = checked
-        if not self.media_player: return
-        self.media_player.audio_set_mute(self.is_muted)
+        if not self.player: return
+        self.player.set_mute(self.is_muted)
         if self.is_muted:
             self.mute_button.setIcon(self.mute_icon); self.mute_button.setToolTip("Unmute")
             current_vol = self.volume_slider.value()
@@ -547,23 +618,23 @@ class VideoPlayer(QWidget):
 
 
     def seek_forward(self):
-        if not self.media_player or not self.media_player.get_media() or not self.media_player.is_seekable(): return
+        if not self.player or not self.player.has_media() or not self.player.is_seekable(): return
         if self.is_looping: self.stop_loop()
         current_time = self.get_current_time_ms()
         if current_time < 0: return
-        media_length = self.media_player.get_length()
+        media_length = self.player.get_length()
         new_time = min(current_time + self.seek_interval, media_length)
         self.set_time_ms(new_time)
-        print(f"Seek Forward: to {format_time(new_time)}")
+        log.debug("Seek Forward: to %s", lazy(format_time, new_time))
 
     def seek_backward(self):
-        if not self.media_player or not self.media_player.get_media() or not self.media_player.is_seekable(): return
+        if not self.player or not self.player.has_media() or not self.player.is_seekable(): return
         if self.is_looping: self.stop_loop()
         current_time = self.get_current_time_ms()
         if current_time < 0: return
         new_time = max(0, current_time - self.seek_interval)
         self.set_time_ms(new_time)
-        print(f"Seek Backward: to {format_time(new_time)}")
+        log.debug("Seek Backward: to %s", lazy(format_time, new_time))
 
 
     def set_loop_interval(self, interval_ms):
@@ -574,70 +645,63 @@ class VideoPlayer(QWidget):
          else: self.start_loop()
 
     def start_loop(self):
-         if not self.media_player or not self.media_player.get_media(): return
-         if not self.media_player.is_playing():
+         if not self.player or not self.player.has_media(): return
+         if not self.player.is_playing():
              current_time = self.get_current_time_ms()
              if current_time < 0: return
              self.loop_end_time = current_time
              self.loop_start_time = max(0, current_time - self.loop_interval_ms)
              if self.loop_start_time >= self.loop_end_time: return
              self.is_looping = True
+             self._engine_looping = self.player.set_loop(self.loop_start_time, self.loop_end_time)
              self.set_time_ms(self.loop_start_time)
              if not self.timer.isActive(): self.timer.start()
-             print(f"Loop region set (paused): {format_time(self.loop_start_time)} -> {format_time(self.loop_end_time)}")
+             log.info("Loop region set (paused): %s -> %s", lazy(format_time, self.loop_start_time), lazy(format_time, self.loop_end_time))
          else:
              self._execute_start_loop()
 
     def _execute_start_loop(self):
-        if not self.media_player or not self.media_player.get_media(): return
+        if not self.player or not self.player.has_media(): return
         current_time = self.get_current_time_ms()
         if current_time < 0: return
         self.loop_end_time = current_time
         self.loop_start_time = max(0, current_time - self.loop_interval_ms)
         if self.loop_start_time >= self.loop_end_time: return
         self.is_looping = True
+        self._engine_looping = self.player.set_loop(self.loop_start_time, self.loop_end_time)
         self.set_time_ms(self.loop_start_time)
         if not self.timer.isActive(): self.timer.start()
-        QTimer.singleShot(100, lambda: self.media_player.play() if self.is_looping and self.media_player else None)
-        print(f"Looping started: {format_time(self.loop_start_time)} -> {format_time(self.loop_end_time)}")
+        QTimer.singleShot(100, lambda: self.player.play() if self.is_looping and self.player else None)
+        log.info("Looping started: %s -> %s", lazy(format_time, self.loop_start_time), lazy(format_time, self.loop_end_time))
 
     def stop_loop(self):
          if self.is_looping:
              self.is_looping = False
-             print("Looping stopped.")
+             if self._engine_looping and self.player: self.player.clear_loop()
+             self._engine_looping = False
+             log.info("Looping stopped.")
 
     def get_current_time_ms(self):
-        if self.media_player and self.media_player.get_media():
-            time_ms = self.media_player.get_time()
+        """Interpolated playback time (see utils.playback_clock), or -1."""
+        if self.player and self.player.has_media():
+            time_ms = playback_clock(self.player).time_ms()
             if time_ms == -1:
-                 state = self.media_player.get_state()
+                 state = self.player.get_state()
                  # Only treat -1 as error if state isn't expected (like Stopped)
-                 if state not in [vlc.State.Stopped, vlc.State.NothingSpecial, vlc.State.Ended]:
-                    print(f"Warning: get_time() returned -1 (State: {state})")
+                 if state not in [PlayerState.STOPPED, PlayerState.NOTHING, PlayerState.ENDED]:
+                    log.debug("get_time() returned -1 (State: %s)", state)
                  return -1 # Return -1 consistently on error/invalid
             return time_ms
         return -1
 
     def release_player(self):
-        """Release VLC resources."""
-        print("Attempting to release VLC player...")
+        """Release the player backend (and its engine, once no other player uses it)."""
+        log.debug("Attempting to release player...")
         if self.timer.isActive(): self.timer.stop()
-        if hasattr(self, 'media_player') and self.media_player:
-            try:
-                if self.media_player.is_playing() or self.media_player.get_state() == vlc.State.Paused:
-                    self.media_player.stop()
-                # Detach media first? May not be necessary with instance release.
-                # self.media_player.set_media(None)
-                self.media_player.release()
-                self.media_player = None
-                print("Media player released.")
-            except Exception as e:
-                print(f"Error releasing media player: {e}")
-
-        if hasattr(self, 'instance') and self.instance:
+        if self.player:
             try:
-                self.instance.release()
-                self.instance = None
-                print("VLC instance released.")
+                self.player.release()
+                self.player = None
+                log.info("Player released.")
             except Exception as e:
-                print(f"Error releasing VLC instance: {e}")
\ No newline at end of file
+                log.error("Error releasing player: %s", e)
\ No newline at end of file
@@ -0,0 +1,102 @@
+from PyQt5 import sip
+from PyQt5.QtWidgets import QFrame
+from PyQt5.QtCore import Qt, QRectF, pyqtSignal
+from PyQt5.QtGui import QPainter, QImage, QColor, QFont, QFontMetrics
+
+from utils.frame_pool import FramePool
+from utils.tracing import tracer
+
+CAPTION_MARGIN = 8
+
+
+# --- Video surface painted by Qt (callback rendering) ---
+class VideoFrameWidget(QFrame):
+    """Paints frames that a player backend decodes into this widget's FramePool.
+
+    The frames are wrapped in QImages over the pool's memory (no copy) and
+    drawn with the caption of the current segment and a loop indicator on
+    top, which native window embedding can't overlay.
+    """
+    frameReady = pyqtSignal()             # Emitted on the decoder thread
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("videoWidget")
+        self.pool = FramePool(on_frame=self.frameReady.emit)
+        self.frameReady.connect(self.update)        # Queued: arrives on the GUI thread
+        self._frame = None
+        self._images = {}                 # (generation, index) -> QImage over the frame's buffer
+        self.caption = ""
+        self.looping = False
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self._caption_font = QFont(self.font())
+        self._caption_font.setPointSizeF(self._caption_font.pointSizeF() * 1.3)
+
+    # --- Overlays ---
+    def set_caption(self, text):
+        if text == self.caption: return
+        self.caption = text
+        self.update()
+
+    def set_looping(self, looping):
+        if looping == self.looping: return
+        self.looping = looping
+        self.update()
+
+    def frame_stats(self):
+        return self.pool.stats()
+
+    # --- Painting ---
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        ratio = self.devicePixelRatioF()
+        self.pool.target_size = (int(self.width() * ratio), int(self.height() * ratio))
+
+    def _image(self, frame):
+        key = (frame.generation, frame.index)
+        image = self._images.get(key)
+        if image is None:
+            if any(generation != frame.generation for generation, _index in self._images): self._images.clear()
+            image = QImage(sip.voidptr(frame.address), frame.width, frame.height, frame.pitch,
+                           QImage.Format_RGB32)
+            self._images[key] = image
+        return image
+
+    def paintEvent(self, event):
+        frame = self.pool.take()
+        if frame is not None: self._frame = frame
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._frame is not None:
+            image = self._image(self._frame)
+            ratio = self.devicePixelRatioF()
+            # Frames are decoded at the widget's size, so this only scales right after a resize
+            scale = min(self.width() * ratio / image.width(), self.height() * ratio / image.height())
+            width, height = image.width() * scale / ratio, image.height() * scale / ratio
+            target = QRectF((self.width() - width) / 2, (self.height() - height) / 2, width, height)
+            if abs(scale - 1.0) > 0.01: painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(target, image)
+        self._paint_overlays(painter)
+        painter.end()
+        if frame is not None and tracer.enabled:
+            tracer.counter("video.frames", self.pool.stats())
+
+    def _paint_overlays(self, painter):
+        if self.caption:
+            painter.setFont(self._caption_font)
+            metrics = QFontMetrics(self._caption_font)
+            width = self.width() - 4 * CAPTION_MARGIN
+            text_rect = metrics.boundingRect(0, 0, width, self.height() // 3,
+                                             Qt.AlignHCenter | Qt.TextWordWrap, self.caption)
+            box = QRectF((self.width() - text_rect.width()) / 2 - CAPTION_MARGIN,
+                         self.height() - text_rect.height() - 3 * CAPTION_MARGIN,
+                         text_rect.width() + 2 * CAPTION_MARGIN, text_rect.height() + CAPTION_MARGIN)
+            painter.fillRect(box, QColor(0, 0, 0, 160))
+            painter.setPen(Qt.white)
+            painter.drawText(box, Qt.AlignCenter | Qt.TextWordWrap, self.caption)
+        if self.looping:
+            painter.setFont(self.font())
+            box = QRectF(self.width() - 70, CAPTION_MARGIN, 62, QFontMetrics(self.font()).height() + 6)
+            painter.fillRect(box, QColor(208, 32, 32, 200))
+            painter.setPen(Qt.white)
+            painter.drawText(box, Qt.AlignCenter, "LOOP")